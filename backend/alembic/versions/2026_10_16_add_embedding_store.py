@@ -0,0 +1,33 @@
+"""Add embedding_store table for content-addressed embeddings.
+
+Revision ID: 20261016_embedding_store
+Revises: 20261016_llm_response_cache
+Create Date: 2026-10-16 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261016_embedding_store"
+down_revision = "20261016_llm_response_cache"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    sql = """
+CREATE TABLE IF NOT EXISTS embedding_store (
+  model VARCHAR(255) NOT NULL,
+  content_hash VARCHAR(64) NOT NULL,
+  dimension INTEGER NOT NULL,
+  vector BYTEA NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (model, content_hash, dimension)
+);
+"""
+    op.execute(sql)
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS embedding_store;")
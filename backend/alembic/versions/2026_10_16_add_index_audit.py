@@ -0,0 +1,122 @@
+"""Drop redundant indexes and add composite/partial indexes for hot queries.
+
+Redundant indexes (each one is maintained on every insert):
+- execution_traces / workflow_events / queue_tasks: `ix_*` single-column
+  indexes created from `index=True` next to the explicit `idx_*` index on
+  the same column (databases built with create_all), and the
+  low-cardinality trace status index;
+- workflow_events: single-column indexes on event_type and stage (leading
+  columns of idx_workflow_events_type_source / _stage_status), on
+  event_source, status, component_role and decision_source (low cardinality,
+  never filtered alone), and on workflow_id (leading column of the new
+  (workflow_id, timestamp) index);
+- queue_tasks: queue_id and priority (covered by the new dequeue indexes);
+- chat_messages.session_id and agent_memories.agent_id (leading columns of
+  the new composite indexes).
+Foreign key indexes that ON DELETE SET NULL / CASCADE rely on are kept.
+
+New indexes follow the query shapes:
+- queue_tasks (queue_id, status, priority) for per-queue listings and
+  counts, and a partial (queue_id, priority DESC, created_at) over
+  pending/queued tasks for TaskQueueManager.get_next_task;
+- workflow_events (workflow_id, timestamp) for a workflow's event history;
+- agent_memories (agent_id, expires_at, importance) for search_memories,
+  and a partial (agent_id, importance DESC) over non-expiring memories;
+- chat_messages (session_id, sequence) for message order and the next
+  sequence number;
+- execution_traces (start_time) WHERE status = 'error' for error rates.
+
+Check usage afterwards with scripts/index_usage.py.
+
+Revision ID: 20261016_index_audit
+Revises: 20261016_memory_full_text_search
+Create Date: 2026-10-16 00:00:00.000000
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261016_index_audit"
+down_revision = "20261016_memory_full_text_search"
+branch_labels = None
+depends_on = None
+
+# name -> definition
+REDUNDANT_INDEXES = {
+    "ix_execution_traces_trace_id": "execution_traces (trace_id)",
+    "ix_execution_traces_task_id": "execution_traces (task_id)",
+    "ix_execution_traces_plan_id": "execution_traces (plan_id)",
+    "ix_execution_traces_span_id": "execution_traces (span_id)",
+    "ix_execution_traces_parent_span_id": "execution_traces (parent_span_id)",
+    "ix_execution_traces_start_time": "execution_traces (start_time)",
+    "ix_execution_traces_status": "execution_traces (status)",
+    "ix_execution_traces_agent_id": "execution_traces (agent_id)",
+    "ix_execution_traces_tool_id": "execution_traces (tool_id)",
+    "idx_traces_status": "execution_traces (status)",
+    "ix_workflow_events_workflow_id": "workflow_events (workflow_id)",
+    "ix_workflow_events_timestamp": "workflow_events (timestamp)",
+    "ix_workflow_events_task_id": "workflow_events (task_id)",
+    "ix_workflow_events_trace_id": "workflow_events (trace_id)",
+    "ix_workflow_events_session_id": "workflow_events (session_id)",
+    "ix_workflow_events_event_type": "workflow_events (event_type)",
+    "ix_workflow_events_event_source": "workflow_events (event_source)",
+    "ix_workflow_events_stage": "workflow_events (stage)",
+    "ix_workflow_events_status": "workflow_events (status)",
+    "ix_workflow_events_component_role": "workflow_events (component_role)",
+    "ix_workflow_events_decision_source": "workflow_events (decision_source)",
+    "idx_workflow_events_workflow_id": "workflow_events (workflow_id)",
+    "ix_queue_tasks_queue_id": "queue_tasks (queue_id)",
+    "ix_queue_tasks_status": "queue_tasks (status)",
+    "ix_queue_tasks_priority": "queue_tasks (priority)",
+    "ix_queue_tasks_task_type": "queue_tasks (task_type)",
+    "ix_queue_tasks_next_retry_at": "queue_tasks (next_retry_at)",
+    "ix_queue_tasks_assigned_worker": "queue_tasks (assigned_worker)",
+    "ix_queue_tasks_created_at": "queue_tasks (created_at)",
+    "idx_queue_tasks_queue": "queue_tasks (queue_id)",
+    "idx_queue_tasks_priority": "queue_tasks (priority)",
+    "ix_chat_messages_session_id": "chat_messages (session_id)",
+    "ix_agent_memories_agent_id": "agent_memories (agent_id)",
+}
+
+NEW_INDEXES = {
+    "idx_queue_tasks_queue_status_priority": "queue_tasks (queue_id, status, priority)",
+    "idx_queue_tasks_dequeue": (
+        "queue_tasks (queue_id, priority DESC, created_at) WHERE status IN ('pending', 'queued')"
+    ),
+    "idx_workflow_events_workflow_timestamp": "workflow_events (workflow_id, timestamp)",
+    "idx_agent_memories_agent_expires_importance": "agent_memories (agent_id, expires_at, importance)",
+    "idx_agent_memories_agent_importance_unexpiring": (
+        "agent_memories (agent_id, importance DESC) WHERE expires_at IS NULL"
+    ),
+    "idx_chat_messages_session_sequence": "chat_messages (session_id, sequence)",
+    "idx_traces_errors_start_time": "execution_traces (start_time) WHERE status = 'error'",
+}
+
+# Created only by create_all, not by earlier migrations (not restored on downgrade)
+CREATE_ALL_ONLY = {
+    name for name in REDUNDANT_INDEXES
+    if name.startswith(("ix_execution_traces_", "ix_queue_tasks_"))
+} | {
+    "ix_workflow_events_workflow_id",
+    "ix_workflow_events_timestamp",
+    "ix_workflow_events_task_id",
+    "ix_workflow_events_trace_id",
+    "ix_workflow_events_session_id",
+}
+
+
+def upgrade():
+    # Create the replacements first so the hot queries always have an index
+    for name, definition in NEW_INDEXES.items():
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition};")
+    for name in REDUNDANT_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name};")
+
+
+def downgrade():
+    for name, definition in REDUNDANT_INDEXES.items():
+        if name in CREATE_ALL_ONLY:
+            continue
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition};")
+    for name in NEW_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name};")
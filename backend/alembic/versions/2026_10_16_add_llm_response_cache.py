@@ -0,0 +1,38 @@
+"""Add llm_response_cache table for persistent LLM response cache.
+
+Revision ID: 20261016_llm_response_cache
+Revises: 20251217_merge_heads_custom
+Create Date: 2026-10-16 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261016_llm_response_cache"
+down_revision = "20251217_merge_heads_custom"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    sql = """
+CREATE TABLE IF NOT EXISTS llm_response_cache (
+  cache_key VARCHAR(64) PRIMARY KEY NOT NULL,
+  model VARCHAR(255) NOT NULL,
+  payload BYTEA NOT NULL,
+  size_bytes INTEGER NOT NULL DEFAULT 0,
+  hit_count INTEGER NOT NULL DEFAULT 0,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  last_hit_at TIMESTAMPTZ,
+  expires_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_llm_response_cache_expires_at ON llm_response_cache(expires_at);
+CREATE INDEX IF NOT EXISTS idx_llm_response_cache_created_at ON llm_response_cache(created_at);
+"""
+    op.execute(sql)
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS llm_response_cache;")
@@ -0,0 +1,50 @@
+"""Add full-text search column and GIN index to agent_memories.
+
+search_vector is a stored generated tsvector of the summary (weight A) and
+the content description/text (weight B), analysed with the Russian and the
+English configuration. Keyword search uses `search_vector @@
+websearch_to_tsquery(...)` through the GIN index instead of an ILIKE scan
+(see app/core/text_search.py).
+
+Revision ID: 20261016_memory_full_text_search
+Revises: 20261016_vector_search_indexes
+Create Date: 2026-10-16 00:00:00.000000
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261016_memory_full_text_search"
+down_revision = "20261016_vector_search_indexes"
+branch_labels = None
+depends_on = None
+
+# Must match app.core.text_search.TEXT_SEARCH_CONFIGS
+CONFIGS = ("russian", "english")
+
+SUMMARY = "coalesce(summary, '')"
+CONTENT = "coalesce(content->>'description', content->>'text', content->>'content', '')"
+
+
+def _search_vector_expression() -> str:
+    parts = []
+    for source, weight in ((SUMMARY, "A"), (CONTENT, "B")):
+        for config in CONFIGS:
+            parts.append(f"setweight(to_tsvector('{config}'::regconfig, {source}), '{weight}')")
+    return " || ".join(parts)
+
+
+def upgrade():
+    op.execute(
+        f"ALTER TABLE agent_memories ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({_search_vector_expression()}) STORED;"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_agent_memories_search_vector "
+        "ON agent_memories USING gin (search_vector);"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS idx_agent_memories_search_vector;")
+    op.execute("ALTER TABLE agent_memories DROP COLUMN IF EXISTS search_vector;")
@@ -0,0 +1,107 @@
+"""Store embeddings at native dimension with per-row model.
+
+Embedding columns of agent_memories and plan_templates become untyped
+pgvector columns (vector, or halfvec when EMBEDDING_VECTOR_TYPE=halfvec),
+with embedding_model / embedding_dim recorded per row. The single
+fixed-dimension HNSW index is replaced by one partial expression index per
+dimension present. Existing rows get embedding_dim from the stored vector
+and no model; scripts/backfill_native_embeddings.py re-embeds them with the
+current model at its native dimension.
+
+Revision ID: 20261016_native_embedding_dim
+Revises: 20261016_embedding_store
+Create Date: 2026-10-16 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from app.core.config import get_settings
+
+# revision identifiers, used by Alembic.
+revision = "20261016_native_embedding_dim"
+down_revision = "20261016_embedding_store"
+branch_labels = None
+depends_on = None
+
+TABLES = ("agent_memories", "plan_templates")
+
+# Native dimension of the default embedding model (nomic-embed-text)
+DEFAULT_DIMENSION = 768
+
+
+def _partial_index_sql(table: str, dimension: int, vtype: str) -> str:
+    return (
+        f"CREATE INDEX IF NOT EXISTS idx_{table}_embedding_{vtype}_{dimension}_hnsw "
+        f"ON {table} USING hnsw ((embedding::{vtype}({dimension})) {vtype}_cosine_ops) "
+        f"WITH (m = 16, ef_construction = 64) "
+        f"WHERE embedding_dim = {dimension}"
+    )
+
+
+def _embedding_column_type(bind, table: str):
+    return bind.execute(sa.text(
+        "SELECT udt_name FROM information_schema.columns "
+        "WHERE table_name = :table AND column_name = 'embedding'"
+    ), {"table": table}).scalar()
+
+
+def upgrade():
+    bind = op.get_bind()
+    vtype = get_settings().embedding_vector_type
+    has_pgvector = bind.execute(sa.text("SELECT EXISTS(SELECT 1 FROM pg_extension WHERE extname = 'vector')")).scalar()
+
+    for table in TABLES:
+        op.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS embedding_model VARCHAR(255);")
+        op.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS embedding_dim INTEGER;")
+
+        column_type = _embedding_column_type(bind, table)
+        if not has_pgvector or column_type is None:
+            continue
+
+        # The fixed-dimension index cannot cover other dimensions
+        op.execute(f"DROP INDEX IF EXISTS idx_{table}_embedding_hnsw;")
+        if column_type != vtype:
+            # Untyped column: any dimension, one partial index per dimension
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN embedding TYPE {vtype} USING embedding::{vtype};")
+        else:
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN embedding TYPE {vtype};")
+        op.execute(
+            f"UPDATE {table} SET embedding_dim = vector_dims(embedding) "
+            f"WHERE embedding IS NOT NULL AND embedding_dim IS NULL;"
+        )
+
+        dimensions = {DEFAULT_DIMENSION}
+        dimensions.update(
+            row[0] for row in bind.execute(sa.text(
+                f"SELECT DISTINCT embedding_dim FROM {table} WHERE embedding_dim IS NOT NULL"
+            ))
+        )
+        for dimension in sorted(dimensions):
+            op.execute(_partial_index_sql(table, dimension, vtype))
+
+    # Vectors cached before this revision were padded/truncated to 1536 dimensions
+    op.execute("DELETE FROM embedding_store;")
+
+
+def downgrade():
+    bind = op.get_bind()
+    for table in TABLES:
+        for (index_name,) in bind.execute(sa.text(
+            "SELECT indexname FROM pg_indexes WHERE tablename = :table AND indexname LIKE :pattern"
+        ), {"table": table, "pattern": f"idx_{table}_embedding_%_hnsw"}):
+            op.execute(f"DROP INDEX IF EXISTS {index_name};")
+
+        if _embedding_column_type(bind, table) in ("vector", "halfvec"):
+            # Back to vector(768); vectors of other dimensions cannot be kept
+            op.execute(
+                f"ALTER TABLE {table} ALTER COLUMN embedding TYPE vector({DEFAULT_DIMENSION}) "
+                f"USING CASE WHEN embedding_dim = {DEFAULT_DIMENSION} "
+                f"THEN embedding::vector({DEFAULT_DIMENSION}) END;"
+            )
+            op.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{table}_embedding_hnsw ON {table} "
+                f"USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);"
+            )
+
+        op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS embedding_dim;")
+        op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS embedding_model;")
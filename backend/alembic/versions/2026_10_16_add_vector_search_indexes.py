@@ -0,0 +1,37 @@
+"""Add filtered-search index for agent memory vectors.
+
+Exact search over one agent's memories (small agents, or when the planner
+prefers it to the shared HNSW graph) reads the agent's rows of one
+dimension through (agent_id, embedding_dim) instead of scanning the table.
+Per-dimension HNSW indexes are created by 20261016_native_embedding_dim;
+per-agent and IVFFlat indexes are managed with scripts/vector_index.py.
+
+Revision ID: 20261016_vector_search_indexes
+Revises: 20261016_native_embedding_dim
+Create Date: 2026-10-16 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261016_vector_search_indexes"
+down_revision = "20261016_native_embedding_dim"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_agent_memories_agent_embedding_dim "
+        "ON agent_memories (agent_id, embedding_dim) WHERE embedding IS NOT NULL;"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_plan_templates_status_embedding_dim "
+        "ON plan_templates (status, embedding_dim) WHERE embedding IS NOT NULL;"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS idx_plan_templates_status_embedding_dim;")
+    op.execute("DROP INDEX IF EXISTS idx_agent_memories_agent_embedding_dim;")
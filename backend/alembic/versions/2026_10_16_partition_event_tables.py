@@ -0,0 +1,228 @@
+"""Range-partition execution_traces, workflow_events and request_logs by time.
+
+Each table becomes a partitioned table (PARTITION BY RANGE on start_time,
+timestamp and created_at respectively) with the same columns, defaults,
+check constraints, outgoing foreign keys and indexes. The existing table is
+not copied: it is renamed to <table>_legacy and attached as the partition
+FROM (MINVALUE) TO (the start of next week), so the migration only pays for
+the bounds check and the new (id, <time column>) primary key index. Four
+weekly partitions and a DEFAULT partition are created after it; further
+partitions are created, and expired ones rolled up and dropped, by
+app/services/partition_maintenance.py.
+
+The primary key must contain the partition key, so id alone is no longer
+unique at the database level and foreign keys that reference these tables
+are dropped (request_consequences.request_id, checkpoints.request_id,
+workflow_events.parent_event_id). The columns stay; the ORM relationships
+join on them explicitly and the retention job removes dependent rows
+before dropping a request_logs partition.
+
+Rollup tables keep per-day aggregates of dropped detail.
+
+Revision ID: 20261016_partition_event_tables
+Revises: 20261016_index_audit
+Create Date: 2026-10-16 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import UUID
+
+# revision identifiers, used by Alembic.
+revision = "20261016_partition_event_tables"
+down_revision = "20261016_index_audit"
+branch_labels = None
+depends_on = None
+
+# table -> partition key (must match app.services.partition_maintenance.PARTITIONED_TABLES)
+PARTITIONED_TABLES = {
+    "execution_traces": "start_time",
+    "workflow_events": "timestamp",
+    "request_logs": "created_at",
+}
+
+PREMADE_WEEKS = 4
+
+# Foreign keys referencing the tables, restored on downgrade
+REFERENCING_FOREIGN_KEYS = (
+    ("request_consequences", "fk_request_consequences_request_id", "request_id", "request_logs", "CASCADE"),
+    ("checkpoints", "fk_checkpoints_request_id", "request_id", "request_logs", "SET NULL"),
+    ("workflow_events", "workflow_events_parent_event_id_fkey", "parent_event_id", "workflow_events", "SET NULL"),
+)
+
+
+def _scalar(sql: str, **params):
+    return op.get_bind().execute(sa.text(sql), params).scalar()
+
+
+def _rows(sql: str, **params):
+    return op.get_bind().execute(sa.text(sql), params).fetchall()
+
+
+def _partition_table(table: str, column: str):
+    legacy = f"{table}_legacy"
+
+    # Foreign keys pointing at the table (including self references)
+    for referencing, name in _rows(
+        "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+        "WHERE contype = 'f' AND confrelid = CAST(:table AS regclass)",
+        table=table,
+    ):
+        op.execute(f'ALTER TABLE {referencing} DROP CONSTRAINT IF EXISTS "{name}";')
+
+    # Definitions to recreate on the partitioned table
+    index_defs = [
+        definition for (definition,) in _rows(
+            "SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i "
+            "WHERE i.indrelid = CAST(:table AS regclass) AND NOT i.indisprimary AND NOT i.indisunique",
+            table=table,
+        )
+    ]
+    foreign_keys = _rows(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE contype = 'f' AND conrelid = CAST(:table AS regclass)",
+        table=table,
+    )
+    index_names = [
+        name for (name,) in _rows(
+            "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE i.indrelid = CAST(:table AS regclass)",
+            table=table,
+        )
+    ]
+    pkey = _scalar(
+        "SELECT conname FROM pg_constraint WHERE contype = 'p' AND conrelid = CAST(:table AS regclass)",
+        table=table,
+    )
+
+    # Upper bound of the legacy partition: start of the week after the newest row
+    boundary = _scalar(
+        f"SELECT date_trunc('week', greatest(now()::timestamp, coalesce(max({column})::timestamp, now()::timestamp))) "
+        f"+ interval '1 week' FROM {table}"
+    )
+
+    op.execute(f"ALTER TABLE {table} RENAME TO {legacy};")
+    if pkey:
+        op.execute(f'ALTER TABLE {legacy} RENAME CONSTRAINT "{pkey}" TO "{legacy}_pkey";')
+    for name in index_names:
+        if name != pkey:
+            op.execute(f'ALTER INDEX "{name}" RENAME TO "{name[:56]}_legacy";')
+
+    op.execute(
+        f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS "
+        f"INCLUDING STORAGE INCLUDING COMMENTS) PARTITION BY RANGE ({column});"
+    )
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, {column});")
+    for definition in index_defs:
+        op.execute(definition + ";")
+    for name, definition in foreign_keys:
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition};')
+
+    # Matching legacy indexes are attached instead of rebuilt
+    op.execute(
+        f"ALTER TABLE {table} ATTACH PARTITION {legacy} "
+        f"FOR VALUES FROM (MINVALUE) TO ('{boundary.isoformat(sep=' ')}');"
+    )
+
+    lower = boundary
+    for _ in range(PREMADE_WEEKS):
+        upper = _scalar("SELECT CAST(:lower AS timestamp) + interval '1 week'", lower=lower)
+        op.execute(
+            f"CREATE TABLE IF NOT EXISTS {table}_p{lower:%Y%m%d} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{lower.isoformat(sep=' ')}') TO ('{upper.isoformat(sep=' ')}');"
+        )
+        lower = upper
+    op.execute(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT;")
+
+
+def upgrade():
+    # Partition bounds of timestamptz columns are read in the session time zone
+    op.execute("SET TIME ZONE 'UTC';")
+    for table, column in PARTITIONED_TABLES.items():
+        if _scalar("SELECT EXISTS(SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))", table=table):
+            continue
+        _partition_table(table, column)
+
+    op.create_table(
+        "execution_trace_rollups",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("operation_name", sa.String(255), nullable=True),
+        sa.Column("agent_id", UUID(as_uuid=True), nullable=True),
+        sa.Column("status", sa.String(20), nullable=True),
+        sa.Column("trace_count", sa.BigInteger(), nullable=False),
+        sa.Column("total_duration_ms", sa.BigInteger(), nullable=True),
+        sa.Column("max_duration_ms", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.text("NOW()")),
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS idx_execution_trace_rollups_day ON execution_trace_rollups (day);")
+    op.create_table(
+        "workflow_event_rollups",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("event_type", sa.String(50), nullable=True),
+        sa.Column("event_source", sa.String(50), nullable=True),
+        sa.Column("stage", sa.String(50), nullable=True),
+        sa.Column("status", sa.String(50), nullable=True),
+        sa.Column("event_count", sa.BigInteger(), nullable=False),
+        sa.Column("total_duration_ms", sa.BigInteger(), nullable=True),
+        sa.Column("max_duration_ms", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.text("NOW()")),
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS idx_workflow_event_rollups_day ON workflow_event_rollups (day);")
+    op.create_table(
+        "request_log_rollups",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("request_type", sa.String(50), nullable=True),
+        sa.Column("model_used", sa.String(255), nullable=True),
+        sa.Column("status", sa.String(20), nullable=True),
+        sa.Column("request_count", sa.BigInteger(), nullable=False),
+        sa.Column("total_duration_ms", sa.BigInteger(), nullable=True),
+        sa.Column("max_duration_ms", sa.Integer(), nullable=True),
+        sa.Column("total_success_score", sa.Float(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.text("NOW()")),
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS idx_request_log_rollups_day ON request_log_rollups (day);")
+
+
+def _unpartition_table(table: str):
+    plain = f"{table}_plain"
+    index_defs = [
+        definition.replace(" ON ONLY ", " ON ") for (definition,) in _rows(
+            "SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i "
+            "WHERE i.indrelid = CAST(:table AS regclass) AND NOT i.indisprimary",
+            table=table,
+        )
+    ]
+    foreign_keys = _rows(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE contype = 'f' AND conrelid = CAST(:table AS regclass) AND conparentid = 0",
+        table=table,
+    )
+    op.execute(f"CREATE TABLE {plain} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE);")
+    op.execute(f"INSERT INTO {plain} SELECT * FROM {table};")
+    op.execute(f"DROP TABLE {table} CASCADE;")
+    op.execute(f"ALTER TABLE {plain} RENAME TO {table};")
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id);")
+    for definition in index_defs:
+        op.execute(definition + ";")
+    for name, definition in foreign_keys:
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition};')
+
+
+def downgrade():
+    op.execute("SET TIME ZONE 'UTC';")
+    op.drop_table("request_log_rollups")
+    op.drop_table("workflow_event_rollups")
+    op.drop_table("execution_trace_rollups")
+
+    for table in PARTITIONED_TABLES:
+        if _scalar("SELECT EXISTS(SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))", table=table):
+            _unpartition_table(table)
+
+    for referencing, name, column, referenced, on_delete in REFERENCING_FOREIGN_KEYS:
+        op.execute(
+            f'ALTER TABLE {referencing} ADD CONSTRAINT "{name}" FOREIGN KEY ({column}) '
+            f"REFERENCES {referenced} (id) ON DELETE {on_delete};"
+        )
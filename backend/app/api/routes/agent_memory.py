@@ -5,11 +5,12 @@ from datetime import datetime
 from typing import List, Optional
 from uuid import UUID
 
-from app.core.database import get_db
+from app.core.database import get_async_db, get_db
 from app.core.logging_config import LoggingConfig
 from app.services.memory_service import MemoryService
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 logger = LoggingConfig.get_logger(__name__)
@@ -297,12 +298,13 @@ async def delete_memory(
 async def search_memories(
     agent_id: str,
     request: SearchMemoryRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Search memories"""
     try:
-        memory_service = MemoryService(db)
-        memories = memory_service.search_memories(
+        memory_service = MemoryService(db.sync_session)
+        memories = await memory_service.search_memories_async(
+            db,
             agent_id=UUID(agent_id),
             query_text=request.query_text,
             content_query=request.content_query,
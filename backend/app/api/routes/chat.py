@@ -11,10 +11,11 @@ from typing import Any, Dict, List, Optional
 from app.api.routes.websocket_events import (broadcast_chat_event,
                                              broadcast_execution_event)
 from app.core.chat_session import ChatSessionManager, get_session_manager
-from app.core.database import get_db
+from app.core.database import get_async_db, get_db
 from app.core.execution_context import ExecutionContext
 from app.core.logging_config import LoggingConfig
-from app.core.ollama_client import (OllamaClient, OllamaError, TaskType,
+from app.core.ollama_client import (OllamaClient, OllamaError,
+                                    RequestPriority, TaskType,
                                     get_ollama_client)
 from app.core.request_orchestrator import RequestOrchestrator
 from app.core.templates import templates
@@ -25,6 +26,7 @@ from app.services.request_logger import RequestLogger
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
@@ -145,7 +147,8 @@ async def chat(
     chat_message: ChatMessage,
     client: OllamaClient = Depends(get_ollama_client),
     session_manager: ChatSessionManager = Depends(get_session_manager),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    async_db: AsyncSession = Depends(get_async_db)
 ):
     """
     Send message to chat and get response from LLM
@@ -162,8 +165,8 @@ async def chat(
         session_id = chat_message.session_id
         if not session_id:
             # Create new session
-            session = session_manager.create_session(
-                db,
+            session = await session_manager.create_session_async(
+                async_db,
                 system_prompt=chat_message.system_prompt,
                 title=chat_message.message[:100] if chat_message.message else None
             )
@@ -174,19 +177,19 @@ async def chat(
                 logger.debug("Failed to broadcast session_created", exc_info=True)
         else:
             # Get existing session
-            session = session_manager.get_session(db, session_id)
+            session = await session_manager.get_session_async(async_db, session_id)
             if not session:
                 # Session not found, create new one
-                session = session_manager.create_session(
-                    db,
+                session = await session_manager.create_session_async(
+                    async_db,
                     system_prompt=chat_message.system_prompt,
                     title=chat_message.message[:100] if chat_message.message else None
                 )
                 session_id = session.id
         
         # Add user message to session (capture returned message with id)
-        user_message = session_manager.add_message(
-            db,
+        user_message = await session_manager.add_message_async(
+            async_db,
             session_id,
             "user",
             chat_message.message,
@@ -325,8 +328,8 @@ async def chat(
             logger.debug(f"Failed to create model_selection node: {e}", exc_info=True)
 
         # Добавить ответ в сессию (capture assistant message)
-        assistant_message = session_manager.add_message(
-            db,
+        assistant_message = await session_manager.add_message_async(
+            async_db,
             session_id,
             "assistant",
             result.response,
@@ -404,18 +407,19 @@ async def _stream_generation(
     temperature: float,
     session_id: str,
     session_manager: ChatSessionManager,
-    db: Session
+    db: AsyncSession
 ):
     """Stream generation response"""
     try:
-        chat_history = session_manager.get_ollama_history(db, session_id)
+        chat_history = await session_manager.get_ollama_history_async(db, session_id)
         async for chunk in client.generate_stream(
             prompt=prompt,
             task_type=task_type,
             model=model,
             server_url=server_url,
             history=chat_history,
-            temperature=temperature
+            temperature=temperature,
+            priority=RequestPriority.INTERACTIVE
         ):
             yield f"data: {json.dumps({'content': chunk.response, 'done': chunk.done})}\n\n"
     except Exception as e:
@@ -427,10 +431,10 @@ async def _stream_generation(
 async def get_chat_session(
     session_id: str,
     session_manager: ChatSessionManager = Depends(get_session_manager),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get chat session with all messages"""
-    session = session_manager.get_session(db, session_id)
+    session = await session_manager.get_session_async(db, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
@@ -458,7 +462,8 @@ async def create_chat_session(
     title: Optional[str] = None,
     system_prompt: Optional[str] = None,
     session_manager: ChatSessionManager = Depends(get_session_manager),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    async_db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new chat session"""
     try:
@@ -476,8 +481,8 @@ async def create_chat_session(
             except Exception as e:
                 logger.warning(f"Failed to fetch system prompt from database: {e}")
         
-        session = session_manager.create_session(
-            db,
+        session = await session_manager.create_session_async(
+            async_db,
             system_prompt=system_prompt,
             title=title
         )
@@ -501,11 +506,11 @@ async def create_chat_session(
 async def delete_chat_session(
     session_id: str,
     session_manager: ChatSessionManager = Depends(get_session_manager),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a chat session and all its messages"""
     try:
-        session_manager.delete_session(db, session_id)
+        await session_manager.delete_session_async(db, session_id)
         try:
             await broadcast_chat_event(session_id, {"type": "session_deleted", "session_id": session_id})
         except Exception:
@@ -4,7 +4,7 @@ API routes for dashboard
 from typing import Any, Dict, List, Optional
 from uuid import UUID
 
-from app.core.database import get_db
+from app.core.database import get_async_db, get_db
 from app.core.templates import templates
 from app.models.approval import ApprovalRequest
 from app.models.plan import Plan
@@ -14,17 +14,37 @@ from app.services.interactive_execution_service import \
 from fastapi import APIRouter, Body, Depends, HTTPException, Request
 from fastapi.responses import HTMLResponse, JSONResponse
 from pydantic import BaseModel
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 router = APIRouter(tags=["dashboard"])
 
 
+async def _get_latest_plans(db: AsyncSession, task_ids) -> Dict[UUID, Plan]:
+    """Latest plan version of each task, in one query"""
+    if not task_ids:
+        return {}
+    latest_versions = (
+        select(Plan.task_id, func.max(Plan.version).label("version"))
+        .where(Plan.task_id.in_(list(task_ids)))
+        .group_by(Plan.task_id)
+        .subquery()
+    )
+    plans = (await db.execute(
+        select(Plan).join(
+            latest_versions,
+            and_(Plan.task_id == latest_versions.c.task_id, Plan.version == latest_versions.c.version)
+        )
+    )).scalars().all()
+    return {plan.task_id: plan for plan in plans}
+
+
 @router.get("/api/dashboard/tasks")
 async def get_dashboard_tasks(
     request: Request,
     status: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get tasks for dashboard
@@ -43,13 +63,13 @@ async def get_dashboard_tasks(
     """
     try:
         # Build query
-        query = db.query(Task)
+        query = select(Task)
         
         # Filter by status if provided
         if status:
             try:
                 task_status = TaskStatus(status)
-                query = query.filter(Task.status == task_status)
+                query = query.where(Task.status == task_status)
             except ValueError:
                 pass  # Invalid status, ignore filter
         
@@ -60,42 +80,45 @@ async def get_dashboard_tasks(
             TaskStatus.ON_HOLD,
             TaskStatus.EXECUTING  # Legacy
         ]
-        active_tasks = query.filter(
-            Task.status.in_(active_statuses)
-        ).order_by(Task.updated_at.desc()).limit(50).all()
-        
-        # Get approval requests for pending approval tasks
-        pending_approval_tasks = db.query(Task).filter(
-            Task.status == TaskStatus.PENDING_APPROVAL
-        ).all()
+        active_tasks = (await db.execute(
+            query.where(Task.status.in_(active_statuses)).order_by(Task.updated_at.desc()).limit(50)
+        )).scalars().all()
+        
+        pending_approval_task_ids = (await db.execute(
+            select(Task.id).where(Task.status == TaskStatus.PENDING_APPROVAL)
+        )).scalars().all()
+        
+        # Latest plan of every task and pending approvals of those plans, one query each
+        latest_plans = await _get_latest_plans(db, {task.id for task in active_tasks} | set(pending_approval_task_ids))
+        pending_plan_ids = [
+            latest_plans[task_id].id for task_id in pending_approval_task_ids if task_id in latest_plans
+        ]
+        approvals_by_plan = {}
+        if pending_plan_ids:
+            approvals = (await db.execute(
+                select(ApprovalRequest).where(
+                    ApprovalRequest.plan_id.in_(pending_plan_ids),
+                    ApprovalRequest.status == "pending"
+                )
+            )).scalars().all()
+            for approval_request in approvals:
+                approvals_by_plan.setdefault(approval_request.plan_id, approval_request)
         
         approval_requests_map = {}
-        for task in pending_approval_tasks:
-            # Get latest plan
-            latest_plan = db.query(Plan).filter(
-                Plan.task_id == task.id
-            ).order_by(Plan.version.desc()).first()
-            
-            if latest_plan:
-                approval_request = db.query(ApprovalRequest).filter(
-                    ApprovalRequest.plan_id == latest_plan.id,
-                    ApprovalRequest.status == "pending"
-                ).first()
-                
-                if approval_request:
-                    approval_requests_map[str(task.id)] = {
-                        "id": str(approval_request.id),
-                        "plan_id": str(latest_plan.id),
-                        "request_data": approval_request.request_data
-                    }
+        for task_id in pending_approval_task_ids:
+            latest_plan = latest_plans.get(task_id)
+            approval_request = approvals_by_plan.get(latest_plan.id) if latest_plan else None
+            if approval_request:
+                approval_requests_map[str(task_id)] = {
+                    "id": str(approval_request.id),
+                    "plan_id": str(latest_plan.id),
+                    "request_data": approval_request.request_data
+                }
         
         # Format tasks with plan information
         tasks_data = []
         for task in active_tasks:
-            # Get latest plan for task
-            latest_plan = db.query(Plan).filter(
-                Plan.task_id == task.id
-            ).order_by(Plan.version.desc()).first()
+            latest_plan = latest_plans.get(task.id)
             
             task_dict = {
                 "id": str(task.id),
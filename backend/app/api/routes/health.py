@@ -5,10 +5,11 @@ import asyncio
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, Optional
 
-import httpx
 from app.core.config import get_settings
 from app.core.database import get_db
+from app.core.llm_circuit_breaker import CircuitState, get_circuit_breakers
 from app.core.logging_config import LoggingConfig
+from app.core.ollama_server_state import get_server_state_registry
 from app.models.checkpoint import Checkpoint
 from app.models.task_queue import QueueTask, TaskQueue
 from app.models.trace import ExecutionTrace
@@ -72,11 +73,19 @@ async def detailed_health_check(db: Session = Depends(get_db)):
             "error": type(e).__name__
         }
     
-    # Check Ollama servers
+    # Check Ollama servers (state comes from the background server state registry)
     try:
         servers = OllamaService.get_all_active_servers(db)
+        registry = get_server_state_registry()
+        # Probe inline only servers with unknown or stale state
+        stale_urls = [s.url for s in servers if not registry.is_fresh(registry.get_state(s.url))]
+        if stale_urls:
+            await asyncio.gather(*(registry.refresh_server(url) for url in stale_urls), return_exceptions=True)
+        
+        breakers = get_circuit_breakers()
         server_statuses = []
         all_servers_healthy = True
+        open_circuits = []
         
         for server in servers:
             server_status = {
@@ -87,22 +96,19 @@ async def detailed_health_check(db: Session = Depends(get_db)):
                 "is_default": server.is_default
             }
             
-            # Try to check server health
-            try:
-                async with httpx.AsyncClient(timeout=5.0) as client:
-                    base_url = server.url
-                    if base_url.endswith("/v1"):
-                        base_url = base_url[:-3]
-                    elif base_url.endswith("/v1/"):
-                        base_url = base_url[:-4]
-                    
-                    response = await client.get(f"{base_url}/api/tags", timeout=5.0)
-                    server_status["reachable"] = response.status_code == 200
-                    if not server_status["reachable"]:
-                        all_servers_healthy = False
-            except Exception as e:
-                server_status["reachable"] = False
-                server_status["error"] = str(e)
+            state = registry.get_state(server.url)
+            server_status["reachable"] = bool(state and state.healthy)
+            if state:
+                server_status["suspect"] = state.suspect
+                server_status["loaded_models"] = state.loaded_models
+                server_status["checked_at"] = state.checked_at.isoformat() if state.checked_at else None
+                if state.last_error:
+                    server_status["error"] = state.last_error
+            circuit = breakers.get(server.url)
+            server_status["circuit"] = circuit.to_dict()
+            if circuit.state != CircuitState.CLOSED:
+                open_circuits.append(server.url)
+            if not server_status["reachable"] or circuit.state != CircuitState.CLOSED:
                 all_servers_healthy = False
             
             server_statuses.append(server_status)
@@ -124,7 +130,8 @@ async def detailed_health_check(db: Session = Depends(get_db)):
             health_status["components"]["ollama_servers"] = {
                 "status": "degraded",
                 "message": "Some servers are unavailable",
-                "servers": server_statuses
+                "servers": server_statuses,
+                "open_circuits": open_circuits
             }
     except Exception as e:
         overall_healthy = False
@@ -1,9 +1,10 @@
 """
-Prometheus metrics endpoint
+Prometheus metrics and slow query endpoints
 """
 from app.core.logging_config import LoggingConfig
 from app.core.metrics import get_metrics, get_metrics_content_type
-from fastapi import APIRouter
+from app.core.slow_queries import get_slow_query_recorder
+from fastapi import APIRouter, Query
 from fastapi.responses import Response
 
 logger = LoggingConfig.get_logger(__name__)
@@ -32,3 +33,30 @@ async def metrics():
             status_code=500
         )
 
+
+
+@router.get("/api/metrics/slow-queries")
+async def slow_queries(
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of statements"),
+    order_by: str = Query("total", pattern="^(total|max|count|recent)$", description="Sort key"),
+    recent: int = Query(20, ge=0, le=200, description="Number of latest slow executions")
+):
+    """
+    Slow statements recorded by the engine listeners
+    
+    Aggregated by normalized SQL with duration stats, parameter shape,
+    calling code, request paths and the sampled EXPLAIN (ANALYZE, BUFFERS) plan.
+    """
+    recorder = get_slow_query_recorder()
+    return {
+        "recorder": recorder.get_stats(),
+        "statements": recorder.get_statements(limit=limit, order_by=order_by),
+        "recent": recorder.get_recent(limit=recent),
+    }
+
+
+@router.post("/api/metrics/slow-queries/reset")
+async def reset_slow_queries():
+    """Forget recorded slow statements"""
+    get_slow_query_recorder().reset()
+    return {"status": "reset"}
@@ -6,6 +6,7 @@ from typing import Dict, List, Optional
 
 import httpx
 from app.core.database import get_db
+from app.core.llm_circuit_breaker import get_circuit_breakers
 from app.core.ollama_client import OllamaClient, get_ollama_client
 from app.models.ollama_server import OllamaServer
 from app.services.ollama_service import OllamaService
@@ -35,6 +36,7 @@ class ServerInfo(BaseModel):
     models: List[ModelInfo] = []
     available: bool = False
     is_default: bool = False
+    circuit_state: str = "closed"
 
 
 @router.get("/servers")
@@ -51,6 +53,7 @@ async def list_servers(db: Session = Depends(get_db)):
             api_url=server.get_api_url(),
             available=False,
             is_default=server.is_default,
+            circuit_state=get_circuit_breakers().get(server.url).state.value,
             models=[]
         )
         
@@ -6,7 +6,9 @@ from typing import List, Optional
 
 import httpx
 from app.core.database import get_db
+from app.core.llm_circuit_breaker import get_circuit_breakers
 from app.core.logging_config import LoggingConfig
+from app.core.ollama_server_state import get_server_state_registry
 from app.models.ollama_model import OllamaModel
 from app.models.ollama_server import OllamaServer
 from app.services.ollama_service import OllamaService
@@ -64,6 +66,7 @@ class ServerResponse(BaseModel):
     updated_at: datetime
     last_checked_at: Optional[datetime]
     models_count: int = 0
+    circuit_state: str = "closed"
 
 
 @router.get("/", response_model=List[ServerResponse])
@@ -100,7 +103,8 @@ async def list_servers(
             created_at=server.created_at,
             updated_at=server.updated_at,
             last_checked_at=server.last_checked_at,
-            models_count=models_count
+            models_count=models_count,
+            circuit_state=get_circuit_breakers().get(server.url).state.value
         ))
     
     return result
@@ -205,7 +209,8 @@ async def get_server(server_id: str, db: Session = Depends(get_db)):
         created_at=server.created_at,
         updated_at=server.updated_at,
         last_checked_at=server.last_checked_at,
-        models_count=models_count
+        models_count=models_count,
+        circuit_state=get_circuit_breakers().get(server.url).state.value
     )
 
 
@@ -227,6 +232,7 @@ async def update_server(
     if update_data.get("is_default") is True:
         db.query(OllamaServer).filter(OllamaServer.id != server_id).update({"is_default": False})
     
+    previous_url = server.url
     for key, value in update_data.items():
         setattr(server, key, value)
     
@@ -234,6 +240,14 @@ async def update_server(
     db.commit()
     db.refresh(server)
     
+    # Keep the server state registry (and its model -> server map) in sync
+    registry = get_server_state_registry()
+    if previous_url != server.url or not server.is_active:
+        registry.unregister_server(previous_url)
+    if server.is_active:
+        registry.register_server(server.url, max_concurrent=server.max_concurrent)
+        registry.invalidate_model_index()
+    
     models_count = db.query(OllamaModel).filter(
         OllamaModel.server_id == server.id,
         OllamaModel.is_active == True
@@ -254,7 +268,8 @@ async def update_server(
         created_at=server.created_at,
         updated_at=server.updated_at,
         last_checked_at=server.last_checked_at,
-        models_count=models_count
+        models_count=models_count,
+        circuit_state=get_circuit_breakers().get(server.url).state.value
     )
 
 
@@ -267,6 +282,7 @@ async def delete_server(server_id: str, db: Session = Depends(get_db)):
     
     db.delete(server)
     db.commit()
+    get_server_state_registry().unregister_server(server.url)
     return {"message": "Server deleted successfully"}
 
 
@@ -342,6 +358,7 @@ async def discover_server_models(server_id: str, db: Session = Depends(get_db)):
                     model.is_active = False
             
             db.commit()
+            get_server_state_registry().set_available_models(server.url, sorted(seen_model_names))
             
             # Get total active models count after sync
             total_active = db.query(OllamaModel).filter(
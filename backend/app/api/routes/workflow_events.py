@@ -3,12 +3,13 @@ Workflow Events API routes
 """
 from typing import Optional
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.models.workflow_event import WorkflowEvent
 from app.services.workflow_event_service import WorkflowEventService
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(prefix="/api/workflow-events", tags=["workflow-events"])
 
@@ -19,7 +20,7 @@ async def get_workflow_events(
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of events to return"),
     offset: int = Query(0, ge=0, description="Offset for pagination"),
     include_entities: bool = Query(False, description="Include related entities (tasks, plans, tools)"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get workflow events
@@ -27,12 +28,10 @@ async def get_workflow_events(
     Returns events filtered by workflow_id if provided, or all recent events.
     If include_entities=True, also returns related entities (tasks, plans, tools) created during workflow.
     """
-    event_service = WorkflowEventService(db)
-    
     if workflow_id:
-        events = event_service.get_events_by_workflow(workflow_id, limit=limit, offset=offset)
+        events = await WorkflowEventService.get_events_by_workflow_async(db, workflow_id, limit=limit, offset=offset)
     else:
-        events = event_service.get_recent_events(limit=limit, workflow_id=None)
+        events = await WorkflowEventService.get_recent_events_async(db, limit=limit, workflow_id=None)
     
     result = {
         "events": [event.to_dict() for event in events],
@@ -56,7 +55,7 @@ async def get_workflow_events(
         
         # Get tasks
         if task_ids:
-            tasks = db.query(Task).filter(Task.id.in_(task_ids)).all()
+            tasks = (await db.execute(select(Task).where(Task.id.in_(task_ids)))).scalars().all()
             for task in tasks:
                 entities.append({
                     "id": str(task.id),
@@ -67,7 +66,7 @@ async def get_workflow_events(
         
         # Get plans
         if plan_ids:
-            plans = db.query(Plan).filter(Plan.id.in_(plan_ids)).all()
+            plans = (await db.execute(select(Plan).where(Plan.id.in_(plan_ids)))).scalars().all()
             for plan in plans:
                 entities.append({
                     "id": str(plan.id),
@@ -78,7 +77,7 @@ async def get_workflow_events(
         
         # Get tools/artifacts
         if tool_ids:
-            tools = db.query(Artifact).filter(Artifact.id.in_(tool_ids)).all()
+            tools = (await db.execute(select(Artifact).where(Artifact.id.in_(tool_ids)))).scalars().all()
             for tool in tools:
                 entities.append({
                     "id": str(tool.id),
@@ -95,10 +94,10 @@ async def get_workflow_events(
 @router.get("/{event_id}")
 async def get_workflow_event(
     event_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific workflow event by ID"""
-    event = db.query(WorkflowEvent).filter(WorkflowEvent.id == event_id).first()
+    event = (await db.execute(select(WorkflowEvent).where(WorkflowEvent.id == event_id))).scalars().first()
     
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
@@ -114,8 +113,7 @@ class WorkflowControlRequest(BaseModel):
 @router.post("/{workflow_id}/control")
 async def control_workflow(
     workflow_id: str,
-    request: WorkflowControlRequest,
-    db: Session = Depends(get_db)
+    request: WorkflowControlRequest
 ):
     """
     Control workflow execution
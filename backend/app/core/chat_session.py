@@ -8,7 +8,8 @@ from typing import Dict, List, Optional
 from app.core.logging_config import LoggingConfig
 from app.models.chat_session import ChatMessage as ChatMessageModel
 from app.models.chat_session import ChatSession as ChatSessionModel
-from sqlalchemy import and_
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 logger = LoggingConfig.get_logger(__name__)
@@ -77,29 +78,33 @@ class ChatSessionManager:
             if not db_session:
                 return None
             
-            # Load messages
-            messages = []
-            for msg in db_session.messages:
-                messages.append(ChatMessage(
-                    id=str(msg.id),
-                    role=msg.role,
-                    content=msg.content,
-                    model=msg.model,
-                    timestamp=msg.created_at,
-                    metadata=msg.message_metadata or {}
-                ))
-            
-            return ChatSession(
-                id=str(db_session.id),
-                created_at=db_session.created_at,
-                messages=messages,
-                system_prompt=db_session.system_prompt,
-                title=db_session.title
-            )
+            return self._to_chat_session(db_session, db_session.messages)
         except (ValueError, Exception) as e:
             logger.warning(f"Error getting session {session_id}: {e}")
             return None
     
+    @staticmethod
+    def _to_chat_session(db_session: ChatSessionModel, db_messages) -> ChatSession:
+        """Build ChatSession from model rows"""
+        messages = []
+        for msg in db_messages:
+            messages.append(ChatMessage(
+                id=str(msg.id),
+                role=msg.role,
+                content=msg.content,
+                model=msg.model,
+                timestamp=msg.created_at,
+                metadata=msg.message_metadata or {}
+            ))
+        
+        return ChatSession(
+            id=str(db_session.id),
+            created_at=db_session.created_at,
+            messages=messages,
+            system_prompt=db_session.system_prompt,
+            title=db_session.title
+        )
+    
     def add_message(self, db: Session, session_id: str, role: str, content: str, 
                    model: Optional[str] = None, metadata: Dict = None) -> Optional[ChatMessage]:
         """Add message to session in database"""
@@ -170,7 +175,10 @@ class ChatSessionManager:
     
     def get_ollama_history(self, db: Session, session_id: str) -> List[Dict[str, str]]:
         """Get chat history in Ollama format"""
-        session = self.get_session(db, session_id)
+        return self._to_ollama_history(self.get_session(db, session_id))
+    
+    @staticmethod
+    def _to_ollama_history(session: Optional[ChatSession]) -> List[Dict[str, str]]:
         if not session:
             return []
         
@@ -185,6 +193,123 @@ class ChatSessionManager:
             history.append({"role": msg.role, "content": msg.content})
         
         return history
+    
+    # Async variants (AsyncSession, for routes on the event loop)
+    
+    async def create_session_async(self, db: AsyncSession, system_prompt: Optional[str] = None,
+                                   title: Optional[str] = None, user_id: Optional[str] = None) -> ChatSession:
+        """Create a new chat session in database"""
+        try:
+            session_id = uuid.uuid4()
+            db_session = ChatSessionModel(
+                id=session_id,
+                system_prompt=system_prompt,
+                title=title,
+                user_id=uuid.UUID(user_id) if user_id and user_id.strip() else None
+            )
+            db.add(db_session)
+            await db.commit()
+            await db.refresh(db_session)
+            
+            logger.info(f"Created chat session: {session_id}")
+            
+            return ChatSession(
+                id=str(session_id),
+                created_at=db_session.created_at,
+                system_prompt=system_prompt,
+                title=title
+            )
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error creating chat session: {e}", exc_info=True)
+            raise
+    
+    async def get_session_async(self, db: AsyncSession, session_id: str) -> Optional[ChatSession]:
+        """Get session by ID from database (session and messages in two queries)"""
+        try:
+            session_uuid = uuid.UUID(session_id)
+            db_session = await db.get(ChatSessionModel, session_uuid)
+            
+            if not db_session:
+                return None
+            
+            result = await db.execute(
+                select(ChatMessageModel)
+                .where(ChatMessageModel.session_id == session_uuid)
+                .order_by(ChatMessageModel.sequence, ChatMessageModel.created_at)
+            )
+            return self._to_chat_session(db_session, result.scalars().all())
+        except (ValueError, Exception) as e:
+            logger.warning(f"Error getting session {session_id}: {e}")
+            return None
+    
+    async def add_message_async(self, db: AsyncSession, session_id: str, role: str, content: str,
+                                model: Optional[str] = None, metadata: Dict = None) -> Optional[ChatMessage]:
+        """Add message to session in database"""
+        try:
+            session_uuid = uuid.UUID(session_id)
+            db_session = await db.get(ChatSessionModel, session_uuid)
+            
+            if not db_session:
+                logger.warning(f"Session {session_id} not found")
+                return None
+            
+            # Get next sequence number
+            max_sequence = (await db.execute(
+                select(ChatMessageModel.sequence)
+                .where(ChatMessageModel.session_id == session_uuid)
+                .order_by(ChatMessageModel.sequence.desc())
+                .limit(1)
+            )).scalar()
+            next_sequence = max_sequence + 1 if max_sequence is not None else 0
+            
+            message_id = uuid.uuid4()
+            db_message = ChatMessageModel(
+                id=message_id,
+                session_id=session_uuid,
+                role=role,
+                content=content,
+                model=model,
+                sequence=next_sequence,
+                message_metadata=metadata or {}
+            )
+            db.add(db_message)
+            
+            # Update session updated_at
+            db_session.updated_at = datetime.now(timezone.utc)
+            
+            await db.commit()
+            await db.refresh(db_message)
+            
+            return ChatMessage(
+                id=str(message_id),
+                role=role,
+                content=content,
+                model=model,
+                timestamp=db_message.created_at,
+                metadata=metadata or {}
+            )
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error adding message to session {session_id}: {e}", exc_info=True)
+            return None
+    
+    async def delete_session_async(self, db: AsyncSession, session_id: str):
+        """Delete a session (cascade will delete messages)"""
+        try:
+            session_uuid = uuid.UUID(session_id)
+            db_session = await db.get(ChatSessionModel, session_uuid)
+            if db_session:
+                await db.delete(db_session)
+                await db.commit()
+                logger.info(f"Deleted chat session: {session_id}")
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error deleting session {session_id}: {e}", exc_info=True)
+    
+    async def get_ollama_history_async(self, db: AsyncSession, session_id: str) -> List[Dict[str, str]]:
+        """Get chat history in Ollama format"""
+        return self._to_ollama_history(await self.get_session_async(db, session_id))
 
 
 # Global session manager instance
@@ -96,6 +96,24 @@ class Settings(BaseSettings):
     postgres_port: int = Field(default=5432, ge=1, le=65535, description="PostgreSQL port")
     database_pool_size: int = Field(default=20, ge=1, description="Database pool size")
     database_max_overflow: int = Field(default=10, ge=0, description="Database max overflow")
+    database_async_pool_size: int = Field(default=20, ge=1, description="Async (asyncpg) database pool size")
+    database_async_max_overflow: int = Field(default=10, ge=0, description="Async (asyncpg) database max overflow")
+    database_pool_metrics_interval_seconds: float = Field(default=15.0, gt=0, description="Interval between connection pool gauge updates")
+    slow_query_log_enabled: bool = Field(default=True, description="Record statements slower than slow_query_threshold_ms")
+    slow_query_threshold_ms: float = Field(default=500.0, ge=0, description="Duration above which a statement is recorded as slow")
+    slow_query_explain_sample_rate: float = Field(default=0.1, ge=0.0, le=1.0, description="Share of slow SELECTs re-run with EXPLAIN (ANALYZE, BUFFERS)")
+    slow_query_explain_interval_seconds: float = Field(default=600.0, ge=0, description="Minimum interval between EXPLAINs of the same statement")
+    slow_query_max_statements: int = Field(default=500, ge=1, description="Distinct slow statements kept in memory")
+
+    # Partitioning and retention of execution_traces, workflow_events, request_logs
+    partition_maintenance_enabled: bool = Field(default=True, description="Create upcoming partitions (and drop expired ones when retention is set) in the background")
+    partition_interval: str = Field(default="week", pattern="^(day|week)$", description="Range of newly created partitions")
+    partition_premake: int = Field(default=4, ge=1, description="Partitions created ahead of the current one")
+    partition_maintenance_interval_seconds: float = Field(default=3600.0, gt=0, description="Interval between partition maintenance runs")
+    partition_rollup_enabled: bool = Field(default=True, description="Aggregate expired rows into *_rollups tables before dropping them")
+    execution_traces_retention_days: int = Field(default=0, ge=0, description="Days of execution traces to keep (0 = forever)")
+    workflow_events_retention_days: int = Field(default=0, ge=0, description="Days of workflow events to keep (0 = forever)")
+    request_logs_retention_days: int = Field(default=0, ge=0, description="Days of request logs to keep (0 = forever)")
     
     # Ollama Instance 1
     ollama_url_1: str = Field(..., description="First Ollama instance URL")
@@ -108,7 +126,239 @@ class Settings(BaseSettings):
     ollama_model_2: str = Field(..., description="Second Ollama model")
     ollama_capabilities_2: str = Field(default="", description="Second Ollama capabilities (comma-separated)")
     ollama_max_concurrent_2: int = Field(default=1, ge=1, description="Second Ollama max concurrent")
+
+    # Ollama HTTP transport (shared connection pool per server)
+    ollama_http_max_connections: int = Field(default=20, ge=1, description="Max connections per Ollama server")
+    ollama_http_max_keepalive_connections: int = Field(
+        default=10,
+        ge=0,
+        description="Max idle keep-alive connections per Ollama server"
+    )
+    ollama_http_keepalive_expiry_seconds: float = Field(
+        default=60.0,
+        ge=0.0,
+        description="Idle keep-alive connection expiry (seconds)"
+    )
+    ollama_http_connect_timeout_seconds: float = Field(
+        default=5.0,
+        gt=0.0,
+        description="TCP connect timeout for Ollama servers (seconds)"
+    )
+    ollama_http_timeout_seconds: float = Field(
+        default=300.0,
+        gt=0.0,
+        description="Default read timeout for Ollama requests (seconds)"
+    )
+    ollama_http2: bool = Field(default=False, description="Use HTTP/2 for Ollama servers (requires 'h2' package)")
+
+    # Ollama server state registry (background health / loaded models refresh)
+    ollama_state_refresh_interval_seconds: float = Field(
+        default=15.0,
+        gt=0.0,
+        description="Interval between background Ollama server state refreshes (seconds)"
+    )
+    ollama_state_stale_after_seconds: float = Field(
+        default=60.0,
+        gt=0.0,
+        description="Cached server state older than this is re-probed inline (seconds)"
+    )
+    
+    # LLM load balancing across servers hosting the same model
+    llm_balancer_ewma_alpha: float = Field(
+        default=0.3,
+        gt=0.0,
+        le=1.0,
+        description="Weight of the newest sample in the EWMA request latency"
+    )
+    llm_balancer_default_latency_seconds: float = Field(
+        default=5.0,
+        gt=0.0,
+        description="Assumed latency of a server without measurements (seconds)"
+    )
+    llm_balancer_cold_start_penalty_seconds: float = Field(
+        default=15.0,
+        ge=0.0,
+        description="Penalty for servers that have to load the model into GPU first (seconds)"
+    )
+    
+    # Circuit breaker per Ollama server and retry policy
+    llm_circuit_failure_threshold: int = Field(
+        default=5,
+        ge=1,
+        description="Consecutive failures that open a server's circuit"
+    )
+    llm_circuit_open_seconds: float = Field(
+        default=10.0,
+        gt=0.0,
+        description="Time an open circuit rejects requests before a half-open probe"
+    )
+    llm_circuit_max_open_seconds: float = Field(
+        default=300.0,
+        gt=0.0,
+        description="Upper bound for the open time, which doubles on every failed probe"
+    )
+    llm_retry_max_attempts: int = Field(default=3, ge=1, description="Attempts per LLM request on one server")
+    llm_retry_base_delay_seconds: float = Field(
+        default=0.5,
+        ge=0.0,
+        description="Base delay of the jittered exponential backoff between attempts"
+    )
+    llm_retry_max_delay_seconds: float = Field(default=8.0, ge=0.0, description="Maximum backoff delay")
+    llm_retry_budget_ratio: float = Field(
+        default=0.2,
+        ge=0.0,
+        le=1.0,
+        description="Retries allowed per request across the process (token budget)"
+    )
+    llm_retry_budget_initial_tokens: float = Field(
+        default=10.0,
+        ge=0.0,
+        description="Initial retry budget (tokens)"
+    )
+    
+    # Hedged LLM requests (second server after a per-task-type latency percentile)
+    llm_hedging_enabled: bool = Field(default=False, description="Send slow requests to a second server as well")
+    llm_hedging_percentile: float = Field(
+        default=0.95,
+        gt=0.0,
+        le=1.0,
+        description="Latency percentile of the task type after which a request is hedged"
+    )
+    llm_hedging_window: int = Field(default=200, ge=10, description="Latency samples kept per task type")
+    llm_hedging_min_samples: int = Field(
+        default=20,
+        ge=1,
+        description="Task types with fewer latency samples are not hedged"
+    )
+    llm_hedging_min_delay_seconds: float = Field(
+        default=1.0,
+        ge=0.0,
+        description="Never hedge earlier than this (seconds)"
+    )
+    llm_hedging_budget_ratio: float = Field(
+        default=0.1,
+        ge=0.0,
+        le=1.0,
+        description="Max share of requests that may be hedged"
+    )
     
+    # LLM admission control (per-server concurrency with priority queues)
+    llm_admission_enabled: bool = Field(default=True, description="Limit concurrent LLM requests per Ollama server")
+    llm_admission_default_concurrency: int = Field(
+        default=2,
+        ge=1,
+        description="Concurrent requests per server when neither an override nor max_concurrent is known"
+    )
+    llm_admission_limits: Optional[str] = Field(
+        default=None,
+        description='Concurrency overrides (JSON, keys "url" or "url|model", e.g. {"http://host:11434": 4})'
+    )
+    llm_admission_max_queue: int = Field(
+        default=100,
+        ge=0,
+        description="Max waiting requests per server and priority class"
+    )
+    llm_admission_timeout_interactive_seconds: float = Field(
+        default=30.0,
+        gt=0.0,
+        description="Max wait for admission of interactive chat requests (seconds)"
+    )
+    llm_admission_timeout_planning_seconds: float = Field(
+        default=60.0,
+        gt=0.0,
+        description="Max wait for admission of planning requests (seconds)"
+    )
+    llm_admission_timeout_execution_seconds: float = Field(
+        default=120.0,
+        gt=0.0,
+        description="Max wait for admission of execution requests (seconds)"
+    )
+    llm_admission_timeout_background_seconds: float = Field(
+        default=600.0,
+        gt=0.0,
+        description="Max wait for admission of background requests (seconds)"
+    )
+    
+    # Embedding generation (batched via Ollama /api/embed)
+    embedding_cache_max_bytes: int = Field(
+        default=64 * 1024 * 1024,
+        ge=1024,
+        description="Max size of the process-wide embedding cache in bytes (float32 vectors)"
+    )
+    embedding_store_enabled: bool = Field(
+        default=True,
+        description="Store embeddings in the database keyed by model and text hash (reused across restarts)"
+    )
+    embedding_store_url: Optional[str] = Field(
+        default=None,
+        description="Separate database URL for the embedding store (e.g. sqlite:///cache/embeddings.db), main DB if empty"
+    )
+    embedding_vector_type: str = Field(
+        default="vector",
+        pattern="^(vector|halfvec)$",
+        description="pgvector storage type of embedding columns: vector (float32) or halfvec (float16, pgvector >= 0.7)"
+    )
+    vector_index_method: str = Field(
+        default="hnsw",
+        pattern="^(hnsw|ivfflat)$",
+        description="ANN index method of embedding columns (IVFFlat indexes are built by scripts/vector_index.py)"
+    )
+    vector_hnsw_m: int = Field(default=16, ge=2, le=100, description="HNSW max connections per layer")
+    vector_hnsw_ef_construction: int = Field(default=64, ge=4, le=1000, description="HNSW build candidate list size")
+    vector_hnsw_ef_search: Optional[int] = Field(
+        default=None,
+        ge=1,
+        le=1000,
+        description="HNSW query candidate list size (hnsw.ef_search, server default 40 if empty)"
+    )
+    vector_ivfflat_lists: int = Field(default=100, ge=1, description="IVFFlat number of lists (~rows/1000)")
+    vector_ivfflat_probes: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="IVFFlat lists probed per query (ivfflat.probes, server default 1 if empty)"
+    )
+    vector_iterative_scan: str = Field(
+        default="off",
+        pattern="^(off|relaxed_order|strict_order)$",
+        description="pgvector >= 0.8 iterative index scan for filtered (per-agent) search"
+    )
+    local_vector_index_enabled: bool = Field(
+        default=True,
+        description="In-process NumPy vector index for semantic search when pgvector is unavailable"
+    )
+    local_vector_index_snapshot_path: Optional[str] = Field(
+        default=None,
+        description="File the in-process vector index is saved to on shutdown and loaded from on startup (.npz)"
+    )
+    embedding_worker_max_queue_size: int = Field(
+        default=1000,
+        ge=1,
+        description="Max memories waiting for background embedding (further memories are saved without embedding)"
+    )
+    embedding_worker_batch_size: int = Field(default=32, ge=1, description="Memories embedded per background batch")
+    embedding_worker_batch_wait_seconds: float = Field(
+        default=0.2,
+        ge=0.0,
+        description="Time the background worker waits for a batch to fill"
+    )
+    embedding_worker_max_retries: int = Field(default=3, ge=0, description="Retries of a failed background embedding")
+    embedding_worker_retry_delay_seconds: float = Field(
+        default=2.0,
+        ge=0.0,
+        description="Initial retry delay of background embeddings (doubled per attempt)"
+    )
+    embedding_batch_max_items: int = Field(default=64, ge=1, description="Max texts per /api/embed request")
+    embedding_batch_max_chars: int = Field(
+        default=32000,
+        ge=1,
+        description="Max total characters per /api/embed request (~4 characters per token)"
+    )
+    embedding_batch_concurrency: int = Field(
+        default=4,
+        ge=1,
+        description="Concurrent embedding requests across servers hosting the model"
+    )
+
     # Features
     enable_agent_ops: bool = Field(default=False, description="Enable Agent Ops features")
     enable_a2a: bool = Field(default=False, description="Enable A2A communication")
@@ -125,6 +375,45 @@ class Settings(BaseSettings):
         description="OTLP endpoint URL (e.g., http://localhost:4318/v1/traces)"
     )
     enable_caching: bool = Field(default=True, description="Enable caching")
+    llm_cache_max_entries: int = Field(default=2000, ge=1, description="Max entries in LLM response cache")
+    llm_cache_max_bytes: int = Field(
+        default=64 * 1024 * 1024,
+        ge=1024,
+        description="Max size of LLM response cache in bytes"
+    )
+    llm_cache_ttl_seconds: int = Field(default=86400, ge=1, description="LLM response cache TTL (seconds)")
+    llm_persistent_cache_enabled: bool = Field(
+        default=False,
+        description="Persist deterministic LLM responses in the database (shared between workers and restarts)"
+    )
+    llm_persistent_cache_url: Optional[str] = Field(
+        default=None,
+        description="Separate database URL for the persistent LLM cache (e.g. sqlite:///cache/llm.db), main DB if empty"
+    )
+    llm_persistent_cache_deterministic_only: bool = Field(
+        default=True,
+        description="Persist only temperature=0 responses"
+    )
+    llm_persistent_cache_ttl_seconds: int = Field(
+        default=7 * 86400,
+        ge=60,
+        description="Persistent LLM cache TTL (seconds)"
+    )
+    llm_persistent_cache_max_bytes: int = Field(
+        default=512 * 1024 * 1024,
+        ge=1024 * 1024,
+        description="Max total compressed size of persistent LLM cache in bytes"
+    )
+    llm_persistent_cache_flush_interval_seconds: float = Field(
+        default=2.0,
+        gt=0.0,
+        description="Interval between write-behind flushes to the persistent LLM cache (seconds)"
+    )
+    llm_persistent_cache_cleanup_interval_seconds: float = Field(
+        default=600.0,
+        gt=0.0,
+        description="Interval between expired/oversize cleanups of the persistent LLM cache (seconds)"
+    )
     
     # ========================================================================
     # ГЛОБАЛЬНЫЕ ОГРАНИЧЕНИЯ ДЛЯ ЛЛМ И КОДА (СТОПОРЫ)
@@ -264,6 +553,11 @@ class Settings(BaseSettings):
             f"@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
         )
     
+    @property
+    def async_database_url(self) -> str:
+        """Database URL for the asyncpg driver"""
+        return self.database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    
     @property
     def ollama_instance_1(self) -> OllamaInstanceConfig:
         """Get first Ollama instance config"""
@@ -1,116 +1,60 @@
 """
 Database configuration and session management
+
+Two engines share the same database and models:
+- the synchronous psycopg2 engine (get_db / SessionLocal) used by most
+  services and background jobs;
+- an asyncpg engine (get_async_db / AsyncSession) for routes on the event
+  loop's hot path (chat, chat sessions, workflow events, memory search,
+  dashboard), so their queries do not block concurrent streams and
+  websockets. Routes move to it one by one; sync services keep working.
 """
 import logging
 import time
-from typing import Generator, Optional
+from typing import AsyncGenerator, Generator, Optional
 
 from app.core.config import get_settings
+from app.core.db_metrics import classify_statement
 from app.core.logging_config import LoggingConfig
-from app.core.metrics import (db_connection_pool_overflow,
-                              db_connection_pool_size, db_queries_total,
-                              db_query_duration_seconds)
+from app.core.metrics import db_queries_total, db_query_duration_seconds
+from app.core.slow_queries import get_slow_query_recorder
 from sqlalchemy import create_engine, event
 from sqlalchemy import text as sa_text
+from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession,
+                                    async_sessionmaker, create_async_engine)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import Session, sessionmaker
 
 # Lazy initialization - don't create engine at module level
 _engine: Optional[create_engine] = None
 _SessionLocal: Optional[sessionmaker] = None
+_async_engine: Optional[AsyncEngine] = None
+_AsyncSessionLocal: Optional[async_sessionmaker] = None
 
 # Base class for models (can be created immediately)
 Base = declarative_base()
 
 
 def _setup_db_metrics(engine):
-    """Setup SQLAlchemy event listeners for database metrics"""
+    """Setup SQLAlchemy event listeners for query metrics (pool gauges: see db_metrics)"""
+    slow_queries = get_slow_query_recorder()
     
     @event.listens_for(engine, "before_cursor_execute")
     def receive_before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
         """Record query start time"""
-        conn.info.setdefault('query_start_time', []).append(time.time())
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
     
     @event.listens_for(engine, "after_cursor_execute")
     def receive_after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
         """Record query metrics"""
         if conn.info.get('query_start_time'):
-            start_time = conn.info['query_start_time'].pop()
-            duration = time.time() - start_time
-            
-            # Extract query type (SELECT, INSERT, UPDATE, DELETE)
-            query_type = statement.strip().split()[0].upper() if statement.strip() else "UNKNOWN"
-            # Normalize to lowercase for labels
-            operation = query_type.lower()
-            
-            # Try to extract table name from statement (basic parsing)
-            table = "unknown"
-            if operation in ['select', 'insert', 'update', 'delete']:
-                # Simple table name extraction (works for most cases)
-                words = statement.strip().split()
-                if len(words) > 1:
-                    if operation == 'select':
-                        # SELECT ... FROM table
-                        from_idx = -1
-                        for i, word in enumerate(words):
-                            if word.upper() == 'FROM':
-                                from_idx = i
-                                break
-                        if from_idx >= 0 and from_idx + 1 < len(words):
-                            table = words[from_idx + 1].lower().strip(';')
-                    elif operation == 'insert':
-                        # INSERT INTO table
-                        into_idx = -1
-                        for i, word in enumerate(words):
-                            if word.upper() == 'INTO':
-                                into_idx = i
-                                break
-                        if into_idx >= 0 and into_idx + 1 < len(words):
-                            table = words[into_idx + 1].lower().strip(';')
-                    elif operation in ['update', 'delete']:
-                        # UPDATE table / DELETE FROM table
-                        if operation == 'update':
-                            table = words[1].lower().strip(';')
-                        else:
-                            # DELETE FROM table
-                            from_idx = -1
-                            for i, word in enumerate(words):
-                                if word.upper() == 'FROM':
-                                    from_idx = i
-                                    break
-                            if from_idx >= 0 and from_idx + 1 < len(words):
-                                table = words[from_idx + 1].lower().strip(';')
-            
-            # Record metrics
+            duration = time.perf_counter() - conn.info['query_start_time'].pop()
+            operation, table = classify_statement(statement)
             db_queries_total.labels(operation=operation, table=table).inc()
             db_query_duration_seconds.labels(operation=operation, table=table).observe(duration)
-    
-    @event.listens_for(engine, "connect")
-    def receive_connect(dbapi_conn, connection_record):
-        """Update connection pool metrics on connect"""
-        pool = engine.pool
-        # Update pool size metrics
-        db_connection_pool_size.labels(state="active").set(pool.checkedout())
-        db_connection_pool_size.labels(state="idle").set(pool.size() - pool.checkedout())
-        db_connection_pool_overflow.set(pool.overflow())
-    
-    @event.listens_for(engine, "checkout")
-    def receive_checkout(dbapi_conn, connection_record, connection_proxy):
-        """Update connection pool metrics on checkout"""
-        pool = engine.pool
-        # Update pool size metrics
-        db_connection_pool_size.labels(state="active").set(pool.checkedout())
-        db_connection_pool_size.labels(state="idle").set(pool.size() - pool.checkedout())
-        db_connection_pool_overflow.set(pool.overflow())
-    
-    @event.listens_for(engine, "checkin")
-    def receive_checkin(dbapi_conn, connection_record):
-        """Update connection pool metrics on checkin"""
-        pool = engine.pool
-        # Update pool size metrics
-        db_connection_pool_size.labels(state="active").set(pool.checkedout())
-        db_connection_pool_size.labels(state="idle").set(pool.size() - pool.checkedout())
-        db_connection_pool_overflow.set(pool.overflow())
+            if duration >= slow_queries.threshold_seconds:
+                # EXPLAINs run on the sync (psycopg2) engine, also for asyncpg statements
+                slow_queries.record(statement, parameters, duration, operation, table, executemany, get_engine())
 
 
 def get_engine():
@@ -192,3 +136,55 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         db.close()
 
+
+def get_async_engine() -> AsyncEngine:
+    """Get or create asyncpg database engine (lazy initialization)"""
+    global _async_engine
+    if _async_engine is None:
+        settings = get_settings()
+        LoggingConfig.configure()
+        url = settings.async_database_url
+        _async_engine = create_async_engine(
+            url,
+            pool_size=settings.database_async_pool_size,
+            max_overflow=settings.database_async_max_overflow,
+            pool_pre_ping=True,
+            echo=settings.log_sqlalchemy,
+            connect_args={
+                "timeout": 5,  # 5 second timeout for connection
+                "server_settings": {"statement_timeout": "5000"}  # 5 second timeout for queries
+            } if url.startswith("postgresql+asyncpg") else {}
+        )
+        # Same query metrics as the sync engine (events fire on the sync facade)
+        _setup_db_metrics(_async_engine.sync_engine)
+    return _async_engine
+
+
+def get_async_session_local() -> async_sessionmaker:
+    """Get or create async session factory (lazy initialization)"""
+    global _AsyncSessionLocal
+    if _AsyncSessionLocal is None:
+        _AsyncSessionLocal = async_sessionmaker(
+            bind=get_async_engine(),
+            autoflush=False,
+            expire_on_commit=False  # Attributes stay readable after commit without lazy IO
+        )
+    return _AsyncSessionLocal
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for getting async database session
+    """
+    AsyncSessionLocal = get_async_session_local()
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def close_async_engine():
+    """Dispose async engine connections (called on application shutdown)"""
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _AsyncSessionLocal = None
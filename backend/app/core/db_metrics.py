@@ -0,0 +1,137 @@
+"""
+Cheap database metrics
+
+Every statement is labelled with its operation and table. The SQL text is
+mostly compiled once by SQLAlchemy and reused, so the classification is
+cached per statement text (bounded LRU); statements too long to be worth
+caching (inlined literals) are classified with anchored regexes over a
+bounded prefix. Connection pool gauges are sampled on a timer instead of
+in checkout/checkin listeners, so the per-query cost is two clock reads and
+one cache lookup.
+"""
+import asyncio
+import re
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from app.core.logging_config import LoggingConfig
+from app.core.metrics import (db_connection_pool_overflow,
+                              db_connection_pool_size)
+
+logger = LoggingConfig.get_logger(__name__)
+
+# Distinct statements kept in the classification cache
+STATEMENT_CACHE_SIZE = 2048
+
+# Longer statements are not cached and only their prefix is parsed
+MAX_CACHED_STATEMENT_LENGTH = 8192
+
+_OPERATION_RE = re.compile(r"\s*(\w+)")
+_TABLE_RES = {
+    "select": re.compile(r"\bFROM\s+([^\s(),;]+)", re.IGNORECASE),
+    "delete": re.compile(r"\bFROM\s+([^\s(),;]+)", re.IGNORECASE),
+    "insert": re.compile(r"\bINTO\s+([^\s(),;]+)", re.IGNORECASE),
+    "update": re.compile(r"\s*UPDATE\s+([^\s(),;]+)", re.IGNORECASE),
+}
+
+
+def _classify(statement: str) -> Tuple[str, str]:
+    match = _OPERATION_RE.match(statement)
+    if not match:
+        return "unknown", "unknown"
+    operation = match.group(1).lower()
+    table_re = _TABLE_RES.get(operation)
+    table_match = table_re.search(statement) if table_re else None
+    table = table_match.group(1).strip('"').lower() if table_match else "unknown"
+    return operation, table
+
+
+_classify_cached = lru_cache(maxsize=STATEMENT_CACHE_SIZE)(_classify)
+
+
+def classify_statement(statement: str) -> Tuple[str, str]:
+    """
+    Operation and table of a SQL statement, e.g. ("select", "agent_memories")
+
+    Args:
+        statement: SQL text as sent to the driver
+
+    Returns:
+        (operation, table) in lower case; "unknown" when not recognised
+    """
+    if len(statement) > MAX_CACHED_STATEMENT_LENGTH:
+        return _classify(statement[:MAX_CACHED_STATEMENT_LENGTH])
+    return _classify_cached(statement)
+
+
+def update_pool_metrics():
+    """Set pool gauges from the engines created so far (sync and async pools summed)"""
+    from app.core import database
+
+    active = idle = overflow = 0
+    for engine in (database._engine, database._async_engine):
+        if engine is None:
+            continue
+        pool = getattr(engine, "sync_engine", engine).pool
+        try:
+            active += pool.checkedout()
+            idle += pool.checkedin()
+            overflow += max(pool.overflow(), 0)
+        except AttributeError:
+            continue  # Pools without counters (e.g. NullPool)
+    db_connection_pool_size.labels(state="active").set(active)
+    db_connection_pool_size.labels(state="idle").set(idle)
+    db_connection_pool_overflow.set(overflow)
+
+
+class PoolMetricsReporter:
+    """Background task sampling connection pool gauges"""
+
+    def __init__(self, interval_seconds: float = 15.0):
+        self.interval_seconds = interval_seconds
+        self.running = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start periodic sampling"""
+        if self.running:
+            logger.warning("Pool metrics reporter is already running")
+            return
+        self.running = True
+        logger.info("Starting pool metrics reporter...")
+        self._task = asyncio.create_task(self._report_loop())
+
+    async def stop(self):
+        """Stop periodic sampling"""
+        self.running = False
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+        logger.info("Stopping pool metrics reporter...")
+
+    async def _report_loop(self):
+        while self.running:
+            try:
+                update_pool_metrics()
+            except Exception as e:
+                logger.warning(f"Error updating pool metrics: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+
+# Global reporter instance
+_pool_metrics_reporter: Optional[PoolMetricsReporter] = None
+
+
+def get_pool_metrics_reporter() -> PoolMetricsReporter:
+    """Get process-wide pool metrics reporter"""
+    global _pool_metrics_reporter
+    if _pool_metrics_reporter is None:
+        from app.core.config import get_settings
+        _pool_metrics_reporter = PoolMetricsReporter(
+            interval_seconds=get_settings().database_pool_metrics_interval_seconds
+        )
+    return _pool_metrics_reporter
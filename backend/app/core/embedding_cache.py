@@ -0,0 +1,146 @@
+"""
+Process-wide embedding cache
+
+Keyed by (model, sha256(text)) so the cache never holds the texts
+themselves, and stores vectors as compact float32 arrays (4 bytes per
+dimension instead of a list of Python floats). Bounded by a byte budget
+with LRU eviction and shared by every EmbeddingService instance.
+"""
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from app.core.config import get_settings
+from app.core.logging_config import LoggingConfig
+from app.core.metrics import (embedding_cache_bytes, embedding_cache_entries,
+                              embedding_cache_evictions_total,
+                              embedding_cache_hits_total,
+                              embedding_cache_misses_total)
+
+logger = LoggingConfig.get_logger(__name__)
+
+# Approximate per-entry bookkeeping overhead (key tuple, digest, array header, OrderedDict node)
+ENTRY_OVERHEAD_BYTES = 250
+
+EmbeddingKey = Tuple[str, bytes]
+
+
+def embedding_key(model: str, text: str) -> EmbeddingKey:
+    """Cache key of a text embedded with a model"""
+    return model, hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """LRU cache of float32 embedding vectors with a byte budget"""
+
+    def __init__(self, max_bytes: int, enabled: bool = True):
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._entries: "OrderedDict[EmbeddingKey, array]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _entry_size(vector: array) -> int:
+        return len(vector) * vector.itemsize + ENTRY_OVERHEAD_BYTES
+
+    def get(self, model: str, text: str) -> Optional[array]:
+        """
+        Get cached vector (None on miss)
+
+        The returned array is shared with the cache and must not be modified.
+        """
+        if not self.enabled:
+            return None
+        key = embedding_key(model, text)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                embedding_cache_misses_total.inc()
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            embedding_cache_hits_total.inc()
+            return vector
+
+    def put(self, model: str, text: str, vector: Sequence[float]) -> array:
+        """
+        Store vector as float32, evicting least recently used entries over budget
+
+        Returns:
+            The stored float32 array
+        """
+        stored = vector if isinstance(vector, array) and vector.typecode == "f" else array("f", vector)
+        if not self.enabled:
+            return stored
+        size = self._entry_size(stored)
+        if size > self.max_bytes:
+            return stored
+        key = embedding_key(model, text)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= self._entry_size(previous)
+            self._entries[key] = stored
+            self._bytes += size
+            while self._entries and self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= self._entry_size(evicted)
+                self.evictions += 1
+                embedding_cache_evictions_total.inc()
+            self._update_gauges()
+        return stored
+
+    def contains(self, model: str, text: str) -> bool:
+        """Check presence without touching LRU order or hit statistics"""
+        return embedding_key(model, text) in self._entries
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._update_gauges()
+
+    def _update_gauges(self):
+        embedding_cache_entries.set(len(self._entries))
+        embedding_cache_bytes.set(self._bytes)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+# Global cache instance
+_embedding_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Get process-wide embedding cache"""
+    global _embedding_cache
+    if _embedding_cache is None:
+        settings = get_settings()
+        _embedding_cache = EmbeddingCache(
+            max_bytes=settings.embedding_cache_max_bytes,
+            enabled=settings.enable_caching,
+        )
+    return _embedding_cache
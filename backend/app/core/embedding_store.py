@@ -0,0 +1,225 @@
+"""
+Persistent content-addressed embedding store
+
+Second tier behind the in-process EmbeddingCache: vectors are stored in the
+database keyed by (model, sha256(text), dimension), so identical text is
+embedded only once across restarts, worker processes, memories, plan
+templates and migration scripts. Lookups and inserts are batched.
+"""
+import asyncio
+import hashlib
+import sys
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from app.core.config import get_settings
+from app.core.logging_config import LoggingConfig
+from app.core.metrics import embedding_store_operations_total
+from app.models.embedding_record import EmbeddingRecord
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+logger = LoggingConfig.get_logger(__name__)
+
+# Keys per SELECT ... IN (...) / rows per INSERT statement
+BATCH_SIZE = 500
+
+
+def content_hash(text: str) -> str:
+    """sha256 hex digest of a text"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def encode_vector(vector: Sequence[float]) -> bytes:
+    """Encode vector as little-endian float32"""
+    data = vector if isinstance(vector, array) and vector.typecode == "f" else array("f", vector)
+    if sys.byteorder == "big":
+        data = array("f", data)
+        data.byteswap()
+    return data.tobytes()
+
+
+def decode_vector(payload: bytes) -> array:
+    """Decode little-endian float32 vector"""
+    data = array("f")
+    data.frombytes(payload)
+    if sys.byteorder == "big":
+        data.byteswap()
+    return data
+
+
+class EmbeddingStore:
+    """
+    Database-backed embedding store.
+
+    Uses the main database by default; a separate database (e.g. a local
+    SQLite file) can be configured with EMBEDDING_STORE_URL, in which case
+    the table is created on first use. Errors are logged and treated as
+    misses, so embedding generation never fails because of the store.
+    """
+
+    def __init__(self, enabled: bool = True, database_url: Optional[str] = None):
+        self.enabled = enabled
+        self.database_url = database_url
+        self._session_factory: Optional[sessionmaker] = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+
+    def _get_session(self) -> Session:
+        if self._session_factory is None:
+            if self.database_url:
+                connect_args = {"check_same_thread": False} if self.database_url.startswith("sqlite") else {}
+                engine = create_engine(self.database_url, pool_pre_ping=True, connect_args=connect_args)
+                EmbeddingRecord.__table__.create(bind=engine, checkfirst=True)
+                self._session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+            else:
+                from app.core.database import get_session_local
+                self._session_factory = get_session_local()
+        return self._session_factory()
+
+    async def get_many(
+        self,
+        model: str,
+        texts: Iterable[str],
+        dimension: Optional[int] = None
+    ) -> Dict[str, array]:
+        """
+        Look up stored vectors
+
+        Args:
+            model: Embedding model
+            texts: Texts to look up
+            dimension: Required vector dimension (any if None)
+
+        Returns:
+            Text -> float32 vector for the texts that are stored
+        """
+        if not self.enabled:
+            return {}
+        by_hash: Dict[str, List[str]] = {}
+        for text in texts:
+            by_hash.setdefault(content_hash(text), []).append(text)
+        if not by_hash:
+            return {}
+        try:
+            rows = await asyncio.to_thread(self._read, model, list(by_hash), dimension)
+        except Exception as e:
+            self.errors += 1
+            embedding_store_operations_total.labels(operation="error").inc()
+            logger.debug(f"Embedding store read failed: {e}")
+            return {}
+
+        found: Dict[str, array] = {}
+        for digest, payload in rows.items():
+            vector = decode_vector(payload)
+            for text in by_hash[digest]:
+                found[text] = vector
+        hits = len(rows)
+        self.hits += hits
+        self.misses += len(by_hash) - hits
+        if hits:
+            embedding_store_operations_total.labels(operation="hit").inc(hits)
+        if len(by_hash) - hits:
+            embedding_store_operations_total.labels(operation="miss").inc(len(by_hash) - hits)
+        return found
+
+    def _read(self, model: str, digests: List[str], dimension: Optional[int]) -> Dict[str, bytes]:
+        session = self._get_session()
+        try:
+            rows: Dict[str, bytes] = {}
+            for start in range(0, len(digests), BATCH_SIZE):
+                query = session.query(EmbeddingRecord.content_hash, EmbeddingRecord.vector).filter(
+                    EmbeddingRecord.model == model,
+                    EmbeddingRecord.content_hash.in_(digests[start:start + BATCH_SIZE]),
+                )
+                if dimension is not None:
+                    query = query.filter(EmbeddingRecord.dimension == dimension)
+                for digest, payload in query.all():
+                    rows[digest] = payload
+            return rows
+        finally:
+            session.close()
+
+    async def put_many(self, model: str, vectors: Dict[str, Sequence[float]]):
+        """
+        Store vectors (existing entries are kept)
+
+        Args:
+            model: Embedding model
+            vectors: Text -> vector
+        """
+        if not self.enabled or not vectors:
+            return
+        records = {}
+        for text, vector in vectors.items():
+            payload = encode_vector(vector)
+            digest = content_hash(text)
+            records[digest] = {
+                "model": model,
+                "content_hash": digest,
+                "dimension": len(payload) // 4,
+                "vector": payload,
+            }
+        try:
+            await asyncio.to_thread(self._write, list(records.values()))
+        except Exception as e:
+            self.errors += 1
+            embedding_store_operations_total.labels(operation="error").inc()
+            logger.debug(f"Embedding store write failed: {e}")
+            return
+        self.writes += len(records)
+        embedding_store_operations_total.labels(operation="write").inc(len(records))
+
+    def _write(self, records: List[Dict[str, object]]):
+        session = self._get_session()
+        try:
+            dialect = session.get_bind().dialect.name
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert
+            elif dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                insert = None
+            for start in range(0, len(records), BATCH_SIZE):
+                chunk = records[start:start + BATCH_SIZE]
+                if insert is not None:
+                    session.execute(insert(EmbeddingRecord).values(chunk).on_conflict_do_nothing())
+                else:
+                    for record in chunk:
+                        session.merge(EmbeddingRecord(**record))
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def get_stats(self) -> Dict[str, object]:
+        """Get store statistics"""
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "errors": self.errors,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+# Global store instance
+_embedding_store: Optional[EmbeddingStore] = None
+
+
+def get_embedding_store() -> EmbeddingStore:
+    """Get process-wide embedding store"""
+    global _embedding_store
+    if _embedding_store is None:
+        settings = get_settings()
+        _embedding_store = EmbeddingStore(
+            enabled=settings.embedding_store_enabled,
+            database_url=settings.embedding_store_url,
+        )
+    return _embedding_store
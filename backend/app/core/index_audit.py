@@ -0,0 +1,95 @@
+"""
+Index usage audit
+
+Reads pg_stat_user_indexes joined with pg_index to list every index with
+its columns, size and scan count since the last statistics reset, and
+flags:
+- unused indexes: never scanned, not backing a primary key or unique
+  constraint (every insert still pays for them);
+- redundant indexes: plain btree indexes whose columns are a leading prefix
+  of another btree index on the same table with the same predicate.
+
+Scan counts are per server since pg_stat_reset(); judge unused indexes only
+after a representative period of production traffic.
+"""
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+INDEX_USAGE_SQL = """
+SELECT
+    s.relname AS table,
+    s.indexrelname AS name,
+    am.amname AS method,
+    ARRAY(
+        SELECT pg_get_indexdef(i.indexrelid, k, true)
+        FROM generate_subscripts(i.indkey, 1) AS k
+        ORDER BY k
+    ) AS columns,
+    pg_get_expr(i.indpred, i.indrelid) AS predicate,
+    i.indisunique AS is_unique,
+    i.indisprimary AS is_primary,
+    s.idx_scan AS scans,
+    s.idx_tup_read AS tuples_read,
+    pg_relation_size(s.indexrelid) AS size_bytes
+FROM pg_stat_user_indexes s
+JOIN pg_index i ON i.indexrelid = s.indexrelid
+JOIN pg_class c ON c.oid = s.indexrelid
+JOIN pg_am am ON am.oid = c.relam
+WHERE s.schemaname = :schema
+  AND (CAST(:table AS text) IS NULL OR s.relname = CAST(:table AS text))
+ORDER BY s.relname, s.indexrelname
+"""
+
+
+def get_index_usage(db: Session, table: Optional[str] = None, schema: str = "public") -> List[Dict[str, Any]]:
+    """
+    Indexes with their columns, size and scan statistics
+
+    Args:
+        db: Database session (PostgreSQL)
+        table: Only indexes of this table
+        schema: Schema to inspect
+
+    Returns:
+        One dict per index
+    """
+    rows = db.execute(text(INDEX_USAGE_SQL), {"schema": schema, "table": table}).mappings().all()
+    return [dict(row, columns=list(row["columns"])) for row in rows]
+
+
+def find_unused_indexes(indexes: List[Dict[str, Any]], max_scans: int = 0) -> List[Dict[str, Any]]:
+    """Indexes scanned at most max_scans times that do not enforce a constraint, largest first"""
+    unused = [
+        index for index in indexes
+        if index["scans"] <= max_scans and not index["is_unique"] and not index["is_primary"]
+    ]
+    return sorted(unused, key=lambda index: index["size_bytes"], reverse=True)
+
+
+def find_redundant_indexes(indexes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Btree indexes covered by another index on the same table
+
+    Returns:
+        {"index": ..., "covered_by": ...} pairs
+    """
+    redundant = []
+    for index in indexes:
+        if index["method"] != "btree" or index["is_unique"] or index["is_primary"]:
+            continue
+        for other in indexes:
+            if other is index or other["table"] != index["table"] or other["method"] != "btree":
+                continue
+            if other["predicate"] != index["predicate"]:
+                continue
+            columns, other_columns = index["columns"], other["columns"]
+            if other_columns[:len(columns)] != columns:
+                continue
+            # Identical indexes: report only the later name
+            if len(other_columns) == len(columns) and other["name"] > index["name"]:
+                continue
+            redundant.append({"index": index, "covered_by": other})
+            break
+    return redundant
@@ -0,0 +1,288 @@
+"""
+Priority-aware admission control for LLM calls
+
+Limits the number of concurrent requests sent to each Ollama server and
+admits waiting requests by priority class (interactive chat > planning >
+execution > background) instead of letting Ollama queue everything FIFO.
+Waiting queues are bounded and every waiter has a deadline after which it
+is rejected.
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.logging_config import LoggingConfig
+from app.core.metrics import (llm_admission_in_flight,
+                              llm_admission_queue_depth,
+                              llm_admission_rejected_total,
+                              llm_admission_wait_seconds)
+from app.core.ollama_transport import strip_api_suffix
+
+logger = LoggingConfig.get_logger(__name__)
+
+
+class RequestPriority(IntEnum):
+    """Priority class of an LLM request (lower value is admitted first)"""
+    INTERACTIVE = 0
+    PLANNING = 1
+    EXECUTION = 2
+    BACKGROUND = 3
+
+    @property
+    def label(self) -> str:
+        return self.name.lower()
+
+    @classmethod
+    def for_task_type(cls, task_type: Any) -> "RequestPriority":
+        """Default priority of a request that did not specify one"""
+        value = getattr(task_type, "value", task_type)
+        return cls.PLANNING if value == "planning" else cls.EXECUTION
+
+    @classmethod
+    def parse(cls, value: Any) -> Optional["RequestPriority"]:
+        """Parse priority from enum, int or name (None if not given)"""
+        if value is None or isinstance(value, cls):
+            return value
+        if isinstance(value, str):
+            return cls[value.strip().upper()]
+        return cls(int(value))
+
+
+class AdmissionRejected(Exception):
+    """Request was not admitted (wait queue full or deadline exceeded)"""
+
+    def __init__(self, server_url: str, priority: RequestPriority, reason: str):
+        self.server_url = server_url
+        self.priority = priority
+        self.reason = reason
+        super().__init__(
+            f"LLM request rejected by admission control for {server_url} "
+            f"(priority={priority.label}, reason={reason})"
+        )
+
+
+class ConcurrencyLimiter:
+    """
+    Concurrency limit with a priority wait queue for one server (or server/model).
+
+    A released slot is handed directly to the highest-priority waiter
+    (FIFO within a class), so late arrivals cannot overtake the queue.
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int):
+        self.name = name
+        self.limit = max(1, limit)
+        self.max_queue = max_queue
+        self.in_flight = 0
+        # Heap of [priority, seq, future]; entries with a done future are stale
+        self._heap: List[list] = []
+        self._seq = itertools.count()
+        self._queued: Dict[RequestPriority, int] = {p: 0 for p in RequestPriority}
+
+    def queue_depth(self, priority: Optional[RequestPriority] = None) -> int:
+        if priority is None:
+            return sum(self._queued.values())
+        return self._queued[priority]
+
+    def set_limit(self, limit: int):
+        """Change limit, admitting waiters if it grew"""
+        self.limit = max(1, limit)
+        self._admit_waiting()
+
+    async def acquire(self, priority: RequestPriority, timeout: float) -> float:
+        """
+        Wait for a slot
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            AdmissionRejected: queue for the priority class is full or deadline exceeded
+        """
+        if self.in_flight < self.limit and not self.queue_depth():
+            self.in_flight += 1
+            return 0.0
+        if self._queued[priority] >= self.max_queue:
+            raise AdmissionRejected(self.name, priority, "queue_full")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._heap, [int(priority), next(self._seq), future])
+        self._set_queued(priority, 1)
+        # Free slots may exist while expired waiters have not left the queue yet
+        self._admit_waiting()
+        deadline = loop.call_later(
+            timeout,
+            lambda: future.done() or future.set_exception(AdmissionRejected(self.name, priority, "deadline"))
+        )
+        started = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                # Slot was handed over right before cancellation: pass it on
+                self.release()
+            raise
+        finally:
+            deadline.cancel()
+            self._set_queued(priority, -1)
+        return time.monotonic() - started
+
+    def release(self):
+        """Release a slot (handed to the next waiter if any)"""
+        if not self._grant_next():
+            self.in_flight = max(0, self.in_flight - 1)
+
+    def _admit_waiting(self):
+        while self.in_flight < self.limit and self._grant_next():
+            self.in_flight += 1
+
+    def _grant_next(self) -> bool:
+        while self._heap:
+            _, _, future = heapq.heappop(self._heap)
+            if not future.done():
+                future.set_result(None)
+                return True
+        return False
+
+    def _set_queued(self, priority: RequestPriority, delta: int):
+        self._queued[priority] += delta
+        llm_admission_queue_depth.labels(server_url=self.name, priority=priority.label).set(self._queued[priority])
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queued": {p.label: n for p, n in self._queued.items()},
+        }
+
+
+class LLMAdmissionController:
+    """
+    Per-server admission layer used by OllamaClient.
+
+    The concurrency limit of a server comes from LLM_ADMISSION_LIMITS
+    (keys "url" or "url|model"), then from max_concurrent of the database
+    server or .env instance, then from LLM_ADMISSION_DEFAULT_CONCURRENCY.
+    A "url|model" override gives that model its own limiter.
+    """
+
+    def __init__(self):
+        settings = get_settings()
+        self.enabled = settings.llm_admission_enabled
+        self.default_concurrency = settings.llm_admission_default_concurrency
+        self.max_queue = settings.llm_admission_max_queue
+        self.timeouts = {
+            RequestPriority.INTERACTIVE: float(settings.llm_admission_timeout_interactive_seconds),
+            RequestPriority.PLANNING: float(settings.llm_admission_timeout_planning_seconds),
+            RequestPriority.EXECUTION: float(settings.llm_admission_timeout_execution_seconds),
+            RequestPriority.BACKGROUND: float(settings.llm_admission_timeout_background_seconds),
+        }
+        self.overrides = self._parse_overrides(settings.llm_admission_limits)
+        self._limiters: Dict[str, ConcurrencyLimiter] = {}
+
+    @staticmethod
+    def _parse_overrides(raw: Optional[str]) -> Dict[str, int]:
+        if not raw:
+            return {}
+        try:
+            overrides = {}
+            for key, limit in json.loads(raw).items():
+                url, _, model = key.partition("|")
+                normalized = strip_api_suffix(url)
+                overrides[f"{normalized}|{model.strip()}" if model else normalized] = int(limit)
+            return overrides
+        except Exception as e:
+            logger.warning(f"Invalid LLM_ADMISSION_LIMITS, ignored: {e}")
+            return {}
+
+    def _resolve(self, server_url: str, model: Optional[str]) -> Tuple[str, int]:
+        """Limiter key and concurrency limit for a request"""
+        base_url = strip_api_suffix(server_url)
+        if model:
+            model_key = f"{base_url}|{model.strip()}"
+            if model_key in self.overrides:
+                return model_key, self.overrides[model_key]
+        if base_url in self.overrides:
+            return base_url, self.overrides[base_url]
+
+        from app.core.ollama_server_state import get_server_state_registry
+        state = get_server_state_registry().get_state(base_url)
+        if state is not None and state.max_concurrent:
+            return base_url, state.max_concurrent
+        try:
+            for instance in get_settings().ollama_instances:
+                if instance.url and strip_api_suffix(instance.url) == base_url:
+                    return base_url, instance.max_concurrent
+        except Exception:
+            pass
+        return base_url, self.default_concurrency
+
+    def get_limiter(self, server_url: str, model: Optional[str] = None) -> ConcurrencyLimiter:
+        key, limit = self._resolve(server_url, model)
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limiter = ConcurrencyLimiter(key, limit, self.max_queue)
+            self._limiters[key] = limiter
+        elif limiter.limit != limit:
+            limiter.set_limit(limit)
+        return limiter
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        server_url: str,
+        model: Optional[str],
+        priority: RequestPriority
+    ) -> AsyncIterator[None]:
+        """
+        Hold a concurrency slot on a server for the duration of a request
+
+        Raises:
+            AdmissionRejected: request was not admitted in time
+        """
+        if not self.enabled:
+            yield
+            return
+        limiter = self.get_limiter(server_url, model)
+        try:
+            waited = await limiter.acquire(priority, self.timeouts[priority])
+        except AdmissionRejected as e:
+            llm_admission_rejected_total.labels(priority=priority.label, reason=e.reason).inc()
+            logger.warning(
+                "LLM request rejected by admission control",
+                extra={"server_url": limiter.name, "priority": priority.label, "reason": e.reason}
+            )
+            raise
+        llm_admission_wait_seconds.labels(priority=priority.label).observe(waited)
+        llm_admission_in_flight.labels(server_url=limiter.name).set(limiter.in_flight)
+        try:
+            yield
+        finally:
+            limiter.release()
+            llm_admission_in_flight.labels(server_url=limiter.name).set(limiter.in_flight)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-server admission statistics"""
+        return {
+            "enabled": self.enabled,
+            "servers": {key: limiter.get_stats() for key, limiter in self._limiters.items()},
+        }
+
+
+# Global admission controller
+_admission_controller: Optional[LLMAdmissionController] = None
+
+
+def get_admission_controller() -> LLMAdmissionController:
+    """Get process-wide LLM admission controller"""
+    global _admission_controller
+    if _admission_controller is None:
+        _admission_controller = LLMAdmissionController()
+    return _admission_controller
@@ -0,0 +1,177 @@
+"""
+Process-wide LLM response cache
+
+Bounded by entry count and byte size with LRU eviction and TTL sweeping.
+Shared by every OllamaClient instance in the process.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional
+
+from app.core.config import get_settings
+from app.core.logging_config import LoggingConfig
+from app.core.metrics import (llm_cache_bytes, llm_cache_entries,
+                              llm_cache_evictions_total, llm_cache_hits_total,
+                              llm_cache_misses_total)
+
+logger = LoggingConfig.get_logger(__name__)
+
+# Approximate per-entry bookkeeping overhead (key, tuple, OrderedDict node)
+ENTRY_OVERHEAD_BYTES = 200
+
+
+class LLMCacheEntry(NamedTuple):
+    """Cached LLM response"""
+    response: str
+    model: str
+    expires_at: float  # time.monotonic() deadline
+    size: int  # Accounted size in bytes
+
+
+class LLMResponseCache:
+    """
+    LRU + TTL cache for LLM responses with entry-count and byte budgets.
+
+    Expired entries are dropped on read and by a periodic sweep on the write
+    path, so memory stays bounded even for keys that are never read again.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        ttl_seconds: float,
+        sweep_interval_seconds: float = 60.0,
+        enabled: bool = True
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, LLMCacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._last_sweep = time.monotonic()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """Get cached response (None on miss or expiry)"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at < time.monotonic():
+                self._remove(key, reason="ttl")
+                entry = None
+            if entry is None:
+                self.misses += 1
+                llm_cache_misses_total.inc()
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            llm_cache_hits_total.inc()
+            return entry.response
+
+    def set(self, key: str, response: str, model: str, ttl_seconds: Optional[float] = None):
+        """Store response, evicting least recently used entries over budget"""
+        if not self.enabled:
+            return
+        size = len(response.encode("utf-8")) + len(key) + ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        now = time.monotonic()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = LLMCacheEntry(response=response, model=model, expires_at=now + ttl, size=size)
+            self._bytes += size
+            if now - self._last_sweep >= self.sweep_interval_seconds:
+                self._sweep_expired(now)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key, reason="lru")
+            self._update_gauges()
+
+    def delete(self, key: str):
+        """Remove entry if present"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self._update_gauges()
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._update_gauges()
+
+    def sweep_expired(self) -> int:
+        """Drop all expired entries, returns number removed"""
+        with self._lock:
+            removed = self._sweep_expired(time.monotonic())
+            self._update_gauges()
+            return removed
+
+    def _sweep_expired(self, now: float) -> int:
+        expired = [k for k, e in self._entries.items() if e.expires_at < now]
+        for key in expired:
+            self._remove(key, reason="ttl")
+        self._last_sweep = now
+        return len(expired)
+
+    def _remove(self, key: str, reason: Optional[str] = None):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        if reason:
+            self.evictions += 1
+            llm_cache_evictions_total.labels(reason=reason).inc()
+
+    def _update_gauges(self):
+        llm_cache_entries.set(len(self._entries))
+        llm_cache_bytes.set(self._bytes)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+# Global cache instance
+_llm_response_cache: Optional[LLMResponseCache] = None
+
+
+def get_llm_response_cache() -> LLMResponseCache:
+    """Get process-wide LLM response cache"""
+    global _llm_response_cache
+    if _llm_response_cache is None:
+        settings = get_settings()
+        _llm_response_cache = LLMResponseCache(
+            max_entries=settings.llm_cache_max_entries,
+            max_bytes=settings.llm_cache_max_bytes,
+            ttl_seconds=float(settings.llm_cache_ttl_seconds),
+            enabled=settings.enable_caching,
+        )
+    return _llm_response_cache
@@ -0,0 +1,269 @@
+"""
+Circuit breakers and retry policy for Ollama servers
+
+Each server has a circuit breaker in front of the retry loop: after a
+number of consecutive failures the circuit opens and requests to the
+server fail immediately (so callers fail over in milliseconds instead of
+burning their timeouts). After the open time one half-open probe request
+is let through; its success closes the circuit, its failure re-opens it
+for twice as long.
+
+Retries use jittered exponential backoff and draw from a process-wide
+retry budget, so a failing server cannot multiply the load by the number
+of attempts.
+"""
+import random
+import threading
+import time
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+from app.core.config import get_settings
+from app.core.logging_config import LoggingConfig
+from app.core.metrics import (llm_circuit_state, llm_circuit_transitions_total,
+                              llm_retries_total)
+from app.core.ollama_transport import strip_api_suffix
+
+logger = LoggingConfig.get_logger(__name__)
+
+
+class CircuitState(str, Enum):
+    """Circuit breaker state"""
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+
+
+_STATE_GAUGE_VALUES = {CircuitState.CLOSED: 0, CircuitState.HALF_OPEN: 1, CircuitState.OPEN: 2}
+
+
+class CircuitOpen(Exception):
+    """Request was rejected because the server's circuit is open"""
+
+    def __init__(self, server_url: str, retry_in_seconds: float):
+        self.server_url = server_url
+        self.retry_in_seconds = retry_in_seconds
+        super().__init__(
+            f"Circuit open for Ollama server {server_url} (next probe in {retry_in_seconds:.1f}s)"
+        )
+
+
+class CircuitBreaker:
+    """Closed/open/half-open circuit breaker of one server"""
+
+    def __init__(
+        self,
+        server_url: str,
+        failure_threshold: int = 5,
+        open_seconds: float = 10.0,
+        max_open_seconds: float = 300.0
+    ):
+        self.server_url = server_url
+        self.failure_threshold = failure_threshold
+        self.base_open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.open_seconds = open_seconds
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._probe_in_flight = False
+
+    def retry_in(self) -> float:
+        """Seconds until an open circuit lets a probe through"""
+        if self.state != CircuitState.OPEN or self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self.open_seconds - time.monotonic())
+
+    def is_open(self) -> bool:
+        """Whether requests would be rejected now (does not take the half-open probe)"""
+        if self.state == CircuitState.OPEN:
+            return self.retry_in() > 0
+        return self.state == CircuitState.HALF_OPEN and self._probe_in_flight
+
+    def acquire(self) -> bool:
+        """
+        Let a request through or raise CircuitOpen
+
+        In the half-open state only one probe request is let through at a time.
+
+        Returns:
+            True if the request is the half-open probe (release() it if it ends without an outcome)
+        """
+        if self.state == CircuitState.OPEN:
+            retry_in = self.retry_in()
+            if retry_in > 0:
+                raise CircuitOpen(self.server_url, retry_in)
+            self._transition(CircuitState.HALF_OPEN)
+        if self.state == CircuitState.HALF_OPEN:
+            if self._probe_in_flight:
+                raise CircuitOpen(self.server_url, 0.0)
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def release(self):
+        """Give back an unused half-open probe (request ended without an outcome)"""
+        self._probe_in_flight = False
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+        if self.state != CircuitState.CLOSED:
+            self.open_seconds = self.base_open_seconds
+            self._transition(CircuitState.CLOSED)
+
+    def record_failure(self, error: Optional[str] = None):
+        self.consecutive_failures += 1
+        self.last_error = error
+        if self.state == CircuitState.HALF_OPEN:
+            # Failed probe: stay away twice as long
+            self._probe_in_flight = False
+            self.open_seconds = min(self.max_open_seconds, self.open_seconds * 2)
+            self._open()
+        elif self.state == CircuitState.CLOSED and self.consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self):
+        self.opened_at = time.monotonic()
+        self._transition(CircuitState.OPEN)
+
+    def _transition(self, state: CircuitState):
+        if state == self.state:
+            return
+        logger.warning(
+            "Circuit breaker state change",
+            extra={
+                "server_url": self.server_url,
+                "from_state": self.state.value,
+                "to_state": state.value,
+                "consecutive_failures": self.consecutive_failures,
+                "open_seconds": self.open_seconds,
+                "last_error": self.last_error,
+            }
+        )
+        self.state = state
+        llm_circuit_state.labels(server_url=self.server_url).set(_STATE_GAUGE_VALUES[state])
+        llm_circuit_transitions_total.labels(server_url=self.server_url, state=state.value).inc()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "server_url": self.server_url,
+            "state": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_in_seconds": round(self.retry_in(), 1),
+            "last_error": self.last_error,
+        }
+
+
+class RetryPolicy:
+    """Jittered exponential backoff with a process-wide retry budget"""
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay_seconds: float = 0.5,
+        max_delay_seconds: float = 8.0,
+        budget_ratio: float = 0.2,
+        initial_tokens: float = 10.0
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.budget_ratio = budget_ratio
+        self.initial_tokens = initial_tokens
+        self.max_tokens = max(initial_tokens, 1.0) * 10
+        self._tokens = initial_tokens
+        self._lock = threading.Lock()
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number `attempt` (0-based), full jitter"""
+        cap = min(self.max_delay_seconds, self.base_delay_seconds * (2 ** attempt))
+        return random.uniform(0, cap)
+
+    def on_request(self):
+        """Earn retry budget for a request"""
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.budget_ratio)
+
+    def try_acquire(self) -> bool:
+        """Spend one retry token (False if the budget is exhausted)"""
+        with self._lock:
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+
+class CircuitBreakerRegistry:
+    """Circuit breakers of all Ollama servers plus the shared retry policy"""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        open_seconds: float = 10.0,
+        max_open_seconds: float = 300.0,
+        retry_policy: Optional[RetryPolicy] = None
+    ):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.retry_policy = retry_policy or RetryPolicy()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, server_url: str) -> CircuitBreaker:
+        server = strip_api_suffix(server_url)
+        breaker = self._breakers.get(server)
+        if breaker is None:
+            breaker = self._breakers[server] = CircuitBreaker(
+                server,
+                failure_threshold=self.failure_threshold,
+                open_seconds=self.open_seconds,
+                max_open_seconds=self.max_open_seconds,
+            )
+        return breaker
+
+    def is_open(self, server_url: str) -> bool:
+        breaker = self._breakers.get(strip_api_suffix(server_url))
+        return breaker is not None and breaker.is_open()
+
+    def can_retry(self, server_url: str) -> bool:
+        """Whether a failed attempt on the server may be retried"""
+        if self.get(server_url).state != CircuitState.CLOSED:
+            llm_retries_total.labels(server_url=strip_api_suffix(server_url), result="circuit_open").inc()
+            return False
+        if not self.retry_policy.try_acquire():
+            llm_retries_total.labels(server_url=strip_api_suffix(server_url), result="budget_exhausted").inc()
+            return False
+        llm_retries_total.labels(server_url=strip_api_suffix(server_url), result="retried").inc()
+        return True
+
+    def open_circuits(self) -> List[CircuitBreaker]:
+        return [b for b in self._breakers.values() if b.state != CircuitState.CLOSED]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {url: breaker.to_dict() for url, breaker in self._breakers.items()}
+
+
+# Global circuit breaker registry
+_circuit_breakers: Optional[CircuitBreakerRegistry] = None
+
+
+def get_circuit_breakers() -> CircuitBreakerRegistry:
+    """Get process-wide circuit breaker registry"""
+    global _circuit_breakers
+    if _circuit_breakers is None:
+        settings = get_settings()
+        _circuit_breakers = CircuitBreakerRegistry(
+            failure_threshold=settings.llm_circuit_failure_threshold,
+            open_seconds=settings.llm_circuit_open_seconds,
+            max_open_seconds=settings.llm_circuit_max_open_seconds,
+            retry_policy=RetryPolicy(
+                max_attempts=settings.llm_retry_max_attempts,
+                base_delay_seconds=settings.llm_retry_base_delay_seconds,
+                max_delay_seconds=settings.llm_retry_max_delay_seconds,
+                budget_ratio=settings.llm_retry_budget_ratio,
+                initial_tokens=settings.llm_retry_budget_initial_tokens,
+            ),
+        )
+    return _circuit_breakers
@@ -0,0 +1,122 @@
+"""
+Hedged LLM requests
+
+If a request has not completed within a high percentile of the recent
+latency of its task type, the same request is sent to a second server
+hosting the same model and whichever finishes first is used; the other one
+is cancelled. A token-bucket hedge budget caps the extra load to a fraction
+of all requests.
+"""
+import math
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from app.core.config import get_settings
+from app.core.logging_config import LoggingConfig
+from app.core.metrics import llm_hedge_total
+
+logger = LoggingConfig.get_logger(__name__)
+
+
+class HedgePolicy:
+    """
+    Per-task-type hedge delay and hedge budget.
+
+    The delay is the configured percentile of the last `window` latencies of
+    the task type (never below `min_delay_seconds`); task types with fewer
+    than `min_samples` measurements are not hedged. Every request earns
+    `budget_ratio` hedge tokens (up to `max_tokens`), every hedge spends one.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        percentile: float = 0.95,
+        window: int = 200,
+        min_samples: int = 20,
+        min_delay_seconds: float = 1.0,
+        budget_ratio: float = 0.1,
+        max_tokens: float = 10.0
+    ):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay_seconds = min_delay_seconds
+        self.budget_ratio = budget_ratio
+        self.max_tokens = max_tokens
+        self._window = window
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+        self.outcomes: Dict[str, int] = {}
+
+    def observe(self, task_type: str, duration: float):
+        """Record latency of a completed request of a task type"""
+        with self._lock:
+            samples = self._latencies.get(task_type)
+            if samples is None:
+                samples = self._latencies[task_type] = deque(maxlen=self._window)
+            samples.append(duration)
+
+    def hedge_delay(self, task_type: str) -> Optional[float]:
+        """Seconds to wait before hedging (None = do not hedge this task type)"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            samples = sorted(self._latencies.get(task_type, ()))
+        if len(samples) < self.min_samples:
+            return None
+        index = min(len(samples) - 1, math.ceil(self.percentile * len(samples)) - 1)
+        return max(self.min_delay_seconds, samples[index])
+
+    def on_request(self):
+        """Earn hedge budget for a request"""
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.budget_ratio)
+
+    def try_acquire(self) -> bool:
+        """Spend one hedge token (False if the budget is exhausted)"""
+        with self._lock:
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+    def record(self, outcome: str):
+        """
+        Count hedging outcome
+
+        Outcomes: 'fired', 'hedge_won', 'primary_won', 'budget_exhausted', 'no_secondary'
+        """
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        llm_hedge_total.labels(outcome=outcome).inc()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hedging statistics"""
+        return {
+            "enabled": self.enabled,
+            "budget_tokens": round(self._tokens, 2),
+            "delays": {task_type: self.hedge_delay(task_type) for task_type in list(self._latencies)},
+            "outcomes": dict(self.outcomes),
+        }
+
+
+# Global hedge policy
+_hedge_policy: Optional[HedgePolicy] = None
+
+
+def get_hedge_policy() -> HedgePolicy:
+    """Get process-wide hedge policy"""
+    global _hedge_policy
+    if _hedge_policy is None:
+        settings = get_settings()
+        _hedge_policy = HedgePolicy(
+            enabled=settings.llm_hedging_enabled,
+            percentile=settings.llm_hedging_percentile,
+            window=settings.llm_hedging_window,
+            min_samples=settings.llm_hedging_min_samples,
+            min_delay_seconds=settings.llm_hedging_min_delay_seconds,
+            budget_ratio=settings.llm_hedging_budget_ratio,
+        )
+    return _hedge_policy
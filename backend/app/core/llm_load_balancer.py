@@ -0,0 +1,188 @@
+"""
+Latency-aware load balancing across Ollama servers
+
+Keeps an exponentially weighted moving average (EWMA) of request latency per
+server and model, fed from the same measurements as the
+llm_request_duration_seconds histogram, plus live in-flight counts. Among
+servers hosting the same model, two random healthy candidates are compared
+(power of two choices) and the one with the lower expected completion time
+wins, with a penalty for servers that would have to load the model first.
+"""
+import random
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import (Any, Callable, Dict, Iterator, List, Optional, Sequence,
+                    Tuple, TypeVar)
+
+from app.core.config import get_settings
+from app.core.logging_config import LoggingConfig
+from app.core.metrics import (llm_request_duration_seconds,
+                              llm_server_ewma_latency_seconds)
+from app.core.ollama_server_state import get_server_state_registry
+from app.core.ollama_transport import strip_api_suffix
+
+logger = LoggingConfig.get_logger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class LatencyStats:
+    """EWMA latency of one server (or server/model pair)"""
+    ewma: Optional[float] = None
+    samples: int = 0
+
+    def observe(self, value: float, alpha: float):
+        self.ewma = value if self.ewma is None else alpha * value + (1 - alpha) * self.ewma
+        self.samples += 1
+
+
+class LLMLoadBalancer:
+    """Chooses the least loaded server among replicas of the same model"""
+
+    def __init__(
+        self,
+        alpha: float = 0.3,
+        default_latency_seconds: float = 5.0,
+        cold_start_penalty_seconds: float = 15.0
+    ):
+        self.alpha = alpha
+        self.default_latency_seconds = default_latency_seconds
+        self.cold_start_penalty_seconds = cold_start_penalty_seconds
+        self._latency: Dict[Tuple[str, Optional[str]], LatencyStats] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Feeding
+    # ------------------------------------------------------------------
+
+    def observe(self, server_url: str, model: Optional[str], duration: float):
+        """Record latency of a completed request"""
+        server = strip_api_suffix(server_url)
+        with self._lock:
+            for key in ((server, model), (server, None)):
+                self._latency.setdefault(key, LatencyStats()).observe(duration, self.alpha)
+            if model:
+                llm_server_ewma_latency_seconds.labels(server_url=server, model=model).set(
+                    self._latency[(server, model)].ewma
+                )
+
+    @contextmanager
+    def track(self, server_url: str) -> Iterator[None]:
+        """Count a request as in flight (queued or running) on a server"""
+        server = strip_api_suffix(server_url)
+        with self._lock:
+            self._in_flight[server] = self._in_flight.get(server, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight[server] = max(0, self._in_flight.get(server, 1) - 1)
+
+    # ------------------------------------------------------------------
+    # Scoring
+    # ------------------------------------------------------------------
+
+    def in_flight(self, server_url: str) -> int:
+        return self._in_flight.get(strip_api_suffix(server_url), 0)
+
+    def expected_latency(self, server_url: str, model: Optional[str] = None) -> float:
+        """EWMA latency of the model on the server, else of the server, else the default"""
+        server = strip_api_suffix(server_url)
+        for key in ((server, model), (server, None)):
+            stats = self._latency.get(key)
+            if stats is not None and stats.ewma is not None:
+                return stats.ewma
+        return self.default_latency_seconds
+
+    def score(self, server_url: str, model: Optional[str] = None) -> float:
+        """Expected time to complete one more request on the server (lower is better)"""
+        score = self.expected_latency(server_url, model) * (1 + self.in_flight(server_url))
+        if model and get_server_state_registry().is_model_loaded(server_url, model) is False:
+            score += self.cold_start_penalty_seconds
+        return score
+
+    def choose(
+        self,
+        candidates: Sequence[T],
+        url_of: Callable[[T], str],
+        model: Optional[str] = None
+    ) -> Optional[T]:
+        """
+        Pick a server among candidates hosting the same model
+
+        Args:
+            candidates: Servers/instances that can serve the request
+            url_of: Returns the server URL of a candidate
+            model: Model name (for per-model latency and GPU residency)
+
+        Returns:
+            Chosen candidate (None if there are no candidates)
+        """
+        if not candidates:
+            return None
+        registry = get_server_state_registry()
+        eligible: List[T] = [c for c in candidates if registry.is_healthy(url_of(c)) is not False]
+        if not eligible:
+            eligible = list(candidates)
+        if len(eligible) == 1:
+            return eligible[0]
+        pair = random.sample(eligible, 2)
+        chosen = min(pair, key=lambda c: self.score(url_of(c), model))
+        logger.debug(
+            "Load balancer choice",
+            extra={
+                "model": model,
+                "chosen": url_of(chosen),
+                "compared": [url_of(c) for c in pair],
+            }
+        )
+        return chosen
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-server latency and load"""
+        servers: Dict[str, Dict[str, Any]] = {}
+        for (server, model), stats in list(self._latency.items()):
+            entry = servers.setdefault(server, {"in_flight": self.in_flight(server), "models": {}})
+            if model is None:
+                entry["ewma_latency_seconds"] = stats.ewma
+                entry["samples"] = stats.samples
+            else:
+                entry["models"][model] = {"ewma_latency_seconds": stats.ewma, "samples": stats.samples}
+        return {"servers": servers}
+
+
+# Global load balancer
+_load_balancer: Optional[LLMLoadBalancer] = None
+
+
+def get_load_balancer() -> LLMLoadBalancer:
+    """Get process-wide LLM load balancer"""
+    global _load_balancer
+    if _load_balancer is None:
+        settings = get_settings()
+        _load_balancer = LLMLoadBalancer(
+            alpha=settings.llm_balancer_ewma_alpha,
+            default_latency_seconds=settings.llm_balancer_default_latency_seconds,
+            cold_start_penalty_seconds=settings.llm_balancer_cold_start_penalty_seconds,
+        )
+    return _load_balancer
+
+
+def record_request_duration(model: str, server_url: str, task_type: str, duration: float, success: bool = True):
+    """
+    Observe llm_request_duration_seconds and feed the same sample to the load balancer
+
+    Successful requests also feed the per-task-type hedge delay.
+    """
+    llm_request_duration_seconds.labels(
+        model=model,
+        server_url=server_url,
+        task_type=task_type
+    ).observe(duration)
+    get_load_balancer().observe(server_url, model, duration)
+    if success:
+        from app.core.llm_hedging import get_hedge_policy
+        get_hedge_policy().observe(task_type, duration)
@@ -0,0 +1,372 @@
+"""
+Persistent LLM response cache
+
+Second cache tier behind the in-process LLMResponseCache: deterministic
+responses are stored compressed in the database so they survive restarts and
+are shared between worker processes. Reads go through to the database on an
+in-memory miss; writes are buffered and flushed in batches in the background
+(write-behind), so a completion never waits on a database round-trip.
+"""
+import asyncio
+import json
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.logging_config import LoggingConfig
+from app.core.metrics import (llm_persistent_cache_operations_total,
+                              llm_persistent_cache_pending_writes)
+from app.models.llm_response_cache import LLMResponseCacheRecord
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import Session, sessionmaker
+
+logger = LoggingConfig.get_logger(__name__)
+
+# Rows deleted per statement when trimming the cache to its byte budget
+CLEANUP_DELETE_CHUNK = 500
+
+
+def encode_payload(response: str, reasoning: Optional[str] = None) -> bytes:
+    """Compress cached response for storage"""
+    data = json.dumps({"response": response, "reasoning": reasoning}, ensure_ascii=False)
+    return zlib.compress(data.encode("utf-8"), 6)
+
+
+def decode_payload(payload: bytes) -> Dict[str, Any]:
+    """Decompress stored response"""
+    return json.loads(zlib.decompress(payload).decode("utf-8"))
+
+
+class PersistentLLMCache:
+    """
+    Database-backed LLM response cache with write-behind batching.
+
+    Uses the main database by default; a separate database (e.g. a local
+    SQLite file) can be configured with LLM_PERSISTENT_CACHE_URL, in which
+    case the table is created on first use.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        database_url: Optional[str] = None,
+        ttl_seconds: float = 7 * 86400,
+        max_bytes: int = 512 * 1024 * 1024,
+        flush_interval_seconds: float = 2.0,
+        cleanup_interval_seconds: float = 600.0,
+        deterministic_only: bool = True,
+        max_pending: int = 1000
+    ):
+        self.enabled = enabled
+        self.database_url = database_url
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.flush_interval_seconds = flush_interval_seconds
+        self.cleanup_interval_seconds = cleanup_interval_seconds
+        self.deterministic_only = deterministic_only
+        self.max_pending = max_pending
+        self._session_factory: Optional[sessionmaker] = None
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._pending_hits: Dict[str, Tuple[int, datetime]] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._last_cleanup = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def _get_session(self) -> Session:
+        if self._session_factory is None:
+            if self.database_url:
+                connect_args = {"check_same_thread": False} if self.database_url.startswith("sqlite") else {}
+                engine = create_engine(self.database_url, pool_pre_ping=True, connect_args=connect_args)
+                LLMResponseCacheRecord.__table__.create(bind=engine, checkfirst=True)
+                self._session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+            else:
+                from app.core.database import get_session_local
+                self._session_factory = get_session_local()
+        return self._session_factory()
+
+    def accepts(self, options: Dict[str, Any]) -> bool:
+        """Check whether a request with these options may be persisted"""
+        if not self.enabled:
+            return False
+        if not self.deterministic_only:
+            return True
+        try:
+            return float(options.get("temperature", 1.0)) == 0.0
+        except (TypeError, ValueError):
+            return False
+
+    # ------------------------------------------------------------------
+    # Read-through
+    # ------------------------------------------------------------------
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get cached response
+
+        Returns:
+            {"response": ..., "reasoning": ...} or None on miss
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            pending = self._pending.get(key)
+        if pending is not None:
+            payload = pending["payload"]
+        else:
+            try:
+                payload = await asyncio.to_thread(self._read, key)
+            except Exception as e:
+                self.errors += 1
+                llm_persistent_cache_operations_total.labels(operation="error").inc()
+                logger.debug(f"Persistent LLM cache read failed: {e}")
+                return None
+        if payload is None:
+            self.misses += 1
+            llm_persistent_cache_operations_total.labels(operation="miss").inc()
+            return None
+
+        self.hits += 1
+        llm_persistent_cache_operations_total.labels(operation="hit").inc()
+        if pending is None:
+            with self._lock:
+                count, _ = self._pending_hits.get(key, (0, None))
+                self._pending_hits[key] = (count + 1, datetime.now(timezone.utc))
+            self._ensure_flusher()
+        return decode_payload(payload)
+
+    def _read(self, key: str) -> Optional[bytes]:
+        session = self._get_session()
+        try:
+            row = session.query(LLMResponseCacheRecord.payload).filter(
+                LLMResponseCacheRecord.cache_key == key,
+                LLMResponseCacheRecord.expires_at > datetime.now(timezone.utc)
+            ).first()
+            return row[0] if row else None
+        finally:
+            session.close()
+
+    # ------------------------------------------------------------------
+    # Write-behind
+    # ------------------------------------------------------------------
+
+    def put(self, key: str, model: str, response: str, reasoning: Optional[str] = None):
+        """Queue response for persistence (flushed in the background)"""
+        if not self.enabled or not response:
+            return
+        payload = encode_payload(response, reasoning)
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            if key not in self._pending and len(self._pending) >= self.max_pending:
+                llm_persistent_cache_operations_total.labels(operation="dropped").inc()
+                return
+            self._pending[key] = {
+                "cache_key": key,
+                "model": model,
+                "payload": payload,
+                "size_bytes": len(payload),
+                "hit_count": 0,
+                "created_at": now,
+                "expires_at": now + timedelta(seconds=self.ttl_seconds),
+            }
+            llm_persistent_cache_pending_writes.set(len(self._pending))
+        self._ensure_flusher()
+
+    def _ensure_flusher(self):
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # No loop: pending writes are flushed by the next flush() call
+        self._task = loop.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        """Flush pending writes until the buffer stays empty"""
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            await self.flush()
+            with self._lock:
+                if not self._pending and not self._pending_hits:
+                    return
+
+    async def flush(self) -> int:
+        """
+        Write pending responses and hit counters to the database
+
+        Returns:
+            Number of responses written
+        """
+        with self._lock:
+            rows = list(self._pending.values())
+            hits = self._pending_hits
+            self._pending = {}
+            self._pending_hits = {}
+            llm_persistent_cache_pending_writes.set(0)
+        if rows or hits:
+            try:
+                await asyncio.to_thread(self._write_batch, rows, hits)
+                self.writes += len(rows)
+                llm_persistent_cache_operations_total.labels(operation="write").inc(len(rows))
+            except Exception as e:
+                self.errors += 1
+                llm_persistent_cache_operations_total.labels(operation="error").inc()
+                logger.warning(f"Persistent LLM cache flush failed, {len(rows)} responses dropped: {e}")
+                rows = []
+        if time.monotonic() - self._last_cleanup >= self.cleanup_interval_seconds:
+            self._last_cleanup = time.monotonic()
+            try:
+                await asyncio.to_thread(self.cleanup)
+            except Exception as e:
+                logger.warning(f"Persistent LLM cache cleanup failed: {e}")
+        return len(rows)
+
+    def _write_batch(self, rows: List[Dict[str, Any]], hits: Dict[str, Tuple[int, datetime]]):
+        session = self._get_session()
+        try:
+            if rows:
+                table = LLMResponseCacheRecord.__table__
+                dialect = session.get_bind().dialect.name
+                if dialect in ("postgresql", "sqlite"):
+                    if dialect == "postgresql":
+                        from sqlalchemy.dialects.postgresql import insert
+                    else:
+                        from sqlalchemy.dialects.sqlite import insert
+                    stmt = insert(table).values(rows)
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=[table.c.cache_key],
+                        set_={
+                            "model": stmt.excluded.model,
+                            "payload": stmt.excluded.payload,
+                            "size_bytes": stmt.excluded.size_bytes,
+                            "created_at": stmt.excluded.created_at,
+                            "expires_at": stmt.excluded.expires_at,
+                        }
+                    )
+                    session.execute(stmt)
+                else:
+                    for row in rows:
+                        session.merge(LLMResponseCacheRecord(**row))
+            for key, (count, last_hit_at) in hits.items():
+                session.query(LLMResponseCacheRecord).filter(
+                    LLMResponseCacheRecord.cache_key == key
+                ).update(
+                    {
+                        LLMResponseCacheRecord.hit_count: LLMResponseCacheRecord.hit_count + count,
+                        LLMResponseCacheRecord.last_hit_at: last_hit_at,
+                    },
+                    synchronize_session=False
+                )
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def cleanup(self) -> int:
+        """
+        Delete expired rows, then least recently used rows over the byte budget
+
+        Returns:
+            Number of rows deleted
+        """
+        session = self._get_session()
+        try:
+            deleted = session.query(LLMResponseCacheRecord).filter(
+                LLMResponseCacheRecord.expires_at <= datetime.now(timezone.utc)
+            ).delete(synchronize_session=False)
+
+            total = session.query(func.coalesce(func.sum(LLMResponseCacheRecord.size_bytes), 0)).scalar() or 0
+            excess = int(total) - self.max_bytes
+            if excess > 0:
+                last_used = func.coalesce(LLMResponseCacheRecord.last_hit_at, LLMResponseCacheRecord.created_at)
+                victims = []
+                for key, size in session.query(
+                    LLMResponseCacheRecord.cache_key, LLMResponseCacheRecord.size_bytes
+                ).order_by(last_used.asc()).yield_per(CLEANUP_DELETE_CHUNK):
+                    victims.append(key)
+                    excess -= size or 0
+                    if excess <= 0:
+                        break
+                for i in range(0, len(victims), CLEANUP_DELETE_CHUNK):
+                    deleted += session.query(LLMResponseCacheRecord).filter(
+                        LLMResponseCacheRecord.cache_key.in_(victims[i:i + CLEANUP_DELETE_CHUNK])
+                    ).delete(synchronize_session=False)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        if deleted:
+            llm_persistent_cache_operations_total.labels(operation="evict").inc(deleted)
+            logger.info("Persistent LLM cache cleanup", extra={"deleted": deleted})
+        return deleted
+
+    async def close(self):
+        """Stop background flusher and write remaining responses"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+        if self.enabled:
+            await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "deterministic_only": self.deterministic_only,
+            "pending_writes": len(self._pending),
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "errors": self.errors,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+# Global persistent cache instance
+_persistent_llm_cache: Optional[PersistentLLMCache] = None
+
+
+def get_persistent_llm_cache() -> PersistentLLMCache:
+    """Get process-wide persistent LLM cache"""
+    global _persistent_llm_cache
+    if _persistent_llm_cache is None:
+        settings = get_settings()
+        _persistent_llm_cache = PersistentLLMCache(
+            enabled=settings.enable_caching and settings.llm_persistent_cache_enabled,
+            database_url=settings.llm_persistent_cache_url,
+            ttl_seconds=float(settings.llm_persistent_cache_ttl_seconds),
+            max_bytes=settings.llm_persistent_cache_max_bytes,
+            flush_interval_seconds=settings.llm_persistent_cache_flush_interval_seconds,
+            cleanup_interval_seconds=settings.llm_persistent_cache_cleanup_interval_seconds,
+            deterministic_only=settings.llm_persistent_cache_deterministic_only,
+        )
+    return _persistent_llm_cache
+
+
+async def close_persistent_llm_cache():
+    """Flush persistent LLM cache (called on application shutdown)"""
+    if _persistent_llm_cache is not None:
+        await _persistent_llm_cache.close()
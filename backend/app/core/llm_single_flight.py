@@ -0,0 +1,185 @@
+"""
+Single-flight coalescing of identical in-flight LLM requests
+
+The response cache is filled only after a completion finishes, so identical
+requests arriving at the same time (dashboard refreshes, HTMX retries,
+alternative-plan fan-out) would all reach Ollama. Here the first caller runs
+the request and concurrent identical callers share its result; for streaming
+requests followers replay the leader's chunks as they arrive.
+"""
+import asyncio
+from typing import (Any, AsyncIterator, Awaitable, Callable, Dict, List,
+                    Optional, Tuple)
+
+from app.core.logging_config import LoggingConfig
+from app.core.metrics import llm_single_flight_absorbed_total
+
+logger = LoggingConfig.get_logger(__name__)
+
+
+class LeaderAborted(Exception):
+    """The leading caller was cancelled or stopped consuming before completion"""
+    pass
+
+
+class _StreamFlight:
+    """Chunks of one in-flight streaming request, replayable by followers"""
+
+    def __init__(self):
+        self.chunks: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self._changed = asyncio.Event()
+
+    def _notify(self):
+        # Wake current waiters and arm a fresh event for the next change
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def publish(self, chunk: Any):
+        self.chunks.append(chunk)
+        self._notify()
+
+    def finish(self, error: Optional[BaseException] = None):
+        self.done = True
+        self.error = error
+        self._notify()
+
+    async def replay(self) -> AsyncIterator[Any]:
+        index = 0
+        while True:
+            if index < len(self.chunks):
+                chunk = self.chunks[index]
+                index += 1
+                yield chunk
+            elif self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            else:
+                await self._changed.wait()
+
+
+class LLMSingleFlight:
+    """
+    Registry of in-flight LLM requests keyed by request cache key.
+
+    Flights are bound to the event loop that started them; callers on a
+    different loop never join them.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, Tuple[asyncio.Future, asyncio.AbstractEventLoop]] = {}
+        self._streams: Dict[str, Tuple[_StreamFlight, asyncio.AbstractEventLoop]] = {}
+        self.absorbed = {"generate": 0, "stream": 0}
+
+    def _absorb(self, mode: str, key: str):
+        self.absorbed[mode] += 1
+        llm_single_flight_absorbed_total.labels(mode=mode).inc()
+        logger.debug("Coalesced identical in-flight LLM request", extra={"mode": mode, "cache_key": key[:20]})
+
+    async def run(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run call once for all concurrent callers with the same key
+
+        Args:
+            key: Request cache key
+            call: Factory of the awaitable performing the request
+
+        Returns:
+            Result of the leader's call (its exception is raised to every caller)
+        """
+        loop = asyncio.get_running_loop()
+        entry = self._calls.get(key)
+        if entry is not None and entry[1] is loop:
+            self._absorb("generate", key)
+            try:
+                # Shield: a cancelled follower must not cancel the shared request
+                return await asyncio.shield(entry[0])
+            except LeaderAborted:
+                # Leader was cancelled: run again (one of the followers becomes the leader)
+                return await self.run(key, call)
+
+        future = loop.create_future()
+        self._calls[key] = (future, loop)
+        try:
+            result = await call()
+        except BaseException as e:
+            if not future.done():
+                if isinstance(e, Exception):
+                    future.set_exception(e)
+                else:
+                    future.set_exception(LeaderAborted())
+                # Retrieve so an unawaited flight does not log "exception never retrieved"
+                future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._calls.get(key, (None, None))[0] is future:
+                del self._calls[key]
+
+    async def stream(self, key: str, call: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """
+        Stream chunks of call once for all concurrent callers with the same key
+
+        Followers receive every chunk from the beginning, including the ones
+        produced before they joined.
+        """
+        loop = asyncio.get_running_loop()
+        entry = self._streams.get(key)
+        if entry is not None and entry[1] is loop:
+            self._absorb("stream", key)
+            replayed = 0
+            try:
+                async for chunk in entry[0].replay():
+                    replayed += 1
+                    yield chunk
+            except LeaderAborted:
+                if replayed:
+                    raise
+                # Nothing was sent to this caller yet: run the stream again
+                async for chunk in self.stream(key, call):
+                    yield chunk
+            return
+
+        flight = _StreamFlight()
+        self._streams[key] = (flight, loop)
+        error: Optional[BaseException] = None
+        completed = False
+        try:
+            async for chunk in call():
+                flight.publish(chunk)
+                yield chunk
+            completed = True
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            if self._streams.get(key, (None, None))[0] is flight:
+                del self._streams[key]
+            if not completed and error is None:
+                # Leader was cancelled or stopped consuming early
+                error = LeaderAborted()
+            flight.finish(error)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics"""
+        return {
+            "in_flight": len(self._calls),
+            "in_flight_streams": len(self._streams),
+            "absorbed": dict(self.absorbed),
+        }
+
+
+# Global single-flight registry
+_llm_single_flight: Optional[LLMSingleFlight] = None
+
+
+def get_llm_single_flight() -> LLMSingleFlight:
+    """Get process-wide single-flight registry"""
+    global _llm_single_flight
+    if _llm_single_flight is None:
+        _llm_single_flight = LLMSingleFlight()
+    return _llm_single_flight
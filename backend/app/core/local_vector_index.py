@@ -0,0 +1,267 @@
+"""
+In-process vector index
+
+Fallback for semantic search when pgvector is not available (SQLite/dev
+deployments, test databases, float8[] embedding columns): normalized
+vectors of one namespace (an agent's memories, the plan templates) are
+kept in a contiguous float32 NumPy matrix, and top-k is one matrix-vector
+product plus a partial sort. Vectors are added and removed incrementally
+as embeddings are written and memories deleted; namespaces are loaded
+lazily from the database, and the whole index can be snapshotted to an
+.npz file and restored on startup.
+
+Requires NumPy (a dependency of pgvector); without it search falls back to
+text search as before.
+"""
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.config import get_settings
+from app.core.logging_config import LoggingConfig
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:  # pragma: no cover - numpy is pinned in requirements.txt
+    np = None
+    NUMPY_AVAILABLE = False
+
+logger = LoggingConfig.get_logger(__name__)
+
+IndexKey = Tuple[str, str, int]  # (namespace, model, dimension)
+
+
+def memory_namespace(agent_id: Any) -> str:
+    """Namespace of an agent's memories"""
+    return f"agent:{agent_id}"
+
+
+TEMPLATES_NAMESPACE = "plan_templates"
+
+
+class LocalVectorIndex:
+    """Normalized float32 vectors of one namespace, model and dimension"""
+
+    def __init__(self, dimension: int, capacity: int = 64):
+        self.dimension = dimension
+        self._matrix = np.zeros((capacity, dimension), dtype=np.float32)
+        self._ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, item_id: Any) -> bool:
+        return str(item_id) in self._positions
+
+    def add(self, item_id: Any, vector: Sequence[float]):
+        """Add or replace a vector (normalized on insert)"""
+        row = np.asarray(vector, dtype=np.float32)
+        if row.shape != (self.dimension,):
+            raise ValueError(f"Expected dimension {self.dimension}, got {row.shape}")
+        norm = float(np.linalg.norm(row))
+        if norm == 0.0:
+            return
+        key = str(item_id)
+        position = self._positions.get(key)
+        if position is None:
+            position = len(self._ids)
+            if position == self._matrix.shape[0]:
+                grown = np.zeros((position * 2, self.dimension), dtype=np.float32)
+                grown[:position] = self._matrix
+                self._matrix = grown
+            self._ids.append(key)
+            self._positions[key] = position
+        self._matrix[position] = row / norm
+
+    def remove(self, item_id: Any) -> bool:
+        """Remove a vector (the last row takes its place)"""
+        key = str(item_id)
+        position = self._positions.pop(key, None)
+        if position is None:
+            return False
+        last = len(self._ids) - 1
+        if position != last:
+            moved = self._ids[last]
+            self._matrix[position] = self._matrix[last]
+            self._ids[position] = moved
+            self._positions[moved] = position
+        self._ids.pop()
+        return True
+
+    def search(
+        self,
+        query: Sequence[float],
+        k: int,
+        threshold: Optional[float] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Top-k by cosine similarity
+
+        Returns:
+            (id, similarity) pairs, most similar first
+        """
+        size = len(self._ids)
+        if size == 0 or k <= 0:
+            return []
+        q = np.asarray(query, dtype=np.float32)
+        norm = float(np.linalg.norm(q))
+        if norm == 0.0 or q.shape != (self.dimension,):
+            return []
+        scores = self._matrix[:size] @ (q / norm)
+        if k < size:
+            top = np.argpartition(-scores, k)[:k]
+        else:
+            top = np.arange(size)
+        top = top[np.argsort(-scores[top])]
+        results = []
+        for position in top:
+            score = float(scores[position])
+            if threshold is not None and score < threshold:
+                break
+            results.append((self._ids[position], score))
+        return results
+
+    def to_arrays(self) -> Tuple[List[str], Any]:
+        return list(self._ids), self._matrix[:len(self._ids)].copy()
+
+    @classmethod
+    def from_arrays(cls, ids: Sequence[str], matrix: Any) -> "LocalVectorIndex":
+        index = cls(matrix.shape[1], capacity=max(64, len(ids)))
+        index._matrix[:len(ids)] = matrix
+        index._ids = [str(item_id) for item_id in ids]
+        index._positions = {item_id: i for i, item_id in enumerate(index._ids)}
+        return index
+
+
+class LocalVectorIndexRegistry:
+    """Per-namespace indexes with lazy database loading and .npz snapshots"""
+
+    def __init__(self, enabled: bool = True, snapshot_path: Optional[str] = None):
+        self.enabled = enabled and NUMPY_AVAILABLE
+        self.snapshot_path = snapshot_path
+        self._indexes: Dict[IndexKey, LocalVectorIndex] = {}
+        self._loaded: set = set()  # namespaces loaded from the database
+        self._lock = threading.RLock()
+
+    def is_loaded(self, namespace: str) -> bool:
+        return namespace in self._loaded
+
+    def mark_loaded(self, namespace: str):
+        self._loaded.add(namespace)
+
+    def add(self, namespace: str, model: str, item_id: Any, vector: Sequence[float]):
+        if not self.enabled or not len(vector):
+            return
+        with self._lock:
+            key = (namespace, model, len(vector))
+            index = self._indexes.get(key)
+            if index is None:
+                index = self._indexes[key] = LocalVectorIndex(len(vector))
+            index.add(item_id, vector)
+
+    def add_many(self, namespace: str, model: str, items: Iterable[Tuple[Any, Sequence[float]]]):
+        for item_id, vector in items:
+            self.add(namespace, model, item_id, vector)
+
+    def remove(self, namespace: str, item_ids: Iterable[Any]):
+        """Remove items from every model/dimension of a namespace"""
+        if not self.enabled:
+            return
+        item_ids = list(item_ids)
+        with self._lock:
+            for (index_namespace, _, _), index in self._indexes.items():
+                if index_namespace == namespace:
+                    for item_id in item_ids:
+                        index.remove(item_id)
+
+    def drop_namespace(self, namespace: str):
+        with self._lock:
+            for key in [key for key in self._indexes if key[0] == namespace]:
+                del self._indexes[key]
+            self._loaded.discard(namespace)
+
+    def search(
+        self,
+        namespace: str,
+        model: str,
+        query: Sequence[float],
+        k: int,
+        threshold: Optional[float] = None
+    ) -> List[Tuple[str, float]]:
+        if not self.enabled:
+            return []
+        index = self._indexes.get((namespace, model, len(query)))
+        if index is None:
+            return []
+        with self._lock:
+            return index.search(query, k, threshold)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "indexes": len(self._indexes),
+            "vectors": sum(len(index) for index in self._indexes.values()),
+            "bytes": sum(len(index) * index.dimension * 4 for index in self._indexes.values()),
+        }
+
+    def save_snapshot(self, path: Optional[str] = None) -> bool:
+        """Write all indexes to an .npz file (atomically)"""
+        path = path or self.snapshot_path
+        if not self.enabled or not path:
+            return False
+        with self._lock:
+            arrays = {}
+            manifest = []
+            for i, ((namespace, model, dimension), index) in enumerate(self._indexes.items()):
+                ids, matrix = index.to_arrays()
+                arrays[f"ids_{i}"] = np.asarray(ids, dtype=str)
+                arrays[f"vectors_{i}"] = matrix
+                manifest.append({"namespace": namespace, "model": model, "dimension": dimension})
+        arrays["manifest"] = np.asarray(json.dumps(manifest))
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+        logger.info(f"Saved local vector index snapshot ({len(manifest)} indexes) to {path}")
+        return True
+
+    def load_snapshot(self, path: Optional[str] = None) -> bool:
+        """Restore indexes from an .npz snapshot (namespaces are still refreshed from the database)"""
+        path = path or self.snapshot_path
+        if not self.enabled or not path or not os.path.exists(path):
+            return False
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                manifest = json.loads(str(data["manifest"]))
+                with self._lock:
+                    for i, entry in enumerate(manifest):
+                        key = (entry["namespace"], entry["model"], int(entry["dimension"]))
+                        self._indexes[key] = LocalVectorIndex.from_arrays(
+                            data[f"ids_{i}"].tolist(), data[f"vectors_{i}"]
+                        )
+        except Exception as e:
+            logger.warning(f"Could not load local vector index snapshot {path}: {e}")
+            return False
+        logger.info(f"Loaded local vector index snapshot ({len(manifest)} indexes) from {path}")
+        return True
+
+
+# Global registry instance
+_local_vector_index: Optional[LocalVectorIndexRegistry] = None
+
+
+def get_local_vector_index() -> LocalVectorIndexRegistry:
+    """Get process-wide in-process vector index"""
+    global _local_vector_index
+    if _local_vector_index is None:
+        settings = get_settings()
+        _local_vector_index = LocalVectorIndexRegistry(
+            enabled=settings.local_vector_index_enabled,
+            snapshot_path=settings.local_vector_index_snapshot_path,
+        )
+    return _local_vector_index
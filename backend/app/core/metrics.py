@@ -52,6 +52,36 @@ llm_request_duration_seconds = Histogram(
     buckets=(0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 120.0)
 )
 
+llm_circuit_state = Gauge(
+    'llm_circuit_state',
+    'Circuit breaker state per Ollama server (0=closed, 1=half-open, 2=open)',
+    ['server_url']
+)
+
+llm_circuit_transitions_total = Counter(
+    'llm_circuit_transitions_total',
+    'Circuit breaker state transitions',
+    ['server_url', 'state']
+)
+
+llm_retries_total = Counter(
+    'llm_retries_total',
+    'LLM request retries',
+    ['server_url', 'result']  # result: 'retried', 'budget_exhausted', 'circuit_open'
+)
+
+llm_hedge_total = Counter(
+    'llm_hedge_total',
+    'Hedged LLM request outcomes',
+    ['outcome']  # outcome: 'fired', 'hedge_won', 'primary_won', 'budget_exhausted', 'no_secondary'
+)
+
+llm_server_ewma_latency_seconds = Gauge(
+    'llm_server_ewma_latency_seconds',
+    'Exponentially weighted moving average of LLM request latency used for load balancing',
+    ['server_url', 'model']
+)
+
 llm_tokens_total = Counter(
     'llm_tokens_total',
     'Total number of tokens processed',
@@ -70,6 +100,134 @@ llm_model_loaded = Gauge(
     ['model', 'server_url']
 )
 
+# ============================================================================
+# LLM Response Cache Metrics
+# ============================================================================
+
+llm_cache_hits_total = Counter(
+    'llm_cache_hits_total',
+    'Total number of LLM response cache hits'
+)
+
+llm_cache_misses_total = Counter(
+    'llm_cache_misses_total',
+    'Total number of LLM response cache misses'
+)
+
+llm_cache_evictions_total = Counter(
+    'llm_cache_evictions_total',
+    'Total number of LLM response cache evictions',
+    ['reason']  # reason: 'lru', 'ttl'
+)
+
+llm_cache_entries = Gauge(
+    'llm_cache_entries',
+    'Current number of entries in LLM response cache'
+)
+
+llm_cache_bytes = Gauge(
+    'llm_cache_bytes',
+    'Current size of LLM response cache in bytes'
+)
+
+llm_persistent_cache_operations_total = Counter(
+    'llm_persistent_cache_operations_total',
+    'Total number of persistent LLM cache operations',
+    ['operation']  # operation: 'hit', 'miss', 'write', 'evict', 'dropped', 'error'
+)
+
+llm_persistent_cache_pending_writes = Gauge(
+    'llm_persistent_cache_pending_writes',
+    'Number of LLM responses waiting to be written to the persistent cache'
+)
+
+llm_single_flight_absorbed_total = Counter(
+    'llm_single_flight_absorbed_total',
+    'Total number of duplicate in-flight LLM requests served by an identical running request',
+    ['mode']  # mode: 'generate', 'stream'
+)
+
+# ============================================================================
+# Embedding Cache Metrics
+# ============================================================================
+
+embedding_cache_hits_total = Counter(
+    'embedding_cache_hits_total',
+    'Total number of embedding cache hits'
+)
+
+embedding_cache_misses_total = Counter(
+    'embedding_cache_misses_total',
+    'Total number of embedding cache misses'
+)
+
+embedding_cache_evictions_total = Counter(
+    'embedding_cache_evictions_total',
+    'Total number of embedding cache LRU evictions'
+)
+
+embedding_cache_entries = Gauge(
+    'embedding_cache_entries',
+    'Current number of vectors in embedding cache'
+)
+
+embedding_cache_bytes = Gauge(
+    'embedding_cache_bytes',
+    'Current size of embedding cache in bytes'
+)
+
+embedding_store_operations_total = Counter(
+    'embedding_store_operations_total',
+    'Total number of persistent embedding store operations (per text)',
+    ['operation']  # operation: 'hit', 'miss', 'write', 'error'
+)
+
+embedding_queue_depth = Gauge(
+    'embedding_queue_depth',
+    'Number of memories waiting in the background embedding queue'
+)
+
+embedding_queue_lag_seconds = Histogram(
+    'embedding_queue_lag_seconds',
+    'Time from enqueueing a memory to writing its embedding',
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+)
+
+embedding_jobs_total = Counter(
+    'embedding_jobs_total',
+    'Total number of background embedding jobs',
+    ['status']  # status: 'processed', 'retried', 'failed', 'rejected'
+)
+
+# ============================================================================
+# LLM Admission Control Metrics
+# ============================================================================
+
+llm_admission_queue_depth = Gauge(
+    'llm_admission_queue_depth',
+    'Number of LLM requests waiting for a concurrency slot',
+    ['server_url', 'priority']
+)
+
+llm_admission_in_flight = Gauge(
+    'llm_admission_in_flight',
+    'Number of admitted LLM requests currently running',
+    ['server_url']
+)
+
+llm_admission_wait_seconds = Histogram(
+    'llm_admission_wait_seconds',
+    'Time LLM requests waited for admission',
+    ['priority'],
+    buckets=[0.0, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0]
+)
+
+llm_admission_rejected_total = Counter(
+    'llm_admission_rejected_total',
+    'Total number of LLM requests rejected by admission control',
+    ['priority', 'reason']  # reason: 'queue_full', 'deadline'
+)
+
 # ============================================================================
 # Plan Execution Metrics
 # ============================================================================
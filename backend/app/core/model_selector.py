@@ -5,7 +5,9 @@ Separates planning models (reasoning) from code generation models
 from typing import List, Optional
 
 from app.core.database import SessionLocal
+from app.core.llm_load_balancer import get_load_balancer
 from app.core.logging_config import LoggingConfig
+from app.core.ollama_server_state import get_server_state_registry
 from app.models.ollama_model import OllamaModel
 from app.models.ollama_server import OllamaServer
 from app.services.ollama_service import OllamaService
@@ -36,6 +38,34 @@ class ModelSelector:
         """
         self.db = db or SessionLocal()
     
+    def _select_server(self) -> Optional[OllamaServer]:
+        """
+        Select server for auto-selection
+        
+        Prefers the default server, then other active servers, skipping servers
+        that the background state registry currently reports as unhealthy.
+        Falls back to the first candidate if none is known to be healthy.
+        
+        Returns:
+            OllamaServer or None if no active servers
+        """
+        default_server = OllamaService.get_default_server(self.db)
+        candidates = [default_server] if default_server else []
+        candidates.extend(
+            s for s in OllamaService.get_all_active_servers(self.db)
+            if not default_server or s.id != default_server.id
+        )
+        if not candidates:
+            return None
+        
+        registry = get_server_state_registry()
+        for candidate in candidates:
+            if registry.is_healthy(candidate.url) is not False:
+                return candidate
+        
+        logger.warning("All active servers are reported unhealthy, using first candidate")
+        return candidates[0]
+    
     def _filter_embedding_models(self, models: List[OllamaModel]) -> List[OllamaModel]:
         """
         Filter out embedding models (they don't support chat API)
@@ -137,20 +167,14 @@ class ModelSelector:
             OllamaModel with planning capabilities or None
         """
         try:
-            if server:
-                models = OllamaService.get_models_for_server(self.db, str(server.id))
-            else:
-                # Get default server or first active server
-                server = OllamaService.get_default_server(self.db)
+            if not server:
+                # Default server or first active server known to be healthy
+                server = self._select_server()
                 if not server:
-                    servers = OllamaService.get_all_active_servers(self.db)
-                    if servers:
-                        server = servers[0]
-                    else:
-                        logger.warning("No active servers found")
-                        return None
-                
-                models = OllamaService.get_models_for_server(self.db, str(server.id))
+                    logger.warning("No active servers found")
+                    return None
+            
+            models = OllamaService.get_models_for_server(self.db, str(server.id))
             
             if not models:
                 logger.warning(f"No models found for server {server.name if server else 'unknown'}")
@@ -228,20 +252,14 @@ class ModelSelector:
             OllamaModel with code generation capabilities or None
         """
         try:
-            if server:
-                models = OllamaService.get_models_for_server(self.db, str(server.id))
-            else:
-                # Get default server or first active server
-                server = OllamaService.get_default_server(self.db)
+            if not server:
+                # Default server or first active server known to be healthy
+                server = self._select_server()
                 if not server:
-                    servers = OllamaService.get_all_active_servers(self.db)
-                    if servers:
-                        server = servers[0]
-                    else:
-                        logger.warning("No active servers found")
-                        return None
-                
-                models = OllamaService.get_models_for_server(self.db, str(server.id))
+                    logger.warning("No active servers found")
+                    return None
+            
+            models = OllamaService.get_models_for_server(self.db, str(server.id))
             
             if not models:
                 logger.warning(f"No models found for server {server.name if server else 'unknown'}")
@@ -304,20 +322,14 @@ class ModelSelector:
             OllamaModel with the specified capability or None
         """
         try:
-            if server:
-                models = OllamaService.get_models_for_server(self.db, str(server.id))
-            else:
-                # Get default server or first active server
-                server = OllamaService.get_default_server(self.db)
+            if not server:
+                # Default server or first active server known to be healthy
+                server = self._select_server()
                 if not server:
-                    servers = OllamaService.get_all_active_servers(self.db)
-                    if servers:
-                        server = servers[0]
-                    else:
-                        logger.warning("No active servers found")
-                        return None
-                
-                models = OllamaService.get_models_for_server(self.db, str(server.id))
+                    logger.warning("No active servers found")
+                    return None
+            
+            models = OllamaService.get_models_for_server(self.db, str(server.id))
             
             if not models:
                 logger.warning(f"No models found for server {server.name if server else 'unknown'}")
@@ -370,6 +382,9 @@ class ModelSelector:
         """
         Get server for a given model
         
+        If several active servers host the same model, the least loaded one
+        is chosen by the latency-aware load balancer.
+        
         Args:
             model: OllamaModel instance
             
@@ -377,6 +392,9 @@ class ModelSelector:
             OllamaServer instance or None
         """
         try:
+            replicas = OllamaService.get_servers_with_model(self.db, model.model_name) if model.model_name else []
+            if len(replicas) > 1:
+                return get_load_balancer().choose(replicas, lambda s: s.url, model.model_name)
             return OllamaService.get_server_by_id(self.db, str(model.server_id))
         except Exception as e:
             logger.error(f"Error getting server for model: {e}", exc_info=True)
@@ -2,20 +2,32 @@
 Ollama API client with support for multiple instances and model selection
 """
 import asyncio
+import functools
 import hashlib
 import json
 import time
 from abc import ABC, abstractmethod
-from datetime import datetime, timedelta, timezone
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
 import httpx
 from app.core.config import OllamaInstanceConfig, get_settings
+from app.core.llm_admission import (AdmissionRejected, RequestPriority,
+                                    get_admission_controller)
+from app.core.llm_cache import LLMResponseCache, get_llm_response_cache
+from app.core.llm_circuit_breaker import CircuitOpen, get_circuit_breakers
+from app.core.llm_hedging import get_hedge_policy
+from app.core.llm_load_balancer import (get_load_balancer,
+                                        record_request_duration)
+from app.core.llm_persistent_cache import (PersistentLLMCache,
+                                           get_persistent_llm_cache)
+from app.core.llm_single_flight import LLMSingleFlight, get_llm_single_flight
 from app.core.logging_config import LoggingConfig
 from app.core.metrics import (llm_errors_total, llm_model_loaded,
                               llm_request_duration_seconds, llm_requests_total,
                               llm_tokens_total)
+from app.core.ollama_server_state import get_server_state_registry
+from app.core.ollama_transport import get_transport_pool, strip_api_suffix
 from app.core.tracing import add_span_attributes, get_tracer
 from pydantic import BaseModel
 
@@ -47,13 +59,6 @@ class OllamaError(Exception):
     pass
 
 
-class CacheEntry(BaseModel):
-    """Cache entry for LLM responses"""
-    response: str
-    timestamp: datetime
-    model: str
-
-
 
 class OllamaClient:
     """
@@ -65,10 +70,12 @@ class OllamaClient:
         # Lazy load settings to avoid issues with module-level initialization
         self._settings = None
         self._instances: Optional[List[OllamaInstanceConfig]] = None
-        self.cache: Dict[str, CacheEntry] = {}
-        self.cache_ttl = timedelta(hours=24)
-        self._client: Optional[httpx.AsyncClient] = None
-        self._instance_clients: Dict[str, httpx.AsyncClient] = {}
+        # Process-wide response cache shared by all OllamaClient instances
+        self.cache: LLMResponseCache = get_llm_response_cache()
+        # Database tier shared between worker processes and restarts
+        self.persistent_cache: PersistentLLMCache = get_persistent_llm_cache()
+        # Process-wide registry of in-flight requests for coalescing duplicates
+        self.single_flight: LLMSingleFlight = get_llm_single_flight()
         
         self._task_type_mapping: Optional[Dict[TaskType, Optional[OllamaInstanceConfig]]] = None
     
@@ -141,7 +148,14 @@ class OllamaClient:
                 return self.instances[0]
             raise OllamaError("No Ollama instances configured")
         
-        return instance
+        return self._balance_replicas(instance)
+    
+    def _balance_replicas(self, instance: OllamaInstanceConfig) -> OllamaInstanceConfig:
+        """Pick the least loaded configured instance serving the same model"""
+        replicas = [inst for inst in self.instances if inst.model == instance.model]
+        if len(replicas) < 2:
+            return instance
+        return get_load_balancer().choose(replicas, lambda inst: inst.url, instance.model)
     
     def _get_cache_key(self, prompt: str, model: str, **kwargs) -> str:
         """Generate cache key for prompt"""
@@ -150,64 +164,105 @@ class OllamaClient:
     
     def _get_from_cache(self, cache_key: str) -> Optional[str]:
         """Get response from cache if available and not expired"""
-        if cache_key not in self.cache:
-            return None
-        
-        entry = self.cache[cache_key]
-        if datetime.now(timezone.utc) - entry.timestamp > self.cache_ttl:
-            del self.cache[cache_key]
-            return None
-        
-        return entry.response
+        return self.cache.get(cache_key)
     
     def _save_to_cache(self, cache_key: str, response: str, model: str, metadata: Optional[Dict] = None):
         """Save response to cache"""
-        self.cache[cache_key] = CacheEntry(
-            response=response,
-            timestamp=datetime.now(timezone.utc),
-            model=model
+        self.cache.set(cache_key, response, model)
+    
+    @staticmethod
+    def _build_messages(
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        history: Optional[List[Dict[str, str]]] = None
+    ) -> List[Dict[str, str]]:
+        """Build chat messages for a request"""
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        if history:
+            messages.extend(history)
+        messages.append({"role": "user", "content": prompt})
+        return messages
+    
+    def _build_options(self, **kwargs) -> Dict[str, Any]:
+        """Build generation options, applying global limits from configuration"""
+        settings = get_settings()
+        return {
+            "temperature": kwargs.get("temperature", settings.llm_temperature),
+            "top_p": kwargs.get("top_p", settings.llm_top_p),
+            "num_ctx": kwargs.get("num_ctx", settings.llm_num_ctx),
+            # num_predict (максимальное количество токенов) - критично для предотвращения "думать час"
+            "num_predict": kwargs.get("num_predict", settings.llm_max_tokens),
+        }
+    
+    @staticmethod
+    def _get_request_cache_key(model: str, messages: List[Dict[str, str]], options: Dict[str, Any]) -> str:
+        """Cache key over everything that determines the completion (model, full messages, options)"""
+        key_data = json.dumps(
+            {"model": model.strip(), "messages": messages, "options": options},
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":")
         )
+        return hashlib.sha256(key_data.encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def _is_deterministic(options: Dict[str, Any]) -> bool:
+        """Greedy decoding (temperature 0) yields reproducible completions"""
+        try:
+            return float(options.get("temperature", 1.0)) == 0.0
+        except (TypeError, ValueError):
+            return False
+    
+    async def _get_cached_response(self, cache_key: str, options: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Look up response in memory, then read through to the persistent cache"""
+        cached_response = self._get_from_cache(cache_key)
+        if cached_response:
+            return {"response": cached_response, "reasoning": None}
+        if self.persistent_cache.accepts(options):
+            cached = await self.persistent_cache.get(cache_key)
+            if cached and cached.get("response"):
+                self.cache.set(cache_key, cached["response"], "")
+                return cached
+        return None
+    
+    def _store_cached_response(
+        self,
+        cache_key: str,
+        model: str,
+        options: Dict[str, Any],
+        response: str,
+        reasoning: Optional[str] = None
+    ):
+        """Store response in memory and queue it for the persistent cache"""
+        self._save_to_cache(cache_key, response, model)
+        if self.persistent_cache.accepts(options):
+            self.persistent_cache.put(cache_key, model, response, reasoning)
     
     async def _get_client(self, instance: OllamaInstanceConfig) -> httpx.AsyncClient:
-        """Get or create HTTP client for instance"""
-        client_key = instance.url
-        if client_key not in self._instance_clients:
-            # Remove /v1 from base URL for client
-            base_url = instance.url
-            if base_url.endswith("/v1"):
-                base_url = base_url[:-3]
-            elif base_url.endswith("/v1/"):
-                base_url = base_url[:-4]
-            
-            self._instance_clients[client_key] = httpx.AsyncClient(
-                base_url=base_url,
-                timeout=300.0,
-                limits=httpx.Limits(
-                    max_keepalive_connections=5,
-                    max_connections=10,
-                )
-            )
-        return self._instance_clients[client_key]
+        """Get shared pooled HTTP client for instance"""
+        return get_transport_pool().get_client(instance.url)
     
     async def health_check(self, instance: OllamaInstanceConfig) -> bool:
         """Check if Ollama instance is healthy"""
         try:
-            # Ollama API endpoints are at base URL without /v1
-            base_url = instance.url
-            if base_url.endswith("/v1"):
-                base_url = base_url[:-3]  # Remove /v1
-            elif base_url.endswith("/v1/"):
-                base_url = base_url[:-4]  # Remove /v1/
-            
-            # Create a temporary client for health check
-            async with httpx.AsyncClient(base_url=base_url, timeout=5.0) as client:
-                # Use /api/tags endpoint (doesn't require model to be loaded)
-                response = await client.get("/api/tags", timeout=5.0)
-                return response.status_code == 200
+            client = await self._get_client(instance)
+            # Use /api/tags endpoint (doesn't require model to be loaded)
+            response = await client.get("/api/tags", timeout=5.0)
+            healthy = response.status_code == 200
         except (httpx.ConnectError, httpx.TimeoutException, httpx.HTTPStatusError):
-            return False
+            healthy = False
         except Exception:
+            healthy = False
+        get_server_state_registry().record_health(instance.url, healthy)
+        return healthy
+    
+    async def _is_available(self, instance: OllamaInstanceConfig) -> bool:
+        """Check instance availability using circuit breaker and cached server state (probes only if stale or suspect)"""
+        if get_circuit_breakers().is_open(instance.url):
             return False
+        return await get_server_state_registry().ensure_healthy(instance.url)
     
     async def is_model_loaded(self, server_url: str, model_name: str) -> bool:
         """
@@ -221,29 +276,21 @@ class OllamaClient:
             True if model is loaded, False otherwise
         """
         try:
-            # Normalize server URL
-            base_url = server_url
-            if base_url.endswith("/v1"):
-                base_url = base_url[:-3]
-            elif base_url.endswith("/v1/"):
-                base_url = base_url[:-4]
-            
-            # Create temporary client for check
-            async with httpx.AsyncClient(base_url=base_url, timeout=5.0) as client:
-                # Check loaded models via /api/ps
-                response = await client.get("/api/ps", timeout=5.0)
-                if response.status_code != 200:
-                    return False
-                
-                data = response.json()
-                loaded_models = data.get("models", [])
-                
-                # Check if our model is in the list
-                for model in loaded_models:
-                    if model.get("name") == model_name:
-                        return True
-                
+            client = get_transport_pool().get_client(server_url)
+            # Check loaded models via /api/ps
+            response = await client.get("/api/ps", timeout=5.0)
+            if response.status_code != 200:
                 return False
+            
+            data = response.json()
+            loaded_models = data.get("models", [])
+            
+            # Check if our model is in the list
+            for model in loaded_models:
+                if model.get("name") == model_name:
+                    return True
+            
+            return False
         except Exception as e:
             # Log error but don't fail - assume model is not loaded
             logger.warning(
@@ -287,6 +334,110 @@ class OllamaClient:
                 return inst
         return None
     
+    # Chat endpoints tried in order until one works for a server (different Ollama versions)
+    CHAT_ENDPOINTS = ["/api/chat", "/api/generate", "/api/chat/completions", "/api/completions"]
+    
+    @staticmethod
+    def _payload_for_endpoint(endpoint: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert chat payload to the dialect expected by an endpoint"""
+        if endpoint != "/api/generate":
+            return payload
+        # /api/generate takes a flat prompt plus optional system prompt
+        system_parts = [m["content"] for m in payload["messages"] if m.get("role") == "system"]
+        dialog = [m for m in payload["messages"] if m.get("role") != "system"]
+        if len(dialog) == 1:
+            prompt = dialog[0]["content"]
+        else:
+            prompt = "\n\n".join(f"{m.get('role', 'user')}: {m['content']}" for m in dialog)
+        generate_payload = {
+            "model": payload["model"],
+            "prompt": prompt,
+            "stream": payload.get("stream", False),
+            "options": payload.get("options", {}),
+        }
+        if system_parts:
+            generate_payload["system"] = "\n\n".join(system_parts)
+        return generate_payload
+    
+    @staticmethod
+    def _extract_content(data: Dict[str, Any]) -> str:
+        """Extract generated text from any supported endpoint dialect"""
+        message = data.get("message")
+        if isinstance(message, dict) and message.get("content") is not None:
+            return message.get("content") or ""
+        if isinstance(data.get("response"), str):
+            return data["response"]
+        choices = data.get("choices")
+        if isinstance(choices, list) and choices:
+            choice = choices[0] or {}
+            if isinstance(choice.get("message"), dict):
+                return choice["message"].get("content") or ""
+            return choice.get("text") or ""
+        return ""
+    
+    async def _post_chat(
+        self,
+        request_client: httpx.AsyncClient,
+        instance: OllamaInstanceConfig,
+        payload: Dict[str, Any],
+        timeout_value: float
+    ):
+        """
+        POST a chat request to the server's chat endpoint
+        
+        The working endpoint is learned once per server and memoized in the
+        server state registry; other endpoints are re-probed only if the
+        memoized one returns 404.
+        
+        Returns:
+            Tuple of (response, endpoint)
+        """
+        registry = get_server_state_registry()
+        known_endpoint = registry.get_chat_endpoint(instance.url)
+        if known_endpoint:
+            try:
+                response = await request_client.post(
+                    known_endpoint,
+                    json=self._payload_for_endpoint(known_endpoint, payload),
+                    timeout=timeout_value
+                )
+                response.raise_for_status()
+                return response, known_endpoint
+            except httpx.HTTPStatusError as http_e:
+                if http_e.response.status_code != 404:
+                    raise
+                known_exc = http_e
+                logger.debug(f"Endpoint {known_endpoint} returned 404, re-probing chat endpoints")
+        
+        last_exc = None
+        for ep in self.CHAT_ENDPOINTS:
+            if ep == known_endpoint:
+                continue
+            try:
+                response = await request_client.post(
+                    ep,
+                    json=self._payload_for_endpoint(ep, payload),
+                    timeout=timeout_value
+                )
+                response.raise_for_status()
+            except httpx.HTTPStatusError as http_e:
+                # if 404 or 400, try next endpoint; otherwise surface error
+                if http_e.response.status_code in (404, 400):
+                    logger.debug(f"Endpoint {ep} returned {http_e.response.status_code}, trying next endpoint")
+                    last_exc = http_e
+                    continue
+                raise
+            registry.set_chat_endpoint(instance.url, ep)
+            logger.debug("Learned chat endpoint", extra={"server_url": instance.url, "endpoint": ep})
+            return response, ep
+        
+        # No other endpoint works: the memoized endpoint stays (404 was likely a missing model)
+        if known_endpoint:
+            raise known_exc
+        if isinstance(last_exc, httpx.HTTPStatusError):
+            raise last_exc
+        raise OllamaError(f"No chat endpoint succeeded for {instance.url}")
+    
     async def generate(
         self,
         prompt: str,
@@ -297,6 +448,7 @@ class OllamaClient:
         history: Optional[List[Dict[str, str]]] = None,
         stream: bool = False,
         use_cache: bool = True,
+        priority: Optional[RequestPriority] = None,
         **kwargs
     ) -> OllamaResponse:
         """
@@ -310,6 +462,7 @@ class OllamaClient:
             system_prompt: System prompt for the model
             history: Chat history in Ollama format
             stream: Whether to stream response
+            priority: Admission priority class (default derived from task_type)
             **kwargs: Additional parameters (temperature, top_p, etc.)
             
         Returns:
@@ -364,7 +517,7 @@ class OllamaClient:
             except Exception:
                 selected = None
             if selected:
-                instance = selected
+                instance = self._balance_replicas(selected)
             else:
                 # Fallback to first configured instance (if any)
                 instance = self.instances[0] if self.instances else None
@@ -396,19 +549,24 @@ class OllamaClient:
             }
         )
         
+        # Prepare messages and options (they determine the cache key)
+        messages = self._build_messages(prompt, system_prompt, history)
+        options = self._build_options(**kwargs)
+        cache_key = self._get_request_cache_key(model_to_use, messages, options)
+        
         # Check cache (only if use_cache is True)
         if use_cache:
-            cache_key = self._get_cache_key(prompt, model_to_use, **kwargs)
-            cached_response = self._get_from_cache(cache_key)
-            if cached_response:
+            cached = await self._get_cached_response(cache_key, options)
+            if cached:
                 logger.debug(
                     "Using cached response",
                     extra={"model": model_to_use, "cache_key": cache_key[:20]}
                 )
                 return OllamaResponse(
                     model=model_to_use,
-                    response=cached_response,
-                    done=True
+                    response=cached["response"],
+                    done=True,
+                    reasoning=cached.get("reasoning")
                 )
         else:
             logger.debug(
@@ -416,14 +574,54 @@ class OllamaClient:
                 extra={"model": model_to_use}
             )
         
-        # Health check (but don't fallback if server_url was explicitly provided)
+        request = functools.partial(
+            self._generate_uncached,
+            instance=instance,
+            model_to_use=model_to_use,
+            task_type=task_type,
+            messages=messages,
+            options=options,
+            cache_key=cache_key,
+            use_cache=use_cache,
+            stream=stream,
+            server_url=server_url,
+            is_dynamic_instance=is_dynamic_instance,
+            prompt_length=len(prompt),
+            priority=RequestPriority.parse(priority) or RequestPriority.for_task_type(task_type),
+            timeout=kwargs.get("timeout"),
+        )
+        if not use_cache:
+            return await request()
+        
+        # Identical concurrent requests share one upstream call (the cache is filled only on completion)
+        response = await self.single_flight.run(cache_key, request)
+        return response.model_copy()
+    
+    async def _generate_uncached(
+        self,
+        instance: OllamaInstanceConfig,
+        model_to_use: str,
+        task_type: TaskType,
+        messages: List[Dict[str, str]],
+        options: Dict[str, Any],
+        cache_key: str,
+        use_cache: bool,
+        stream: bool,
+        server_url: Optional[str],
+        is_dynamic_instance: bool,
+        prompt_length: int,
+        priority: RequestPriority = RequestPriority.EXECUTION,
+        timeout: Optional[float] = None
+    ) -> OllamaResponse:
+        """Select an available instance and send request once admitted (no cache lookup)"""
+        # Health check from server state registry (but don't fallback if server_url was explicitly provided)
         if not is_dynamic_instance:
-            if not await self.health_check(instance):
+            if not await self._is_available(instance):
                 # Only fallback if server_url was not explicitly provided
                 if not server_url:
                     # Try fallback to another instance
                     for fallback_instance in self.instances:
-                        if fallback_instance != instance and await self.health_check(fallback_instance):
+                        if fallback_instance != instance and await self._is_available(fallback_instance):
                             instance = fallback_instance
                             break
                     else:
@@ -432,12 +630,173 @@ class OllamaClient:
                     raise OllamaError(f"Ollama instance {instance.url} is not available")
         else:
             # For dynamic instances, always check health but don't fallback
-            if not await self.health_check(instance):
+            if not await self._is_available(instance):
                 raise OllamaError(f"Ollama server {instance.url} is not available")
         
-        # Check if model is loaded (to avoid queues)
-        model_loaded = await self.is_model_loaded(instance.url, model_to_use)
-        if not model_loaded:
+        send = functools.partial(
+            self._send_admitted,
+            model_to_use=model_to_use,
+            task_type=task_type,
+            messages=messages,
+            options=options,
+            cache_key=cache_key,
+            use_cache=use_cache,
+            stream=stream,
+            prompt_length=prompt_length,
+            priority=priority,
+            timeout=timeout,
+        )
+        
+        # Hedge requests that take longer than usual for their task type (never streaming ones,
+        # nor requests pinned to a server: they must be answered by that server)
+        hedging = get_hedge_policy()
+        hedging.on_request()
+        task_type_str = task_type.value if hasattr(task_type, 'value') else str(task_type)
+        pinned = bool(server_url) or is_dynamic_instance
+        delay = None if stream or pinned else hedging.hedge_delay(task_type_str)
+        if delay is None:
+            return await send(instance)
+        return await self._send_hedged(send, instance, model_to_use, delay)
+    
+    async def _send_admitted(
+        self,
+        instance: OllamaInstanceConfig,
+        model_to_use: str,
+        task_type: TaskType,
+        messages: List[Dict[str, str]],
+        options: Dict[str, Any],
+        cache_key: str,
+        use_cache: bool,
+        stream: bool,
+        prompt_length: int,
+        priority: RequestPriority = RequestPriority.EXECUTION,
+        timeout: Optional[float] = None
+    ) -> OllamaResponse:
+        """Send request to an instance once admitted by its circuit breaker and concurrency limiter"""
+        # Fail fast while the server's circuit is open
+        breaker = get_circuit_breakers().get(instance.url)
+        try:
+            is_probe = breaker.acquire()
+        except CircuitOpen as e:
+            raise OllamaError(str(e)) from e
+        
+        # Wait for a concurrency slot on the server (higher priority classes are admitted first);
+        # queued and running requests count as load for the balancer
+        try:
+            with get_load_balancer().track(instance.url):
+                async with get_admission_controller().slot(instance.url, model_to_use, priority):
+                    return await self._send_generate_request(
+                        instance=instance,
+                        model_to_use=model_to_use,
+                        task_type=task_type,
+                        messages=messages,
+                        options=options,
+                        cache_key=cache_key,
+                        use_cache=use_cache,
+                        stream=stream,
+                        prompt_length=prompt_length,
+                        timeout=timeout,
+                    )
+        except AdmissionRejected as e:
+            raise OllamaError(str(e)) from e
+        finally:
+            if is_probe:
+                breaker.release()
+    
+    async def _send_hedged(
+        self,
+        send: Callable[[OllamaInstanceConfig], Awaitable[OllamaResponse]],
+        instance: OllamaInstanceConfig,
+        model_to_use: str,
+        delay: float
+    ) -> OllamaResponse:
+        """
+        Send request and, if it has not completed within delay, also to a second server
+        
+        The first successful response wins and the other request is cancelled.
+        
+        Args:
+            send: Sends the request to a given instance
+            instance: Primary instance
+            model_to_use: Model name (the second server must host it)
+            delay: Seconds to wait for the primary before hedging
+        """
+        hedging = get_hedge_policy()
+        primary = asyncio.create_task(send(instance))
+        pending = {primary}
+        secondary = None
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+            
+            hedge_instance = self._find_hedge_instance(instance, model_to_use)
+            if hedge_instance is None:
+                hedging.record("no_secondary")
+                return await primary
+            if not hedging.try_acquire():
+                hedging.record("budget_exhausted")
+                return await primary
+            
+            hedging.record("fired")
+            logger.info(
+                "Hedging slow LLM request",
+                extra={
+                    "model": model_to_use,
+                    "primary": instance.url,
+                    "secondary": hedge_instance.url,
+                    "delay_seconds": round(delay, 3),
+                }
+            )
+            secondary = asyncio.create_task(send(hedge_instance))
+            pending.add(secondary)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        hedging.record("hedge_won" if task is secondary else "primary_won")
+                        return task.result()
+            # Both requests failed: report the primary's error
+            return primary.result()
+        finally:
+            for task in (primary, secondary):
+                if task is not None and not task.done():
+                    task.cancel()
+    
+    def _find_hedge_instance(self, instance: OllamaInstanceConfig, model: str) -> Optional[OllamaInstanceConfig]:
+        """Pick another healthy server that has the model (None if there is none)"""
+        primary = strip_api_suffix(instance.url)
+        breakers = get_circuit_breakers()
+        candidates = [
+            state.url for state in get_server_state_registry().get_all_states()
+            if state.url != primary
+            and state.healthy is not False
+            and not state.suspect
+            and not breakers.is_open(state.url)
+            and model in state.available_models
+        ]
+        url = get_load_balancer().choose(candidates, lambda u: u, model)
+        if url is None:
+            return None
+        return self._create_dynamic_instance(url, model)
+    
+    async def _send_generate_request(
+        self,
+        instance: OllamaInstanceConfig,
+        model_to_use: str,
+        task_type: TaskType,
+        messages: List[Dict[str, str]],
+        options: Dict[str, Any],
+        cache_key: str,
+        use_cache: bool,
+        stream: bool,
+        prompt_length: int,
+        timeout: Optional[float] = None
+    ) -> OllamaResponse:
+        """Send request to an instance with retries"""
+        # Check if model is loaded (to avoid queues) - from cached /api/ps state
+        model_loaded = get_server_state_registry().is_model_loaded(instance.url, model_to_use)
+        if model_loaded is False:
             logger.info(
                 "Model not loaded in GPU, will be loaded on first request",
                 extra={
@@ -446,14 +805,6 @@ class OllamaClient:
                 }
             )
         
-        # Prepare messages for chat API
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        if history:
-            messages.extend(history)
-        messages.append({"role": "user", "content": prompt})
-        
         # Логирование реального вызова к LLM (если кэш отключен)
         if not use_cache:
             logger.info(
@@ -461,34 +812,19 @@ class OllamaClient:
                 extra={
                     "model": model_to_use,
                     "server_url": instance.url,
-                    "prompt_length": len(prompt),
+                    "prompt_length": prompt_length,
                     "task_type": task_type.value
                 }
             )
         
-        # Prepare request
-        # Применить глобальные ограничения из конфигурации (стопоры)
-        from app.core.config import get_settings
-        settings = get_settings()
-        
-        # Использовать значения из kwargs, если указаны, иначе из конфигурации
+        # Prepare request (options already include global limits from configuration)
         payload = {
             "model": model_to_use,
             "messages": messages,
             "stream": stream,
-            "options": {
-                "temperature": kwargs.get("temperature", settings.llm_temperature),
-                "top_p": kwargs.get("top_p", settings.llm_top_p),
-                "num_ctx": kwargs.get("num_ctx", settings.llm_num_ctx),
-            }
+            "options": dict(options),
         }
         
-        # num_predict (максимальное количество токенов) - критично для предотвращения "думать час"
-        if "num_predict" in kwargs:
-            payload["options"]["num_predict"] = kwargs["num_predict"]
-        else:
-            payload["options"]["num_predict"] = settings.llm_max_tokens
-        
         # Prepare request URL (remove /v1 for API calls)
         request_base_url = instance.url
         if request_base_url.endswith("/v1"):
@@ -500,7 +836,7 @@ class OllamaClient:
         logger.debug(
             "Sending request to Ollama",
             extra={
-                "url": f"{request_base_url}/api/chat",
+                "url": f"{request_base_url}{get_server_state_registry().get_chat_endpoint(instance.url) or '/api/chat'}",
                 "model": model_to_use,
                 "payload_model": payload.get('model'),
                 "task_type": task_type.value if hasattr(task_type, 'value') else str(task_type),
@@ -517,345 +853,326 @@ class OllamaClient:
         timeout_value = float(settings.llm_timeout_seconds)
         
         # Если явно указан таймаут в kwargs, использовать его
-        if "timeout" in kwargs:
-            timeout_value = float(kwargs["timeout"])
+        if timeout is not None:
+            timeout_value = float(timeout)
         
         # Start metrics tracking
         request_start_time = time.time()
         task_type_str = task_type.value if hasattr(task_type, 'value') else str(task_type)
         
-        async with httpx.AsyncClient(
-            base_url=request_base_url,
-            timeout=timeout_value,
-            limits=httpx.Limits(
-                max_keepalive_connections=5,
-                max_connections=10,
-            )
-        ) as request_client:
-            max_retries = 3
-            retry_delay = 1
-            
-            for attempt in range(max_retries):
+        request_client = await self._get_client(instance)
+        
+        # Retries are bounded per request, by the server's circuit and by the process-wide retry budget
+        breakers = get_circuit_breakers()
+        breaker = breakers.get(instance.url)
+        retry_policy = breakers.retry_policy
+        retry_policy.on_request()
+        max_retries = retry_policy.max_attempts
+        
+        for attempt in range(max_retries):
+            try:
+                if task_type == TaskType.PLANNING:
+                    logger.info(
+                        "Planning request",
+                        extra={
+                            "timeout": timeout_value,
+                            "attempt": attempt + 1,
+                            "max_retries": max_retries,
+                        }
+                    )
+                
+                # Use the chat endpoint learned for this server (probed once per server)
+                response, endpoint = await self._post_chat(request_client, instance, payload, timeout_value)
+                
                 try:
-                    if task_type == TaskType.PLANNING:
-                        logger.info(
-                            "Planning request",
-                            extra={
-                                "timeout": timeout_value,
-                                "attempt": attempt + 1,
-                                "max_retries": max_retries,
-                            }
-                        )
-                    
-                    # Try multiple possible chat endpoints for different Ollama versions
-                    chat_endpoints = ["/api/chat", "/api/generate", "/api/chat/completions", "/api/completions"]
-                    response = None
-                    last_exc = None
-                    for ep in chat_endpoints:
-                        try:
-                            response = await request_client.post(ep, json=payload, timeout=timeout_value)
-                            response.raise_for_status()
-                            break
-                        except httpx.HTTPStatusError as http_e:
-                            # if 404 or 400, try next endpoint; otherwise surface error
-                            if http_e.response.status_code in (404, 400):
-                                logger.debug(f"Endpoint {ep} returned {http_e.response.status_code}, trying next endpoint")
-                                last_exc = http_e
-                                continue
-                            else:
-                                raise
-                        except Exception as exc:
-                            last_exc = exc
-                            continue
-                    if response is None:
-                        # No endpoint succeeded; raise last exception if available
-                        if isinstance(last_exc, httpx.HTTPStatusError):
-                            raise last_exc
-                        raise OllamaError(f"No chat endpoint succeeded for {request_base_url}")
-                    
-                    try:
-                        data = response.json()
-                    except Exception as json_exc:
-                        # Non-JSON response (some Ollama variants return raw text) - fall back to using raw text as response
-                        logger.debug(f"Non-JSON response from {request_base_url}: {response.text[:400]}")
-                        # Construct a synthetic data object with raw content
-                        data = {"message": {"content": response.text}, "done": True, "model": model_to_use}
-                    
-                    # Extract response from chat format
-                    response_text = data.get("message", {}).get("content", "")
-                    
-                    # Parse reasoning/thinking from response if present
-                    # Models like deepseek-r1 use <think>...</think> tags
-                    reasoning_text = None
-                    final_response = response_text
-                    
-                    # Check for <think>...</think> tags
-                    import re
-                    think_pattern = r'<think>(.*?)</think>'
-                    think_matches = re.findall(think_pattern, response_text, re.DOTALL | re.IGNORECASE)
-                    if think_matches:
-                        reasoning_text = '\n\n'.join(think_matches)
-                        # Remove thinking tags from final response
-                        final_response = re.sub(think_pattern, '', response_text, flags=re.DOTALL | re.IGNORECASE).strip()
-                    
-                    # Check for [thinking]...</thinking> tags (alternative format)
-                    if not reasoning_text:
-                        thinking_pattern = r'\[thinking\](.*?)\[/thinking\]'
-                        thinking_matches = re.findall(thinking_pattern, response_text, re.DOTALL | re.IGNORECASE)
-                        if thinking_matches:
-                            reasoning_text = '\n\n'.join(thinking_matches)
-                            final_response = re.sub(thinking_pattern, '', response_text, flags=re.DOTALL | re.IGNORECASE).strip()
-                    
-                    # Check for reasoning: prefix (some models use this)
-                    if not reasoning_text:
-                        reasoning_pattern = r'(?:^|\n)reasoning:\s*(.*?)(?=\n\n|\n[^\s]|$)'
-                        reasoning_matches = re.findall(reasoning_pattern, response_text, re.DOTALL | re.IGNORECASE)
-                        if reasoning_matches:
-                            reasoning_text = '\n\n'.join(reasoning_matches)
-                            final_response = re.sub(reasoning_pattern, '', response_text, flags=re.DOTALL | re.IGNORECASE).strip()
-                    
-                    # Check for Reasoning: or Рассуждение: prefix (some models like gpt-oss use this)
-                    if not reasoning_text:
-                        reasoning_prefix_pattern = r'(?:^|\n)(?:Reasoning|Рассуждение|Размышление):\s*(.*?)(?=\n\n(?:Ответ|Answer|Final|Итог)|$)'
-                        reasoning_prefix_matches = re.findall(reasoning_prefix_pattern, response_text, re.DOTALL | re.IGNORECASE)
-                        if reasoning_prefix_matches:
-                            reasoning_text = '\n\n'.join(reasoning_prefix_matches)
-                            # Try to find where reasoning ends and answer begins
-                            answer_pattern = r'(?:Ответ|Answer|Final|Итог):\s*(.*)'
-                            answer_match = re.search(answer_pattern, response_text, re.DOTALL | re.IGNORECASE)
-                            if answer_match:
-                                final_response = answer_match.group(1).strip()
-                            else:
-                                # Remove reasoning prefix but keep rest
-                                final_response = re.sub(reasoning_prefix_pattern, '', response_text, flags=re.DOTALL | re.IGNORECASE).strip()
-                    
-                    # Check for models that put reasoning before the answer with separator
-                    if not reasoning_text:
-                        # Pattern: reasoning text followed by --- or === or \*\*\* separator, then answer
-                        # Escape asterisks properly in regex
-                        separator_pattern = r'(.*?)(?:^|\n)(?:---+|===+|\*{3,})(?:^|\n)(.*)'
-                        separator_match = re.match(separator_pattern, response_text, re.DOTALL)
-                        if separator_match:
-                            potential_reasoning = separator_match.group(1).strip()
-                            potential_answer = separator_match.group(2).strip()
-                            # If potential_reasoning is substantial and potential_answer is shorter, treat first as reasoning
-                            if len(potential_reasoning) > 100 and len(potential_answer) < len(potential_reasoning) * 2:
-                                reasoning_text = potential_reasoning
-                                final_response = potential_answer
-                    
-                    # Use parsed response
-                    response_text = final_response
-                    
-                    # DEBUG: Check what model Ollama returned
-                    ollama_returned_model = data.get("model")
-                    if ollama_returned_model and ollama_returned_model != model_to_use:
-                        logger.warning(
-                            "Model mismatch: Ollama returned different model",
-                            extra={
-                                "requested_model": model_to_use,
-                                "returned_model": ollama_returned_model,
-                            }
-                        )
-                    
-                    # Log reasoning if found
-                    if reasoning_text:
-                        logger.debug(
-                            "Reasoning found in response",
-                            extra={
-                                "reasoning_length": len(reasoning_text),
-                                "response_length": len(response_text),
-                                "model": model_to_use,
-                            }
-                        )
-                    
-                    # Save to cache (только если кэш включен)
-                    if use_cache and data.get("done") and response_text:
-                        cache_key = self._get_cache_key(prompt, model_to_use, **kwargs)
-                        self._save_to_cache(
-                            cache_key,
-                            response_text,
-                            model_to_use,
-                            metadata={"attempt": attempt + 1}
-                        )
-                    elif not use_cache:
-                        # Логирование реального ответа от LLM
-                        duration = time.time() - request_start_time
-                        logger.info(
-                            "✅ РЕАЛЬНЫЙ ОТВЕТ ОТ LLM получен",
-                            extra={
-                                "model": model_to_use,
-                                "server_url": instance.url,
-                                "response_length": len(response_text),
-                                "duration_seconds": round(duration, 2),
-                                "task_type": task_type.value
-                            }
-                        )
-                    
-                    # Record successful request metrics
-                    duration = time.time() - request_start_time
-                    llm_requests_total.labels(
-                        model=model_to_use,
-                        server_url=instance.url,
-                        task_type=task_type_str,
-                        status="success"
-                    ).inc()
-                    llm_request_duration_seconds.labels(
-                        model=model_to_use,
-                        server_url=instance.url,
-                        task_type=task_type_str
-                    ).observe(duration)
-                    
-                    # Extract and record tokens if available
-                    if "prompt_eval_count" in data:
-                        llm_tokens_total.labels(
-                            model=model_to_use,
-                            type="input"
-                        ).inc(data.get("prompt_eval_count", 0))
-                    if "eval_count" in data:
-                        llm_tokens_total.labels(
-                            model=model_to_use,
-                            type="output"
-                        ).inc(data.get("eval_count", 0))
-                    
-                    # Always use model_to_use (the one we requested), not what Ollama returned
-                    # This ensures consistency with what the user selected
-                    return OllamaResponse(
-                        model=model_to_use,
-                        response=response_text,
-                        done=data.get("done", False),
-                        reasoning=reasoning_text if 'reasoning_text' in locals() and reasoning_text else None
+                    data = response.json()
+                except Exception as json_exc:
+                    # Non-JSON response (some Ollama variants return raw text) - fall back to using raw text as response
+                    logger.debug(f"Non-JSON response from {request_base_url}: {response.text[:400]}")
+                    # Construct a synthetic data object with raw content
+                    data = {"message": {"content": response.text}, "done": True, "model": model_to_use}
+                
+                # Extract response according to the endpoint dialect
+                response_text = self._extract_content(data)
+                
+                # Parse reasoning/thinking from response if present
+                # Models like deepseek-r1 use <think>...</think> tags
+                reasoning_text = None
+                final_response = response_text
+                
+                # Check for <think>...</think> tags
+                import re
+                think_pattern = r'<think>(.*?)</think>'
+                think_matches = re.findall(think_pattern, response_text, re.DOTALL | re.IGNORECASE)
+                if think_matches:
+                    reasoning_text = '\n\n'.join(think_matches)
+                    # Remove thinking tags from final response
+                    final_response = re.sub(think_pattern, '', response_text, flags=re.DOTALL | re.IGNORECASE).strip()
+                
+                # Check for [thinking]...</thinking> tags (alternative format)
+                if not reasoning_text:
+                    thinking_pattern = r'\[thinking\](.*?)\[/thinking\]'
+                    thinking_matches = re.findall(thinking_pattern, response_text, re.DOTALL | re.IGNORECASE)
+                    if thinking_matches:
+                        reasoning_text = '\n\n'.join(thinking_matches)
+                        final_response = re.sub(thinking_pattern, '', response_text, flags=re.DOTALL | re.IGNORECASE).strip()
+                
+                # Check for reasoning: prefix (some models use this)
+                if not reasoning_text:
+                    reasoning_pattern = r'(?:^|\n)reasoning:\s*(.*?)(?=\n\n|\n[^\s]|$)'
+                    reasoning_matches = re.findall(reasoning_pattern, response_text, re.DOTALL | re.IGNORECASE)
+                    if reasoning_matches:
+                        reasoning_text = '\n\n'.join(reasoning_matches)
+                        final_response = re.sub(reasoning_pattern, '', response_text, flags=re.DOTALL | re.IGNORECASE).strip()
+                
+                # Check for Reasoning: or Рассуждение: prefix (some models like gpt-oss use this)
+                if not reasoning_text:
+                    reasoning_prefix_pattern = r'(?:^|\n)(?:Reasoning|Рассуждение|Размышление):\s*(.*?)(?=\n\n(?:Ответ|Answer|Final|Итог)|$)'
+                    reasoning_prefix_matches = re.findall(reasoning_prefix_pattern, response_text, re.DOTALL | re.IGNORECASE)
+                    if reasoning_prefix_matches:
+                        reasoning_text = '\n\n'.join(reasoning_prefix_matches)
+                        # Try to find where reasoning ends and answer begins
+                        answer_pattern = r'(?:Ответ|Answer|Final|Итог):\s*(.*)'
+                        answer_match = re.search(answer_pattern, response_text, re.DOTALL | re.IGNORECASE)
+                        if answer_match:
+                            final_response = answer_match.group(1).strip()
+                        else:
+                            # Remove reasoning prefix but keep rest
+                            final_response = re.sub(reasoning_prefix_pattern, '', response_text, flags=re.DOTALL | re.IGNORECASE).strip()
+                
+                # Check for models that put reasoning before the answer with separator
+                if not reasoning_text:
+                    # Pattern: reasoning text followed by --- or === or \*\*\* separator, then answer
+                    # Escape asterisks properly in regex
+                    separator_pattern = r'(.*?)(?:^|\n)(?:---+|===+|\*{3,})(?:^|\n)(.*)'
+                    separator_match = re.match(separator_pattern, response_text, re.DOTALL)
+                    if separator_match:
+                        potential_reasoning = separator_match.group(1).strip()
+                        potential_answer = separator_match.group(2).strip()
+                        # If potential_reasoning is substantial and potential_answer is shorter, treat first as reasoning
+                        if len(potential_reasoning) > 100 and len(potential_answer) < len(potential_reasoning) * 2:
+                            reasoning_text = potential_reasoning
+                            final_response = potential_answer
+                
+                # Use parsed response
+                response_text = final_response
+                
+                # DEBUG: Check what model Ollama returned
+                ollama_returned_model = data.get("model")
+                if ollama_returned_model and ollama_returned_model != model_to_use:
+                    logger.warning(
+                        "Model mismatch: Ollama returned different model",
+                        extra={
+                            "requested_model": model_to_use,
+                            "returned_model": ollama_returned_model,
+                        }
                     )
-                    
-                except httpx.TimeoutException as e:
-                    error_type = "timeout"
-                    if attempt < max_retries - 1:
-                        await asyncio.sleep(retry_delay * (attempt + 1))
-                        continue
-                    # Record error metrics
-                    duration = time.time() - request_start_time
-                    llm_requests_total.labels(
-                        model=model_to_use,
-                        server_url=instance.url,
-                        task_type=task_type_str,
-                        status="error"
-                    ).inc()
-                    llm_errors_total.labels(
-                        model=model_to_use,
-                        server_url=instance.url,
-                        error_type=error_type
-                    ).inc()
-                    llm_request_duration_seconds.labels(
-                        model=model_to_use,
-                        server_url=instance.url,
-                        task_type=task_type_str
-                    ).observe(duration)
-                    raise OllamaError(f"Request to {instance.url} timed out after {max_retries} attempts")
-                except httpx.HTTPStatusError as e:
-                    error_type = f"http_{e.response.status_code}"
-                    # Record error metrics
+                
+                # Log reasoning if found
+                if reasoning_text:
+                    logger.debug(
+                        "Reasoning found in response",
+                        extra={
+                            "reasoning_length": len(reasoning_text),
+                            "response_length": len(response_text),
+                            "model": model_to_use,
+                        }
+                    )
+                
+                # Save to cache (только если кэш включен)
+                if use_cache and data.get("done") and response_text:
+                    self._store_cached_response(
+                        cache_key,
+                        model_to_use,
+                        options,
+                        response_text,
+                        reasoning_text
+                    )
+                elif not use_cache:
+                    # Логирование реального ответа от LLM
                     duration = time.time() - request_start_time
-                    llm_requests_total.labels(
-                        model=model_to_use,
-                        server_url=instance.url,
-                        task_type=task_type_str,
-                        status="error"
-                    ).inc()
-                    llm_errors_total.labels(
+                    logger.info(
+                        "✅ РЕАЛЬНЫЙ ОТВЕТ ОТ LLM получен",
+                        extra={
+                            "model": model_to_use,
+                            "server_url": instance.url,
+                            "response_length": len(response_text),
+                            "duration_seconds": round(duration, 2),
+                            "task_type": task_type.value
+                        }
+                    )
+                
+                # Record successful request metrics
+                duration = time.time() - request_start_time
+                llm_requests_total.labels(
+                    model=model_to_use,
+                    server_url=instance.url,
+                    task_type=task_type_str,
+                    status="success"
+                ).inc()
+                record_request_duration(model_to_use, instance.url, task_type_str, duration)
+                get_server_state_registry().mark_success(instance.url)
+                breaker.record_success()
+                
+                # Extract and record tokens if available
+                if "prompt_eval_count" in data:
+                    llm_tokens_total.labels(
                         model=model_to_use,
-                        server_url=instance.url,
-                        error_type=error_type
-                    ).inc()
-                    llm_request_duration_seconds.labels(
+                        type="input"
+                    ).inc(data.get("prompt_eval_count", 0))
+                if "eval_count" in data:
+                    llm_tokens_total.labels(
                         model=model_to_use,
-                        server_url=instance.url,
-                        task_type=task_type_str
-                    ).observe(duration)
-                    # If model endpoint returned 404 or 400, try fallback to a server-registered model and retry
-                    try:
-                        status_code = e.response.status_code
-                        if status_code in (404, 400):
-                            # Try to find models in DB for this server and retry with first available
+                        type="output"
+                    ).inc(data.get("eval_count", 0))
+                
+                # Always use model_to_use (the one we requested), not what Ollama returned
+                # This ensures consistency with what the user selected
+                return OllamaResponse(
+                    model=model_to_use,
+                    response=response_text,
+                    done=data.get("done", False),
+                    reasoning=reasoning_text if 'reasoning_text' in locals() and reasoning_text else None
+                )
+                
+            except httpx.TimeoutException as e:
+                error_type = "timeout"
+                get_server_state_registry().mark_suspect(instance.url, error_type)
+                breaker.record_failure(error_type)
+                if attempt < max_retries - 1 and breakers.can_retry(instance.url):
+                    await asyncio.sleep(retry_policy.backoff(attempt))
+                    continue
+                # Record error metrics
+                duration = time.time() - request_start_time
+                llm_requests_total.labels(
+                    model=model_to_use,
+                    server_url=instance.url,
+                    task_type=task_type_str,
+                    status="error"
+                ).inc()
+                llm_errors_total.labels(
+                    model=model_to_use,
+                    server_url=instance.url,
+                    error_type=error_type
+                ).inc()
+                # Timeouts feed the balancer too, so a stalled server stops being preferred
+                record_request_duration(model_to_use, instance.url, task_type_str, duration, success=False)
+                raise OllamaError(f"Request to {instance.url} timed out after {attempt + 1} attempts")
+            except httpx.HTTPStatusError as e:
+                error_type = f"http_{e.response.status_code}"
+                if e.response.status_code >= 500:
+                    get_server_state_registry().mark_suspect(instance.url, error_type)
+                    breaker.record_failure(error_type)
+                else:
+                    # The server answered: a client error does not count against its circuit
+                    breaker.record_success()
+                # Record error metrics
+                duration = time.time() - request_start_time
+                llm_requests_total.labels(
+                    model=model_to_use,
+                    server_url=instance.url,
+                    task_type=task_type_str,
+                    status="error"
+                ).inc()
+                llm_errors_total.labels(
+                    model=model_to_use,
+                    server_url=instance.url,
+                    error_type=error_type
+                ).inc()
+                llm_request_duration_seconds.labels(
+                    model=model_to_use,
+                    server_url=instance.url,
+                    task_type=task_type_str
+                ).observe(duration)
+                # If model endpoint returned 404 or 400, try fallback to a server-registered model and retry
+                try:
+                    status_code = e.response.status_code
+                    if status_code in (404, 400):
+                        # Try to find models in DB for this server and retry with first available
+                        try:
+                            from app.core.database import get_session_local
+                            from app.services.ollama_service import \
+                                OllamaService
+                            SessionLocal = get_session_local()
+                            db = SessionLocal()
                             try:
-                                from app.core.database import get_session_local
-                                from app.services.ollama_service import \
-                                    OllamaService
-                                SessionLocal = get_session_local()
-                                db = SessionLocal()
-                                try:
-                                    # Normalize URL without /v1
-                                    server_url_norm = instance.url
-                                    if server_url_norm.endswith("/v1"):
-                                        server_url_norm = server_url_norm[:-3]
-                                    elif server_url_norm.endswith("/v1/"):
-                                        server_url_norm = server_url_norm[:-4]
-                                    server = OllamaService.get_server_by_url(db, server_url_norm)
-                                    if server:
-                                        models = OllamaService.get_models_for_server(db, str(server.id))
-                                        if models:
-                                            # pick first active model
-                                            new_model = models[0].model_name
-                                            logger.warning(f"Falling back to server-registered model {new_model} on {server.url}")
-                                            model_to_use = new_model
-                                            # update payload model and retry
-                                            payload["model"] = model_to_use
-                                            # reset request_start_time for metrics
-                                            request_start_time = time.time()
-                                            db.close()
-                                            continue
-                                except Exception:
-                                    try:
+                                # Normalize URL without /v1
+                                server_url_norm = instance.url
+                                if server_url_norm.endswith("/v1"):
+                                    server_url_norm = server_url_norm[:-3]
+                                elif server_url_norm.endswith("/v1/"):
+                                    server_url_norm = server_url_norm[:-4]
+                                server = OllamaService.get_server_by_url(db, server_url_norm)
+                                if server:
+                                    models = OllamaService.get_models_for_server(db, str(server.id))
+                                    if models:
+                                        # pick first active model
+                                        new_model = models[0].model_name
+                                        logger.warning(f"Falling back to server-registered model {new_model} on {server.url}")
+                                        model_to_use = new_model
+                                        # update payload model and retry
+                                        payload["model"] = model_to_use
+                                        # reset request_start_time for metrics
+                                        request_start_time = time.time()
                                         db.close()
-                                    except Exception:
-                                        pass
+                                        continue
                             except Exception:
-                                pass
-                    except Exception:
-                        pass
-                    raise OllamaError(f"HTTP error from {instance.url}: {e.response.status_code} - {e.response.text}")
-                except Exception as e:
-                    error_type = type(e).__name__
-                    if attempt < max_retries - 1:
-                        await asyncio.sleep(retry_delay * (attempt + 1))
-                        continue
-                    # Record error metrics
-                    duration = time.time() - request_start_time
-                    llm_requests_total.labels(
-                        model=model_to_use,
-                        server_url=instance.url,
-                        task_type=task_type_str,
-                        status="error"
-                    ).inc()
-                    llm_errors_total.labels(
-                        model=model_to_use,
-                        server_url=instance.url,
-                        error_type=error_type
-                    ).inc()
-                    llm_request_duration_seconds.labels(
-                        model=model_to_use,
-                        server_url=instance.url,
-                        task_type=task_type_str
-                    ).observe(duration)
-                    raise OllamaError(f"Error calling Ollama at {instance.url}: {str(e)}")
-            
-            # All retries failed
-            duration = time.time() - request_start_time
-            llm_requests_total.labels(
-                model=model_to_use,
-                server_url=instance.url,
-                task_type=task_type_str,
-                status="error"
-            ).inc()
-            llm_errors_total.labels(
-                model=model_to_use,
-                server_url=instance.url,
-                error_type="max_retries_exceeded"
-            ).inc()
-            llm_request_duration_seconds.labels(
-                model=model_to_use,
-                server_url=instance.url,
-                task_type=task_type_str
-            ).observe(duration)
-            raise OllamaError(f"Failed to generate response after {max_retries} attempts")
+                                try:
+                                    db.close()
+                                except Exception:
+                                    pass
+                        except Exception:
+                            pass
+                except Exception:
+                    pass
+                raise OllamaError(f"HTTP error from {instance.url}: {e.response.status_code} - {e.response.text}")
+            except Exception as e:
+                error_type = type(e).__name__
+                if isinstance(e, (httpx.TransportError, OllamaError)):
+                    get_server_state_registry().mark_suspect(instance.url, error_type)
+                    breaker.record_failure(error_type)
+                if attempt < max_retries - 1 and breakers.can_retry(instance.url):
+                    await asyncio.sleep(retry_policy.backoff(attempt))
+                    continue
+                # Record error metrics
+                duration = time.time() - request_start_time
+                llm_requests_total.labels(
+                    model=model_to_use,
+                    server_url=instance.url,
+                    task_type=task_type_str,
+                    status="error"
+                ).inc()
+                llm_errors_total.labels(
+                    model=model_to_use,
+                    server_url=instance.url,
+                    error_type=error_type
+                ).inc()
+                llm_request_duration_seconds.labels(
+                    model=model_to_use,
+                    server_url=instance.url,
+                    task_type=task_type_str
+                ).observe(duration)
+                raise OllamaError(f"Error calling Ollama at {instance.url}: {str(e)}")
+        
+        # All retries failed
+        duration = time.time() - request_start_time
+        llm_requests_total.labels(
+            model=model_to_use,
+            server_url=instance.url,
+            task_type=task_type_str,
+            status="error"
+        ).inc()
+        llm_errors_total.labels(
+            model=model_to_use,
+            server_url=instance.url,
+            error_type="max_retries_exceeded"
+        ).inc()
+        llm_request_duration_seconds.labels(
+            model=model_to_use,
+            server_url=instance.url,
+            task_type=task_type_str
+        ).observe(duration)
+        raise OllamaError(f"Failed to generate response after {max_retries} attempts")
     
     async def generate_stream(
         self,
@@ -865,11 +1182,15 @@ class OllamaClient:
         server_url: Optional[str] = None,
         system_prompt: Optional[str] = None,
         history: Optional[List[Dict[str, str]]] = None,
+        priority: Optional[RequestPriority] = None,
         **kwargs
     ):
         """
         Generate streaming response using Ollama
         
+        Args:
+            priority: Admission priority class (default derived from task_type)
+        
         Yields:
             OllamaResponse chunks
         """
@@ -917,7 +1238,7 @@ class OllamaClient:
             
             if not instance:
                 for inst in self.instances:
-                    if await self.health_check(inst):
+                    if await self._is_available(inst):
                         instance = inst
                         actual_model_name = model
                         break
@@ -930,7 +1251,7 @@ class OllamaClient:
             instance = self.select_model_for_task(task_type)
             if not instance:
                 for inst in self.instances:
-                    if await self.health_check(inst):
+                    if await self._is_available(inst):
                         instance = inst
                         break
                 if not instance:
@@ -942,12 +1263,60 @@ class OllamaClient:
         
         model_to_use = actual_model_name if actual_model_name else instance.model
         
-        # Health check
+        messages = self._build_messages(prompt, system_prompt, history)
+        options = {
+            "temperature": kwargs.get("temperature", 0.7),
+            "top_p": kwargs.get("top_p", 0.9),
+            "num_ctx": kwargs.get("num_ctx", 4096),
+        }
+        
+        # Deterministic requests are served from cache as a single final chunk
+        cache_key = self._get_request_cache_key(model_to_use, messages, options)
+        cacheable = self.cache.enabled and self._is_deterministic(options)
+        if cacheable:
+            cached = await self._get_cached_response(cache_key, options)
+            if cached:
+                yield OllamaResponse(
+                    model=model_to_use,
+                    response=cached["response"],
+                    done=True,
+                    reasoning=cached.get("reasoning")
+                )
+                return
+        
+        # Identical concurrent streams share one upstream stream
+        request = functools.partial(
+            self._stream_uncached,
+            instance=instance,
+            model_to_use=model_to_use,
+            messages=messages,
+            options=options,
+            cache_key=cache_key if cacheable else None,
+            server_url=server_url,
+            is_dynamic_instance=is_dynamic_instance,
+            priority=RequestPriority.parse(priority) or RequestPriority.for_task_type(task_type),
+        )
+        async for chunk in self.single_flight.stream(cache_key, request):
+            yield chunk.model_copy()
+    
+    async def _stream_uncached(
+        self,
+        instance: OllamaInstanceConfig,
+        model_to_use: str,
+        messages: List[Dict[str, str]],
+        options: Dict[str, Any],
+        cache_key: Optional[str],
+        server_url: Optional[str],
+        is_dynamic_instance: bool,
+        priority: RequestPriority = RequestPriority.EXECUTION
+    ):
+        """Stream response from Ollama with health checks and fallback (no cache lookup)"""
+        # Health check from server state registry
         if not is_dynamic_instance:
-            if not await self.health_check(instance):
+            if not await self._is_available(instance):
                 if not server_url:
                     for fallback_instance in self.instances:
-                        if fallback_instance != instance and await self.health_check(fallback_instance):
+                        if fallback_instance != instance and await self._is_available(fallback_instance):
                             instance = fallback_instance
                             break
                     else:
@@ -955,59 +1324,73 @@ class OllamaClient:
                 else:
                     raise OllamaError(f"Ollama instance {instance.url} is not available")
         else:
-            if not await self.health_check(instance):
+            if not await self._is_available(instance):
                 raise OllamaError(f"Ollama server {instance.url} is not available")
         
-        # Prepare messages
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        if history:
-            messages.extend(history)
-        messages.append({"role": "user", "content": prompt})
+        # Shared pooled client for the server
+        request_client = await self._get_client(instance)
         
-        # Prepare request URL
-        request_base_url = instance.url
-        if request_base_url.endswith("/v1"):
-            request_base_url = request_base_url[:-3]
-        elif request_base_url.endswith("/v1/"):
-            request_base_url = request_base_url[:-4]
+        payload = {
+            "model": model_to_use,
+            "messages": messages,
+            "stream": True,
+            "options": dict(options),
+        }
         
-        # Create client and stream
-        async with httpx.AsyncClient(
-            base_url=request_base_url,
-            timeout=300.0,
-            limits=httpx.Limits(
-                max_keepalive_connections=5,
-                max_connections=10,
-            )
-        ) as request_client:
-            payload = {
-                "model": model_to_use,
-                "messages": messages,
-                "stream": True,
-                "options": {
-                    "temperature": kwargs.get("temperature", 0.7),
-                    "top_p": kwargs.get("top_p", 0.9),
-                    "num_ctx": kwargs.get("num_ctx", 4096),
-                }
-            }
-            
-            async with request_client.stream("POST", "/api/chat", json=payload, timeout=300.0) as response:
-                response.raise_for_status()
-                async for line in response.aiter_lines():
-                    if line:
-                        try:
-                            data = json.loads(line)
-                            # Extract content from chat format
-                            content = data.get("message", {}).get("content", "")
-                            yield OllamaResponse(
-                                model=model_to_use,
-                                response=content,
-                                done=data.get("done", False)
-                            )
-                        except json.JSONDecodeError:
-                            continue
+        # Stream via /api/generate only if the server is known to lack /api/chat
+        endpoint = "/api/chat"
+        if get_server_state_registry().get_chat_endpoint(instance.url) == "/api/generate":
+            endpoint = "/api/generate"
+        
+        # Fail fast while the server's circuit is open
+        breaker = get_circuit_breakers().get(instance.url)
+        try:
+            is_probe = breaker.acquire()
+        except CircuitOpen as e:
+            raise OllamaError(str(e)) from e
+        
+        chunks: List[str] = []
+        completed = False
+        # Hold a concurrency slot on the server for the whole stream (counted as load for the balancer)
+        try:
+            with get_load_balancer().track(instance.url):
+                async with get_admission_controller().slot(instance.url, model_to_use, priority):
+                    try:
+                        async with request_client.stream(
+                            "POST", endpoint, json=self._payload_for_endpoint(endpoint, payload), timeout=300.0
+                        ) as response:
+                            response.raise_for_status()
+                            async for line in response.aiter_lines():
+                                if line:
+                                    try:
+                                        data = json.loads(line)
+                                        # Extract content according to the endpoint dialect
+                                        content = self._extract_content(data)
+                                        if cache_key is not None:
+                                            chunks.append(content)
+                                            completed = completed or bool(data.get("done"))
+                                        yield OllamaResponse(
+                                            model=model_to_use,
+                                            response=content,
+                                            done=data.get("done", False)
+                                        )
+                                    except json.JSONDecodeError:
+                                        continue
+                    except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                        if not isinstance(e, httpx.HTTPStatusError) or e.response.status_code >= 500:
+                            get_server_state_registry().mark_suspect(instance.url, type(e).__name__)
+                            breaker.record_failure(type(e).__name__)
+                        raise
+                    get_server_state_registry().mark_success(instance.url)
+                    breaker.record_success()
+        except AdmissionRejected as e:
+            raise OllamaError(str(e)) from e
+        finally:
+            if is_probe:
+                breaker.release()
+        
+        if cache_key is not None and completed and chunks:
+            self._store_cached_response(cache_key, model_to_use, options, "".join(chunks))
     
     def get_instance_by_model_name(self, model_name: str) -> Optional[OllamaInstanceConfig]:
         """Get Ollama instance config by model name"""
@@ -1017,10 +1400,14 @@ class OllamaClient:
         return None
     
     async def close(self):
-        """Close all HTTP clients"""
-        for client in self._instance_clients.values():
-            await client.aclose()
-        self._instance_clients.clear()
+        """
+        Release resources of this client.
+        
+        Connections belong to the process-wide transport pool shared with
+        other clients, the server state registry and the embedding service,
+        so nothing is closed here; the pool is closed on application
+        shutdown (close_transport_pool).
+        """
 
 
 # Global client instance
@@ -0,0 +1,341 @@
+"""
+Background registry of Ollama server state
+
+Keeps health, loaded models and their VRAM residency for every known Ollama
+server, refreshed in the background, so the request hot path can read state
+instead of probing /api/tags and /api/ps before every completion.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.logging_config import LoggingConfig
+from app.core.metrics import llm_model_loaded
+from app.core.ollama_transport import get_transport_pool, strip_api_suffix
+
+logger = LoggingConfig.get_logger(__name__)
+
+
+@dataclass
+class ServerState:
+    """Last known state of one Ollama server"""
+    url: str
+    healthy: Optional[bool] = None  # None = never checked
+    suspect: bool = False  # A request failed since the last successful probe
+    loaded_models: Dict[str, Dict[str, Any]] = field(default_factory=dict)  # name -> {size, size_vram, expires_at}
+    available_models: List[str] = field(default_factory=list)
+    checked_at: Optional[datetime] = None
+    checked_monotonic: float = 0.0
+    last_error: Optional[str] = None
+    consecutive_failures: int = 0
+    chat_endpoint: Optional[str] = None  # Learned working chat endpoint (e.g. "/api/chat")
+    max_concurrent: Optional[int] = None  # Configured concurrency (database server or .env instance)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "suspect": self.suspect,
+            "loaded_models": self.loaded_models,
+            "available_models": self.available_models,
+            "checked_at": self.checked_at.isoformat() if self.checked_at else None,
+            "last_error": self.last_error,
+            "consecutive_failures": self.consecutive_failures,
+            "chat_endpoint": self.chat_endpoint,
+            "max_concurrent": self.max_concurrent,
+        }
+
+
+class OllamaServerStateRegistry:
+    """
+    Registry of Ollama server state refreshed on a background interval.
+
+    Servers are discovered from the .env instances and active database
+    servers on every refresh, and registered on the fly when a request
+    targets an unknown server.
+    """
+
+    def __init__(self):
+        settings = get_settings()
+        self.refresh_interval = float(settings.ollama_state_refresh_interval_seconds)
+        self.stale_after = float(settings.ollama_state_stale_after_seconds)
+        self.probe_timeout = float(settings.ollama_http_connect_timeout_seconds)
+        self._states: Dict[str, ServerState] = {}
+        self._model_index: Optional[Dict[str, List[str]]] = None  # model name -> server URLs
+        self._probes: Dict[str, asyncio.Task] = {}  # In-flight inline probes, shared by concurrent requests
+        self._task: Optional[asyncio.Task] = None
+        self.running = False
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        """Start background refresh loop"""
+        if self.running:
+            logger.warning("Ollama server state registry is already running")
+            return
+        self.running = True
+        logger.info("Starting Ollama server state registry...")
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        """Stop background refresh loop"""
+        self.running = False
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+        logger.info("Stopping Ollama server state registry...")
+
+    async def _refresh_loop(self):
+        """Main refresh loop"""
+        while self.running:
+            try:
+                await self._discover_servers()
+                await self.refresh_all()
+            except Exception as e:
+                logger.error(f"Error in Ollama server state loop: {e}", exc_info=True)
+            await asyncio.sleep(self.refresh_interval)
+
+    async def _discover_servers(self):
+        """Register configured and database servers"""
+        try:
+            for instance in get_settings().ollama_instances:
+                if instance.url:
+                    self.register_server(instance.url, max_concurrent=instance.max_concurrent)
+        except Exception:
+            pass
+        try:
+            # Synchronous query off the event loop (a slow or unreachable database must not stall requests);
+            # servers are registered back on the loop
+            servers = await asyncio.to_thread(self._load_database_servers)
+        except Exception as e:
+            logger.debug(f"Could not load Ollama servers from database: {e}")
+            return
+        for url, max_concurrent in servers:
+            self.register_server(url, max_concurrent=max_concurrent)
+
+    @staticmethod
+    def _load_database_servers() -> List[Tuple[str, Optional[int]]]:
+        """URL and max_concurrent of active database servers"""
+        from app.core.database import SessionLocal
+        from app.services.ollama_service import OllamaService
+        db = SessionLocal()
+        try:
+            return [(server.url, server.max_concurrent) for server in OllamaService.get_all_active_servers(db)]
+        finally:
+            db.close()
+
+    # ------------------------------------------------------------------
+    # State updates
+    # ------------------------------------------------------------------
+
+    def register_server(self, server_url: str, max_concurrent: Optional[int] = None) -> ServerState:
+        """Register server (no-op if already known, except for updating max_concurrent)"""
+        key = strip_api_suffix(server_url)
+        state = self._states.get(key)
+        if state is None:
+            state = ServerState(url=key)
+            self._states[key] = state
+        if max_concurrent:
+            state.max_concurrent = max_concurrent
+        return state
+
+    def unregister_server(self, server_url: str):
+        """Forget a server (deleted or deactivated)"""
+        self._states.pop(strip_api_suffix(server_url), None)
+        self.invalidate_model_index()
+
+    def set_available_models(self, server_url: str, models: List[str]):
+        """Update models of a server from an out-of-band /api/tags call (e.g. model discovery)"""
+        self.register_server(server_url).available_models = list(models)
+        self.invalidate_model_index()
+
+    def invalidate_model_index(self):
+        """Drop the model -> servers index (rebuilt on next lookup)"""
+        self._model_index = None
+
+    async def refresh_server(self, server_url: str) -> ServerState:
+        """Probe /api/tags and /api/ps of one server and update its state"""
+        state = self.register_server(server_url)
+        client = get_transport_pool().get_client(state.url)
+        try:
+            tags_response = await client.get("/api/tags", timeout=self.probe_timeout)
+            if tags_response.status_code != 200:
+                raise RuntimeError(f"/api/tags returned {tags_response.status_code}")
+            available = [m.get("name") for m in tags_response.json().get("models", []) if m.get("name")]
+
+            loaded: Dict[str, Dict[str, Any]] = {}
+            ps_response = await client.get("/api/ps", timeout=self.probe_timeout)
+            if ps_response.status_code == 200:
+                for model in ps_response.json().get("models", []):
+                    name = model.get("name")
+                    if name:
+                        loaded[name] = {
+                            "size": model.get("size"),
+                            "size_vram": model.get("size_vram"),
+                            "expires_at": model.get("expires_at"),
+                        }
+
+            self._update_loaded_gauge(state, loaded)
+            state.healthy = True
+            state.suspect = False
+            state.available_models = available
+            state.loaded_models = loaded
+            state.last_error = None
+            state.consecutive_failures = 0
+        except Exception as e:
+            self._update_loaded_gauge(state, {})
+            state.healthy = False
+            state.loaded_models = {}
+            state.last_error = str(e) or type(e).__name__
+            state.consecutive_failures += 1
+        state.checked_at = datetime.now(timezone.utc)
+        state.checked_monotonic = time.monotonic()
+        self.invalidate_model_index()
+        return state
+
+    async def refresh_all(self):
+        """Refresh all registered servers concurrently"""
+        urls = list(self._states.keys())
+        if urls:
+            await asyncio.gather(*(self.refresh_server(url) for url in urls), return_exceptions=True)
+
+    def record_health(self, server_url: str, healthy: bool):
+        """Record result of an out-of-band health probe"""
+        state = self.register_server(server_url)
+        state.healthy = healthy
+        if healthy:
+            state.suspect = False
+            state.consecutive_failures = 0
+        self.invalidate_model_index()
+        state.checked_at = datetime.now(timezone.utc)
+        state.checked_monotonic = time.monotonic()
+
+    def mark_suspect(self, server_url: str, error: Optional[str] = None):
+        """Mark server as suspect after a failed request (forces re-probe before next use)"""
+        state = self.register_server(server_url)
+        if not state.suspect:
+            logger.warning("Ollama server marked as suspect", extra={"server_url": state.url, "error": error})
+        state.suspect = True
+        state.last_error = error
+        state.consecutive_failures += 1
+        self.invalidate_model_index()
+
+    def mark_success(self, server_url: str):
+        """Clear suspect flag after a successful request"""
+        state = self.register_server(server_url)
+        if state.suspect:
+            self.invalidate_model_index()
+        state.suspect = False
+        state.consecutive_failures = 0
+
+    def set_chat_endpoint(self, server_url: str, endpoint: Optional[str]):
+        """Memoize the chat endpoint that works for a server"""
+        self.register_server(server_url).chat_endpoint = endpoint
+
+    def _update_loaded_gauge(self, state: ServerState, loaded: Dict[str, Dict[str, Any]]):
+        for name in set(state.loaded_models) - set(loaded):
+            llm_model_loaded.labels(model=name, server_url=state.url).set(0)
+        for name in loaded:
+            llm_model_loaded.labels(model=name, server_url=state.url).set(1)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get_state(self, server_url: str) -> Optional[ServerState]:
+        """Get last known state of a server"""
+        return self._states.get(strip_api_suffix(server_url))
+
+    def get_all_states(self) -> List[ServerState]:
+        """Get states of all registered servers"""
+        return list(self._states.values())
+
+    def servers_with_model(self, model_name: str) -> List[str]:
+        """
+        Servers whose last /api/tags listed a model
+
+        A name without a tag matches any tag ("nomic-embed-text" matches
+        "nomic-embed-text:latest"). Servers known to be down or suspect are
+        left out until they are probed again.
+        """
+        if self._model_index is None:
+            index: Dict[str, List[str]] = {}
+            for state in self._states.values():
+                if state.healthy is False or state.suspect:
+                    continue
+                for name in state.available_models:
+                    for key in {name, name.split(":", 1)[0]}:
+                        index.setdefault(key, []).append(state.url)
+            self._model_index = index
+        return list(self._model_index.get(model_name, ()))
+
+    def get_chat_endpoint(self, server_url: str) -> Optional[str]:
+        """Learned chat endpoint of a server (None if not probed yet)"""
+        state = self.get_state(server_url)
+        return state.chat_endpoint if state else None
+
+    def is_fresh(self, state: Optional[ServerState]) -> bool:
+        """Check that state was probed recently and no request failed since"""
+        if state is None or state.healthy is None or state.suspect:
+            return False
+        return time.monotonic() - state.checked_monotonic <= self.stale_after
+
+    def is_healthy(self, server_url: str) -> Optional[bool]:
+        """
+        Cached health of a server
+
+        Returns:
+            True/False from fresh state, None if unknown, stale or suspect
+        """
+        state = self.get_state(server_url)
+        if not self.is_fresh(state):
+            return None
+        return state.healthy
+
+    def is_model_loaded(self, server_url: str, model_name: str) -> Optional[bool]:
+        """Cached GPU residency of a model (None if unknown)"""
+        state = self.get_state(server_url)
+        if not self.is_fresh(state):
+            return None
+        return model_name in state.loaded_models
+
+    async def ensure_healthy(self, server_url: str) -> bool:
+        """
+        Health of a server for the request hot path
+
+        Uses cached state when fresh; probes inline only for unknown,
+        stale or suspect servers. Concurrent requests share one probe.
+        """
+        healthy = self.is_healthy(server_url)
+        if healthy is not None:
+            return healthy
+        key = strip_api_suffix(server_url)
+        probe = self._probes.get(key)
+        if probe is None or probe.done() or probe.get_loop() is not asyncio.get_running_loop():
+            probe = asyncio.create_task(self.refresh_server(key))
+            self._probes[key] = probe
+            probe.add_done_callback(lambda task: self._probes.pop(key, None) if self._probes.get(key) is task else None)
+        # A cancelled caller must not cancel the probe other requests are waiting on
+        state = await asyncio.shield(probe)
+        return bool(state.healthy)
+
+
+# Global registry instance
+_server_state_registry: Optional[OllamaServerStateRegistry] = None
+
+
+def get_server_state_registry() -> OllamaServerStateRegistry:
+    """Get or create global Ollama server state registry"""
+    global _server_state_registry
+    if _server_state_registry is None:
+        _server_state_registry = OllamaServerStateRegistry()
+    return _server_state_registry
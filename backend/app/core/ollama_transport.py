@@ -0,0 +1,171 @@
+"""
+Shared HTTP transports for Ollama servers
+
+One long-lived httpx.AsyncClient (and therefore one connection pool) is kept
+per Ollama server and event loop for the whole process, so LLM calls, health
+probes and /api/ps checks reuse keep-alive connections instead of opening
+new ones.
+"""
+import asyncio
+import importlib.util
+import socket
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from app.core.config import get_settings
+from app.core.logging_config import LoggingConfig
+
+logger = LoggingConfig.get_logger(__name__)
+
+
+def strip_api_suffix(url: str) -> str:
+    """Return Ollama base URL without trailing /v1 (native API lives at the root)"""
+    base_url = url.strip()
+    if base_url.endswith("/v1"):
+        base_url = base_url[:-3]
+    elif base_url.endswith("/v1/"):
+        base_url = base_url[:-4]
+    return base_url.rstrip("/")
+
+
+class OllamaTransportPool:
+    """
+    Process-wide registry of pooled HTTP clients, one per Ollama server.
+
+    httpx clients are bound to the event loop they were first used on, so
+    clients are kept per (server, event loop): callers on another loop
+    (run_until_complete in worker threads, asyncio.run in scripts) get their
+    own long-lived client instead of replacing the main loop's one. Clients
+    of loops that have been closed are released on the next lookup.
+    """
+
+    def __init__(self):
+        self._clients: Dict[Tuple[str, Optional[asyncio.AbstractEventLoop]], httpx.AsyncClient] = {}
+        self._http2_available: Optional[bool] = None
+
+    def _use_http2(self) -> bool:
+        """HTTP/2 is used only if enabled in settings and the h2 package is installed"""
+        settings = get_settings()
+        if not settings.ollama_http2:
+            return False
+        if self._http2_available is None:
+            self._http2_available = importlib.util.find_spec("h2") is not None
+            if not self._http2_available:
+                logger.warning("OLLAMA_HTTP2 is enabled but 'h2' package is not installed, using HTTP/1.1")
+        return self._http2_available
+
+    def _build_client(self, base_url: str) -> httpx.AsyncClient:
+        """Create pooled client for a server"""
+        settings = get_settings()
+        return httpx.AsyncClient(
+            base_url=base_url,
+            http2=self._use_http2(),
+            timeout=httpx.Timeout(
+                float(settings.ollama_http_timeout_seconds),
+                connect=float(settings.ollama_http_connect_timeout_seconds),
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.ollama_http_max_connections,
+                max_keepalive_connections=settings.ollama_http_max_keepalive_connections,
+                keepalive_expiry=float(settings.ollama_http_keepalive_expiry_seconds),
+            ),
+        )
+
+    def get_client(self, server_url: str) -> httpx.AsyncClient:
+        """
+        Get shared client for a server (created on first use)
+
+        Args:
+            server_url: Ollama server URL (with or without /v1)
+
+        Returns:
+            Long-lived httpx.AsyncClient with base_url set to the server root
+        """
+        base_url = strip_api_suffix(server_url)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        key = (base_url, loop)
+        client = self._clients.get(key)
+        if client is not None and not client.is_closed:
+            return client
+        if client is not None:
+            logger.debug("Rebuilding closed Ollama transport", extra={"server_url": base_url})
+
+        self._release_closed_loops()
+        client = self._build_client(base_url)
+        self._clients[key] = client
+        return client
+
+    def _release_closed_loops(self):
+        """Drop clients whose event loop has been closed, closing their sockets"""
+        for key in [key for key in self._clients if key[1] is not None and key[1].is_closed()]:
+            _close_sockets(self._clients.pop(key))
+
+    async def close(self):
+        """Close all pooled clients, each on its own event loop"""
+        clients = list(self._clients.items())
+        self._clients.clear()
+        current = asyncio.get_running_loop()
+        for (base_url, client_loop), client in clients:
+            try:
+                if client.is_closed:
+                    continue
+                if client_loop is None or client_loop is current:
+                    await client.aclose()
+                elif client_loop.is_running():
+                    asyncio.run_coroutine_threadsafe(client.aclose(), client_loop)
+                else:
+                    _close_sockets(client)
+            except Exception as e:
+                logger.debug(f"Error closing Ollama transport: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics"""
+        return {
+            "servers": sorted({base_url for base_url, _ in self._clients}),
+            "clients": len(self._clients),
+            "http2": self._use_http2(),
+        }
+
+
+def _close_sockets(client: httpx.AsyncClient):
+    """
+    Close pooled sockets of a client whose event loop is gone
+
+    aclose() can no longer run there; without this the keep-alive sockets
+    stay open until the client is garbage collected.
+    """
+    try:
+        pool = getattr(client._transport, "_pool", None)
+        for connection in list(getattr(pool, "connections", None) or []):
+            stream = getattr(getattr(connection, "_connection", None), "_network_stream", None)
+            sock = stream.get_extra_info("socket") if stream is not None else None
+            if sock is None:
+                continue
+            sock.shutdown(socket.SHUT_RDWR)
+            # asyncio exposes a TransportSocket without close(); its loop is gone,
+            # so nothing else will close the underlying socket
+            getattr(sock, "_sock", sock).close()
+    except Exception as e:
+        logger.debug(f"Error closing Ollama transport sockets: {e}")
+
+
+# Global transport pool
+_transport_pool: Optional[OllamaTransportPool] = None
+
+
+def get_transport_pool() -> OllamaTransportPool:
+    """Get global Ollama transport pool"""
+    global _transport_pool
+    if _transport_pool is None:
+        _transport_pool = OllamaTransportPool()
+    return _transport_pool
+
+
+async def close_transport_pool():
+    """Close global Ollama transport pool (called on application shutdown)"""
+    if _transport_pool is not None:
+        await _transport_pool.close()
@@ -10,7 +10,7 @@ from app.components.semantic_validator import SemanticValidator
 from app.core.execution_context import ExecutionContext
 from app.core.logging_config import LoggingConfig
 from app.core.model_selector import ModelSelector
-from app.core.ollama_client import OllamaClient, TaskType
+from app.core.ollama_client import OllamaClient, RequestPriority, TaskType
 from app.core.prompt_manager import PromptManager
 from app.core.request_router import RequestType, determine_request_type
 from app.core.service_registry import get_service_registry
@@ -361,7 +361,8 @@ class RequestOrchestrator:
                 model=selected_model,
                 server_url=selected_server.get_api_url(),
                 system_prompt=system_prompt,
-                temperature=temperature
+                temperature=temperature,
+                priority=RequestPriority.INTERACTIVE
             )
             
             execution_time_ms = (time.time() - execution_start) * 1000
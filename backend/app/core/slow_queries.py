@@ -0,0 +1,355 @@
+"""
+Slow query recorder
+
+The engine listeners in app/core/database.py pass every statement slower
+than `slow_query_threshold_ms` to the recorder. It keeps, per normalized
+SQL (literals and bind placeholders replaced by `?`, IN lists collapsed),
+the call count, total/max duration, parameter shape and the calling code:
+the first application frame on the stack plus the request path from the
+logging context. A sample of slow SELECTs is re-run as
+`EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)` on a separate connection in a
+background thread (at most once per statement per `explain_interval`),
+so the plan shows the sequential scans and row estimates behind the time.
+The EXPLAIN runs in a read-only transaction; statements calling functions
+with side effects (nextval, set_config, advisory locks, ...) are only
+planned, not executed.
+
+Browsable through GET /api/metrics/slow-queries.
+"""
+import random
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional
+from uuid import UUID
+
+from app.core.logging_config import LoggingConfig, request_context
+
+logger = LoggingConfig.get_logger(__name__)
+
+# Frames of these modules are skipped when looking for the caller
+_SKIPPED_MODULES = ("app.core.database", "app.core.slow_queries", "app.core.db_metrics")
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r"%\(\w+\)s|%s|\$\d+|\?")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE_RE = re.compile(r"\s+")
+_READ_RE = re.compile(r"\s*(SELECT|WITH)\b", re.IGNORECASE)
+_DML_RE = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE)\b|\bFOR\s+(UPDATE|SHARE)\b", re.IGNORECASE)
+# Functions with side effects outside the rolled back transaction (sequences, session
+# settings, advisory locks, notifications, ...): only planned, never re-executed
+_SIDE_EFFECT_RE = re.compile(
+    r"\b(nextval|setval|set_config|pg_(try_)?advisory_\w+|pg_notify|pg_sleep\w*|"
+    r"pg_cancel_backend|pg_terminate_backend|pg_reload_conf|pg_rotate_logfile|"
+    r"pg_stat_reset\w*|lo_\w+|dblink\w*)\s*\(",
+    re.IGNORECASE
+)
+_ASYNCPG_PARAM_RE = re.compile(r"\$(\d+)")
+
+# Normalized SQL is truncated to this length
+MAX_SQL_LENGTH = 4000
+
+
+def normalize_sql(statement: str) -> str:
+    """SQL with literals and bind placeholders replaced by ?, IN lists collapsed"""
+    normalized = _STRING_RE.sub("?", statement)
+    normalized = _PLACEHOLDER_RE.sub("?", normalized)
+    normalized = _NUMBER_RE.sub("?", normalized)
+    normalized = _IN_LIST_RE.sub("(?)", normalized)
+    normalized = _WHITESPACE_RE.sub(" ", normalized).strip()
+    return normalized[:MAX_SQL_LENGTH]
+
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> Any:
+    """Names and types of bound parameters, without their values"""
+    if executemany and isinstance(parameters, (list, tuple)):
+        first = parameter_shape(parameters[0]) if parameters else None
+        return {"rows": len(parameters), "row": first}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in list(parameters.items())[:50]}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters[:50]]
+    return type(parameters).__name__ if parameters is not None else None
+
+
+def find_caller() -> Optional[str]:
+    """First application frame (module:function:line) below the database layer"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("app.") and not module.startswith(_SKIPPED_MODULES):
+            return f"{module}:{frame.f_code.co_name}:{frame.f_lineno}"
+        frame = frame.f_back
+    return None
+
+
+def explainable(statement: str) -> bool:
+    """Whether EXPLAIN ANALYZE may re-run the statement (read-only SELECT/WITH)"""
+    return bool(_READ_RE.match(statement)) and not _DML_RE.search(statement)
+
+
+def analyze_safe(statement: str) -> bool:
+    """Whether the statement calls no function with side effects (else EXPLAIN without ANALYZE)"""
+    return not _SIDE_EFFECT_RE.search(statement)
+
+
+def _to_pyformat(statement: str, parameters: Any):
+    """Convert asyncpg ($n) statements and parameters for psycopg2"""
+    if isinstance(parameters, (list, tuple)) and _ASYNCPG_PARAM_RE.search(statement):
+        converted = _ASYNCPG_PARAM_RE.sub(r"%(p\1)s", statement.replace("%", "%%"))
+        values = {
+            f"p{i}": str(value) if isinstance(value, UUID) else value
+            for i, value in enumerate(parameters, start=1)
+        }
+        return converted, values
+    return statement, parameters
+
+
+@dataclass
+class SlowQueryStats:
+    """Aggregated slow executions of one normalized statement"""
+    sql: str
+    operation: str
+    table: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_ms: float = 0.0
+    last_seen: Optional[str] = None
+    parameter_shape: Any = None
+    callers: Dict[str, int] = field(default_factory=dict)
+    paths: Dict[str, int] = field(default_factory=dict)
+    plan: Any = None
+    plan_ms: Optional[float] = None
+    plan_captured_at: Optional[str] = None
+    explain_error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["avg_ms"] = self.total_ms / self.count if self.count else 0.0
+        return data
+
+
+class SlowQueryRecorder:
+    """
+    Bounded store of slow statements with sampled EXPLAIN plans.
+
+    record() runs inside the engine listener, so it only normalizes,
+    aggregates and, for a sample, hands the EXPLAIN to a one-thread executor.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float = 500.0,
+        explain_sample_rate: float = 0.1,
+        explain_interval_seconds: float = 600.0,
+        max_statements: int = 500,
+        max_recent: int = 200,
+        enabled: bool = True
+    ):
+        self.threshold_ms = threshold_ms
+        self.explain_sample_rate = explain_sample_rate
+        self.explain_interval_seconds = explain_interval_seconds
+        self.max_statements = max_statements
+        self.enabled = enabled
+        self._statements: "OrderedDict[str, SlowQueryStats]" = OrderedDict()
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=max_recent)
+        self._last_explained: Dict[str, float] = {}
+        self._explains_pending = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def threshold_seconds(self) -> float:
+        return self.threshold_ms / 1000.0
+
+    def is_explaining(self) -> bool:
+        """Whether the current thread is running an EXPLAIN (its queries are not recorded)"""
+        return getattr(self._local, "explaining", False)
+
+    def record(
+        self,
+        statement: str,
+        parameters: Any,
+        duration: float,
+        operation: str,
+        table: str,
+        executemany: bool = False,
+        explain_engine: Any = None
+    ):
+        """
+        Record a slow statement
+
+        Args:
+            statement: SQL as sent to the driver
+            parameters: Bound parameters (only their shape is kept)
+            duration: Execution time in seconds
+            operation: Statement operation (select, insert, ...)
+            table: Main table of the statement
+            executemany: Whether parameters hold several rows
+            explain_engine: Sync engine to run sampled EXPLAINs on
+        """
+        if not self.enabled or self.is_explaining():
+            return
+        duration_ms = duration * 1000.0
+        sql = normalize_sql(statement)
+        caller = find_caller()
+        path = request_context.get({}).get("path")
+        shape = parameter_shape(parameters, executemany)
+        now = datetime.now(timezone.utc).isoformat()
+
+        with self._lock:
+            stats = self._statements.get(sql)
+            if stats is None:
+                stats = SlowQueryStats(sql=sql, operation=operation, table=table)
+                self._statements[sql] = stats
+                while len(self._statements) > self.max_statements:
+                    evicted, _ = self._statements.popitem(last=False)
+                    self._last_explained.pop(evicted, None)
+            else:
+                self._statements.move_to_end(sql)
+            stats.count += 1
+            stats.total_ms += duration_ms
+            stats.max_ms = max(stats.max_ms, duration_ms)
+            stats.last_ms = duration_ms
+            stats.last_seen = now
+            stats.parameter_shape = shape
+            if caller:
+                stats.callers[caller] = stats.callers.get(caller, 0) + 1
+            if path:
+                stats.paths[path] = stats.paths.get(path, 0) + 1
+            self._recent.append({
+                "sql": sql,
+                "duration_ms": duration_ms,
+                "caller": caller,
+                "path": path,
+                "request_id": request_context.get({}).get("request_id"),
+                "at": now,
+            })
+            explain = self._should_explain(sql, statement, executemany, explain_engine)
+
+        logger.warning(
+            f"Slow query ({duration_ms:.0f} ms) from {caller or 'unknown'}: {sql[:200]}",
+            extra={"duration_ms": duration_ms, "caller": caller, "table": table},
+        )
+        if explain:
+            self._submit_explain(sql, statement, parameters, explain_engine)
+
+    def _should_explain(self, sql: str, statement: str, executemany: bool, explain_engine: Any) -> bool:
+        if explain_engine is None or executemany or self._explains_pending >= 2:
+            return False
+        if explain_engine.dialect.name != "postgresql" or not explainable(statement):
+            return False
+        last = self._last_explained.get(sql)
+        if last is not None and time.monotonic() - last < self.explain_interval_seconds:
+            return False
+        if random.random() >= self.explain_sample_rate:
+            return False
+        self._last_explained[sql] = time.monotonic()
+        self._explains_pending += 1
+        return True
+
+    def _submit_explain(self, sql: str, statement: str, parameters: Any, explain_engine: Any):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+        self._executor.submit(self._explain, sql, statement, parameters, explain_engine)
+
+    def _explain(self, sql: str, statement: str, parameters: Any, explain_engine: Any):
+        """Run EXPLAIN (ANALYZE, BUFFERS) in a read-only transaction on a separate connection and attach the plan"""
+        from sqlalchemy import text
+
+        self._local.explaining = True
+        plan = error = None
+        started = time.perf_counter()
+        try:
+            explain_sql, explain_params = _to_pyformat(statement, parameters)
+            options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze_safe(statement) else "FORMAT JSON"
+            with explain_engine.connect() as conn:
+                conn.execute(text("SET TRANSACTION READ ONLY"))
+                conn.execute(text("SET LOCAL statement_timeout = 30000"))
+                plan = conn.exec_driver_sql(f"EXPLAIN ({options}) " + explain_sql, explain_params or {}).scalar()
+                conn.rollback()
+        except Exception as e:
+            error = str(e)[:500]
+            logger.debug(f"EXPLAIN of slow query failed: {e}")
+        finally:
+            self._local.explaining = False
+        with self._lock:
+            self._explains_pending -= 1
+            stats = self._statements.get(sql)
+            if stats is not None:
+                stats.plan = plan
+                stats.plan_ms = (time.perf_counter() - started) * 1000.0
+                stats.plan_captured_at = datetime.now(timezone.utc).isoformat()
+                stats.explain_error = error
+
+    def get_statements(self, limit: int = 50, order_by: str = "total") -> List[Dict[str, Any]]:
+        """
+        Aggregated slow statements
+
+        Args:
+            limit: Maximum number of statements
+            order_by: "total", "max", "count" or "recent"
+
+        Returns:
+            Statement stats, worst first
+        """
+        with self._lock:
+            statements = [stats.to_dict() for stats in self._statements.values()]
+        keys = {
+            "total": lambda s: s["total_ms"],
+            "max": lambda s: s["max_ms"],
+            "count": lambda s: s["count"],
+            "recent": lambda s: s["last_seen"] or "",
+        }
+        statements.sort(key=keys.get(order_by, keys["total"]), reverse=True)
+        return statements[:limit]
+
+    def get_recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Latest slow executions, newest first"""
+        with self._lock:
+            return list(self._recent)[-limit:][::-1]
+
+    def reset(self):
+        """Forget recorded statements"""
+        with self._lock:
+            self._statements.clear()
+            self._recent.clear()
+            self._last_explained.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Recorder settings and sizes"""
+        return {
+            "enabled": self.enabled,
+            "threshold_ms": self.threshold_ms,
+            "explain_sample_rate": self.explain_sample_rate,
+            "statements": len(self._statements),
+            "recent": len(self._recent),
+        }
+
+
+# Global recorder instance
+_slow_query_recorder: Optional[SlowQueryRecorder] = None
+
+
+def get_slow_query_recorder() -> SlowQueryRecorder:
+    """Get process-wide slow query recorder"""
+    global _slow_query_recorder
+    if _slow_query_recorder is None:
+        from app.core.config import get_settings
+        settings = get_settings()
+        _slow_query_recorder = SlowQueryRecorder(
+            threshold_ms=settings.slow_query_threshold_ms,
+            explain_sample_rate=settings.slow_query_explain_sample_rate,
+            explain_interval_seconds=settings.slow_query_explain_interval_seconds,
+            max_statements=settings.slow_query_max_statements,
+            enabled=settings.slow_query_log_enabled,
+        )
+    return _slow_query_recorder
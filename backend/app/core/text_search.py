@@ -0,0 +1,100 @@
+"""
+PostgreSQL full-text search helpers
+
+agent_memories has a generated `search_vector` tsvector column (see the
+memory_full_text_search migration) covering the summary (weight A) and the
+description/text of the content (weight B), analysed with both the Russian
+and the English configuration so that stemming works for either language.
+A GIN index makes `search_vector @@ query` an indexed lookup instead of the
+`summary ILIKE '%...%'` full-table scan. Queries are parsed with
+websearch_to_tsquery in both configurations and OR-ed together.
+
+Keyword and vector results are combined by reciprocal rank fusion:
+score = sum over rankings of 1 / (RRF_K + rank).
+"""
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+from app.core.logging_config import LoggingConfig
+from sqlalchemy import bindparam, func, literal_column, text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+logger = LoggingConfig.get_logger(__name__)
+
+# Text search configurations of the generated column (must match the migration)
+TEXT_SEARCH_CONFIGS = ("russian", "english")
+
+# Rank constant of reciprocal rank fusion (Cormack et al.)
+RRF_K = 60
+
+# table -> whether it has a search_vector column, probed once per process
+_available: Dict[str, bool] = {}
+
+
+def full_text_search_available(db: Session, table: str = "agent_memories") -> bool:
+    """Whether a table has the generated search_vector column (cached, PostgreSQL only)"""
+    available = _available.get(table)
+    if available is None:
+        if db.get_bind().dialect.name != "postgresql":
+            return False
+        exists = db.execute(text(
+            "SELECT EXISTS(SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = :table AND column_name = 'search_vector')"
+        ), {"table": table}).scalar()
+        available = exists is True
+        if isinstance(exists, bool):
+            _available[table] = available
+    return available
+
+
+def reset_full_text_search():
+    """Forget probed columns (after migrations)"""
+    _available.clear()
+
+
+def search_vector_column(table: str = "agent_memories") -> ColumnElement:
+    """The generated tsvector column"""
+    return literal_column(f"{table}.search_vector")
+
+
+def ts_query(param: str = "query_text") -> ColumnElement:
+    """websearch_to_tsquery of a bound text in every configuration, OR-ed"""
+    query = None
+    for config in TEXT_SEARCH_CONFIGS:
+        part = func.websearch_to_tsquery(literal_column(f"'{config}'::regconfig"), bindparam(param))
+        query = part if query is None else query.op("||")(part)
+    return query
+
+
+def ts_match(table: str = "agent_memories", param: str = "query_text") -> ColumnElement:
+    """search_vector @@ query (uses the GIN index)"""
+    return search_vector_column(table).op("@@")(ts_query(param))
+
+
+def ts_rank(table: str = "agent_memories", param: str = "query_text") -> ColumnElement:
+    """Cover density rank of the query against search_vector"""
+    return func.ts_rank_cd(search_vector_column(table), ts_query(param))
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Hashable]],
+    k: int = RRF_K,
+    limit: Optional[int] = None
+) -> List[Tuple[Hashable, float]]:
+    """
+    Fuse ranked lists of ids
+
+    Args:
+        rankings: Lists of ids, best first
+        k: Rank constant (higher flattens the contribution of top ranks)
+        limit: Maximum number of results
+
+    Returns:
+        (id, score) pairs, best first; ties keep first-seen order
+    """
+    scores: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank)
+    fused = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return fused[:limit] if limit is not None else fused
@@ -0,0 +1,450 @@
+"""
+pgvector column helpers
+
+Embedding columns of agent_memories and plan_templates are untyped
+pgvector columns (`vector` or `halfvec`, see EMBEDDING_VECTOR_TYPE) that
+hold vectors at the native dimension of the model that produced them;
+every row records its `embedding_model` and `embedding_dim`. Approximate
+nearest neighbour indexes need a fixed dimension, so there is one partial
+expression index per dimension:
+
+    CREATE INDEX ... USING hnsw ((embedding::halfvec(768)) halfvec_cosine_ops)
+    WHERE embedding_dim = 768
+
+Queries must use the same expression (see distance_expression and
+distance_clause) and the same predicate for the planner to pick the index.
+Agents with many memories can get their own partial index (predicate
+`embedding_dim = 768 AND agent_id = '...'`), so their searches do not
+filter a shared graph. Indexes are HNSW by default, IVFFlat on request
+(VECTOR_INDEX_METHOD); query-time ef_search / probes / iterative scan are
+set per transaction by apply_search_settings. scripts/vector_index.py
+lists, creates and drops indexes and measures recall against latency.
+"""
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+from app.core.config import get_settings
+from app.core.logging_config import LoggingConfig
+from sqlalchemy import Float, bindparam, cast, text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.types import UserDefinedType
+
+logger = LoggingConfig.get_logger(__name__)
+
+VECTOR_TABLES = ("agent_memories", "plan_templates")
+VECTOR_TYPES = ("vector", "halfvec")
+INDEX_METHODS = ("hnsw", "ivfflat")
+
+# (table, dimension, vector type, method) with an index known to exist in this process
+_ensured_indexes: Set[Tuple[str, int, str, str]] = set()
+# Indexes being checked or built in the background
+_pending_indexes: Set[Tuple[str, int, str, str]] = set()
+_lock = threading.Lock()
+_index_executor: Optional[ThreadPoolExecutor] = None
+
+# Background builds give up instead of queueing behind long transactions
+INDEX_BUILD_LOCK_TIMEOUT = "5s"
+
+# table -> (udt_name of the embedding column or None, pgvector installed), probed once per process
+_capabilities: Dict[str, Tuple[Optional[str], bool]] = {}
+
+
+def vector_type() -> str:
+    """Configured storage type of embedding columns"""
+    value = get_settings().embedding_vector_type
+    return value if value in VECTOR_TYPES else "vector"
+
+
+def _probe(db: Session, table: str) -> Tuple[Optional[str], bool]:
+    capabilities = _capabilities.get(table)
+    if capabilities is None:
+        if db.get_bind().dialect.name != "postgresql":
+            # SQLite/dev databases: no pgvector (not cached, sessions may differ)
+            return None, False
+        row = db.execute(text(
+            "SELECT (SELECT udt_name FROM information_schema.columns "
+            "WHERE table_name = :table AND column_name = 'embedding' LIMIT 1), "
+            "EXISTS(SELECT 1 FROM pg_extension WHERE extname = 'vector')"
+        ), {"table": table}).fetchone()
+        capabilities = _capabilities[table] = (row[0], bool(row[1]))
+    return capabilities
+
+
+def embedding_column_type(db: Session, table: str) -> Optional[str]:
+    """udt_name of a table's embedding column (vector, halfvec, _float8) or None if missing (cached)"""
+    return _probe(db, table)[0]
+
+
+def vector_search_available(db: Session, table: str) -> bool:
+    """Whether a table has a pgvector embedding column and the extension is installed (cached)"""
+    column_type, has_extension = _probe(db, table)
+    return has_extension and column_type in VECTOR_TYPES
+
+
+def reset_capabilities():
+    """Forget probed capabilities (after migrations or extension changes)"""
+    _capabilities.clear()
+    _ensured_indexes.clear()
+
+
+def vector_literal(vector: Iterable[float]) -> str:
+    """pgvector text representation: [0.1,0.2,...]"""
+    return "[" + ",".join(repr(float(x)) for x in vector) + "]"
+
+
+def typed_column(dimension: int, column: str = "embedding", vtype: Optional[str] = None) -> str:
+    """Column cast to a fixed dimension (the indexed expression)"""
+    return f"({column}::{vtype or vector_type()}({int(dimension)}))"
+
+
+def distance_expression(dimension: int, param: str = "query_embedding", vtype: Optional[str] = None) -> str:
+    """Cosine distance between the column and a bound query vector, matching the partial index"""
+    vtype = vtype or vector_type()
+    return f"{typed_column(dimension, vtype=vtype)} <=> CAST(:{param} AS {vtype}({int(dimension)}))"
+
+
+class VectorColumnType(UserDefinedType):
+    """pgvector type of a fixed dimension, for casts in SQLAlchemy expressions"""
+
+    cache_ok = True
+
+    def __init__(self, dimension: int, vtype: Optional[str] = None):
+        self.dimension = int(dimension)
+        self.vtype = vtype or vector_type()
+
+    def get_col_spec(self, **kw) -> str:
+        return f"{self.vtype}({self.dimension})"
+
+
+def distance_clause(
+    column: Any,
+    dimension: int,
+    param: str = "query_embedding",
+    vtype: Optional[str] = None
+) -> ColumnElement:
+    """distance_expression as a SQLAlchemy expression (bind the query vector with .params())"""
+    column_type = VectorColumnType(dimension, vtype)
+    return cast(column, column_type).op("<=>", return_type=Float)(cast(bindparam(param), column_type))
+
+
+def index_method() -> str:
+    """Configured ANN index method"""
+    value = get_settings().vector_index_method
+    return value if value in INDEX_METHODS else "hnsw"
+
+
+def index_name(
+    table: str,
+    dimension: int,
+    vtype: Optional[str] = None,
+    method: Optional[str] = None,
+    agent_id: Optional[UUID] = None
+) -> str:
+    name = f"idx_{table}_embedding_{vtype or vector_type()}_{int(dimension)}_{method or index_method()}"
+    if agent_id is not None:
+        name += f"_agent_{UUID(str(agent_id)).hex[:16]}"
+    return name
+
+
+def create_index_sql(
+    table: str,
+    dimension: int,
+    vtype: Optional[str] = None,
+    method: Optional[str] = None,
+    agent_id: Optional[UUID] = None,
+    concurrently: bool = False
+) -> str:
+    """
+    Partial ANN index for rows of one dimension (optionally of one agent)
+
+    Args:
+        table: agent_memories or plan_templates
+        dimension: Vector dimension covered by the index
+        vtype: vector or halfvec (configured type if None)
+        method: hnsw or ivfflat (configured method if None)
+        agent_id: Restrict the index to one agent's memories
+        concurrently: Build without blocking writes (not inside a transaction)
+    """
+    if table not in VECTOR_TABLES:
+        raise ValueError(f"Unknown vector table: {table}")
+    if agent_id is not None and table != "agent_memories":
+        raise ValueError("Per-agent indexes are only supported for agent_memories")
+    vtype = vtype or vector_type()
+    method = method or index_method()
+    if method not in INDEX_METHODS:
+        raise ValueError(f"Unknown index method: {method}")
+    settings = get_settings()
+    if method == "hnsw":
+        options = f"m = {settings.vector_hnsw_m}, ef_construction = {settings.vector_hnsw_ef_construction}"
+    else:
+        options = f"lists = {settings.vector_ivfflat_lists}"
+    predicate = f"embedding_dim = {int(dimension)}"
+    if agent_id is not None:
+        predicate += f" AND agent_id = '{UUID(str(agent_id))}'"
+    return (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS "
+        f"{index_name(table, dimension, vtype, method, agent_id)} "
+        f"ON {table} USING {method} ({typed_column(dimension, vtype=vtype)} {vtype}_cosine_ops) "
+        f"WITH ({options}) "
+        f"WHERE {predicate}"
+    )
+
+
+def apply_search_settings(
+    db: Session,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None
+):
+    """
+    Set query-time ANN parameters for the current transaction
+
+    One round trip, and none when nothing is configured (server defaults).
+    Larger ef_search / probes trade latency for recall; iterative scan
+    (pgvector >= 0.8) keeps scanning the index until enough rows pass
+    filters such as agent_id.
+
+    Args:
+        db: Database session (settings last until its transaction ends)
+        ef_search: hnsw.ef_search (VECTOR_HNSW_EF_SEARCH if None)
+        probes: ivfflat.probes (VECTOR_IVFFLAT_PROBES if None)
+    """
+    settings = get_settings()
+    values = {
+        "hnsw.ef_search": ef_search or settings.vector_hnsw_ef_search,
+        "ivfflat.probes": probes or settings.vector_ivfflat_probes,
+    }
+    if settings.vector_iterative_scan != "off":
+        values["hnsw.iterative_scan"] = settings.vector_iterative_scan
+        values["ivfflat.iterative_scan"] = "relaxed_order"  # the only ordered mode of IVFFlat
+    values = {name: str(value) for name, value in values.items() if value}
+    if not values:
+        return
+    columns = ", ".join(f"set_config(:name_{i}, :value_{i}, true)" for i in range(len(values)))
+    params = {}
+    for i, (name, value) in enumerate(values.items()):
+        params[f"name_{i}"] = name
+        params[f"value_{i}"] = value
+    db.execute(text(f"SELECT {columns}"), params)
+
+
+def ensure_vector_index(db: Session, table: str, dimension: int):
+    """
+    Create the partial index for a dimension if needed (once per process)
+
+    Called before vectors of a dimension are written, so the index of a new
+    model is created while it is still small. Existence is checked in the
+    catalog (no table lock); a missing index is built in the background with
+    CREATE INDEX CONCURRENTLY, so neither the caller's thread (often the
+    event loop) nor writers of the table wait for it. Failures are logged,
+    search then falls back to a sequential scan until the next attempt or
+    scripts/vector_index.py builds the index.
+    """
+    key = (table, int(dimension), vector_type(), index_method())
+    if key in _ensured_indexes:
+        return
+    if key[3] == "ivfflat":
+        # IVFFlat clusters are computed at build time, an index built on an
+        # empty dimension would be useless: build it with scripts/vector_index.py
+        return
+    with _lock:
+        if key in _ensured_indexes or key in _pending_indexes:
+            return
+        _pending_indexes.add(key)
+    name = index_name(table, dimension)
+    try:
+        exists = db.execute(
+            text("SELECT EXISTS(SELECT 1 FROM pg_class WHERE relname = :name AND relkind = 'i')"),
+            {"name": name}
+        ).scalar()
+    except Exception as e:
+        _pending_indexes.discard(key)
+        logger.warning(f"Could not check vector index {name}: {e}")
+        return
+    if exists:
+        # May still be INVALID while another process builds it concurrently
+        _ensured_indexes.add(key)
+        _pending_indexes.discard(key)
+        return
+    global _index_executor
+    if _index_executor is None:
+        _index_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vector-index")
+    _index_executor.submit(_build_vector_index, db.get_bind(), key, table, dimension, name)
+
+
+def _build_vector_index(engine: Any, key: Tuple[str, int, str, str], table: str, dimension: int, name: str):
+    """Build a missing index concurrently on an autocommit connection (background thread)"""
+    try:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text(f"SET lock_timeout = '{INDEX_BUILD_LOCK_TIMEOUT}'"))
+            try:
+                connection.execute(text(create_index_sql(table, dimension, concurrently=True)))
+            except Exception:
+                # A failed concurrent build leaves an INVALID index behind that
+                # IF NOT EXISTS would skip forever
+                try:
+                    connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+                except Exception as e:
+                    logger.warning(f"Could not drop invalid vector index {name}: {e}")
+                raise
+            finally:
+                connection.execute(text("RESET lock_timeout"))
+        _ensured_indexes.add(key)
+        logger.info(f"Created vector index {name}")
+    except Exception as e:
+        logger.warning(f"Could not create vector index for {table} (dim={dimension}): {e}")
+    finally:
+        _pending_indexes.discard(key)
+
+
+def save_embeddings(
+    db: Session,
+    table: str,
+    rows: List[Tuple[Any, Sequence[float]]],
+    model: str
+):
+    """
+    Write embeddings with their model and native dimension (caller commits)
+
+    Args:
+        db: Database session
+        table: agent_memories or plan_templates
+        rows: (row id, vector) pairs
+        model: Embedding model that produced the vectors
+    """
+    if table not in VECTOR_TABLES:
+        raise ValueError(f"Unknown vector table: {table}")
+    if not rows:
+        return
+    for dimension in {len(vector) for _, vector in rows}:
+        ensure_vector_index(db, table, dimension)
+    db.execute(
+        text(
+            f"UPDATE {table} SET embedding = CAST(:embedding AS {vector_type()}), "
+            f"embedding_model = :model, embedding_dim = :dim WHERE id = CAST(:id AS uuid)"
+        ),
+        [
+            {"id": str(row_id), "embedding": vector_literal(vector), "model": model, "dim": len(vector)}
+            for row_id, vector in rows
+        ]
+    )
+
+
+def list_vector_indexes(db: Session, table: Optional[str] = None) -> List[Dict[str, Any]]:
+    """ANN indexes on embedding columns with their size and usage"""
+    rows = db.execute(text(
+        "SELECT i.relname, t.relname, am.amname, pg_relation_size(i.oid), "
+        "COALESCE(s.idx_scan, 0), pg_get_indexdef(i.oid) "
+        "FROM pg_index x "
+        "JOIN pg_class i ON i.oid = x.indexrelid "
+        "JOIN pg_class t ON t.oid = x.indrelid "
+        "JOIN pg_am am ON am.oid = i.relam "
+        "LEFT JOIN pg_stat_user_indexes s ON s.indexrelid = x.indexrelid "
+        "WHERE t.relname = ANY(:tables) AND am.amname IN ('hnsw', 'ivfflat') "
+        "ORDER BY t.relname, i.relname"
+    ), {"tables": [table] if table else list(VECTOR_TABLES)}).fetchall()
+    return [
+        {
+            "name": name,
+            "table": table_name,
+            "method": method,
+            "size_bytes": size,
+            "scans": scans,
+            "definition": definition,
+        }
+        for name, table_name, method, size, scans, definition in rows
+    ]
+
+
+def recall_at_k(exact: Sequence[Any], approximate: Sequence[Any]) -> float:
+    """Share of the exact top-k ids found by the approximate search"""
+    if not exact:
+        return 1.0
+    return len(set(exact) & set(approximate)) / len(exact)
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def check_recall(
+    db: Session,
+    table: str,
+    dimension: int,
+    settings_to_try: Sequence[int],
+    k: int = 10,
+    samples: int = 50,
+    agent_id: Optional[UUID] = None
+) -> List[Dict[str, Any]]:
+    """
+    Measure recall@k and latency of ANN search against exact search
+
+    Query vectors are sampled from the table itself. Exact results come from
+    the same query with index scans disabled. Every value in settings_to_try
+    is an hnsw.ef_search (HNSW) or ivfflat.probes (IVFFlat) value.
+
+    Returns:
+        One dict per setting: value, recall, p50_ms, p95_ms, index_used
+    """
+    if table not in VECTOR_TABLES:
+        raise ValueError(f"Unknown vector table: {table}")
+    agent_filter = " AND agent_id = CAST(:agent_id AS uuid)" if agent_id is not None else ""
+    params: Dict[str, Any] = {"agent_id": str(agent_id)} if agent_id is not None else {}
+    queries = [row[0] for row in db.execute(text(
+        f"SELECT embedding::text FROM {table} "
+        f"WHERE embedding_dim = {int(dimension)}{agent_filter} ORDER BY random() LIMIT :samples"
+    ), {**params, "samples": samples}).fetchall()]
+    db.rollback()
+
+    search_sql = text(
+        f"SELECT id FROM {table} WHERE embedding_dim = {int(dimension)}{agent_filter} "
+        f"ORDER BY {distance_expression(dimension)} LIMIT :k"
+    )
+
+    def run(query_vector: str) -> List[Any]:
+        return [row[0] for row in db.execute(search_sql, {**params, "query_embedding": query_vector, "k": k})]
+
+    exact: List[List[Any]] = []
+    for query_vector in queries:
+        db.execute(text("SET LOCAL statement_timeout = 0"))  # Sequential scans can be slow
+        db.execute(text("SET LOCAL enable_indexscan = off"))
+        db.execute(text("SET LOCAL enable_bitmapscan = off"))
+        exact.append(run(query_vector))
+        db.rollback()
+
+    method_setting = "ivfflat.probes" if index_method() == "ivfflat" else "hnsw.ef_search"
+    results = []
+    for value in settings_to_try:
+        recalls, latencies = [], []
+        for query_vector, expected in zip(queries, exact):
+            db.execute(text("SELECT set_config(:name, :value, true)"), {"name": method_setting, "value": str(value)})
+            started = time.perf_counter()
+            found = run(query_vector)
+            latencies.append((time.perf_counter() - started) * 1000)
+            recalls.append(recall_at_k(expected, found))
+            db.rollback()
+        plan = ""
+        if queries:
+            db.execute(text("SELECT set_config(:name, :value, true)"), {"name": method_setting, "value": str(value)})
+            plan = "\n".join(
+                row[0] for row in db.execute(
+                    text(f"EXPLAIN {search_sql.text}"), {**params, "query_embedding": queries[0], "k": k}
+                )
+            )
+            db.rollback()
+        results.append({
+            "setting": method_setting,
+            "value": value,
+            "recall": statistics.mean(recalls) if recalls else 0.0,
+            "p50_ms": percentile(latencies, 0.5),
+            "p95_ms": percentile(latencies, 0.95),
+            "index_used": "Index Scan" in plan,
+        })
+    return results
@@ -29,6 +29,7 @@ from app.models.benchmark_task import (BenchmarkTask,  # noqa: F401
                                        BenchmarkTaskType)
 from app.models.chat_session import ChatMessage, ChatSession  # noqa: F401
 from app.models.checkpoint import Checkpoint  # noqa: F401
+from app.models.embedding_record import EmbeddingRecord  # noqa: F401
 from app.models.evolution import (ChangeType, EntityType,  # noqa: F401
                                   EvolutionHistory, Feedback, FeedbackType,
                                   TriggerType)
@@ -36,6 +37,7 @@ from app.models.execution_graph import (ExecutionEdge,  # noqa: F401
                                         ExecutionGraph, ExecutionNode)
 from app.models.learning_pattern import (LearningPattern,  # noqa: F401
                                          PatternType)
+from app.models.llm_response_cache import LLMResponseCacheRecord  # noqa: F401
 from app.models.ollama_model import OllamaModel  # noqa: F401
 from app.models.ollama_server import OllamaServer  # noqa: F401
 from app.models.plan import Plan, PlanStatus  # noqa: F401
@@ -45,6 +47,9 @@ from app.models.project_metric import (MetricPeriod, MetricType,  # noqa: F401
 from app.models.prompt import Prompt, PromptStatus, PromptType  # noqa: F401
 from app.models.prompt_assignment import PromptAssignment  # noqa: F401
 from app.models.request_log import RequestConsequence, RequestLog  # noqa: F401
+from app.models.retention_rollup import (ExecutionTraceRollup,  # noqa: F401
+                                         RequestLogRollup,
+                                         WorkflowEventRollup)
 from app.models.system_parameter import (ParameterCategory,  # noqa: F401
                                          SystemParameter, SystemParameterType)
 from app.models.system_setting import (SettingCategory, SettingValueType,
@@ -78,6 +83,10 @@ __all__ = [
     # Ollama
     "OllamaServer",
     "OllamaModel",
+    # LLM response cache
+    "LLMResponseCacheRecord",
+    # Embedding store
+    "EmbeddingRecord",
     # Prompts
     "Prompt",
     "PromptType",
@@ -109,6 +118,10 @@ __all__ = [
     # Request Logs
     "RequestLog",
     "RequestConsequence",
+    # Retention rollups
+    "ExecutionTraceRollup",
+    "WorkflowEventRollup",
+    "RequestLogRollup",
     # Task Queues
     "TaskQueue",
     "QueueTask",
@@ -45,11 +45,15 @@ class AgentMemory(Base):
     memory_type = Column(String(50), nullable=False)  # MemoryType enum
     content = Column(JSONB, nullable=False)  # Memory content (flexible structure)
     summary = Column(Text, nullable=True)  # Human-readable summary
+    # Full-text search: generated `search_vector` tsvector column with a GIN index,
+    # not mapped (database-computed; see app/core/text_search.py)
     
     # Vector embedding for semantic search
     # Note: embedding is stored as vector type in DB, but SQLAlchemy can't read it directly
     # Use raw SQL to read/write embeddings (see MemoryService)
     embedding = Column(ARRAY(Float), nullable=True)  # Embedding column (array of floats) - use raw SQL for vector ops if available
+    embedding_model = Column(String(255), nullable=True)  # Model that produced the embedding
+    embedding_dim = Column(Integer, nullable=True)  # Native dimension of the embedding (selects the vector index)
     
     # Importance and access tracking
     importance = Column(Float, default=0.5, nullable=False)  # 0.0 to 1.0
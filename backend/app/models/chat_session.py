@@ -5,8 +5,8 @@ import uuid
 from datetime import datetime, timezone
 
 from app.core.database import Base
-from sqlalchemy import (JSON, Column, DateTime, ForeignKey, Integer, String,
-                        Text)
+from sqlalchemy import (JSON, Column, DateTime, ForeignKey, Index, Integer,
+                        String, Text)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -29,7 +29,7 @@ class ChatSession(Base):
     session_metadata = Column("metadata", JSON, default={}, nullable=True)
     
     # Relationship to messages
-    messages = relationship("ChatMessage", back_populates="session", cascade="all, delete-orphan", order_by="ChatMessage.created_at")
+    messages = relationship("ChatMessage", back_populates="session", cascade="all, delete-orphan", order_by="[ChatMessage.sequence, ChatMessage.created_at]")
     
     def __repr__(self):
         return f"<ChatSession(id={self.id}, title={self.title}, messages_count={len(self.messages)})>"
@@ -40,7 +40,7 @@ class ChatMessage(Base):
     __tablename__ = "chat_messages"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    session_id = Column(UUID(as_uuid=True), ForeignKey("chat_sessions.id", ondelete="CASCADE"), nullable=False, index=True)
+    session_id = Column(UUID(as_uuid=True), ForeignKey("chat_sessions.id", ondelete="CASCADE"), nullable=False)
     
     role = Column(String(50), nullable=False)  # "user", "assistant", "system"
     content = Column(Text, nullable=False)
@@ -58,6 +58,10 @@ class ChatMessage(Base):
     # Relationship to session
     session = relationship("ChatSession", back_populates="messages")
     
+    __table_args__ = (
+        Index("idx_chat_messages_session_sequence", "session_id", "sequence"),
+    )
+    
     def __repr__(self):
         return f"<ChatMessage(id={self.id}, role={self.role}, content_length={len(self.content) if self.content else 0})>"
 
@@ -5,7 +5,7 @@ import uuid
 from datetime import datetime, timezone
 
 from app.core.database import Base
-from sqlalchemy import Column, DateTime, ForeignKey, Index, String
+from sqlalchemy import Column, DateTime, Index, String
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship
 
@@ -32,11 +32,11 @@ class Checkpoint(Base):
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False, index=True)
     
     # Links
-    request_id = Column(UUID(as_uuid=True), ForeignKey("request_logs.id", ondelete="SET NULL"), nullable=True)
+    request_id = Column(UUID(as_uuid=True), nullable=True)  # request_logs.id (partitioned table, no foreign key)
     trace_id = Column(String(255), nullable=True, index=True)  # OpenTelemetry trace ID
     
     # Relationships
-    request = relationship("RequestLog", foreign_keys=[request_id])
+    request = relationship("RequestLog", primaryjoin="RequestLog.id == foreign(Checkpoint.request_id)")
     
     # Indexes
     __table_args__ = (
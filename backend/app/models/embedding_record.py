@@ -0,0 +1,30 @@
+"""
+SQLAlchemy model for the persistent content-addressed embedding store
+"""
+from datetime import datetime, timezone
+
+from app.core.database import Base
+from sqlalchemy import Column, DateTime, Integer, LargeBinary, String
+
+
+class EmbeddingRecord(Base):
+    """
+    Embedding vector of a text, keyed by model, content hash and dimension.
+
+    Shared by memories, plan templates and scripts so identical text is
+    embedded only once. Uses only portable column types so the same table
+    works in PostgreSQL and in a local SQLite database.
+    """
+    __tablename__ = "embedding_store"
+    
+    model = Column(String(255), primary_key=True)
+    # sha256 hex digest of the embedded text
+    content_hash = Column(String(64), primary_key=True)
+    dimension = Column(Integer, primary_key=True)
+    # Little-endian float32 vector
+    vector = Column(LargeBinary, nullable=False)
+    
+    created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    
+    def __repr__(self):
+        return f"<EmbeddingRecord(model='{self.model}', content_hash='{self.content_hash[:12]}', dimension={self.dimension})>"
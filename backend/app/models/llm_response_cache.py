@@ -0,0 +1,37 @@
+"""
+SQLAlchemy model for persistent LLM response cache
+"""
+from datetime import datetime, timezone
+
+from app.core.database import Base
+from sqlalchemy import Column, DateTime, Index, Integer, LargeBinary, String
+
+
+class LLMResponseCacheRecord(Base):
+    """
+    Persistent LLM response shared between worker processes and restarts.
+
+    Uses only portable column types so the same table works in PostgreSQL
+    and in a local SQLite cache database.
+    """
+    __tablename__ = "llm_response_cache"
+    
+    # sha256 of normalized model + messages + options
+    cache_key = Column(String(64), primary_key=True)
+    model = Column(String(255), nullable=False)
+    # zlib-compressed JSON: {"response": ..., "reasoning": ...}
+    payload = Column(LargeBinary, nullable=False)
+    size_bytes = Column(Integer, nullable=False, default=0)
+    hit_count = Column(Integer, nullable=False, default=0)
+    
+    created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    last_hit_at = Column(DateTime(timezone=True), nullable=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    
+    __table_args__ = (
+        Index("idx_llm_response_cache_expires_at", "expires_at"),
+        Index("idx_llm_response_cache_created_at", "created_at"),
+    )
+    
+    def __repr__(self):
+        return f"<LLMResponseCacheRecord(cache_key='{self.cache_key[:12]}', model='{self.model}')>"
@@ -55,6 +55,8 @@ class PlanTemplate(Base):
     
     # Embedding for semantic search (if vector search is available)
     embedding = Column(ARRAY(Float), nullable=True)  # Vector embedding for semantic search
+    embedding_model = Column(String(255), nullable=True)  # Model that produced the embedding
+    embedding_dim = Column(Integer, nullable=True)  # Native dimension of the embedding (selects the vector index)
     
     # Timestamps
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
@@ -5,8 +5,8 @@ import uuid
 from datetime import datetime, timezone
 
 from app.core.database import Base
-from sqlalchemy import (CheckConstraint, Column, DateTime, Float, ForeignKey,
-                        Index, Integer, String, Text)
+from sqlalchemy import (CheckConstraint, Column, DateTime, Float, Index,
+                        Integer, String, Text)
 from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID
 from sqlalchemy.orm import relationship
 
@@ -56,7 +56,12 @@ class RequestLog(Base):
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc), nullable=False)
     
     # Relationships
-    consequences = relationship("RequestConsequence", back_populates="request", cascade="all, delete-orphan")
+    consequences = relationship(
+        "RequestConsequence",
+        primaryjoin="RequestLog.id == foreign(RequestConsequence.request_id)",
+        back_populates="request",
+        cascade="all, delete-orphan"
+    )
     
     # Indexes for common queries
     __table_args__ = (
@@ -79,7 +84,9 @@ class RequestConsequence(Base):
     __tablename__ = "request_consequences"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    request_id = Column(UUID(as_uuid=True), ForeignKey("request_logs.id", ondelete="CASCADE"), nullable=False, index=True)
+    # request_logs.id; no database foreign key: request_logs is partitioned by created_at
+    # (rows are removed with their request by the partition retention job)
+    request_id = Column(UUID(as_uuid=True), nullable=False, index=True)
     
     # Consequence type
     consequence_type = Column(String(50), nullable=False)  # artifact_created, plan_created, approval_created, etc.
@@ -94,7 +101,11 @@ class RequestConsequence(Base):
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
     
     # Relationships
-    request = relationship("RequestLog", back_populates="consequences")
+    request = relationship(
+        "RequestLog",
+        primaryjoin="RequestLog.id == foreign(RequestConsequence.request_id)",
+        back_populates="consequences"
+    )
     
     # Indexes
     __table_args__ = (
@@ -0,0 +1,72 @@
+"""
+Per-day aggregates of expired execution traces, workflow events and request logs
+
+Written by the partition retention job (app/services/partition_maintenance.py)
+just before a partition is dropped. A day can have several rows with the
+same keys (one per rolled-up partition); sum counts and totals over them.
+"""
+from datetime import datetime, timezone
+
+from app.core.database import Base
+from sqlalchemy import (BigInteger, Column, Date, DateTime, Float, Index,
+                        Integer, String)
+from sqlalchemy.dialects.postgresql import UUID
+
+
+class ExecutionTraceRollup(Base):
+    """Daily execution trace counts and durations"""
+    __tablename__ = "execution_trace_rollups"
+    
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    day = Column(Date, nullable=False)
+    operation_name = Column(String(255), nullable=True)
+    agent_id = Column(UUID(as_uuid=True), nullable=True)
+    status = Column(String(20), nullable=True)
+    trace_count = Column(BigInteger, nullable=False)
+    total_duration_ms = Column(BigInteger, nullable=True)
+    max_duration_ms = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    
+    __table_args__ = (
+        Index("idx_execution_trace_rollups_day", "day"),
+    )
+
+
+class WorkflowEventRollup(Base):
+    """Daily workflow event counts and durations"""
+    __tablename__ = "workflow_event_rollups"
+    
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    day = Column(Date, nullable=False)
+    event_type = Column(String(50), nullable=True)
+    event_source = Column(String(50), nullable=True)
+    stage = Column(String(50), nullable=True)
+    status = Column(String(50), nullable=True)
+    event_count = Column(BigInteger, nullable=False)
+    total_duration_ms = Column(BigInteger, nullable=True)
+    max_duration_ms = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    
+    __table_args__ = (
+        Index("idx_workflow_event_rollups_day", "day"),
+    )
+
+
+class RequestLogRollup(Base):
+    """Daily request counts, durations and success scores"""
+    __tablename__ = "request_log_rollups"
+    
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    day = Column(Date, nullable=False)
+    request_type = Column(String(50), nullable=True)
+    model_used = Column(String(255), nullable=True)
+    status = Column(String(20), nullable=True)
+    request_count = Column(BigInteger, nullable=False)
+    total_duration_ms = Column(BigInteger, nullable=True)
+    max_duration_ms = Column(Integer, nullable=True)
+    total_success_score = Column(Float, nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    
+    __table_args__ = (
+        Index("idx_request_log_rollups_day", "day"),
+    )
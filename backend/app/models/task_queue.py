@@ -6,7 +6,7 @@ from datetime import datetime, timezone
 
 from app.core.database import Base
 from sqlalchemy import (Boolean, CheckConstraint, Column, DateTime, ForeignKey,
-                        Index, Integer, String, Text)
+                        Index, Integer, String, Text, text)
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship
 
@@ -47,36 +47,35 @@ class QueueTask(Base):
     __tablename__ = "queue_tasks"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    queue_id = Column(UUID(as_uuid=True), ForeignKey("task_queues.id", ondelete="CASCADE"), nullable=False, index=True)
+    queue_id = Column(UUID(as_uuid=True), ForeignKey("task_queues.id", ondelete="CASCADE"), nullable=False)
     
     # Task information
-    task_type = Column(String(50), nullable=False, index=True)  # plan_execution, artifact_generation, etc.
+    task_type = Column(String(50), nullable=False)  # plan_execution, artifact_generation, etc.
     task_data = Column(JSONB, nullable=False)
-    priority = Column(Integer, default=5, nullable=False, index=True)  # 0-9
+    priority = Column(Integer, default=5, nullable=False)  # 0-9
     
     # Status
     status = Column(
         String(20),
         CheckConstraint("status IN ('pending', 'queued', 'processing', 'completed', 'failed', 'cancelled')"),
         nullable=False,
-        default="pending",
-        index=True
+        default="pending"
     )
     
     # Retry
     retry_count = Column(Integer, default=0, nullable=False)
     max_retries = Column(Integer, default=3, nullable=False)
-    next_retry_at = Column(DateTime, nullable=True, index=True)
+    next_retry_at = Column(DateTime, nullable=True)
     
     # Result
     result_data = Column(JSONB, nullable=True)
     error_message = Column(Text, nullable=True)
     
     # Metadata
-    assigned_worker = Column(String(255), nullable=True, index=True)  # Worker ID
+    assigned_worker = Column(String(255), nullable=True)  # Worker ID
     started_at = Column(DateTime, nullable=True)
     completed_at = Column(DateTime, nullable=True)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False, index=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc), nullable=False)
     
     # Relationships
@@ -85,9 +84,13 @@ class QueueTask(Base):
     # Indexes for common queries
     __table_args__ = (
         Index("idx_queue_tasks_status", "status"),
-        Index("idx_queue_tasks_priority", "priority"),
         Index("idx_queue_tasks_next_retry", "next_retry_at"),
-        Index("idx_queue_tasks_queue", "queue_id"),
+        Index("idx_queue_tasks_queue_status_priority", "queue_id", "status", "priority"),
+        # Next task of a queue (TaskQueueManager.get_next_task)
+        Index(
+            "idx_queue_tasks_dequeue", "queue_id", text("priority DESC"), "created_at",
+            postgresql_where=text("status IN ('pending', 'queued')")
+        ),
         Index("idx_queue_tasks_type", "task_type"),
         Index("idx_queue_tasks_worker", "assigned_worker"),
         Index("idx_queue_tasks_created", "created_at"),
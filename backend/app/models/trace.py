@@ -6,7 +6,7 @@ from datetime import datetime, timezone
 
 from app.core.database import Base
 from sqlalchemy import (CheckConstraint, Column, DateTime, ForeignKey, Index,
-                        Integer, String)
+                        Integer, String, text)
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship
 
@@ -18,24 +18,23 @@ class ExecutionTrace(Base):
     __tablename__ = "execution_traces"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    trace_id = Column(String(255), nullable=False, index=True)  # OpenTelemetry trace ID
-    task_id = Column(UUID(as_uuid=True), ForeignKey("tasks.id", ondelete="SET NULL"), nullable=True, index=True)
-    plan_id = Column(UUID(as_uuid=True), ForeignKey("plans.id", ondelete="SET NULL"), nullable=True, index=True)
-    span_id = Column(String(255), nullable=True, index=True)
-    parent_span_id = Column(String(255), nullable=True, index=True)
+    trace_id = Column(String(255), nullable=False)  # OpenTelemetry trace ID
+    task_id = Column(UUID(as_uuid=True), ForeignKey("tasks.id", ondelete="SET NULL"), nullable=True)
+    plan_id = Column(UUID(as_uuid=True), ForeignKey("plans.id", ondelete="SET NULL"), nullable=True)
+    span_id = Column(String(255), nullable=True)
+    parent_span_id = Column(String(255), nullable=True)
     operation_name = Column(String(255), nullable=False)
-    start_time = Column(DateTime, nullable=False, index=True)
+    start_time = Column(DateTime, nullable=False)
     end_time = Column(DateTime, nullable=True)
     duration_ms = Column(Integer, nullable=True)
     status = Column(
         String(20),
         CheckConstraint("status IN ('success', 'error', 'timeout')"),
-        nullable=True,
-        index=True
+        nullable=True
     )
     attributes = Column(JSONB, nullable=True)
-    agent_id = Column(UUID(as_uuid=True), nullable=True, index=True)
-    tool_id = Column(UUID(as_uuid=True), nullable=True, index=True)
+    agent_id = Column(UUID(as_uuid=True), nullable=True)
+    tool_id = Column(UUID(as_uuid=True), nullable=True)
     error_message = Column(String(1000), nullable=True)
     error_type = Column(String(255), nullable=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
@@ -51,8 +50,11 @@ class ExecutionTrace(Base):
         Index("idx_traces_plan_id", "plan_id"),
         Index("idx_traces_agent_id", "agent_id"),
         Index("idx_traces_start_time", "start_time"),
-        Index("idx_traces_status", "status"),
         Index("idx_traces_operation", "operation_name"),
+        Index("idx_traces_span_id", "span_id"),
+        Index("idx_traces_parent_span_id", "parent_span_id"),
+        # Error rates (health checks); status alone is too unselective to index
+        Index("idx_traces_errors_start_time", "start_time", postgresql_where=text("status = 'error'")),
     )
     
     def __repr__(self):
@@ -70,12 +70,12 @@ class WorkflowEvent(Base):
     id = Column(PGUUID(as_uuid=True), primary_key=True, default=uuid4)
     
     # Workflow identification
-    workflow_id = Column(String(255), nullable=False, index=True)  # Can be task_id, chat_session_id, etc.
+    workflow_id = Column(String(255), nullable=False)  # Can be task_id, chat_session_id, etc.
     
     # Event classification
-    event_type = Column(String(50), nullable=False, index=True)
-    event_source = Column(String(50), nullable=False, index=True)
-    stage = Column(String(50), nullable=False, index=True)
+    event_type = Column(String(50), nullable=False)
+    event_source = Column(String(50), nullable=False)
+    stage = Column(String(50), nullable=False)
     status = Column(String(50), nullable=False, default=EventStatus.IN_PROGRESS.value)
     
     # Human-readable message
@@ -85,24 +85,24 @@ class WorkflowEvent(Base):
     event_data = Column(JSONB, nullable=True)  # Full prompt, response, tool call details, etc.
     event_metadata = Column("metadata", JSONB, nullable=True)  # Additional metadata (model, server, duration, etc.) - using Column name to avoid SQLAlchemy reserved word
     # Canonical mapping fields for observability / audit
-    component_role = Column(String(100), nullable=True, index=True)  # e.g., interpretation, planning, routing
+    component_role = Column(String(100), nullable=True)  # e.g., interpretation, planning, routing
     prompt_id = Column(PGUUID(as_uuid=True), ForeignKey("prompts.id", ondelete="SET NULL"), nullable=True, index=True)
     prompt_version = Column(String(50), nullable=True)
-    decision_source = Column(String(50), nullable=True, index=True)  # one of: component | registry | human
+    decision_source = Column(String(50), nullable=True)  # one of: component | registry | human
     
     # Relationships to other entities
-    task_id = Column(PGUUID(as_uuid=True), ForeignKey("tasks.id", ondelete="SET NULL"), nullable=True, index=True)
+    task_id = Column(PGUUID(as_uuid=True), ForeignKey("tasks.id", ondelete="SET NULL"), nullable=True)
     plan_id = Column(PGUUID(as_uuid=True), ForeignKey("plans.id", ondelete="SET NULL"), nullable=True, index=True)
     tool_id = Column(PGUUID(as_uuid=True), ForeignKey("artifacts.id", ondelete="SET NULL"), nullable=True, index=True)
     approval_request_id = Column(PGUUID(as_uuid=True), ForeignKey("approval_requests.id", ondelete="SET NULL"), nullable=True, index=True)
-    session_id = Column(String(255), nullable=True, index=True)  # Chat session ID
+    session_id = Column(String(255), nullable=True)  # Chat session ID
     
     # Tracing
-    trace_id = Column(String(255), nullable=True, index=True)  # OpenTelemetry trace ID
-    parent_event_id = Column(PGUUID(as_uuid=True), ForeignKey("workflow_events.id", ondelete="SET NULL"), nullable=True, index=True)
+    trace_id = Column(String(255), nullable=True)  # OpenTelemetry trace ID
+    parent_event_id = Column(PGUUID(as_uuid=True), nullable=True, index=True)  # No foreign key: the table is partitioned by timestamp
     
     # Timing (millisecond precision)
-    timestamp = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc), index=True)
+    timestamp = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
     duration_ms = Column(Integer, nullable=True)  # Duration of the event if applicable
     
     # Relationships
@@ -110,11 +110,15 @@ class WorkflowEvent(Base):
     plan = relationship("Plan", backref="workflow_events")
     tool = relationship("Artifact", backref="workflow_events")
     approval_request = relationship("ApprovalRequest", backref="workflow_events")
-    parent_event = relationship("WorkflowEvent", remote_side=[id], backref="child_events")
+    parent_event = relationship(
+        "WorkflowEvent",
+        primaryjoin="remote(WorkflowEvent.id) == foreign(WorkflowEvent.parent_event_id)",
+        backref="child_events"
+    )
     
     # Indexes for common queries
     __table_args__ = (
-        Index("idx_workflow_events_workflow_id", "workflow_id"),
+        Index("idx_workflow_events_workflow_timestamp", "workflow_id", "timestamp"),
         Index("idx_workflow_events_timestamp", "timestamp"),
         Index("idx_workflow_events_type_source", "event_type", "event_source"),
         Index("idx_workflow_events_stage_status", "stage", "status"),
@@ -9,7 +9,7 @@ from typing import Any, Dict, List, Optional
 from uuid import UUID
 
 from app.core.logging_config import LoggingConfig
-from app.core.ollama_client import OllamaClient, TaskType
+from app.core.ollama_client import OllamaClient, RequestPriority, TaskType
 from app.models.benchmark_result import BenchmarkResult
 from app.models.benchmark_task import BenchmarkTask, BenchmarkTaskType
 from app.models.ollama_model import OllamaModel
@@ -246,7 +246,8 @@ class BenchmarkService:
                 server_url=server_url,
                 system_prompt=system_prompt,
                 temperature=0.7,  # Explicit temperature
-                top_p=0.9  # Explicit top_p
+                top_p=0.9,  # Explicit top_p
+                priority=RequestPriority.BACKGROUND
             )
             response = await asyncio.wait_for(_coro, timeout=timeout)
             
@@ -502,7 +503,7 @@ class BenchmarkService:
             Tuple of (score, metrics)
         """
         try:
-            from app.core.ollama_client import OllamaClient, TaskType
+            from app.core.ollama_client import OllamaClient, RequestPriority, TaskType
 
             # Create evaluation prompt
             eval_prompt = f"""Evaluate the following output against the expected output and criteria.
@@ -525,7 +526,8 @@ Return only valid JSON, no additional text."""
             # Use reasoning task type for evaluation
             response = await client.generate(
                 prompt=eval_prompt,
-                task_type=TaskType.REASONING
+                task_type=TaskType.REASONING,
+                priority=RequestPriority.BACKGROUND
             )
             
             # Parse JSON response
@@ -1,23 +1,38 @@
 """
 Service for generating text embeddings for vector search
 """
-from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from typing import (TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Set,
+                    Union)
 
 if TYPE_CHECKING:
     from app.models.ollama_server import OllamaServer
 
 import asyncio
 import json
+from array import array
 from functools import lru_cache
 
 import httpx
 from app.core.config import get_settings
+from app.core.embedding_cache import EmbeddingCache, get_embedding_cache
+from app.core.embedding_store import EmbeddingStore, get_embedding_store
 from app.core.logging_config import LoggingConfig
+from app.core.ollama_server_state import get_server_state_registry
+from app.core.ollama_transport import get_transport_pool, strip_api_suffix
 from app.services.ollama_service import OllamaService
 from sqlalchemy.orm import Session
 
 logger = LoggingConfig.get_logger(__name__)
 
+# Embedding vector: a list of floats, or a read-only float32 memoryview (as_view=True)
+EmbeddingVector = Union[List[float], memoryview]
+
+# Servers (base URLs) that answered /api/embed with "404 page not found" (Ollama < 0.3.4)
+_servers_without_embed_api: Set[str] = set()
+
+# Native embedding dimension of each model seen in this process
+_model_dimensions: Dict[str, int] = {}
+
 
 class EmbeddingService:
     """
@@ -25,105 +40,203 @@ class EmbeddingService:
     
     Supports:
     - Text embedding generation
-    - Embedding caching
+    - Embedding caching (process-wide, float32, keyed by model and text hash)
+    - Persistent embedding store (database, shared across processes and restarts)
     - Vector normalization
     - Batch processing
+    
+    Vectors keep the native dimension of the model (768 for nomic-embed-text,
+    1024 for mxbai-embed-large, ...); they are not padded or truncated.
     """
     
-    # Default embedding dimension (can be adjusted based on model)
-    # Note: Different models have different dimensions (e.g., 768, 1536)
-    DEFAULT_EMBEDDING_DIM = 1536  # Default, but actual dimension depends on model
+    # Dimension of zero vectors for a model whose dimension is not known yet
+    # (native dimension of the default model nomic-embed-text)
+    DEFAULT_EMBEDDING_DIM = 768
+    
+    # Timeouts for one /api/embed batch and one legacy /api/embeddings call (seconds)
+    BATCH_REQUEST_TIMEOUT = 120.0
+    SINGLE_REQUEST_TIMEOUT = 30.0
     
     def __init__(self, db: Session):
         self.db = db
         self.settings = get_settings()
         self.ollama_service = OllamaService()  # OllamaService is static
-        self._embedding_cache: Dict[str, List[float]] = {}
-        self._cache_size_limit = 1000  # Limit cache size
+        self.cache: EmbeddingCache = get_embedding_cache()
+        self.store: EmbeddingStore = get_embedding_store()
     
     async def generate_embedding(
         self,
         text: str,
         model: Optional[str] = None,
-        use_cache: bool = True
-    ) -> List[float]:
+        use_cache: bool = True,
+        as_view: bool = False
+    ) -> EmbeddingVector:
         """
         Generate embedding for given text.
         
         Args:
             text: Text to generate embedding for
             model: Optional model name (uses default if not provided)
-            use_cache: Whether to use cached embeddings
+            use_cache: Whether to use cached and stored embeddings
+            as_view: Return a read-only float32 memoryview of the cached vector
+                instead of a new list (for callers that only read or bind it)
             
         Returns:
-            List of floats representing the embedding vector
+            List of floats (or float32 memoryview) representing the embedding vector
         """
         if not text or not text.strip():
             logger.warning("Empty text provided for embedding generation")
-            # Return zero vector matching DEFAULT_EMBEDDING_DIM
-            return [0.0] * self.DEFAULT_EMBEDDING_DIM
+            return self._zero_vector(as_view, model)
+        
+        # Get default model if not provided (the cache is keyed by model)
+        model = self.resolve_model(model)
         
         # Check cache first
-        if use_cache and text in self._embedding_cache:
-            logger.debug(f"Using cached embedding for text: {text[:50]}...")
-            return self._embedding_cache[text]
+        if use_cache:
+            cached = self.cache.get(model, text)
+            if cached is not None:
+                logger.debug(f"Using cached embedding for text: {text[:50]}...")
+                return self._as_output(cached, as_view)
+            
+            # Then the persistent store
+            stored = (await self.store.get_many(model, [text])).get(text)
+            if stored is not None:
+                _model_dimensions[model] = len(stored)
+                logger.debug(f"Using stored embedding for text: {text[:50]}...")
+                return self._as_output(self.cache.put(model, text, stored), as_view)
         
         try:
-            # Get default model if not provided
-            if not model:
-                model = self._get_default_embedding_model()
-            
             # Generate embedding via Ollama
             embedding = await self._generate_embedding_via_ollama(text, model)
             
-            # Normalize embedding
-            normalized = self._normalize_vector(embedding)
-            # Ensure embedding dimension matches expected DEFAULT_EMBEDDING_DIM
-            if len(normalized) != self.DEFAULT_EMBEDDING_DIM:
-                if len(normalized) < self.DEFAULT_EMBEDDING_DIM:
-                    # pad with zeros
-                    normalized = normalized + [0.0] * (self.DEFAULT_EMBEDDING_DIM - len(normalized))
-                else:
-                    # truncate
-                    normalized = normalized[: self.DEFAULT_EMBEDDING_DIM]
+            normalized = self._prepare_embedding(embedding, model)
             
             # Cache the result
-            if use_cache:
-                self._cache_embedding(text, normalized)
+            stored = self._cache_embedding(text, normalized, model) if use_cache else None
+            if stored is not None and any(stored):
+                await self.store.put_many(model, {text: stored})
             
             logger.debug(f"Generated embedding for text: {text[:50]}... (dim={len(normalized)})")
-            return normalized
+            if stored is not None:
+                # Same float32 values as later cache hits
+                return self._as_output(stored, as_view)
+            return self._as_output(array("f", normalized), as_view) if as_view else normalized
             
         except Exception as e:
             logger.error(f"Error generating embedding: {e}", exc_info=True)
-            # Return zero vector with default embedding dimension on error
-            return [0.0] * self.DEFAULT_EMBEDDING_DIM
+            # Return zero vector of the model's dimension on error
+            return self._zero_vector(as_view, model)
     
     async def generate_embeddings_batch(
         self,
         texts: List[str],
         model: Optional[str] = None,
-        use_cache: bool = True
-    ) -> List[List[float]]:
+        use_cache: bool = True,
+        as_view: bool = False
+    ) -> List[EmbeddingVector]:
         """
         Generate embeddings for multiple texts (batch processing).
         
+        Uncached texts are deduplicated and looked up in the persistent store
+        with one batched query; the rest are sent in chunks to Ollama's
+        multi-input /api/embed endpoint, spread across the servers hosting the
+        model. Texts that cannot be embedded get a zero vector, as in
+        generate_embedding.
+        
         Args:
             texts: List of texts to generate embeddings for
             model: Optional model name
-            use_cache: Whether to use cached embeddings
+            use_cache: Whether to use cached and stored embeddings
+            as_view: Return read-only float32 memoryviews instead of lists
             
         Returns:
-            List of embedding vectors
+            List of embedding vectors (same order as texts)
         """
-        results = []
+        model = self.resolve_model(model)
+        
+        results: List[Optional[EmbeddingVector]] = [None] * len(texts)
+        pending: Dict[str, List[int]] = {}  # text -> positions in texts
+        empty: List[int] = []  # positions of empty texts (zero vectors)
+        
+        for i, text in enumerate(texts):
+            if not text or not text.strip():
+                empty.append(i)
+                continue
+            cached = self.cache.get(model, text) if use_cache else None
+            if cached is not None:
+                results[i] = self._as_output(cached, as_view)
+            else:
+                pending.setdefault(text, []).append(i)
+        
+        if pending and use_cache:
+            found = await self.store.get_many(model, pending)
+            for text, vector in found.items():
+                _model_dimensions[model] = len(vector)
+                embedding = self._as_output(self.cache.put(model, text, vector), as_view)
+                for i in pending.pop(text):
+                    results[i] = embedding
+        
+        if not pending:
+            return self._fill_zero_vectors(results, empty, as_view, model)
+        
+        unique_texts = list(pending)
+        try:
+            vectors = await self._generate_embeddings_via_ollama_batch(unique_texts, model)
+        except Exception as e:
+            logger.error(f"Error generating batch embeddings: {e}", exc_info=True)
+            vectors = [None] * len(unique_texts)
+        
+        failed = 0
+        new_vectors: Dict[str, array] = {}
+        for text, vector in zip(unique_texts, vectors):
+            if vector:
+                embedding = self._prepare_embedding(vector, model)
+                stored = self._cache_embedding(text, embedding, model) if use_cache else None
+                if stored is not None:
+                    if any(stored):
+                        new_vectors[text] = stored
+                    embedding = self._as_output(stored, as_view)
+                elif as_view:
+                    embedding = self._as_output(array("f", embedding), as_view)
+            else:
+                failed += 1
+                empty.extend(pending[text])
+                continue
+            for i in pending[text]:
+                results[i] = embedding
         
-        for text in texts:
-            embedding = await self.generate_embedding(text, model, use_cache)
-            results.append(embedding)
+        await self.store.put_many(model, new_vectors)
         
+        if failed:
+            logger.warning(
+                f"Failed to embed {failed} of {len(unique_texts)} texts with model {model}, using zero vectors"
+            )
+        else:
+            logger.debug(f"Generated {len(unique_texts)} embeddings in batch (model={model})")
+        return self._fill_zero_vectors(results, empty, as_view, model)
+    
+    def _fill_zero_vectors(
+        self,
+        results: List[Optional[EmbeddingVector]],
+        positions: List[int],
+        as_view: bool,
+        model: str
+    ) -> List[EmbeddingVector]:
+        """Put zero vectors (of the model's dimension, known once any text was embedded) at positions"""
+        if positions:
+            zero = self._zero_vector(as_view, model)
+            for i in positions:
+                results[i] = zero
         return results
     
+    def resolve_model(self, model: Optional[str] = None) -> str:
+        """Embedding model used for a request (default model if not given)"""
+        return model or self._get_default_embedding_model()
+    
+    def get_dimension(self, model: Optional[str] = None) -> int:
+        """Native dimension of a model (DEFAULT_EMBEDDING_DIM until one of its vectors was seen)"""
+        return _model_dimensions.get(self.resolve_model(model), self.DEFAULT_EMBEDDING_DIM)
+    
     def _get_default_embedding_model(self) -> str:
         """
         Get default embedding model.
@@ -131,47 +244,55 @@ class EmbeddingService:
         """
         return "nomic-embed-text"  # Common embedding model for Ollama
     
-    async def _find_server_with_model(self, model_name: str) -> Optional[Any]:
+    async def _find_servers_with_model(self, model_name: str) -> List[str]:
         """
-        Find a server that has the specified model available.
+        Find servers that have the specified model available.
+        
+        Uses the model -> server map of the server state registry, which is
+        refreshed in the background from /api/tags and invalidated when a
+        server or its models change or a request to it fails. Active servers
+        are probed inline only when no server is known to have the model
+        (e.g. in scripts, where the background refresh is not running).
         
         Args:
             model_name: Name of the model to find
             
         Returns:
-            OllamaServer instance if found, None otherwise
+            Server URLs (empty if no servers are configured)
         """
-        import httpx
+        registry = get_server_state_registry()
+        servers = registry.servers_with_model(model_name)
+        if servers:
+            return servers
         
-        servers = self.ollama_service.get_all_active_servers(self.db)
-        if not servers:
-            return None
+        active_servers = self.ollama_service.get_all_active_servers(self.db)
+        if not active_servers:
+            return []
         
-        # Try to find a server with the model
-        for server in servers:
-            try:
-                base_url = server.url.rstrip("/")
-                if base_url.endswith("/v1"):
-                    base_url = base_url[:-3]
-                
-                async with httpx.AsyncClient(base_url=base_url, timeout=5.0) as client:
-                    # Check if model is available on this server
-                    response = await client.get("/api/tags", timeout=5.0)
-                    if response.status_code == 200:
-                        data = response.json()
-                        models = data.get("models", [])
-                        for model_data in models:
-                            # Check both 'name' and 'model' fields
-                            model_full_name = model_data.get("name", "") or model_data.get("model", "")
-                            if model_name in model_full_name:
-                                logger.debug(f"Found model {model_name} on server {server.name} ({server.url})")
-                                return server
-            except Exception as e:
-                logger.debug(f"Error checking server {server.name} for model {model_name}: {e}")
-                continue
+        await asyncio.gather(
+            *(registry.refresh_server(server.url) for server in active_servers),
+            return_exceptions=True
+        )
+        servers = registry.servers_with_model(model_name)
+        if servers:
+            logger.debug(f"Found model {model_name} on servers {servers}")
+            return servers
         
         # If not found, return first available server (will try to use model anyway)
         logger.warning(f"Model {model_name} not found on any server, using first available server")
+        return [active_servers[0].url]
+    
+    async def _find_server_with_model(self, model_name: str) -> Optional[str]:
+        """
+        Find a server that has the specified model available.
+        
+        Args:
+            model_name: Name of the model to find
+            
+        Returns:
+            Server URL if found, None otherwise
+        """
+        servers = await self._find_servers_with_model(model_name)
         return servers[0] if servers else None
     
     async def _generate_embedding_via_ollama(
@@ -186,46 +307,188 @@ class EmbeddingService:
         This is a basic implementation that can be extended.
         """
         # Find a server that has the model
-        server = await self._find_server_with_model(model)
-        if not server:
+        server_url = await self._find_server_with_model(model)
+        if not server_url:
             raise ValueError("No Ollama servers available")
         
-        base_url = server.url.rstrip("/")
-        if base_url.endswith("/v1"):
-            base_url = base_url[:-3]
+        base_url = strip_api_suffix(server_url)
         
-        # Ollama embedding endpoint
+        # Ollama embedding endpoint (shared pooled client for the server)
         # Note: This might need adjustment based on your Ollama version
-        embed_url = f"{base_url}/api/embeddings"
+        client = get_transport_pool().get_client(base_url)
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    embed_url,
-                    json={
-                        "model": model,
-                        "prompt": text
-                    }
-                )
+            response = await client.post(
+                "/api/embeddings",
+                json={
+                    "model": model,
+                    "prompt": text
+                },
+                timeout=self.SINGLE_REQUEST_TIMEOUT
+            )
+            
+            if response.status_code == 200:
+                data = response.json()
+                embedding = data.get("embedding", [])
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    embedding = data.get("embedding", [])
-                    
-                    if not embedding:
-                        raise ValueError(f"No embedding returned from model {model}")
-                    
-                    return embedding
-                else:
-                    raise ValueError(f"Ollama API error: {response.status_code} - {response.text}")
+                if not embedding:
+                    raise ValueError(f"No embedding returned from model {model}")
+                
+                return embedding
+            else:
+                raise ValueError(f"Ollama API error: {response.status_code} - {response.text}")
                     
         except httpx.TimeoutException:
             logger.error(f"Timeout generating embedding for model {model}")
+            # Drop the server from the model map until it is probed again
+            get_server_state_registry().mark_suspect(base_url, "embedding_timeout")
             raise
         except Exception as e:
             logger.error(f"Error calling Ollama embedding API: {e}")
+            if isinstance(e, httpx.TransportError):
+                get_server_state_registry().mark_suspect(base_url, type(e).__name__)
             raise
     
+    @staticmethod
+    def _chunk_texts(texts: List[str], max_items: int, max_chars: int) -> List[List[int]]:
+        """
+        Split texts into request-sized chunks.
+        
+        Args:
+            texts: Texts to embed
+            max_items: Max texts per chunk
+            max_chars: Max total characters per chunk (a longer text gets a chunk of its own)
+            
+        Returns:
+            Lists of indices into texts
+        """
+        chunks: List[List[int]] = []
+        current: List[int] = []
+        current_chars = 0
+        for i, text in enumerate(texts):
+            if current and (len(current) >= max_items or current_chars + len(text) > max_chars):
+                chunks.append(current)
+                current, current_chars = [], 0
+            current.append(i)
+            current_chars += len(text)
+        if current:
+            chunks.append(current)
+        return chunks
+    
+    async def _generate_embeddings_via_ollama_batch(
+        self,
+        texts: List[str],
+        model: str
+    ) -> List[Optional[List[float]]]:
+        """
+        Generate raw embeddings for many texts.
+        
+        Chunks are embedded concurrently (bounded by embedding_batch_concurrency)
+        and assigned to servers round-robin; a chunk whose server fails is
+        retried on the next server.
+        
+        Returns:
+            Raw embedding per text (None for texts that could not be embedded)
+        """
+        servers = await self._find_servers_with_model(model)
+        if not servers:
+            raise ValueError("No Ollama servers available")
+        
+        chunks = self._chunk_texts(
+            texts,
+            self.settings.embedding_batch_max_items,
+            self.settings.embedding_batch_max_chars
+        )
+        semaphore = asyncio.Semaphore(self.settings.embedding_batch_concurrency)
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        
+        async def embed_chunk(number: int, indices: List[int]):
+            async with semaphore:
+                for attempt in range(len(servers)):
+                    server_url = servers[(number + attempt) % len(servers)]
+                    try:
+                        vectors = await self._embed_chunk(server_url, model, [texts[i] for i in indices])
+                    except Exception as e:
+                        logger.warning(
+                            f"Embedding chunk of {len(indices)} texts failed on {server_url}: {e}"
+                        )
+                        if isinstance(e, httpx.TransportError):
+                            get_server_state_registry().mark_suspect(server_url, type(e).__name__)
+                        continue
+                    for i, vector in zip(indices, vectors):
+                        results[i] = vector
+                    return
+        
+        await asyncio.gather(*(embed_chunk(number, indices) for number, indices in enumerate(chunks)))
+        return results
+    
+    async def _embed_chunk(
+        self,
+        server_url: str,
+        model: str,
+        texts: List[str]
+    ) -> List[Optional[List[float]]]:
+        """
+        Embed one chunk on one server.
+        
+        Uses /api/embed with array input; falls back to one /api/embeddings
+        call per text, one after another, if the server lacks /api/embed or
+        rejects the batch (so a single bad text does not fail the whole
+        chunk). Transport errors are raised so the caller can try another
+        server.
+        """
+        base_url = strip_api_suffix(server_url)
+        client = get_transport_pool().get_client(base_url)
+        
+        if base_url not in _servers_without_embed_api:
+            response = await client.post(
+                "/api/embed",
+                json={"model": model, "input": texts},
+                timeout=self.BATCH_REQUEST_TIMEOUT
+            )
+            if response.status_code == 200:
+                embeddings = response.json().get("embeddings") or []
+                if len(embeddings) == len(texts):
+                    return embeddings
+                logger.warning(
+                    f"/api/embed on {base_url} returned {len(embeddings)} embeddings for {len(texts)} texts"
+                )
+            elif response.status_code == 404 and "page not found" in response.text:
+                _servers_without_embed_api.add(base_url)
+                logger.info(f"Ollama server {base_url} has no /api/embed, using /api/embeddings")
+            else:
+                logger.warning(
+                    f"/api/embed error on {base_url}: {response.status_code} - {response.text[:200]}"
+                )
+        
+        # Legacy single-prompt endpoint, one text at a time: chunks already run in parallel
+        # (embedding_batch_concurrency), a gather here would multiply that by the chunk size
+        return [await self._embed_single(client, model, text) for text in texts]
+    
+    async def _embed_single(
+        self,
+        client: httpx.AsyncClient,
+        model: str,
+        text: str
+    ) -> Optional[List[float]]:
+        """Embed one text via /api/embeddings (None if the server rejects it)"""
+        response = await client.post(
+            "/api/embeddings",
+            json={"model": model, "prompt": text},
+            timeout=self.SINGLE_REQUEST_TIMEOUT
+        )
+        if response.status_code != 200:
+            logger.warning(f"/api/embeddings error: {response.status_code} - {response.text[:200]}")
+            return None
+        return response.json().get("embedding") or None
+    
+    def _prepare_embedding(self, embedding: List[float], model: Optional[str] = None) -> List[float]:
+        """Normalize embedding (native dimension) and remember the model's dimension"""
+        normalized = self._normalize_vector(embedding)
+        if embedding:
+            _model_dimensions[self.resolve_model(model)] = len(normalized)
+        return normalized
+    
     def _normalize_vector(self, vector: List[float]) -> List[float]:
         """
         Normalize vector to unit length (L2 normalization).
@@ -238,35 +501,46 @@ class EmbeddingService:
         norm = sum(x * x for x in vector) ** 0.5
         
         if norm == 0:
-            # Zero vector - return the original vector (preserve dimension).
-            # Upstream callers (generate_embedding) will pad/truncate to DEFAULT_EMBEDDING_DIM as needed.
+            # Zero vector - return the original vector (preserve dimension)
             return vector
         
         # Normalize
         normalized = [x / norm for x in vector]
         return normalized
     
-    def _cache_embedding(self, text: str, embedding: List[float]):
-        """Cache embedding result"""
-        # Simple LRU-style cache management
-        if len(self._embedding_cache) >= self._cache_size_limit:
-            # Remove oldest entry (simple FIFO)
-            oldest_key = next(iter(self._embedding_cache))
-            del self._embedding_cache[oldest_key]
-        
-        self._embedding_cache[text] = embedding
+    def _cache_embedding(self, text: str, embedding: Sequence[float], model: Optional[str] = None) -> array:
+        """Cache embedding result (stored as float32), returns the stored array"""
+        return self.cache.put(model or self._get_default_embedding_model(), text, embedding)
+    
+    def _as_output(self, vector: array, as_view: bool) -> EmbeddingVector:
+        """List copy of a float32 vector, or a zero-copy read-only view of it"""
+        if as_view:
+            return memoryview(vector).toreadonly()
+        return vector.tolist()
+    
+    def _zero_vector(self, as_view: bool = False, model: Optional[str] = None) -> EmbeddingVector:
+        dimension = self.get_dimension(model)
+        if as_view:
+            return memoryview(array("f", bytes(4 * dimension))).toreadonly()
+        return [0.0] * dimension
     
     def clear_cache(self):
-        """Clear embedding cache"""
-        self._embedding_cache.clear()
+        """Clear embedding cache (shared by all EmbeddingService instances)"""
+        self.cache.clear()
         logger.debug("Embedding cache cleared")
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
+        stats = self.cache.get_stats()
         return {
-            "cache_size": len(self._embedding_cache),
-            "cache_limit": self._cache_size_limit,
-            "cache_usage_percent": (len(self._embedding_cache) / self._cache_size_limit) * 100
+            "cache_size": stats["entries"],
+            "cache_bytes": stats["bytes"],
+            "cache_limit_bytes": stats["max_bytes"],
+            "cache_usage_percent": (stats["bytes"] / stats["max_bytes"]) * 100 if stats["max_bytes"] else 0.0,
+            "hits": stats["hits"],
+            "misses": stats["misses"],
+            "hit_rate": stats["hit_rate"],
+            "store": self.store.get_stats(),
         }
     
     def cosine_similarity(
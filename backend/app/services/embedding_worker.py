@@ -0,0 +1,398 @@
+"""
+Background embedding worker for agent memories
+
+MemoryService.save_memory(generate_embedding=True) enqueues the memory ID
+instead of starting a task per memory. One supervised worker drains the
+queue in batches: the memories' texts are read with one query, embedded
+with one batched call (deduplicated, cached and stored by EmbeddingService)
+and written back with one executemany UPDATE. The queue is bounded (full
+queue -> the job is rejected and counted; scripts/migrate_memories_to_vectors.py
+embeds the memories later), failed jobs are retried with exponential
+backoff, and queue depth and enqueue-to-write lag are exported as metrics.
+
+The queue is thread-safe: save_memory may run in a threadpool thread
+without an event loop.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from app.core.config import get_settings
+from app.core.local_vector_index import (get_local_vector_index,
+                                         memory_namespace)
+from app.core.logging_config import LoggingConfig
+from app.core.metrics import (embedding_jobs_total, embedding_queue_depth,
+                              embedding_queue_lag_seconds)
+from app.core.vector_storage import (VECTOR_TYPES, embedding_column_type,
+                                     save_embeddings)
+from app.models.agent_memory import AgentMemory
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = LoggingConfig.get_logger(__name__)
+
+
+def memory_embedding_text(summary: Optional[str], content: Any) -> Optional[str]:
+    """Text a memory is embedded from: summary, else description/text/content of the content"""
+    if summary:
+        return summary
+    if isinstance(content, dict):
+        return (
+            content.get("description") or
+            content.get("text") or
+            content.get("content") or
+            str(content)
+        )
+    return str(content) if content else None
+
+
+def write_memory_embeddings(
+    db: Session,
+    items: Sequence[Tuple[UUID, UUID, Sequence[float]]],
+    model: str
+):
+    """
+    Write memory embeddings (caller commits)
+
+    pgvector columns get native-dimension vectors, float8[] columns plain
+    arrays; without pgvector the vectors are also added to the in-process
+    index of each agent.
+
+    Args:
+        db: Database session
+        items: (memory_id, agent_id, embedding) tuples
+        model: Embedding model that produced the vectors
+    """
+    if not items:
+        return
+    col_type = embedding_column_type(db, "agent_memories")
+    if col_type in VECTOR_TYPES:
+        save_embeddings(db, "agent_memories", [(memory_id, embedding) for memory_id, _, embedding in items], model)
+        return
+    if col_type:
+        # Use parameter binding to save as Postgres float8[] (ARRAY)
+        db.execute(
+            text(
+                "UPDATE agent_memories SET embedding = :embedding, embedding_model = :model, "
+                "embedding_dim = :dim WHERE id = CAST(:memory_id AS uuid)"
+            ),
+            [
+                {
+                    "memory_id": str(memory_id),
+                    "embedding": [float(x) for x in embedding],
+                    "model": model,
+                    "dim": len(embedding),
+                }
+                for memory_id, _, embedding in items
+            ],
+        )
+    # No pgvector: searched through the in-process index
+    index = get_local_vector_index()
+    for memory_id, agent_id, embedding in items:
+        index.add(memory_namespace(agent_id), model, memory_id, embedding)
+
+
+@dataclass
+class EmbeddingJob:
+    """Queued memory embedding"""
+    memory_id: UUID
+    enqueued_at: float  # time.monotonic()
+    attempts: int = 0
+    not_before: float = 0.0  # retry backoff deadline
+
+
+class EmbeddingWorker:
+    """
+    Bounded queue of memory IDs drained in batches by one background task.
+
+    The task is supervised: an unexpected error in the loop is logged and
+    the loop restarts after a short pause.
+    """
+
+    def __init__(
+        self,
+        max_queue_size: int = 1000,
+        batch_size: int = 32,
+        batch_wait_seconds: float = 0.2,
+        max_retries: int = 3,
+        retry_delay_seconds: float = 2.0
+    ):
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.batch_wait_seconds = batch_wait_seconds
+        self.max_retries = max_retries
+        self.retry_delay_seconds = retry_delay_seconds
+        self._queue: Deque[EmbeddingJob] = deque()
+        self._queued_ids: set = set()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.running = False
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.restarts = 0
+
+    # ------------------------------------------------------------------
+    # Queue
+    # ------------------------------------------------------------------
+
+    def enqueue(self, memory_id: UUID) -> bool:
+        """
+        Queue a memory for embedding (callable from any thread)
+
+        Returns:
+            False if the queue is full (the memory stays without embedding)
+        """
+        with self._lock:
+            if memory_id in self._queued_ids:
+                return True
+            if len(self._queue) >= self.max_queue_size:
+                self.rejected += 1
+                embedding_jobs_total.labels(status="rejected").inc()
+                logger.warning(f"Embedding queue full ({self.max_queue_size}), memory {memory_id} not queued")
+                return False
+            self._queue.append(EmbeddingJob(memory_id=memory_id, enqueued_at=time.monotonic()))
+            self._queued_ids.add(memory_id)
+            embedding_queue_depth.set(len(self._queue))
+        self._wake()
+        return True
+
+    def _wake(self):
+        loop, wakeup = self._loop, self._wakeup
+        if loop is None or wakeup is None or loop.is_closed():
+            return  # Not started: jobs wait for start()
+        try:
+            if asyncio.get_running_loop() is loop:
+                wakeup.set()
+                return
+        except RuntimeError:
+            pass
+        loop.call_soon_threadsafe(wakeup.set)
+
+    def _take_batch(self) -> Tuple[List[EmbeddingJob], Optional[float]]:
+        """Pop up to batch_size due jobs; also returns seconds until the next retry is due"""
+        now = time.monotonic()
+        batch: List[EmbeddingJob] = []
+        deferred: List[EmbeddingJob] = []
+        with self._lock:
+            while self._queue and len(batch) < self.batch_size:
+                job = self._queue.popleft()
+                (batch if job.not_before <= now else deferred).append(job)
+            self._queue.extendleft(reversed(deferred))
+            for job in batch:
+                self._queued_ids.discard(job.memory_id)
+            embedding_queue_depth.set(len(self._queue))
+            next_due = min((job.not_before for job in self._queue), default=None)
+        return batch, (max(0.0, next_due - now) if next_due is not None else None)
+
+    def _retry(self, jobs: List[EmbeddingJob], reason: str):
+        now = time.monotonic()
+        with self._lock:
+            for job in jobs:
+                job.attempts += 1
+                if job.attempts > self.max_retries:
+                    self.failed += 1
+                    embedding_jobs_total.labels(status="failed").inc()
+                    logger.warning(f"Embedding for memory {job.memory_id} failed after {job.attempts} attempts: {reason}")
+                    continue
+                if job.memory_id in self._queued_ids:
+                    continue  # Re-queued meanwhile
+                job.not_before = now + self.retry_delay_seconds * (2 ** (job.attempts - 1))
+                self._queue.append(job)
+                self._queued_ids.add(job.memory_id)
+                embedding_jobs_total.labels(status="retried").inc()
+            embedding_queue_depth.set(len(self._queue))
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        """Start the worker on the running event loop"""
+        if self.running:
+            logger.warning("Embedding worker is already running")
+            return
+        self.running = True
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        logger.info("Starting embedding worker...")
+        self._task = asyncio.create_task(self._supervise())
+        if self._queue:
+            self._wakeup.set()
+
+    async def stop(self, drain_timeout: float = 10.0):
+        """Stop the worker, processing already queued jobs for up to drain_timeout seconds"""
+        if not self.running:
+            return
+        logger.info("Stopping embedding worker...")
+        deadline = time.monotonic() + drain_timeout
+        while self.depth() and time.monotonic() < deadline:
+            batch, _ = self._take_batch()
+            if not batch:
+                break
+            await self.process_batch(batch)
+        self.running = False
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+        self._loop = None
+        self._wakeup = None
+
+    async def _supervise(self):
+        """Run the worker loop, restarting it after unexpected errors"""
+        while self.running:
+            try:
+                await self._run()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.restarts += 1
+                logger.error(f"Embedding worker crashed, restarting: {e}", exc_info=True)
+                await asyncio.sleep(1.0)
+
+    async def _run(self):
+        """Drain the queue in batches"""
+        timeout: Optional[float] = None
+        while self.running:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            # Let a burst of writes accumulate into one batch
+            if self.depth() < self.batch_size:
+                await asyncio.sleep(self.batch_wait_seconds)
+            while True:
+                batch, timeout = self._take_batch()
+                if not batch:
+                    break
+                await self.process_batch(batch)
+
+    # ------------------------------------------------------------------
+    # Processing
+    # ------------------------------------------------------------------
+
+    async def process_batch(self, jobs: List[EmbeddingJob]) -> int:
+        """
+        Embed and save one batch of memories
+
+        Returns:
+            Number of memories written
+        """
+        from app.core.database import SessionLocal
+        from app.services.embedding_service import EmbeddingService
+
+        db = SessionLocal()
+        try:
+            rows = await asyncio.to_thread(self._load_rows, db, [job.memory_id for job in jobs])
+            embedding_service = EmbeddingService(db)
+            model = embedding_service.resolve_model()
+
+            items: List[Tuple[EmbeddingJob, UUID, str]] = []
+            for job in jobs:
+                row = rows.get(job.memory_id)
+                if row is None:
+                    continue  # Deleted meanwhile
+                agent_id, text_for_embedding = row
+                if text_for_embedding:
+                    items.append((job, agent_id, text_for_embedding))
+            if not items:
+                return 0
+
+            embeddings = await embedding_service.generate_embeddings_batch(
+                [text_for_embedding for _, _, text_for_embedding in items], model=model
+            )
+            to_write = []
+            failed = []
+            for (job, agent_id, _), embedding in zip(items, embeddings):
+                if any(embedding):
+                    to_write.append((job, agent_id, embedding))
+                else:
+                    failed.append(job)
+
+            if to_write:
+                await asyncio.to_thread(
+                    self._write, db, [(job.memory_id, agent_id, embedding) for job, agent_id, embedding in to_write], model
+                )
+                now = time.monotonic()
+                for job, _, _ in to_write:
+                    embedding_queue_lag_seconds.observe(now - job.enqueued_at)
+                self.processed += len(to_write)
+                embedding_jobs_total.labels(status="processed").inc(len(to_write))
+            if failed:
+                self._retry(failed, "embedding could not be generated")
+            return len(to_write)
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Embedding batch of {len(jobs)} memories failed: {e}")
+            self._retry(jobs, str(e))
+            return 0
+        finally:
+            db.close()
+
+    @staticmethod
+    def _load_rows(db: Session, memory_ids: List[UUID]) -> Dict[UUID, Tuple[UUID, Optional[str]]]:
+        rows = db.query(AgentMemory.id, AgentMemory.agent_id, AgentMemory.summary, AgentMemory.content).filter(
+            AgentMemory.id.in_(memory_ids)
+        ).all()
+        return {
+            memory_id: (agent_id, memory_embedding_text(summary, content))
+            for memory_id, agent_id, summary, content in rows
+        }
+
+    @staticmethod
+    def _write(db: Session, items: List[Tuple[UUID, UUID, Sequence[float]]], model: str):
+        try:
+            write_memory_embeddings(db, items, model)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+    def depth(self) -> int:
+        """Number of queued jobs"""
+        return len(self._queue)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get worker statistics"""
+        with self._lock:
+            oldest = min((job.enqueued_at for job in self._queue), default=None)
+        return {
+            "running": self.running,
+            "queue_depth": len(self._queue),
+            "max_queue_size": self.max_queue_size,
+            "oldest_job_age_seconds": time.monotonic() - oldest if oldest is not None else 0.0,
+            "processed": self.processed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "restarts": self.restarts,
+        }
+
+
+# Global worker instance
+_embedding_worker: Optional[EmbeddingWorker] = None
+
+
+def get_embedding_worker() -> EmbeddingWorker:
+    """Get process-wide embedding worker"""
+    global _embedding_worker
+    if _embedding_worker is None:
+        settings = get_settings()
+        _embedding_worker = EmbeddingWorker(
+            max_queue_size=settings.embedding_worker_max_queue_size,
+            batch_size=settings.embedding_worker_batch_size,
+            batch_wait_seconds=settings.embedding_worker_batch_wait_seconds,
+            max_retries=settings.embedding_worker_max_retries,
+            retry_delay_seconds=settings.embedding_worker_retry_delay_seconds,
+        )
+    return _embedding_worker
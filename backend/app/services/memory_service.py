@@ -9,15 +9,26 @@ from uuid import UUID
 
 from app.core.database import SessionLocal
 from app.core.execution_context import ExecutionContext
+from app.core.local_vector_index import (get_local_vector_index,
+                                         memory_namespace)
 from app.core.logging_config import LoggingConfig
+from app.core.text_search import (RRF_K, full_text_search_available,
+                                  reciprocal_rank_fusion, ts_match, ts_rank)
+from app.core.vector_storage import (apply_search_settings, distance_clause,
+                                     embedding_column_type, vector_literal,
+                                     vector_search_available)
 from app.models.agent import Agent
 from app.models.agent_memory import (AgentMemory, AssociationType,
                                      MemoryAssociation, MemoryEntry,
                                      MemoryType)
 from app.services.embedding_service import EmbeddingService
-from sqlalchemy import and_, desc, func, or_, text
+from app.services.embedding_worker import (get_embedding_worker,
+                                           memory_embedding_text,
+                                           write_memory_embeddings)
+from sqlalchemy import and_, desc, func, or_, select, text
 from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, defer
 
 logger = LoggingConfig.get_logger(__name__)
 
@@ -143,18 +154,10 @@ class MemoryService:
         if self._cache_enabled:
             self.clear_cache(agent_id=agent_id)
         
-        # Generate embedding in background if requested
+        # Generate embedding in background if requested (bounded queue, batched worker)
+        embedding_scheduled = False
         if generate_embedding:
-            # Run async embedding generation in background
-            import asyncio
-            try:
-                loop = asyncio.get_event_loop()
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-            
-            # Schedule embedding generation (fire and forget)
-            asyncio.create_task(self._generate_and_save_embedding(memory))
+            embedding_scheduled = get_embedding_worker().enqueue(memory.id)
         
         logger.info(
             f"Saved memory for agent {agent_id}",
@@ -162,7 +165,7 @@ class MemoryService:
                 "memory_id": str(memory.id),
                 "memory_type": memory_type,
                 "importance": importance,
-                "embedding_scheduled": generate_embedding
+                "embedding_scheduled": embedding_scheduled
             }
         )
         
@@ -268,7 +271,8 @@ class MemoryService:
                 await self._generate_and_save_embedding_by_id(
                     memory_id=memory_id,
                     summary=memory_summary,
-                    content=memory_content
+                    content=memory_content,
+                    agent_id=agent_id
                 )
             except Exception as e:
                 # Log error but don't fail - memory is already saved
@@ -291,7 +295,8 @@ class MemoryService:
         self,
         memory_id,
         summary: Optional[str] = None,
-        content: Optional[Any] = None
+        content: Optional[Any] = None,
+        agent_id: Optional[UUID] = None
     ):
         """
         Generate and save embedding for a memory by ID (avoids SQLAlchemy vector type issues).
@@ -300,47 +305,28 @@ class MemoryService:
             memory_id: Memory UUID
             summary: Memory summary text
             content: Memory content
+            agent_id: Owning agent (keys the in-process index when pgvector is unavailable)
         """
         # Use a separate database session to avoid transaction conflicts
         separate_db = SessionLocal()
         try:
             # Use summary or content for embedding generation
-            text_for_embedding = summary
-            if not text_for_embedding:
-                # Extract text from content if summary is not available
-                if isinstance(content, dict):
-                    # Try to get text from common fields
-                    text_for_embedding = (
-                        content.get("description") or
-                        content.get("text") or
-                        content.get("content") or
-                        str(content)
-                    )
-                else:
-                    text_for_embedding = str(content) if content else None
+            text_for_embedding = memory_embedding_text(summary, content)
             
             if text_for_embedding:
-                embedding = await self.embedding_service.generate_embedding(text_for_embedding)
-                embedding_list = [float(x) for x in embedding]
-                # Decide whether DB column is pgvector 'vector' or an array (float8[])
+                model = self.embedding_service.resolve_model()
+                embedding = await self.embedding_service.generate_embedding(text_for_embedding, model=model)
+                if not any(embedding):
+                    logger.warning(f"Embedding could not be generated for memory {memory_id}")
+                    return
+                if agent_id is None:
+                    agent_id = separate_db.query(AgentMemory.agent_id).filter(
+                        AgentMemory.id == memory_id
+                    ).scalar()
                 try:
-                    col_type = separate_db.execute(text(
-                        "SELECT udt_name FROM information_schema.columns WHERE table_name = 'agent_memories' AND column_name = 'embedding' LIMIT 1"
-                    )).scalar()
-                except Exception:
-                    col_type = None
-
-                try:
-                    if col_type == "vector":
-                        # PostgreSQL vector format: [0.1,0.2,0.3]
-                        embedding_array_str = "[" + ",".join(str(x) for x in embedding_list) + "]"
-                        embedding_array_str_escaped = embedding_array_str.replace("'", "''")
-                        sql = text(f"UPDATE agent_memories SET embedding = '{embedding_array_str_escaped}'::vector WHERE id = CAST(:memory_id AS uuid)")
-                        separate_db.execute(sql, {"memory_id": str(memory_id)})
-                    else:
-                        # Use parameter binding to save as Postgres float8[] (ARRAY)
-                        sql = text("UPDATE agent_memories SET embedding = :embedding WHERE id = CAST(:memory_id AS uuid)")
-                        separate_db.execute(sql, {"memory_id": str(memory_id), "embedding": embedding_list})
+                    # pgvector column (native dimension, model per row), float8[] array
+                    # or in-process index, decided by the column type probed once per process
+                    write_memory_embeddings(separate_db, [(memory_id, agent_id, embedding)], model)
                     separate_db.commit()
                     logger.debug(f"Generated embedding for memory {memory_id}")
                 except Exception as e:
@@ -531,32 +517,110 @@ class MemoryService:
                     return cached
         
         # Execute search
-        query = self.db.query(AgentMemory).filter(
+        full_text = bool(query_text) and full_text_search_available(self.db)
+        conditions, order_by = self._search_criteria(agent_id, query_text, content_query, memory_type, full_text)
+        query = self.db.query(AgentMemory).filter(*conditions)
+        if full_text:
+            query = query.params(query_text=query_text)
+        results = query.order_by(*order_by).limit(limit).all()
+        
+        # Save to cache
+        if self._cache_enabled:
+            self._save_to_cache(cache_key, results)
+        
+        return results
+    
+    @staticmethod
+    def _search_criteria(
+        agent_id: UUID,
+        query_text: Optional[str],
+        content_query: Optional[Dict[str, Any]],
+        memory_type: Optional[str],
+        full_text: bool
+    ) -> tuple:
+        """Filter conditions and ordering of search_memories (shared by the sync and async paths)"""
+        conditions = [
             AgentMemory.agent_id == agent_id,
             or_(
                 AgentMemory.expires_at.is_(None),
                 AgentMemory.expires_at > datetime.now(timezone.utc)
             )
-        )
+        ]
         
         if memory_type:
-            query = query.filter(AgentMemory.memory_type == memory_type)
+            conditions.append(AgentMemory.memory_type == memory_type)
         
-        if query_text:
+        if full_text:
+            # Full-text search over the generated tsvector column (GIN index)
+            conditions.append(ts_match())
+        elif query_text:
             # Search in summary (case-insensitive)
-            query = query.filter(AgentMemory.summary.ilike(f"%{query_text}%"))
+            conditions.append(AgentMemory.summary.ilike(f"%{query_text}%"))
         
         if content_query:
             # Use JSONB contains for content search
             # This is a simple implementation - can be extended with more complex queries
             for key, value in content_query.items():
-                query = query.filter(
+                conditions.append(
                     func.jsonb_extract_path_text(AgentMemory.content, key) == str(value)
                 )
         
-        results = query.order_by(desc(AgentMemory.importance), desc(AgentMemory.last_accessed_at)).limit(limit).all()
+        if full_text:
+            order_by = (desc(ts_rank()), desc(AgentMemory.importance))
+        else:
+            order_by = (desc(AgentMemory.importance), desc(AgentMemory.last_accessed_at))
+        return conditions, order_by
+    
+    async def search_memories_async(
+        self,
+        db: AsyncSession,
+        agent_id: UUID,
+        query_text: Optional[str] = None,
+        content_query: Optional[Dict[str, Any]] = None,
+        memory_type: Optional[str] = None,
+        limit: int = 20
+    ) -> List[AgentMemory]:
+        """
+        Search memories by text or content on an AsyncSession (with caching)
+        
+        Same filters and ordering as search_memories, without blocking the event loop.
+        
+        Args:
+            db: Async database session
+            agent_id: Agent ID
+            query_text: Text to search in summary
+            content_query: JSONB query for content (PostgreSQL JSONB operators)
+            memory_type: Filter by memory type
+            limit: Maximum number of results
+            
+        Returns:
+            List of matching AgentMemory
+        """
+        cache_key = self._get_cache_key(
+            method="search_memories",
+            agent_id=str(agent_id),
+            query_text=query_text,
+            content_query=content_query,
+            memory_type=memory_type,
+            limit=limit
+        )
+        if self._cache_enabled:
+            cached = self._get_from_cache(cache_key)
+            if cached is not None:
+                return cached
+        
+        full_text = bool(query_text) and await db.run_sync(full_text_search_available)
+        conditions, order_by = self._search_criteria(agent_id, query_text, content_query, memory_type, full_text)
+        statement = (
+            select(AgentMemory)
+            .options(defer(AgentMemory.embedding))
+            .where(*conditions)
+            .order_by(*order_by)
+            .limit(limit)
+        )
+        params = {"query_text": query_text} if full_text else {}
+        results = list((await db.execute(statement, params)).scalars().all())
         
-        # Save to cache
         if self._cache_enabled:
             self._save_to_cache(cache_key, results)
         
@@ -607,27 +671,21 @@ class MemoryService:
                 return cached
         
         try:
-            # Check if embedding column exists; if not, fallback to text search
-            col_check = self.db.execute(text(
-                "SELECT 1 FROM information_schema.columns WHERE table_name = 'agent_memories' AND column_name = 'embedding' LIMIT 1"
-            )).fetchone()
-            if not col_check:
-                logger.warning("Embedding column not present in agent_memories, falling back to text search")
-                if combine_with_text_search:
-                    return self.search_memories(
-                        agent_id=agent_id,
-                        query_text=query_text,
-                        limit=limit,
-                        memory_type=memory_type
+            # Check embedding column and pgvector extension (probed once per process);
+            # if unavailable, fallback to text search
+            if not vector_search_available(self.db, "agent_memories"):
+                if get_local_vector_index().enabled:
+                    filtered_results = await self._search_memories_local(
+                        agent_id, query_text, limit, similarity_threshold, memory_type
                     )
-                return []
-            # Check if pgvector extension is available; if not, fallback to text search
-            try:
-                ext_check = self.db.execute(text("SELECT EXISTS(SELECT 1 FROM pg_extension WHERE extname = 'vector');")).scalar()
-            except Exception:
-                ext_check = False
-            if not ext_check:
-                logger.warning("pgvector extension not available, falling back to text search")
+                    if combine_with_text_search:
+                        filtered_results = self._fuse_text_results(
+                            filtered_results, agent_id, query_text, limit, memory_type
+                        )
+                    if self._cache_enabled:
+                        self._save_to_cache(cache_key, filtered_results[:limit])
+                    return filtered_results[:limit]
+                logger.warning("pgvector embedding column not available in agent_memories, falling back to text search")
                 if combine_with_text_search:
                     return self.search_memories(
                         agent_id=agent_id,
@@ -637,67 +695,81 @@ class MemoryService:
                     )
                 return []
             # Generate embedding for query text
-            query_embedding = await self.embedding_service.generate_embedding(query_text)
+            model = self.embedding_service.resolve_model()
+            query_embedding = await self.embedding_service.generate_embedding(query_text, model=model, as_view=True)
+            dimension = len(query_embedding)
             
-            # Use pgvector cosine similarity search via raw SQL
-            # Convert embedding list to PostgreSQL vector format: [0.1,0.2,0.3]
-            embedding_array_str = "[" + ",".join(str(x) for x in query_embedding) + "]"
-            # Escape single quotes if any (shouldn't be any in numeric array)
-            embedding_array_str_escaped = embedding_array_str.replace("'", "''")
-            
-            # Raw SQL query for vector similarity search
+            # One query returns the memory rows with their similarity, threshold applied in SQL.
             # Using cosine distance: 1 - cosine_similarity
             # Lower distance = higher similarity
-            memory_type_filter = "AND memory_type = :memory_type" if memory_type else ""
-            sql_query = text(f"""
-                SELECT 
-                    id,
-                    1 - (embedding <=> '{embedding_array_str_escaped}'::vector) as similarity
-                FROM agent_memories
-                WHERE agent_id = CAST(:agent_id AS uuid)
-                    AND embedding IS NOT NULL
-                    AND (expires_at IS NULL OR expires_at > NOW())
-                    {memory_type_filter}
-                ORDER BY embedding <=> '{embedding_array_str_escaped}'::vector
-                LIMIT :limit
-            """)
-            
-            params = {
-                "agent_id": str(agent_id),
-                "limit": limit
-            }
+            # The query vector and threshold are bound parameters; only the dimension is
+            # inlined (one statement per dimension), because the partial HNSW index of a
+            # dimension is chosen by the embedding_dim predicate and typed expression.
+            # Rows without a recorded model predate per-row models and are still searched.
+            # The embedding column itself is not loaded.
+            distance = distance_clause(AgentMemory.embedding, dimension)
+            conditions = [
+                AgentMemory.agent_id == agent_id,
+                or_(AgentMemory.expires_at.is_(None), AgentMemory.expires_at > func.now()),
+            ]
             if memory_type:
-                params["memory_type"] = memory_type
-            
-            # Execute vector search
-            result = self.db.execute(sql_query, params)
-            rows = result.fetchall()
-            
-            # Get memory IDs and similarities
-            # Handle both UUID objects and strings from raw SQL
-            memory_ids = []
-            similarities = []
-            for row in rows:
-                memory_id = row[0]
-                # Convert to UUID if it's a string
-                if isinstance(memory_id, str):
-                    memory_ids.append(UUID(memory_id))
-                elif isinstance(memory_id, UUID):
-                    memory_ids.append(memory_id)
-                else:
-                    memory_ids.append(UUID(str(memory_id)))
-                similarities.append(float(row[1]))
-            
-            # Filter by similarity threshold
-            filtered_results = []
-            for mem_id, similarity in zip(memory_ids, similarities):
-                if similarity >= similarity_threshold:
-                    memory = self.db.query(AgentMemory).filter(AgentMemory.id == mem_id).first()
-                    if memory:
-                        filtered_results.append(memory)
+                conditions.append(AgentMemory.memory_type == memory_type)
+            vector_conditions = conditions + [
+                text(f"agent_memories.embedding_dim = {dimension}"),
+                or_(AgentMemory.embedding_model == model, AgentMemory.embedding_model.is_(None)),
+                distance <= 1 - similarity_threshold,
+            ]
+            params = {"query_embedding": vector_literal(query_embedding)}
+            hybrid = combine_with_text_search and full_text_search_available(self.db)
+            if hybrid:
+                # Vector and full-text candidates ranked in their own CTEs (HNSW and GIN
+                # index scans) and fused by reciprocal rank in the same statement
+                candidates = limit * 2
+                vector_hits = (
+                    select(AgentMemory.id.label("id"), func.row_number().over(order_by=distance).label("rank"))
+                    .where(*vector_conditions)
+                    .order_by(distance)
+                    .limit(candidates)
+                    .cte("vector_hits")
+                )
+                text_hits = (
+                    select(AgentMemory.id.label("id"), func.row_number().over(order_by=desc(ts_rank())).label("rank"))
+                    .where(*conditions, ts_match())
+                    .order_by(desc(ts_rank()))
+                    .limit(candidates)
+                    .cte("text_hits")
+                )
+                score = (
+                    func.coalesce(1.0 / (RRF_K + vector_hits.c.rank), 0.0)
+                    + func.coalesce(1.0 / (RRF_K + text_hits.c.rank), 0.0)
+                )
+                fused = (
+                    select(func.coalesce(vector_hits.c.id, text_hits.c.id).label("id"), score.label("score"))
+                    .select_from(vector_hits.join(text_hits, vector_hits.c.id == text_hits.c.id, full=True))
+                    .cte("fused")
+                )
+                statement = (
+                    select(AgentMemory, fused.c.score)
+                    .options(defer(AgentMemory.embedding))
+                    .join(fused, AgentMemory.id == fused.c.id)
+                    .order_by(desc(fused.c.score), desc(AgentMemory.importance))
+                    .limit(limit)
+                )
+                params["query_text"] = query_text
+            else:
+                statement = (
+                    select(AgentMemory, (1 - distance).label("similarity"))
+                    .options(defer(AgentMemory.embedding))
+                    .where(*vector_conditions)
+                    .order_by(distance)
+                    .limit(limit)
+                )
+            apply_search_settings(self.db)
+            rows = self.db.execute(statement, params).fetchall()
+            filtered_results = [row[0] for row in rows]
             
             logger.info(
-                f"Vector search found {len(filtered_results)} memories",
+                f"{'Hybrid' if hybrid else 'Vector'} search found {len(filtered_results)} memories",
                 extra={
                     "agent_id": str(agent_id),
                     "query": query_text[:50],
@@ -705,33 +777,11 @@ class MemoryService:
                 }
             )
             
-            # Optionally combine with text search
-            if combine_with_text_search and len(filtered_results) < limit:
-                try:
-                    text_results = self.search_memories(
-                        agent_id=agent_id,
-                        query_text=query_text,
-                        limit=limit - len(filtered_results),
-                        memory_type=memory_type
-                    )
-                    # Normalize to list if possible
-                    if not isinstance(text_results, list):
-                        try:
-                            text_results = list(text_results)
-                        except Exception:
-                            text_results = []
-                except Exception:
-                    text_results = []
-
-                # Merge results, avoiding duplicates
-                vector_ids = {mem.id for mem in filtered_results}
-                for text_mem in text_results:
-                    try:
-                        if text_mem.id not in vector_ids:
-                            filtered_results.append(text_mem)
-                    except Exception:
-                        # Ignore malformed entries
-                        continue
+            # Optionally combine with text search (already fused in SQL when hybrid)
+            if combine_with_text_search and not hybrid:
+                filtered_results = self._fuse_text_results(
+                    filtered_results, agent_id, query_text, limit, memory_type
+                )
             
             # Save to cache
             if self._cache_enabled:
@@ -751,6 +801,102 @@ class MemoryService:
                 )
             return []
     
+    def _fuse_text_results(
+        self,
+        results: List[AgentMemory],
+        agent_id: UUID,
+        query_text: str,
+        limit: int,
+        memory_type: Optional[str]
+    ) -> List[AgentMemory]:
+        """Combine vector search results with text search results by reciprocal rank fusion"""
+        try:
+            text_results = self.search_memories(
+                agent_id=agent_id,
+                query_text=query_text,
+                limit=limit,
+                memory_type=memory_type
+            )
+            # Normalize to list if possible
+            if not isinstance(text_results, list):
+                try:
+                    text_results = list(text_results)
+                except Exception:
+                    text_results = []
+        except Exception:
+            text_results = []
+
+        by_id = {mem.id: mem for mem in results}
+        text_ids = []
+        for text_mem in text_results:
+            mem_id = getattr(text_mem, "id", None)
+            if mem_id is None:
+                # Ignore malformed entries
+                continue
+            by_id.setdefault(mem_id, text_mem)
+            text_ids.append(mem_id)
+        fused = reciprocal_rank_fusion([[mem.id for mem in results], text_ids], limit=limit)
+        return [by_id[mem_id] for mem_id, _ in fused]
+    
+    async def _search_memories_local(
+        self,
+        agent_id: UUID,
+        query_text: str,
+        limit: int,
+        similarity_threshold: float,
+        memory_type: Optional[str] = None
+    ) -> List[AgentMemory]:
+        """
+        Vector search through the in-process index (no pgvector).
+        
+        The agent's vectors are loaded from the embedding column (float8[])
+        on first use; afterwards the index is kept current by embedding
+        writes and deletes.
+        
+        Returns:
+            List of AgentMemory sorted by similarity
+        """
+        index = get_local_vector_index()
+        namespace = memory_namespace(agent_id)
+        model = self.embedding_service.resolve_model()
+        if not index.is_loaded(namespace):
+            if embedding_column_type(self.db, "agent_memories"):
+                rows = self.db.query(
+                    AgentMemory.id, AgentMemory.embedding_model, AgentMemory.embedding
+                ).filter(
+                    AgentMemory.agent_id == agent_id,
+                    AgentMemory.embedding.isnot(None)
+                ).all()
+                for memory_id, embedding_model, embedding in rows:
+                    # Rows without a recorded model predate per-row models
+                    index.add(namespace, embedding_model or model, memory_id, embedding)
+            index.mark_loaded(namespace)
+
+        query_embedding = await self.embedding_service.generate_embedding(query_text, model=model, as_view=True)
+        # Over-fetch when filtering by type, the index holds all of the agent's memories
+        k = limit * 4 if memory_type else limit
+        hits = index.search(namespace, model, query_embedding, k, similarity_threshold)
+        if not hits:
+            return []
+
+        query = self.db.query(AgentMemory).options(defer(AgentMemory.embedding)).filter(
+            AgentMemory.id.in_([UUID(memory_id) for memory_id, _ in hits]),
+            or_(AgentMemory.expires_at.is_(None), AgentMemory.expires_at > func.now())
+        )
+        if memory_type:
+            query = query.filter(AgentMemory.memory_type == memory_type)
+        by_id = {str(memory.id): memory for memory in query.all()}
+        results = [by_id[memory_id] for memory_id, _ in hits if memory_id in by_id][:limit]
+        logger.info(
+            f"Local vector search found {len(results)} memories",
+            extra={
+                "agent_id": str(agent_id),
+                "query": query_text[:50],
+                "threshold": similarity_threshold
+            }
+        )
+        return results
+    
     def update_memory(
         self,
         memory_id: UUID,
@@ -806,8 +952,10 @@ class MemoryService:
         if not memory:
             return False
         
+        agent_id = memory.agent_id
         self.db.delete(memory)
         self.db.commit()
+        get_local_vector_index().remove(memory_namespace(agent_id), [memory_id])
         
         logger.info(f"Deleted memory {memory_id}")
         
@@ -10,7 +10,7 @@ from uuid import UUID
 
 from app.core.config import get_settings
 from app.core.logging_config import LoggingConfig
-from app.core.ollama_client import OllamaClient, TaskType
+from app.core.ollama_client import OllamaClient, RequestPriority, TaskType
 from app.models.ollama_model import OllamaModel
 from app.models.ollama_server import OllamaServer
 from app.services.ollama_service import OllamaService
@@ -86,7 +86,8 @@ class ModelBenchmarkService:
                 task_type=task_type,
                 model=model.model_name,
                 server_url=server_url,
-                num_predict=200  # Ограничение для быстрого теста
+                num_predict=200,  # Ограничение для быстрого теста
+                priority=RequestPriority.BACKGROUND
             )
             response = await asyncio.wait_for(_coro, timeout=timeout)
             
@@ -49,6 +49,19 @@ class OllamaService:
             )
         ).order_by(OllamaModel.priority.desc(), OllamaModel.name).all()
     
+    @staticmethod
+    def get_servers_with_model(db: Session, model_name: str) -> List[OllamaServer]:
+        """Get active servers that host an active model with the given name"""
+        return db.query(OllamaServer).join(
+            OllamaModel, OllamaModel.server_id == OllamaServer.id
+        ).filter(
+            and_(
+                OllamaServer.is_active == True,
+                OllamaModel.model_name == model_name,
+                OllamaModel.is_active == True
+            )
+        ).order_by(OllamaServer.priority.desc(), OllamaServer.name).all()
+    
     @staticmethod
     def get_model_by_name(db: Session, server_id: str, model_name: str) -> Optional[OllamaModel]:
         """Get model by name and server"""
@@ -0,0 +1,373 @@
+"""
+Partition maintenance for time-partitioned tables
+
+execution_traces, workflow_events and request_logs are range-partitioned by
+time (see the partition_event_tables migration). This module keeps them
+that way:
+- partitions are created `partition_premake` periods (day or week) ahead,
+  filling any gap left while the job was not running; rows that landed in
+  the DEFAULT partition meanwhile are moved into the new partition;
+- partitions whose upper bound is older than the table's retention are
+  rolled up into the per-day *_rollups tables (optional) and dropped, which
+  is a catalog operation instead of a DELETE over millions of rows. Expired
+  rows in the DEFAULT partition are rolled up and deleted.
+
+Range queries on the partition key (start_time, timestamp, created_at) only
+scan the partitions they overlap.
+"""
+import asyncio
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.logging_config import LoggingConfig
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = LoggingConfig.get_logger(__name__)
+
+PARTITION_INTERVALS = {"day": timedelta(days=1), "week": timedelta(weeks=1)}
+
+
+@dataclass(frozen=True)
+class PartitionedTable:
+    """A time-partitioned table and how its expired rows are rolled up"""
+    name: str
+    column: str
+    retention_setting: str
+    rollup_sql: str  # INSERT ... SELECT ... FROM {source} {where}
+    dependents_sql: Tuple[str, ...] = ()  # Run with {source} {where} before rows are removed
+
+
+PARTITIONED_TABLES: Tuple[PartitionedTable, ...] = (
+    PartitionedTable(
+        name="execution_traces",
+        column="start_time",
+        retention_setting="execution_traces_retention_days",
+        rollup_sql=(
+            "INSERT INTO execution_trace_rollups "
+            "(day, operation_name, agent_id, status, trace_count, total_duration_ms, max_duration_ms) "
+            "SELECT CAST(start_time AS date), operation_name, agent_id, status, "
+            "count(*), sum(duration_ms), max(duration_ms) "
+            "FROM {source} {where} GROUP BY 1, 2, 3, 4"
+        ),
+    ),
+    PartitionedTable(
+        name="workflow_events",
+        column='"timestamp"',
+        retention_setting="workflow_events_retention_days",
+        rollup_sql=(
+            "INSERT INTO workflow_event_rollups "
+            "(day, event_type, event_source, stage, status, event_count, total_duration_ms, max_duration_ms) "
+            'SELECT CAST("timestamp" AS date), event_type, event_source, stage, status, '
+            "count(*), sum(duration_ms), max(duration_ms) "
+            "FROM {source} {where} GROUP BY 1, 2, 3, 4, 5"
+        ),
+    ),
+    PartitionedTable(
+        name="request_logs",
+        column="created_at",
+        retention_setting="request_logs_retention_days",
+        rollup_sql=(
+            "INSERT INTO request_log_rollups "
+            "(day, request_type, model_used, status, request_count, total_duration_ms, max_duration_ms, "
+            "total_success_score) "
+            "SELECT CAST(created_at AS date), request_type, model_used, status, "
+            "count(*), sum(duration_ms), max(duration_ms), sum(success_score) "
+            "FROM {source} {where} GROUP BY 1, 2, 3, 4"
+        ),
+        # Former foreign keys (ON DELETE CASCADE / SET NULL)
+        dependents_sql=(
+            "DELETE FROM request_consequences WHERE request_id IN (SELECT id FROM {source} {where})",
+            "UPDATE checkpoints SET request_id = NULL WHERE request_id IN (SELECT id FROM {source} {where})",
+        ),
+    ),
+)
+
+_BOUND_RE = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+@dataclass
+class Partition:
+    """One partition; lower/upper are None for MINVALUE/MAXVALUE"""
+    name: str
+    lower: Optional[datetime]
+    upper: Optional[datetime]
+    is_default: bool = False
+
+
+def parse_bound_value(value: str) -> Optional[datetime]:
+    """Partition bound literal -> naive UTC datetime (None for MINVALUE/MAXVALUE)"""
+    value = value.strip()
+    if value.upper() in ("MINVALUE", "MAXVALUE"):
+        return None
+    moment = datetime.fromisoformat(value.strip("'"))
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def parse_partition(name: str, bound: str) -> Partition:
+    """Partition from pg_get_expr(relpartbound)"""
+    if bound.strip().upper() == "DEFAULT":
+        return Partition(name=name, lower=None, upper=None, is_default=True)
+    match = _BOUND_RE.search(bound)
+    if not match:
+        raise ValueError(f"Unsupported partition bound for {name}: {bound}")
+    return Partition(name=name, lower=parse_bound_value(match.group(1)), upper=parse_bound_value(match.group(2)))
+
+
+def period_start(moment: datetime, interval: str) -> datetime:
+    """Start of the day or ISO week (Monday, like date_trunc('week')) containing moment"""
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == "week":
+        day -= timedelta(days=day.weekday())
+    return day
+
+
+def missing_partition_ranges(
+    partitions: List[Partition],
+    now: datetime,
+    interval: str,
+    premake: int
+) -> List[Tuple[datetime, datetime]]:
+    """
+    Ranges to create so that partitions cover up to `premake` periods after now
+
+    Starts at the highest existing upper bound (filling gaps), or at the
+    current period when there are no range partitions.
+    """
+    step = PARTITION_INTERVALS[interval]
+    uppers = [partition.upper for partition in partitions if not partition.is_default]
+    if any(upper is None for upper in uppers):
+        return []  # Covered up to MAXVALUE
+    lower = max(uppers) if uppers else period_start(now, interval)
+    horizon = period_start(now, interval) + step * (premake + 1)
+    ranges = []
+    while lower < horizon:
+        # Realigns to period boundaries after the interval setting changes
+        upper = period_start(lower, interval) + step
+        ranges.append((lower, upper))
+        lower = upper
+    return ranges
+
+
+def expired_partitions(partitions: List[Partition], cutoff: datetime) -> List[Partition]:
+    """Range partitions whose rows are all older than cutoff"""
+    return [
+        partition for partition in partitions
+        if not partition.is_default and partition.upper is not None and partition.upper <= cutoff
+    ]
+
+
+def _literal(moment: datetime) -> str:
+    return moment.isoformat(sep=" ")
+
+
+class PartitionManager:
+    """Creates, rolls up and drops partitions of the time-partitioned tables"""
+
+    def __init__(self, db: Session, interval: str = "week", premake: int = 4, rollup: bool = True):
+        if interval not in PARTITION_INTERVALS:
+            raise ValueError(f"Unsupported partition interval: {interval}")
+        self.db = db
+        self.interval = interval
+        self.premake = premake
+        self.rollup = rollup
+
+    def is_partitioned(self, table: str) -> bool:
+        """Whether the table is range-partitioned (PostgreSQL only)"""
+        if self.db.get_bind().dialect.name != "postgresql":
+            return False
+        return bool(self.db.execute(
+            text("SELECT EXISTS(SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"),
+            {"table": table}
+        ).scalar())
+
+    def _begin(self):
+        # Bounds of timestamptz partitions are read and written in UTC;
+        # never queue behind long transactions holding the parent table
+        self.db.execute(text("SET LOCAL TIME ZONE 'UTC'"))
+        self.db.execute(text("SET LOCAL lock_timeout = '5s'"))
+
+    def list_partitions(self, table: str) -> List[Partition]:
+        """Partitions of a table with their bounds"""
+        self._begin()
+        rows = self.db.execute(text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = CAST(:table AS regclass) "
+            "ORDER BY c.relname"
+        ), {"table": table}).fetchall()
+        return [parse_partition(name, bound) for name, bound in rows]
+
+    def ensure_partitions(self, spec: PartitionedTable, now: datetime, dry_run: bool = False) -> List[str]:
+        """Create missing partitions up to `premake` periods ahead"""
+        partitions = self.list_partitions(spec.name)
+        default = next((partition.name for partition in partitions if partition.is_default), None)
+        created = []
+        for lower, upper in missing_partition_ranges(partitions, now, self.interval, self.premake):
+            name = f"{spec.name}_p{lower:%Y%m%d}"
+            if not dry_run:
+                self._create_partition(spec, name, lower, upper, default)
+            created.append(name)
+        return created
+
+    def _create_partition(self, spec: PartitionedTable, name: str, lower: datetime, upper: datetime, default: Optional[str]):
+        bounds = f"FOR VALUES FROM ('{_literal(lower)}') TO ('{_literal(upper)}')"
+        in_range = f"WHERE {spec.column} >= :lower AND {spec.column} < :upper"
+        params = {"lower": lower, "upper": upper}
+        try:
+            self._begin()
+            has_default_rows = default is not None and self.db.execute(
+                text(f"SELECT EXISTS(SELECT 1 FROM {default} {in_range})"), params
+            ).scalar()
+            if has_default_rows:
+                # Rows inserted while the range had no partition: move them out of DEFAULT
+                self.db.execute(text(
+                    f"CREATE TABLE {name} (LIKE {spec.name} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+                ))
+                self.db.execute(text(f"INSERT INTO {name} SELECT * FROM {default} {in_range}"), params)
+                self.db.execute(text(f"DELETE FROM {default} {in_range}"), params)
+                self.db.execute(text(f"ALTER TABLE {spec.name} ATTACH PARTITION {name} {bounds}"))
+            else:
+                self.db.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {spec.name} {bounds}"))
+            self.db.commit()
+            logger.info(f"Created partition {name} [{lower}, {upper})")
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def drop_expired(self, spec: PartitionedTable, cutoff: datetime, dry_run: bool = False) -> Dict[str, Any]:
+        """Roll up and drop partitions older than cutoff, and delete expired DEFAULT rows"""
+        partitions = self.list_partitions(spec.name)
+        dropped = []
+        for partition in expired_partitions(partitions, cutoff):
+            if not dry_run:
+                self._remove_rows(spec, partition.name, "", {})
+                self.db.execute(text(f"DROP TABLE {partition.name}"))
+                self.db.commit()
+                logger.info(f"Dropped partition {partition.name} (before {partition.upper})")
+            dropped.append(partition.name)
+
+        default_rows = 0
+        default = next((partition.name for partition in partitions if partition.is_default), None)
+        if default is not None and not dry_run:
+            where = f"WHERE {spec.column} < :cutoff"
+            default_rows = self._remove_rows(spec, default, where, {"cutoff": cutoff})
+            self.db.execute(text(f"DELETE FROM {default} {where}"), {"cutoff": cutoff})
+            self.db.commit()
+        return {"dropped": dropped, "default_rows_deleted": default_rows}
+
+    def _remove_rows(self, spec: PartitionedTable, source: str, where: str, params: Dict[str, Any]) -> int:
+        """Roll up rows about to be removed and clean up rows that referenced them (caller commits)"""
+        self._begin()
+        rolled_up = 0
+        if self.rollup:
+            rolled_up = self.db.execute(text(spec.rollup_sql.format(source=source, where=where)), params).rowcount
+        for sql in spec.dependents_sql:
+            self.db.execute(text(sql.format(source=source, where=where)), params)
+        return rolled_up
+
+    def run(self, retention_days: Dict[str, int], now: Optional[datetime] = None, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Maintain all partitioned tables
+
+        Args:
+            retention_days: table -> days to keep (0 keeps everything)
+            now: Current time (naive UTC)
+            dry_run: Only report what would be created and dropped
+
+        Returns:
+            Report per table
+        """
+        now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+        report: Dict[str, Any] = {}
+        for spec in PARTITIONED_TABLES:
+            if not self.is_partitioned(spec.name):
+                report[spec.name] = {"partitioned": False}
+                continue
+            result: Dict[str, Any] = {"partitioned": True}
+            try:
+                result["created"] = self.ensure_partitions(spec, now, dry_run=dry_run)
+                days = retention_days.get(spec.name, 0)
+                if days > 0:
+                    result.update(self.drop_expired(spec, now - timedelta(days=days), dry_run=dry_run))
+            except Exception as e:
+                self.db.rollback()
+                logger.error(f"Partition maintenance of {spec.name} failed: {e}", exc_info=True)
+                result["error"] = str(e)
+            report[spec.name] = result
+        return report
+
+
+def run_partition_maintenance(dry_run: bool = False) -> Dict[str, Any]:
+    """Run maintenance with the configured interval, premake and retention"""
+    from app.core.database import SessionLocal
+
+    settings = get_settings()
+    db = SessionLocal()
+    try:
+        manager = PartitionManager(
+            db,
+            interval=settings.partition_interval,
+            premake=settings.partition_premake,
+            rollup=settings.partition_rollup_enabled,
+        )
+        retention = {spec.name: getattr(settings, spec.retention_setting) for spec in PARTITIONED_TABLES}
+        return manager.run(retention, dry_run=dry_run)
+    finally:
+        db.close()
+
+
+class PartitionMaintenanceScheduler:
+    """Background task running partition maintenance periodically"""
+
+    def __init__(self, interval_seconds: float = 3600.0):
+        self.interval_seconds = interval_seconds
+        self.running = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start periodic maintenance"""
+        if self.running:
+            logger.warning("Partition maintenance scheduler is already running")
+            return
+        self.running = True
+        logger.info("Starting partition maintenance scheduler...")
+        self._task = asyncio.create_task(self._maintenance_loop())
+
+    async def stop(self):
+        """Stop periodic maintenance"""
+        self.running = False
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+        logger.info("Stopping partition maintenance scheduler...")
+
+    async def _maintenance_loop(self):
+        while self.running:
+            try:
+                await asyncio.to_thread(run_partition_maintenance)
+            except Exception as e:
+                logger.error(f"Error in partition maintenance loop: {e}", exc_info=True)
+            await asyncio.sleep(self.interval_seconds)
+
+
+# Global scheduler instance
+_partition_maintenance_scheduler: Optional[PartitionMaintenanceScheduler] = None
+
+
+def get_partition_maintenance_scheduler() -> PartitionMaintenanceScheduler:
+    """Get process-wide partition maintenance scheduler"""
+    global _partition_maintenance_scheduler
+    if _partition_maintenance_scheduler is None:
+        _partition_maintenance_scheduler = PartitionMaintenanceScheduler(
+            interval_seconds=get_settings().partition_maintenance_interval_seconds
+        )
+    return _partition_maintenance_scheduler
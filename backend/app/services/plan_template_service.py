@@ -8,8 +8,14 @@ from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 from uuid import UUID, uuid4
 
+from app.core.local_vector_index import (TEMPLATES_NAMESPACE,
+                                         get_local_vector_index)
 from app.core.logging_config import LoggingConfig
 from app.core.ollama_client import OllamaClient, TaskType
+from app.core.vector_storage import (apply_search_settings,
+                                     distance_expression,
+                                     embedding_column_type, save_embeddings,
+                                     vector_literal, vector_search_available)
 from app.models.plan import Plan, PlanStatus
 from app.models.plan_template import PlanTemplate, TemplateStatus
 from app.models.task import Task, TaskStatus
@@ -368,14 +374,26 @@ class PlanTemplateService:
             if template.tags:
                 text_for_embedding += " " + " ".join(template.tags)
             
-            embedding = await self.embedding_service.generate_embedding(text_for_embedding)
+            model = self.embedding_service.resolve_model()
+            embedding = await self.embedding_service.generate_embedding(text_for_embedding, model=model)
+            if not any(embedding):
+                logger.warning(f"Embedding could not be generated for template {template_id}")
+                return
             
-            # Update template with embedding (using raw SQL to avoid SQLAlchemy vector type issues)
-            from sqlalchemy import text
-            embedding_str = "[" + ",".join(str(x) for x in embedding) + "]"
-            sql = text(f"UPDATE plan_templates SET embedding = '{embedding_str}'::vector WHERE id = CAST(:id AS uuid)")
-            self.db.execute(sql, {"id": str(template_id)})
-            self.db.commit()
+            if vector_search_available(self.db, "plan_templates"):
+                # Update template with embedding (using raw SQL to avoid SQLAlchemy vector type issues)
+                save_embeddings(self.db, "plan_templates", [(template_id, embedding)], model)
+                self.db.commit()
+            else:
+                # No pgvector: keep the array column current and search the in-process index
+                if embedding_column_type(self.db, "plan_templates"):
+                    self.db.query(PlanTemplate).filter(PlanTemplate.id == template_id).update({
+                        PlanTemplate.embedding: [float(x) for x in embedding],
+                        PlanTemplate.embedding_model: model,
+                        PlanTemplate.embedding_dim: len(embedding),
+                    }, synchronize_session=False)
+                    self.db.commit()
+                get_local_vector_index().add(TEMPLATES_NAMESPACE, model, template_id, embedding)
             
             logger.debug(f"Generated embedding for template {template_id}")
             
@@ -453,28 +471,44 @@ class PlanTemplateService:
                     base_conditions, task_description, limit
                 )
             else:
+                model = self.embedding_service.resolve_model()
                 embedding = loop.run_until_complete(
-                    self.embedding_service.generate_embedding(task_description)
+                    self.embedding_service.generate_embedding(task_description, model=model, as_view=True)
                 )
             
-            # Convert to PostgreSQL array format
-            embedding_str = "[" + ",".join(str(x) for x in embedding) + "]"
-            
-            # Raw SQL query for vector similarity search
             from sqlalchemy import text
-            sql_query = text(f"""
-                SELECT 
-                    id,
-                    1 - (embedding <=> '{embedding_str}'::vector) as similarity
-                FROM plan_templates
-                WHERE embedding IS NOT NULL
-                    AND status = 'active'
-                ORDER BY embedding <=> '{embedding_str}'::vector
-                LIMIT :limit
-            """)
-            
-            result = self.db.execute(sql_query, {"limit": limit})
-            rows = result.fetchall()
+            if not vector_search_available(self.db, "plan_templates"):
+                # No pgvector: top-k from the in-process index (inactive templates
+                # are dropped when fetching, so over-fetch)
+                if not get_local_vector_index().enabled:
+                    return self._find_templates_text_search_with_filters(
+                        base_conditions, task_description, limit
+                    )
+                self._load_local_template_index(model)
+                rows = get_local_vector_index().search(TEMPLATES_NAMESPACE, model, embedding, limit * 2)
+            else:
+                # Raw SQL query for vector similarity search over templates of the
+                # query's dimension and model (matches the partial HNSW index)
+                distance = distance_expression(len(embedding))
+                sql_query = text(f"""
+                    SELECT 
+                        id,
+                        1 - ({distance}) as similarity
+                    FROM plan_templates
+                    WHERE embedding_dim = {len(embedding)}
+                        AND (embedding_model = :embedding_model OR embedding_model IS NULL)
+                        AND status = 'active'
+                    ORDER BY {distance}
+                    LIMIT :limit
+                """)
+                
+                apply_search_settings(self.db)
+                result = self.db.execute(sql_query, {
+                    "query_embedding": vector_literal(embedding),
+                    "embedding_model": model,
+                    "limit": limit
+                })
+                rows = result.fetchall()
             # If rows is not a list/tuple (e.g., unit tests using Mock), fall back to ORM-style query
             if not isinstance(rows, (list, tuple)):
                 try:
@@ -515,6 +549,7 @@ class PlanTemplateService:
                        created_at, updated_at, last_used_at
                 FROM plan_templates
                 WHERE id IN ({id_placeholders})
+                    AND status = 'active'
             """)
             
             fetch_result = self.db.execute(fetch_sql, id_params)
@@ -578,7 +613,7 @@ class PlanTemplateService:
                 template_dict[template.id] = template
             
             # Return in order from vector search
-            return [template_dict[tid] for tid in template_ids if tid in template_dict]
+            return [template_dict[tid] for tid in template_ids if tid in template_dict][:limit]
             
         except Exception as e:
             logger.warning(f"Vector search failed: {e}, falling back to text search")
@@ -587,6 +622,19 @@ class PlanTemplateService:
                 base_conditions, task_description, limit
             )
     
+    def _load_local_template_index(self, model: str):
+        """Load template vectors from the array column into the in-process index (once)"""
+        index = get_local_vector_index()
+        if index.is_loaded(TEMPLATES_NAMESPACE):
+            return
+        if embedding_column_type(self.db, "plan_templates"):
+            rows = self.db.query(
+                PlanTemplate.id, PlanTemplate.embedding_model, PlanTemplate.embedding
+            ).filter(PlanTemplate.embedding.isnot(None)).all()
+            for template_id, embedding_model, embedding in rows:
+                index.add(TEMPLATES_NAMESPACE, embedding_model or model, template_id, embedding)
+        index.mark_loaded(TEMPLATES_NAMESPACE)
+    
     def _find_templates_text_search(
         self,
         base_query,
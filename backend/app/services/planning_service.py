@@ -2408,7 +2408,8 @@ Return a JSON array of steps."""
                     system_prompt=system_prompt,
                     task_type=TaskType.PLANNING,
                     model=planning_model.model_name,
-                    server_url=server.get_api_url()
+                    server_url=server.get_api_url(),
+                    temperature=0.0  # Детерминированный ответ - кэшируется между процессами и перезапусками
                 )
                 response = await asyncio.wait_for(
                     _coro,
@@ -2790,7 +2791,8 @@ Break down this task into executable steps. Return only a valid JSON array."""
                     system_prompt=system_prompt,
                     task_type=TaskType.PLANNING,
                     model=planning_model.model_name,
-                    server_url=server.get_api_url()
+                    server_url=server.get_api_url(),
+                    temperature=0.0  # Детерминированный ответ - кэшируется между процессами и перезапусками
                 )
                 try:
                     response = await asyncio.wait_for(_coro, timeout=float(self.settings.planning_timeout_seconds))
@@ -147,18 +147,18 @@ class ProjectMetricsService:
             failed = sum(1 for t in tasks if t.status == TaskStatus.FAILED)
             success_rate = completed / total_tasks if total_tasks > 0 else 0.0
             
-            # Get execution traces for timing
-            traces = self.db.query(ExecutionTrace).filter(
+            # Get execution traces for timing (start_time is the partition key)
+            traces = self.db.query(ExecutionTrace.duration_ms).filter(
                 and_(
-                    ExecutionTrace.created_at >= period_start,
-                    ExecutionTrace.created_at < period_end
+                    ExecutionTrace.start_time >= period_start,
+                    ExecutionTrace.start_time < period_end
                 )
             ).all()
             
             execution_times = []
-            for trace in traces:
-                if trace.duration_ms:
-                    execution_times.append(trace.duration_ms / 1000.0)  # Convert to seconds
+            for duration_ms, in traces:
+                if duration_ms:
+                    execution_times.append(duration_ms / 1000.0)  # Convert to seconds
             
             avg_execution_time = sum(execution_times) / len(execution_times) if execution_times else None
             min_execution_time = min(execution_times) if execution_times else None
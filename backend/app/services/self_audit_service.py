@@ -660,7 +660,7 @@ class SelfAuditService:
         recommendations: List[Dict[str, Any]]
     ) -> str:
         """Generate summary using LLM"""
-        from app.core.ollama_client import OllamaClient
+        from app.core.ollama_client import OllamaClient, RequestPriority
         
         prompt = f"""Analyze the following audit results and generate a concise summary.
 
@@ -681,7 +681,8 @@ Return only the summary text, no additional formatting."""
             client = OllamaClient()
             response = await client.generate(
                 prompt=prompt,
-                task_type="reasoning"
+                task_type="reasoning",
+                priority=RequestPriority.BACKGROUND
             )
             return response.response
         except Exception as e:
@@ -1051,7 +1052,7 @@ Return only the summary text, no additional formatting."""
             Enhanced analysis with LLM insights (or fallback if LLM unavailable)
         """
         try:
-            from app.core.ollama_client import OllamaClient
+            from app.core.ollama_client import OllamaClient, RequestPriority
 
             # Check if LLM is available (stub - will fail gracefully if not)
             client = OllamaClient()
@@ -1074,7 +1075,8 @@ Return JSON with: insights, root_causes, recommendations, risk_level"""
             
             response = await client.generate(
                 prompt=prompt,
-                task_type="reasoning"
+                task_type="reasoning",
+                priority=RequestPriority.BACKGROUND
             )
             
             # Try to parse JSON response
@@ -9,7 +9,8 @@ from app.core.logging_config import LoggingConfig
 from app.core.workflow_tracker import WorkflowStage as TrackerStage
 from app.models.workflow_event import (EventSource, EventStatus, EventType,
                                        WorkflowEvent, WorkflowStage)
-from sqlalchemy import desc
+from sqlalchemy import desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 logger = LoggingConfig.get_logger(__name__)
@@ -160,6 +161,40 @@ class WorkflowEventService:
         
         return query.order_by(desc(WorkflowEvent.timestamp)).limit(limit).all()
     
+    # Async reads (AsyncSession, for routes on the event loop)
+    
+    @staticmethod
+    async def get_events_by_workflow_async(
+        db: AsyncSession,
+        workflow_id: str,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[WorkflowEvent]:
+        """Get all events for a workflow"""
+        statement = select(WorkflowEvent).where(
+            WorkflowEvent.workflow_id == workflow_id
+        ).order_by(WorkflowEvent.timestamp.asc())
+        
+        if limit:
+            statement = statement.limit(limit).offset(offset)
+        
+        return list((await db.execute(statement)).scalars().all())
+    
+    @staticmethod
+    async def get_recent_events_async(
+        db: AsyncSession,
+        limit: int = 100,
+        workflow_id: Optional[str] = None
+    ) -> List[WorkflowEvent]:
+        """Get recent events, optionally filtered by workflow_id"""
+        statement = select(WorkflowEvent)
+        
+        if workflow_id:
+            statement = statement.where(WorkflowEvent.workflow_id == workflow_id)
+        
+        statement = statement.order_by(desc(WorkflowEvent.timestamp)).limit(limit)
+        return list((await db.execute(statement)).scalars().all())
+    
     def update_event_status(
         self,
         event_id: UUID,
@@ -63,6 +63,34 @@ async def lifespan(app: FastAPI):
     audit_scheduler = get_audit_scheduler()
     await audit_scheduler.start()
     
+    # Start Ollama server state registry (background health / loaded models refresh)
+    from app.core.ollama_server_state import get_server_state_registry
+    server_state_registry = get_server_state_registry()
+    await server_state_registry.start()
+    
+    # Start connection pool gauges
+    from app.core.db_metrics import get_pool_metrics_reporter
+    pool_metrics_reporter = get_pool_metrics_reporter()
+    await pool_metrics_reporter.start()
+    
+    # Start partition maintenance (create upcoming partitions, drop expired ones)
+    partition_maintenance_scheduler = None
+    if settings.partition_maintenance_enabled:
+        from app.services.partition_maintenance import \
+            get_partition_maintenance_scheduler
+        partition_maintenance_scheduler = get_partition_maintenance_scheduler()
+        await partition_maintenance_scheduler.start()
+    
+    # Restore in-process vector index (used when pgvector is unavailable)
+    from app.core.local_vector_index import get_local_vector_index
+    local_vector_index = get_local_vector_index()
+    local_vector_index.load_snapshot()
+    
+    # Start background embedding worker (memories saved with generate_embedding=True)
+    from app.services.embedding_worker import get_embedding_worker
+    embedding_worker = get_embedding_worker()
+    await embedding_worker.start()
+    
     yield
     
     # Shutdown
@@ -74,6 +102,34 @@ async def lifespan(app: FastAPI):
     # Stop heartbeat monitor
     await heartbeat_monitor.stop()
     
+    # Drain and stop embedding worker (before the Ollama state registry it uses)
+    await embedding_worker.stop()
+    
+    # Stop Ollama server state registry
+    await server_state_registry.stop()
+    
+    # Flush pending persistent LLM cache writes
+    from app.core.llm_persistent_cache import close_persistent_llm_cache
+    await close_persistent_llm_cache()
+    
+    # Snapshot in-process vector index
+    local_vector_index.save_snapshot()
+    
+    # Stop partition maintenance
+    if partition_maintenance_scheduler is not None:
+        await partition_maintenance_scheduler.stop()
+    
+    # Stop connection pool gauges
+    await pool_metrics_reporter.stop()
+    
+    # Dispose async database engine
+    from app.core.database import close_async_engine
+    await close_async_engine()
+    
+    # Close pooled Ollama HTTP connections
+    from app.core.ollama_transport import close_transport_pool
+    await close_transport_pool()
+    
     # Shutdown tracing
     shutdown_tracing()
 
@@ -0,0 +1,148 @@
+"""
+Script to re-embed memories and plan templates at native dimension
+Processes rows whose embedding has no recorded model (written before
+per-row models, possibly padded or truncated to 1536 dimensions) or was
+produced by a different model than the current default
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add backend to path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from dotenv import load_dotenv
+
+BASE_DIR = backend_dir.parent
+ENV_FILE = BASE_DIR / ".env"
+if ENV_FILE.exists():
+    load_dotenv(ENV_FILE, override=True)
+
+from app.core.database import SessionLocal
+from app.core.logging_config import LoggingConfig
+from app.core.vector_storage import save_embeddings
+from app.services.embedding_service import EmbeddingService
+from sqlalchemy import text
+
+logger = LoggingConfig.get_logger(__name__)
+
+# Text each table is embedded from (same as MemoryService / PlanTemplateService)
+TEXT_QUERIES = {
+    "agent_memories": """
+        SELECT id, COALESCE(NULLIF(summary, ''), content->>'description', content->>'text',
+                            content->>'content', content::text)
+        FROM agent_memories
+        WHERE embedding IS NOT NULL
+            AND (embedding_model IS NULL OR embedding_model <> :model)
+        ORDER BY id
+        LIMIT :limit
+    """,
+    "plan_templates": """
+        SELECT id, CONCAT_WS(' ', name, COALESCE(description, ''), goal_pattern, category,
+                             array_to_string(tags, ' '))
+        FROM plan_templates
+        WHERE embedding IS NOT NULL
+            AND (embedding_model IS NULL OR embedding_model <> :model)
+        ORDER BY id
+        LIMIT :limit
+    """,
+}
+
+
+async def backfill_table(
+    embedding_service: EmbeddingService,
+    table: str,
+    model: str,
+    batch_size: int,
+    dry_run: bool
+) -> int:
+    """
+    Re-embed one table in batches.
+
+    Returns:
+        Number of rows updated
+    """
+    db = embedding_service.db
+    updated = 0
+    failed_ids = set()
+    while True:
+        rows = db.execute(
+            text(TEXT_QUERIES[table]),
+            {"model": model, "limit": batch_size + len(failed_ids)}
+        ).fetchall()
+        rows = [(row_id, text_value) for row_id, text_value in rows if row_id not in failed_ids][:batch_size]
+        if not rows:
+            break
+
+        if dry_run:
+            print(f"  [DRY RUN] {table}: at least {len(rows)} rows would be re-embedded")
+            return 0
+
+        # One batched embedding call per batch (duplicates come from the embedding store)
+        embeddings = await embedding_service.generate_embeddings_batch(
+            [text_value or "" for _, text_value in rows], model=model
+        )
+        to_save = []
+        for (row_id, _), embedding in zip(rows, embeddings):
+            if any(embedding):
+                to_save.append((row_id, embedding))
+            else:
+                failed_ids.add(row_id)
+                print(f"  ❌ {table} {row_id}: embedding could not be generated")
+
+        try:
+            save_embeddings(db, table, to_save, model)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error saving embeddings for {table}: {e}", exc_info=True)
+            raise
+        updated += len(to_save)
+        dims = sorted({len(embedding) for _, embedding in to_save})
+        print(f"  ✅ {table}: {updated} rows re-embedded (dims: {dims})")
+
+    if failed_ids:
+        print(f"  ⚠️  {table}: {len(failed_ids)} rows could not be re-embedded")
+    return updated
+
+
+async def backfill(batch_size: int = 64, dry_run: bool = False):
+    """Re-embed all tables with the default embedding model"""
+    print("=" * 70)
+    print(" Native-dimension embedding backfill")
+    print("=" * 70)
+
+    db = SessionLocal()
+    try:
+        embedding_service = EmbeddingService(db)
+        model = embedding_service.resolve_model()
+        print(f"\nModel: {model}")
+        for table in TEXT_QUERIES:
+            await backfill_table(embedding_service, table, model, batch_size, dry_run)
+    finally:
+        db.close()
+
+
+def main():
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Re-embed memories and plan templates at native dimension")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=64,
+        help="Number of rows per embedding batch (default: 64)"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Show what would be done without making changes"
+    )
+    args = parser.parse_args()
+    asyncio.run(backfill(batch_size=args.batch_size, dry_run=args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
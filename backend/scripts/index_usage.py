@@ -0,0 +1,113 @@
+"""
+Script to audit index usage from pg_stat_user_indexes
+
+Commands:
+    list [--table T]                All indexes with columns, size and scans
+    unused [--max-scans N]          Indexes scanned at most N times (not constraints)
+    redundant                       Btree indexes covered by another index
+    reset                           Reset statistics (pg_stat_reset) to start a new period
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add backend to path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from dotenv import load_dotenv
+
+BASE_DIR = backend_dir.parent
+ENV_FILE = BASE_DIR / ".env"
+if ENV_FILE.exists():
+    load_dotenv(ENV_FILE, override=True)
+
+from app.core.database import SessionLocal
+from app.core.index_audit import (find_redundant_indexes, find_unused_indexes,
+                                  get_index_usage)
+from sqlalchemy import text
+
+
+def _format(index) -> str:
+    columns = ", ".join(index["columns"])
+    predicate = f" WHERE {index['predicate']}" if index["predicate"] else ""
+    return (
+        f"{index['table']:<24} {index['name']:<50} {index['size_bytes'] / 1024 / 1024:>8.1f} MB "
+        f"{index['scans']:>10} scans  ({columns}){predicate}"
+    )
+
+
+def _load(table: str = None):
+    db = SessionLocal()
+    try:
+        return get_index_usage(db, table=table)
+    finally:
+        db.close()
+
+
+def list_indexes(table: str = None):
+    for index in _load(table):
+        print(_format(index))
+
+
+def unused(max_scans: int, table: str = None):
+    indexes = find_unused_indexes(_load(table), max_scans=max_scans)
+    if not indexes:
+        print(f"No indexes with <= {max_scans} scans")
+        return
+    total = sum(index["size_bytes"] for index in indexes)
+    print(f"{len(indexes)} indexes with <= {max_scans} scans ({total / 1024 / 1024:.1f} MB):")
+    for index in indexes:
+        print(_format(index))
+
+
+def redundant(table: str = None):
+    pairs = find_redundant_indexes(_load(table))
+    if not pairs:
+        print("No redundant indexes")
+        return
+    for pair in pairs:
+        print(_format(pair["index"]))
+        print(f"    covered by {pair['covered_by']['name']} ({', '.join(pair['covered_by']['columns'])})")
+
+
+def reset():
+    db = SessionLocal()
+    try:
+        db.execute(text("SELECT pg_stat_reset()"))
+        db.commit()
+    finally:
+        db.close()
+    print("[OK] Statistics reset")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Audit index usage")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list", help="List indexes with usage")
+    list_parser.add_argument("--table")
+
+    unused_parser = commands.add_parser("unused", help="List unused indexes")
+    unused_parser.add_argument("--max-scans", type=int, default=0)
+    unused_parser.add_argument("--table")
+
+    redundant_parser = commands.add_parser("redundant", help="List indexes covered by another index")
+    redundant_parser.add_argument("--table")
+
+    commands.add_parser("reset", help="Reset index statistics")
+
+    args = parser.parse_args()
+    if args.command == "list":
+        list_indexes(args.table)
+    elif args.command == "unused":
+        unused(args.max_scans, args.table)
+    elif args.command == "redundant":
+        redundant(args.table)
+    elif args.command == "reset":
+        reset()
+
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,7 @@ if ENV_FILE.exists():
 
 from app.core.database import SessionLocal
 from app.core.logging_config import LoggingConfig
+from app.core.vector_storage import save_embeddings
 from app.models.agent_memory import AgentMemory
 from app.services.embedding_service import EmbeddingService
 
@@ -61,6 +62,7 @@ async def migrate_memories(
         
         # Initialize embedding service
         embedding_service = EmbeddingService(db)
+        model = embedding_service.resolve_model()
         
         # Process in batches
         processed = 0
@@ -77,45 +79,55 @@ async def migrate_memories(
             
             print(f"\nBatch {batch_num}/{total_batches} ({len(batch)} memories)")
             
+            to_embed = []
             for memory in batch:
-                try:
-                    # Extract text for embedding
-                    text_for_embedding = memory.summary
-                    if not text_for_embedding:
-                        # Try to extract from content
-                        if isinstance(memory.content, dict):
-                            text_for_embedding = (
-                                memory.content.get("description") or
-                                memory.content.get("text") or
-                                memory.content.get("content") or
-                                str(memory.content)
-                            )
-                        else:
-                            text_for_embedding = str(memory.content)
-                    
-                    if not text_for_embedding or not text_for_embedding.strip():
-                        print(f"  ⏭️  Skipped {memory.id}: no text available")
-                        skipped += 1
-                        continue
-                    
-                    if dry_run:
-                        print(f"  [DRY RUN] Would generate embedding for {memory.id}: {text_for_embedding[:50]}...")
-                        processed += 1
+                # Extract text for embedding
+                text_for_embedding = memory.summary
+                if not text_for_embedding:
+                    # Try to extract from content
+                    if isinstance(memory.content, dict):
+                        text_for_embedding = (
+                            memory.content.get("description") or
+                            memory.content.get("text") or
+                            memory.content.get("content") or
+                            str(memory.content)
+                        )
                     else:
-                        # Generate embedding
-                        embedding = await embedding_service.generate_embedding(text_for_embedding)
-                        
-                        # Save embedding
-                        memory.embedding = embedding
-                        db.commit()
-                        
+                        text_for_embedding = str(memory.content)
+                
+                if not text_for_embedding or not text_for_embedding.strip():
+                    print(f"  ⏭️  Skipped {memory.id}: no text available")
+                    skipped += 1
+                    continue
+                
+                if dry_run:
+                    print(f"  [DRY RUN] Would generate embedding for {memory.id}: {text_for_embedding[:50]}...")
+                    processed += 1
+                else:
+                    to_embed.append((memory, text_for_embedding))
+            
+            if to_embed:
+                try:
+                    # One batched embedding call for the whole batch
+                    embeddings = await embedding_service.generate_embeddings_batch(
+                        [text for _, text in to_embed], model=model
+                    )
+                    to_save = []
+                    for (memory, _), embedding in zip(to_embed, embeddings):
+                        if not any(embedding):
+                            failed += 1
+                            print(f"  ❌ {memory.id}: embedding could not be generated")
+                            continue
+                        to_save.append((memory.id, embedding))
                         processed += 1
                         print(f"  ✅ {memory.id}: embedding generated ({len(embedding)} dims)")
-                
+                    # Native dimension, model recorded per row
+                    save_embeddings(db, "agent_memories", to_save, model)
+                    db.commit()
                 except Exception as e:
-                    failed += 1
-                    print(f"  ❌ {memory.id}: error - {e}")
-                    logger.error(f"Error generating embedding for memory {memory.id}: {e}", exc_info=True)
+                    failed += len(to_embed)
+                    print(f"  ❌ Batch {batch_num}: error - {e}")
+                    logger.error(f"Error generating embeddings for batch {batch_num}: {e}", exc_info=True)
                     db.rollback()
             
             # Progress update
@@ -0,0 +1,74 @@
+"""
+Script to inspect and maintain time-partitioned tables
+
+Commands:
+    status                          Partitions of each table with their bounds
+    run [--dry-run]                 Create upcoming partitions, roll up and drop expired ones
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Add backend to path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from dotenv import load_dotenv
+
+BASE_DIR = backend_dir.parent
+ENV_FILE = BASE_DIR / ".env"
+if ENV_FILE.exists():
+    load_dotenv(ENV_FILE, override=True)
+
+from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.services.partition_maintenance import (PARTITIONED_TABLES,
+                                                PartitionManager,
+                                                run_partition_maintenance)
+
+
+def status():
+    settings = get_settings()
+    db = SessionLocal()
+    try:
+        manager = PartitionManager(db, interval=settings.partition_interval)
+        for spec in PARTITIONED_TABLES:
+            retention = getattr(settings, spec.retention_setting)
+            if not manager.is_partitioned(spec.name):
+                print(f"{spec.name}: not partitioned")
+                continue
+            print(f"{spec.name} (by {spec.column}, retention {retention or 'forever'} days):")
+            for partition in manager.list_partitions(spec.name):
+                if partition.is_default:
+                    print(f"    {partition.name:<40} DEFAULT")
+                else:
+                    print(f"    {partition.name:<40} {partition.lower or 'MINVALUE'} .. {partition.upper or 'MAXVALUE'}")
+    finally:
+        db.close()
+
+
+def run(dry_run: bool):
+    report = run_partition_maintenance(dry_run=dry_run)
+    print(json.dumps(report, indent=2, default=str))
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Maintain time-partitioned tables")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("status", help="List partitions")
+
+    run_parser = commands.add_parser("run", help="Run partition maintenance once")
+    run_parser.add_argument("--dry-run", action="store_true", help="Only report what would change")
+
+    args = parser.parse_args()
+    if args.command == "status":
+        status()
+    elif args.command == "run":
+        run(args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
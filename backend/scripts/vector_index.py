@@ -0,0 +1,150 @@
+"""
+Script to manage ANN indexes on embedding columns and check their recall
+
+Commands:
+    status                      List vector indexes with size and scan count
+    create --table T --dim D    Create a partial index for one dimension
+    agents --min-rows N         Create per-agent indexes for agents with >= N memories
+    drop NAME                   Drop an index
+    check --table T --dim D     Recall@k and latency for several ef_search / probes values
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add backend to path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from dotenv import load_dotenv
+
+BASE_DIR = backend_dir.parent
+ENV_FILE = BASE_DIR / ".env"
+if ENV_FILE.exists():
+    load_dotenv(ENV_FILE, override=True)
+
+from app.core.database import SessionLocal, engine
+from app.core.vector_storage import (VECTOR_TABLES, check_recall,
+                                     create_index_sql, index_method,
+                                     list_vector_indexes)
+from sqlalchemy import text
+
+
+def _execute_outside_transaction(sql: str):
+    """CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction"""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        # Index builds outlast the application's statement timeout
+        conn.execute(text("SET statement_timeout = 0"))
+        conn.execute(text(sql))
+
+
+def status():
+    db = SessionLocal()
+    try:
+        indexes = list_vector_indexes(db)
+        if not indexes:
+            print("No vector indexes: ORDER BY embedding <=> ... is a sequential scan")
+            return
+        for index in indexes:
+            print(
+                f"{index['table']:<16} {index['name']:<70} {index['method']:<8} "
+                f"{index['size_bytes'] / 1024 / 1024:>8.1f} MB  {index['scans']:>8} scans"
+            )
+    finally:
+        db.close()
+
+
+def create(table: str, dimension: int, method: str = None, agent_id: str = None):
+    sql = create_index_sql(table, dimension, method=method, agent_id=agent_id, concurrently=True)
+    print(sql)
+    _execute_outside_transaction(sql)
+    print("[OK] Index created")
+
+
+def create_agent_indexes(dimension: int, min_rows: int, method: str = None):
+    db = SessionLocal()
+    try:
+        agents = db.execute(text(
+            "SELECT agent_id, COUNT(*) FROM agent_memories "
+            "WHERE embedding_dim = :dim GROUP BY agent_id HAVING COUNT(*) >= :min_rows"
+        ), {"dim": dimension, "min_rows": min_rows}).fetchall()
+    finally:
+        db.close()
+    print(f"{len(agents)} agents with >= {min_rows} memories of dimension {dimension}")
+    for agent_id, count in agents:
+        print(f"  agent {agent_id}: {count} memories")
+        _execute_outside_transaction(
+            create_index_sql("agent_memories", dimension, method=method, agent_id=agent_id, concurrently=True)
+        )
+    print("[OK] Per-agent indexes created")
+
+
+def drop(name: str):
+    _execute_outside_transaction(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+    print(f"[OK] Index {name} dropped")
+
+
+def check(table: str, dimension: int, values, k: int, samples: int, agent_id: str = None):
+    db = SessionLocal()
+    try:
+        results = check_recall(db, table, dimension, values, k=k, samples=samples, agent_id=agent_id)
+    finally:
+        db.close()
+    print(f"{index_method()} index, recall@{k} over {samples} sampled queries")
+    print(f"{'setting':<18} {'value':>6} {'recall':>8} {'p50 ms':>8} {'p95 ms':>8}  index")
+    for row in results:
+        print(
+            f"{row['setting']:<18} {row['value']:>6} {row['recall']:>8.3f} "
+            f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f}  {'yes' if row['index_used'] else 'NO (seq scan)'}"
+        )
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Manage ANN indexes on embedding columns")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("status", help="List vector indexes")
+
+    create_parser = commands.add_parser("create", help="Create a partial index for one dimension")
+    create_parser.add_argument("--table", choices=VECTOR_TABLES, required=True)
+    create_parser.add_argument("--dim", type=int, default=768)
+    create_parser.add_argument("--method", choices=("hnsw", "ivfflat"))
+    create_parser.add_argument("--agent", help="Index only this agent's memories")
+
+    agents_parser = commands.add_parser("agents", help="Create per-agent indexes for large agents")
+    agents_parser.add_argument("--dim", type=int, default=768)
+    agents_parser.add_argument("--min-rows", type=int, default=10000)
+    agents_parser.add_argument("--method", choices=("hnsw", "ivfflat"))
+
+    drop_parser = commands.add_parser("drop", help="Drop an index")
+    drop_parser.add_argument("name")
+
+    check_parser = commands.add_parser("check", help="Measure recall against latency")
+    check_parser.add_argument("--table", choices=VECTOR_TABLES, required=True)
+    check_parser.add_argument("--dim", type=int, default=768)
+    check_parser.add_argument(
+        "--values",
+        default="10,20,40,80,160",
+        help="Comma-separated hnsw.ef_search (or ivfflat.probes) values (default: 10,20,40,80,160)"
+    )
+    check_parser.add_argument("--k", type=int, default=10)
+    check_parser.add_argument("--samples", type=int, default=50)
+    check_parser.add_argument("--agent", help="Only this agent's memories (filtered search)")
+
+    args = parser.parse_args()
+    if args.command == "status":
+        status()
+    elif args.command == "create":
+        create(args.table, args.dim, args.method, args.agent)
+    elif args.command == "agents":
+        create_agent_indexes(args.dim, args.min_rows, args.method)
+    elif args.command == "drop":
+        drop(args.name)
+    elif args.command == "check":
+        values = [int(value) for value in args.values.split(",") if value.strip()]
+        check(args.table, args.dim, values, args.k, args.samples, args.agent)
+
+
+if __name__ == "__main__":
+    main()
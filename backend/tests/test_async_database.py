@@ -0,0 +1,41 @@
+"""
+Tests for async database session path
+"""
+import uuid
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from app.core.chat_session import ChatSessionManager
+from app.core.config import get_settings
+from app.models.chat_session import ChatMessage as ChatMessageModel
+from app.models.chat_session import ChatSession as ChatSessionModel
+
+
+def test_async_database_url_uses_asyncpg():
+    """Test the async URL targets the same database through asyncpg"""
+    settings = get_settings()
+    assert settings.async_database_url.startswith("postgresql+asyncpg://")
+    assert settings.async_database_url.split("://", 1)[1] == settings.database_url.split("://", 1)[1]
+
+
+@pytest.mark.asyncio
+async def test_get_session_async_loads_messages():
+    """Test chat session is loaded with its messages on an AsyncSession"""
+    session_id = uuid.uuid4()
+    now = datetime.now(timezone.utc)
+    db_session = ChatSessionModel(id=session_id, created_at=now, updated_at=now, title="t")
+    db_message = ChatMessageModel(
+        id=uuid.uuid4(), session_id=session_id, role="user", content="hi", created_at=now
+    )
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = [db_message]
+    db = AsyncMock()
+    db.get.return_value = db_session
+    db.execute.return_value = result
+
+    session = await ChatSessionManager().get_session_async(db, str(session_id))
+
+    assert session.id == str(session_id)
+    assert [(m.role, m.content) for m in session.messages] == [("user", "hi")]
+    assert await ChatSessionManager().get_session_async(db, "not-a-uuid") is None
@@ -0,0 +1,50 @@
+"""
+Tests for cheap database metrics
+"""
+from unittest.mock import MagicMock, patch
+
+from app.core import db_metrics
+from app.core.db_metrics import classify_statement, update_pool_metrics
+from app.core.metrics import db_connection_pool_size
+
+
+def test_classify_statement():
+    """Test operation and table of common statements"""
+    assert classify_statement("SELECT a.id FROM agent_memories AS a WHERE a.x = %(x)s") == ("select", "agent_memories")
+    assert classify_statement("\n  INSERT INTO tasks (id) VALUES (%(id)s)") == ("insert", "tasks")
+    assert classify_statement('UPDATE "plans" SET status=%(s)s') == ("update", "plans")
+    assert classify_statement("DELETE FROM chat_messages WHERE id = 1;") == ("delete", "chat_messages")
+    assert classify_statement("SELECT count(*) FROM (SELECT 1 FROM tasks) t") == ("select", "tasks")
+    assert classify_statement("SELECT 1") == ("select", "unknown")
+    assert classify_statement("   ") == ("unknown", "unknown")
+
+
+def test_classification_is_cached_and_long_statements_bypass_cache():
+    """Test repeated statements hit the cache and long ones are parsed on a prefix"""
+    db_metrics._classify_cached.cache_clear()
+    statement = "SELECT id FROM workflow_events"
+    classify_statement(statement)
+    classify_statement(statement)
+    assert db_metrics._classify_cached.cache_info().hits == 1
+
+    long_statement = "INSERT INTO agent_memories (embedding) VALUES ('[" + "0.1," * 5000 + "0.1]')"
+    assert classify_statement(long_statement) == ("insert", "agent_memories")
+    assert db_metrics._classify_cached.cache_info().currsize == 1
+
+
+def test_update_pool_metrics_sums_created_engines():
+    """Test pool gauges are sampled from sync and async engines"""
+    sync_engine = MagicMock(spec=["pool"])
+    sync_engine.pool.checkedout.return_value = 2
+    sync_engine.pool.checkedin.return_value = 3
+    sync_engine.pool.overflow.return_value = -5
+    async_engine = MagicMock()
+    async_engine.sync_engine.pool.checkedout.return_value = 1
+    async_engine.sync_engine.pool.checkedin.return_value = 0
+    async_engine.sync_engine.pool.overflow.return_value = 1
+
+    with patch("app.core.database._engine", sync_engine), patch("app.core.database._async_engine", async_engine):
+        update_pool_metrics()
+
+    assert db_connection_pool_size.labels(state="active")._value.get() == 3
+    assert db_connection_pool_size.labels(state="idle")._value.get() == 3
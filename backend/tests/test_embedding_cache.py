@@ -0,0 +1,48 @@
+"""
+Tests for process-wide embedding cache
+"""
+from array import array
+
+from app.core.embedding_cache import (ENTRY_OVERHEAD_BYTES, EmbeddingCache,
+                                      embedding_key)
+
+
+def test_key_is_model_and_text_hash():
+    """Test that texts are not kept in keys and models do not share entries"""
+    model, digest = embedding_key("m", "some long text " * 100)
+    assert model == "m"
+    assert len(digest) == 32
+    assert embedding_key("m", "t") != embedding_key("other", "t")
+
+
+def test_lru_eviction_by_byte_budget():
+    """Test float32 storage and least recently used eviction over the byte budget"""
+    entry_size = 4 * 100 + ENTRY_OVERHEAD_BYTES
+    cache = EmbeddingCache(max_bytes=2 * entry_size)
+    stored = cache.put("m", "a", [0.5] * 100)
+    assert isinstance(stored, array) and stored.itemsize == 4
+    cache.put("m", "b", [0.25] * 100)
+    assert cache.get("m", "a") is stored  # "a" becomes most recently used
+    cache.put("m", "c", [0.125] * 100)
+
+    assert not cache.contains("m", "b")
+    assert cache.get("m", "a")[0] == 0.5
+    assert cache.get("m", "c")[0] == 0.125
+    stats = cache.get_stats()
+    assert stats["bytes"] == 2 * entry_size
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3
+    assert stats["hit_rate"] == 1.0
+
+
+def test_disabled_and_oversized():
+    """Test that a disabled cache stores nothing and oversized vectors are skipped"""
+    cache = EmbeddingCache(max_bytes=1000, enabled=False)
+    cache.put("m", "a", [1.0] * 10)
+    assert cache.get("m", "a") is None
+    assert len(cache) == 0
+
+    cache = EmbeddingCache(max_bytes=1000)
+    cache.put("m", "big", [1.0] * 1000)
+    assert cache.get("m", "big") is None
+    assert cache.misses == 1
@@ -2,11 +2,14 @@
 Tests for EmbeddingService
 """
 import asyncio
+import json
 from unittest.mock import AsyncMock, Mock, patch
 
+import httpx
 import pytest
 from app.core.database import SessionLocal
-from app.services.embedding_service import EmbeddingService
+from app.core.embedding_store import EmbeddingStore
+from app.services.embedding_service import EmbeddingService, _model_dimensions
 
 
 @pytest.fixture
@@ -16,16 +19,20 @@ def db():
 
 
 @pytest.fixture
-def embedding_service(db):
-    """EmbeddingService fixture"""
-    return EmbeddingService(db)
+def embedding_service(db, tmp_path):
+    """EmbeddingService fixture (with an empty shared cache and a temporary store)"""
+    service = EmbeddingService(db)
+    service.clear_cache()
+    _model_dimensions.clear()
+    service.store = EmbeddingStore(database_url=f"sqlite:///{tmp_path / 'embeddings.db'}")
+    return service
 
 
 def test_embedding_service_initialization(embedding_service):
     """Test EmbeddingService initialization"""
     assert embedding_service is not None
-    assert embedding_service.DEFAULT_EMBEDDING_DIM == 1536
-    assert len(embedding_service._embedding_cache) == 0
+    assert embedding_service.DEFAULT_EMBEDDING_DIM == 768
+    assert len(embedding_service.cache) == 0
 
 
 def test_normalize_vector(embedding_service):
@@ -45,7 +52,7 @@ def test_normalize_vector(embedding_service):
     
     # Test empty vector
     empty = embedding_service._normalize_vector([])
-    assert len(empty) == 1536  # Should return default dimension
+    assert len(empty) == 768  # Should return default dimension
 
 
 def test_cosine_similarity(embedding_service):
@@ -67,40 +74,42 @@ def test_cosine_similarity(embedding_service):
         embedding_service.cosine_similarity([1.0, 2.0], [1.0, 2.0, 3.0])
 
 
-def test_cache_embedding(embedding_service):
-    """Test embedding caching"""
+def test_cache_embedding(embedding_service, db):
+    """Test embedding caching (float32, shared between service instances)"""
     text = "test text"
-    embedding = [0.1] * 1536
+    embedding = [0.5] * 1536
     
-    embedding_service._cache_embedding(text, embedding)
-    assert text in embedding_service._embedding_cache
-    assert embedding_service._embedding_cache[text] == embedding
+    embedding_service._cache_embedding(text, embedding, "model-a")
+    cached = EmbeddingService(db).cache.get("model-a", text)
+    assert cached.typecode == "f"
+    assert cached.tolist() == embedding
+    assert embedding_service.cache.get("model-b", text) is None
 
 
 def test_clear_cache(embedding_service):
     """Test cache clearing"""
     embedding_service._cache_embedding("test", [0.1] * 1536)
-    assert len(embedding_service._embedding_cache) > 0
+    assert len(embedding_service.cache) > 0
     
     embedding_service.clear_cache()
-    assert len(embedding_service._embedding_cache) == 0
+    assert len(embedding_service.cache) == 0
 
 
 def test_get_cache_stats(embedding_service):
     """Test cache statistics"""
     stats = embedding_service.get_cache_stats()
     assert "cache_size" in stats
-    assert "cache_limit" in stats
+    assert "cache_limit_bytes" in stats
     assert "cache_usage_percent" in stats
+    assert "hit_rate" in stats
     assert stats["cache_size"] == 0
-    assert stats["cache_limit"] == 1000
 
 
 @pytest.mark.asyncio
 async def test_generate_embedding_empty_text(embedding_service):
     """Test embedding generation for empty text"""
     embedding = await embedding_service.generate_embedding("")
-    assert len(embedding) == 1536
+    assert len(embedding) == 768
     assert all(x == 0.0 for x in embedding)
 
 
@@ -121,6 +130,12 @@ async def test_generate_embedding_with_cache(embedding_service):
         embedding2 = await embedding_service.generate_embedding(text, use_cache=True)
         assert mock_ollama.call_count == 1  # Should not call again
         assert embedding1 == embedding2
+        
+        # Zero-copy view of the cached float32 vector
+        view = await embedding_service.generate_embedding(text, use_cache=True, as_view=True)
+        assert view.format == "f" and view.readonly
+        assert view.tolist() == embedding1
+        assert mock_ollama.call_count == 1
 
 
 @pytest.mark.asyncio
@@ -128,15 +143,109 @@ async def test_generate_embeddings_batch(embedding_service):
     """Test batch embedding generation"""
     texts = ["text 1", "text 2", "text 3"]
     
-    # Mock the Ollama API call
+    # Mock the batched Ollama API call
+    with patch.object(embedding_service, '_generate_embeddings_via_ollama_batch', new_callable=AsyncMock) as mock_ollama:
+        mock_ollama.return_value = [[0.1] * 768, None, [0.2] * 768]
+        
+        embeddings = await embedding_service.generate_embeddings_batch(texts + ["text 1", ""])
+        
+        assert len(embeddings) == len(texts) + 2
+        # Native dimension, no padding; the failed and empty texts get zero vectors of the same size
+        assert all(len(emb) == 768 for emb in embeddings)
+        # One request for all unique non-empty texts
+        assert mock_ollama.call_count == 1
+        assert mock_ollama.call_args.args[0] == texts
+        assert embeddings[0] == embeddings[3]
+        # Failed text gets a zero vector and is not cached
+        assert all(x == 0.0 for x in embeddings[1])
+        assert not embedding_service.cache.contains("nomic-embed-text", "text 2")
+        assert embedding_service.cache.contains("nomic-embed-text", "text 3")
+
+
+
+@pytest.mark.asyncio
+async def test_native_dimension_is_kept(embedding_service):
+    """Test that vectors are neither padded nor truncated and zero vectors follow the model's dimension"""
     with patch.object(embedding_service, '_generate_embedding_via_ollama', new_callable=AsyncMock) as mock_ollama:
-        mock_ollama.return_value = [0.1] * 1536
+        mock_ollama.return_value = [3.0, 4.0] + [0.0] * 1022
+        embedding = await embedding_service.generate_embedding("large", model="mxbai-embed-large")
+        assert len(embedding) == 1024
+        assert embedding[:2] == pytest.approx([0.6, 0.8])
         
-        embeddings = await embedding_service.generate_embeddings_batch(texts)
+        mock_ollama.return_value = [1.0] * 4096
+        assert len(await embedding_service.generate_embedding("huge", model="huge-embed")) == 4096
+    
+    assert embedding_service.get_dimension("mxbai-embed-large") == 1024
+    assert len(await embedding_service.generate_embedding("", model="mxbai-embed-large")) == 1024
+    assert embedding_service.get_dimension() == embedding_service.DEFAULT_EMBEDDING_DIM
+
+@pytest.mark.asyncio
+async def test_store_reuses_vectors_after_cache_loss(embedding_service):
+    """Test that stored vectors are reused instead of re-embedding (e.g. after a restart)"""
+    with patch.object(embedding_service, '_generate_embeddings_via_ollama_batch', new_callable=AsyncMock) as mock_ollama:
+        mock_ollama.return_value = [[0.1] * 768, [0.2] * 768]
+        first = await embedding_service.generate_embeddings_batch(["a", "b"])
+        assert embedding_service.store.writes == 2
         
-        assert len(embeddings) == len(texts)
-        assert all(len(emb) == 1536 for emb in embeddings)
-        assert mock_ollama.call_count == len(texts)
+        embedding_service.clear_cache()
+        mock_ollama.return_value = [[0.3] * 768]
+        second = await embedding_service.generate_embeddings_batch(["b", "c", "a"])
+        # Only the new text went to Ollama, with one store lookup for all three
+        assert mock_ollama.call_args.args[0] == ["c"]
+        assert second[0] == first[1] and second[2] == first[0]
+    
+    embedding_service.clear_cache()
+    with patch.object(embedding_service, '_generate_embedding_via_ollama', new_callable=AsyncMock) as mock_single:
+        assert await embedding_service.generate_embedding("c") == second[1]
+        assert mock_single.call_count == 0
+    assert embedding_service.cache.contains("nomic-embed-text", "c")
+
+
+def test_chunk_texts():
+    """Test splitting texts by item count and character budget"""
+    texts = ["a" * 10, "b" * 10, "c" * 30, "d", "e", "f"]
+    assert EmbeddingService._chunk_texts(texts, max_items=3, max_chars=25) == [[0, 1], [2], [3, 4, 5]]
+    assert EmbeddingService._chunk_texts([], max_items=3, max_chars=25) == []
+
+
+@pytest.mark.asyncio
+async def test_batch_embed_api_with_fallbacks(embedding_service, monkeypatch):
+    """Test /api/embed batching, legacy fallback and partial failure"""
+    calls = []
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        calls.append((request.url.host, request.url.path))
+        if request.url.host == "legacy":
+            if request.url.path == "/api/embed":
+                return httpx.Response(404, text="404 page not found")
+            if body["prompt"] == "bad":
+                return httpx.Response(500, json={"error": "failed"})
+            return httpx.Response(200, json={"embedding": [1.0, 0.0]})
+        return httpx.Response(200, json={"embeddings": [[0.0, 1.0]] * len(body["input"])})
+    
+    class Pool:
+        def get_client(self, server_url):
+            return httpx.AsyncClient(base_url=server_url, transport=httpx.MockTransport(handler))
+    
+    monkeypatch.setattr("app.services.embedding_service.get_transport_pool", lambda: Pool())
+    embedding_service.settings = embedding_service.settings.model_copy(
+        update={"embedding_batch_max_items": 2, "embedding_batch_concurrency": 2}
+    )
+    
+    servers = ["http://modern:11434"]
+    with patch.object(embedding_service, '_find_servers_with_model', new_callable=AsyncMock, return_value=servers):
+        vectors = await embedding_service._generate_embeddings_via_ollama_batch(["a", "b", "c"], "embed")
+    assert vectors == [[0.0, 1.0]] * 3
+    assert calls == [("modern", "/api/embed")] * 2
+    
+    calls.clear()
+    servers = ["http://legacy:11434/v1"]
+    with patch.object(embedding_service, '_find_servers_with_model', new_callable=AsyncMock, return_value=servers):
+        vectors = await embedding_service._generate_embeddings_via_ollama_batch(["a", "bad"], "embed")
+    assert vectors == [[1.0, 0.0], None]
+    assert calls.count(("legacy", "/api/embed")) == 1
+    assert calls.count(("legacy", "/api/embeddings")) == 2
 
 
 @pytest.mark.asyncio
@@ -148,6 +257,23 @@ async def test_generate_embedding_error_handling(embedding_service):
         
         # Should return zero vector on error
         embedding = await embedding_service.generate_embedding("test text")
-        assert len(embedding) == 1536
+        assert len(embedding) == 768
         assert all(x == 0.0 for x in embedding)
 
+
+
+@pytest.mark.asyncio
+async def test_find_servers_uses_model_map(embedding_service):
+    """Test that known model locations are used without listing servers or probing them"""
+    from app.core.ollama_server_state import get_server_state_registry
+    
+    registry = get_server_state_registry()
+    registry.set_available_models("http://embed-host:11434", ["embed-map-model:latest"])
+    with patch.object(embedding_service.ollama_service, 'get_all_active_servers') as mock_servers:
+        assert await embedding_service._find_server_with_model("embed-map-model") == "http://embed-host:11434"
+        mock_servers.assert_not_called()
+    
+    # A failed request drops the server from the map; unknown models fall back to the first active server
+    registry.mark_suspect("http://embed-host:11434", "timeout")
+    with patch.object(embedding_service.ollama_service, 'get_all_active_servers', return_value=[]):
+        assert await embedding_service._find_servers_with_model("embed-map-model") == []
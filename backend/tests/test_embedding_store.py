@@ -0,0 +1,54 @@
+"""
+Tests for persistent embedding store
+"""
+from array import array
+
+import pytest
+from app.core.embedding_store import (EmbeddingStore, content_hash,
+                                      decode_vector, encode_vector)
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Store on a temporary SQLite database"""
+    return EmbeddingStore(database_url=f"sqlite:///{tmp_path / 'embeddings.db'}")
+
+
+def test_vector_encoding_roundtrip():
+    """Test little-endian float32 encoding"""
+    payload = encode_vector([0.5, -1.25, 3.0])
+    assert len(payload) == 12
+    assert decode_vector(payload) == array("f", [0.5, -1.25, 3.0])
+    assert len(content_hash("text")) == 64
+
+
+@pytest.mark.asyncio
+async def test_put_and_get_many(store, monkeypatch):
+    """Test batched lookups by model, text and dimension"""
+    monkeypatch.setattr("app.core.embedding_store.BATCH_SIZE", 2)
+    await store.put_many("m", {"a": [1.0, 0.0], "b": [0.0, 1.0], "c": [0.5, 0.5]})
+    # Existing entries are kept
+    await store.put_many("m", {"a": [9.0, 9.0]})
+
+    found = await store.get_many("m", ["a", "b", "c", "missing", "a"], dimension=2)
+    assert set(found) == {"a", "b", "c"}
+    assert found["a"].tolist() == [1.0, 0.0]
+    assert await store.get_many("other", ["a"]) == {}
+    assert await store.get_many("m", ["a"], dimension=3) == {}
+    stats = store.get_stats()
+    assert stats["writes"] == 4
+    assert stats["hits"] == 3
+    assert stats["errors"] == 0
+
+
+@pytest.mark.asyncio
+async def test_errors_are_misses(tmp_path):
+    """Test that an unusable database never fails embedding generation"""
+    store = EmbeddingStore(database_url=f"sqlite:///{tmp_path / 'missing' / 'embeddings.db'}")
+    assert await store.get_many("m", ["a"]) == {}
+    await store.put_many("m", {"a": [1.0]})
+    assert store.get_stats()["errors"] == 2
+
+    disabled = EmbeddingStore(enabled=False, database_url=f"sqlite:///{tmp_path / 'x.db'}")
+    await disabled.put_many("m", {"a": [1.0]})
+    assert await disabled.get_many("m", ["a"]) == {}
@@ -0,0 +1,112 @@
+"""
+Tests for background embedding worker
+"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from app.services.embedding_worker import (EmbeddingWorker,
+                                           memory_embedding_text)
+
+
+@pytest.fixture
+def backend():
+    """Patched session, memory rows, embedding calls and writes"""
+    agent_id = uuid4()
+    rows = {}
+    written = []
+
+    def load_rows(db, memory_ids):
+        return {memory_id: rows[memory_id] for memory_id in memory_ids if memory_id in rows}
+
+    async def embed(texts, model=None):
+        return [[0.0, 0.0] if text == "fails" else [1.0, 0.0] for text in texts]
+
+    with patch("app.core.database.SessionLocal", return_value=MagicMock()), \
+            patch.object(EmbeddingWorker, "_load_rows", staticmethod(load_rows)), \
+            patch("app.services.embedding_service.EmbeddingService.resolve_model", return_value="m"), \
+            patch("app.services.embedding_service.EmbeddingService.generate_embeddings_batch",
+                  new_callable=AsyncMock, side_effect=embed) as mock_embed, \
+            patch("app.services.embedding_worker.write_memory_embeddings",
+                  side_effect=lambda db, items, model: written.append(list(items))):
+        yield agent_id, rows, written, mock_embed
+
+
+def test_memory_embedding_text():
+    """Test summary, then content fields, are embedded"""
+    assert memory_embedding_text("summary", {"text": "t"}) == "summary"
+    assert memory_embedding_text(None, {"text": "t"}) == "t"
+    assert memory_embedding_text(None, None) is None
+
+
+def test_queue_is_bounded_and_deduplicated():
+    """Test backpressure when the queue is full"""
+    worker = EmbeddingWorker(max_queue_size=2)
+    first = uuid4()
+    assert worker.enqueue(first)
+    assert worker.enqueue(first)
+    assert worker.enqueue(uuid4())
+    assert not worker.enqueue(uuid4())
+    assert worker.depth() == 2
+    assert worker.get_stats()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_is_embedded_and_written_once(backend):
+    """Test one embedding call and one write per batch"""
+    agent_id, rows, written, mock_embed = backend
+    worker = EmbeddingWorker(batch_size=10)
+    ids = [uuid4() for _ in range(3)]
+    for i, memory_id in enumerate(ids):
+        rows[memory_id] = (agent_id, f"memory {i}")
+        worker.enqueue(memory_id)
+    worker.enqueue(uuid4())  # deleted before processing
+
+    batch, _ = worker._take_batch()
+    assert await worker.process_batch(batch) == 3
+    assert mock_embed.await_count == 1
+    assert len(written) == 1
+    assert [memory_id for memory_id, _, _ in written[0]] == ids
+    assert worker.depth() == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_embeddings_are_retried_then_dropped(backend):
+    """Test retries with backoff up to max_retries"""
+    agent_id, rows, written, _ = backend
+    worker = EmbeddingWorker(max_retries=1, retry_delay_seconds=0.0)
+    memory_id = uuid4()
+    rows[memory_id] = (agent_id, "fails")
+    worker.enqueue(memory_id)
+
+    batch, _ = worker._take_batch()
+    await worker.process_batch(batch)
+    assert worker.depth() == 1  # retried
+    batch, _ = worker._take_batch()
+    await worker.process_batch(batch)
+    assert worker.depth() == 0
+    assert worker.get_stats()["failed"] == 1
+    assert written == []
+
+
+@pytest.mark.asyncio
+async def test_worker_drains_queue_in_background(backend):
+    """Test that start() processes queued and newly enqueued memories and stop() drains"""
+    agent_id, rows, written, _ = backend
+    worker = EmbeddingWorker(batch_wait_seconds=0.0)
+    before, after = uuid4(), uuid4()
+    rows[before] = (agent_id, "before start")
+    rows[after] = (agent_id, "after start")
+    worker.enqueue(before)
+
+    await worker.start()
+    worker.enqueue(after)
+    for _ in range(50):
+        if worker.get_stats()["processed"] == 2:
+            break
+        await asyncio.sleep(0.01)
+    await worker.stop()
+
+    assert worker.get_stats()["processed"] == 2
+    assert not worker.running
@@ -0,0 +1,44 @@
+"""
+Tests for index usage audit
+"""
+from app.core.index_audit import find_redundant_indexes, find_unused_indexes
+
+
+def _index(name, columns, table="workflow_events", scans=0, size=1024, method="btree",
+           predicate=None, is_unique=False, is_primary=False):
+    return {
+        "table": table, "name": name, "method": method, "columns": columns, "predicate": predicate,
+        "is_unique": is_unique, "is_primary": is_primary, "scans": scans, "tuples_read": 0,
+        "size_bytes": size,
+    }
+
+
+def test_find_unused_indexes():
+    """Test never-scanned indexes are reported, constraints are not"""
+    indexes = [
+        _index("workflow_events_pkey", ["id"], is_primary=True),
+        _index("idx_small", ["stage"], size=10),
+        _index("idx_large", ["status"], size=1000),
+        _index("idx_used", ["workflow_id"], scans=42),
+    ]
+    assert [index["name"] for index in find_unused_indexes(indexes)] == ["idx_large", "idx_small"]
+    assert len(find_unused_indexes(indexes, max_scans=100)) == 3
+
+
+def test_find_redundant_indexes():
+    """Test prefix and duplicate btree indexes are reported"""
+    indexes = [
+        _index("idx_workflow_events_workflow_id", ["workflow_id"]),
+        _index("idx_workflow_events_workflow_timestamp", ["workflow_id", '"timestamp"']),
+        _index("idx_workflow_events_task_id", ["task_id"]),
+        _index("ix_workflow_events_task_id", ["task_id"]),
+        _index("idx_partial", ["stage"], predicate="(status = 'failed')"),
+        _index("idx_stage_status", ["stage", "status"]),
+        _index("idx_other_table", ["workflow_id"], table="tasks"),
+        _index("idx_gin", ["event_data"], method="gin"),
+    ]
+    pairs = {pair["index"]["name"]: pair["covered_by"]["name"] for pair in find_redundant_indexes(indexes)}
+    assert pairs == {
+        "idx_workflow_events_workflow_id": "idx_workflow_events_workflow_timestamp",
+        "ix_workflow_events_task_id": "idx_workflow_events_task_id",
+    }
@@ -0,0 +1,102 @@
+"""
+Tests for priority-aware LLM admission control
+"""
+import asyncio
+
+import pytest
+from app.core.llm_admission import (AdmissionRejected, ConcurrencyLimiter,
+                                    LLMAdmissionController, RequestPriority)
+from app.core.ollama_client import TaskType
+
+
+def test_default_priority_from_task_type():
+    """Test default priority classes"""
+    assert RequestPriority.for_task_type(TaskType.PLANNING) == RequestPriority.PLANNING
+    assert RequestPriority.for_task_type(TaskType.CODE_GENERATION) == RequestPriority.EXECUTION
+    assert RequestPriority.parse("background") == RequestPriority.BACKGROUND
+    assert RequestPriority.parse(0) == RequestPriority.INTERACTIVE
+    assert RequestPriority.parse(None) is None
+
+
+@pytest.mark.asyncio
+async def test_released_slot_goes_to_highest_priority_waiter():
+    """Test that waiters are admitted by priority, FIFO within a class"""
+    limiter = ConcurrencyLimiter("http://server", limit=1, max_queue=10)
+    await limiter.acquire(RequestPriority.EXECUTION, timeout=5)
+    order = []
+
+    async def wait(priority, name):
+        await limiter.acquire(priority, timeout=5)
+        order.append(name)
+        limiter.release()
+
+    tasks = [
+        asyncio.create_task(wait(RequestPriority.BACKGROUND, "background")),
+        asyncio.create_task(wait(RequestPriority.PLANNING, "planning-1")),
+        asyncio.create_task(wait(RequestPriority.INTERACTIVE, "chat")),
+        asyncio.create_task(wait(RequestPriority.PLANNING, "planning-2")),
+    ]
+    await asyncio.sleep(0)
+    assert limiter.queue_depth() == 4
+
+    limiter.release()
+    await asyncio.gather(*tasks)
+
+    assert order == ["chat", "planning-1", "planning-2", "background"]
+    assert limiter.in_flight == 0
+    assert limiter.queue_depth() == 0
+
+
+@pytest.mark.asyncio
+async def test_queue_full_and_deadline_rejection():
+    """Test bounded queue and deadline-based rejection"""
+    limiter = ConcurrencyLimiter("http://server", limit=1, max_queue=1)
+    await limiter.acquire(RequestPriority.EXECUTION, timeout=5)
+
+    waiter = asyncio.create_task(limiter.acquire(RequestPriority.BACKGROUND, timeout=0.05))
+    await asyncio.sleep(0)
+    with pytest.raises(AdmissionRejected) as exc_info:
+        await limiter.acquire(RequestPriority.BACKGROUND, timeout=5)
+    assert exc_info.value.reason == "queue_full"
+
+    with pytest.raises(AdmissionRejected) as exc_info:
+        await waiter
+    assert exc_info.value.reason == "deadline"
+
+    # The slot is still held by the first request; after release a new request is admitted at once
+    limiter.release()
+    assert await limiter.acquire(RequestPriority.BACKGROUND, timeout=0.05) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_slot():
+    """Test that cancelling a waiter keeps the limiter consistent"""
+    limiter = ConcurrencyLimiter("http://server", limit=1, max_queue=10)
+    await limiter.acquire(RequestPriority.EXECUTION, timeout=5)
+    waiter = asyncio.create_task(limiter.acquire(RequestPriority.EXECUTION, timeout=5))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    limiter.release()
+    assert limiter.in_flight == 0
+    assert limiter.queue_depth() == 0
+
+
+@pytest.mark.asyncio
+async def test_controller_limits_from_overrides():
+    """Test per-server and per-model overrides"""
+    controller = LLMAdmissionController()
+    controller.overrides = controller._parse_overrides(
+        '{"http://gpu:11434/v1": 3, "http://gpu:11434|big-model": 1}'
+    )
+
+    assert controller.get_limiter("http://gpu:11434", "small-model").limit == 3
+    big = controller.get_limiter("http://gpu:11434/v1", "big-model")
+    assert big.limit == 1
+    assert big.name == "http://gpu:11434|big-model"
+
+    async with controller.slot("http://gpu:11434", "big-model", RequestPriority.INTERACTIVE):
+        assert big.in_flight == 1
+    assert big.in_flight == 0
@@ -0,0 +1,74 @@
+"""
+Tests for process-wide LLM response cache
+"""
+import time
+
+from app.core.llm_cache import LLMResponseCache, get_llm_response_cache
+from app.core.ollama_client import OllamaClient
+
+
+def test_lru_eviction_by_entry_count():
+    """Test that least recently used entry is evicted over entry budget"""
+    cache = LLMResponseCache(max_entries=2, max_bytes=10_000, ttl_seconds=60)
+    cache.set("a", "1", "m")
+    cache.set("b", "2", "m")
+    assert cache.get("a") == "1"  # "a" becomes most recently used
+    cache.set("c", "3", "m")
+
+    assert "b" not in cache
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert cache.evictions == 1
+
+
+def test_eviction_by_byte_budget():
+    """Test that byte budget bounds the cache"""
+    cache = LLMResponseCache(max_entries=100, max_bytes=1000, ttl_seconds=60)
+    for i in range(10):
+        cache.set(f"k{i}", "x" * 200, "m")
+
+    stats = cache.get_stats()
+    assert stats["bytes"] <= 1000
+    assert stats["entries"] < 10
+    assert cache.get("k9") == "x" * 200
+
+
+def test_ttl_expiry_and_sweep():
+    """Test that expired entries are dropped on read and by sweep"""
+    cache = LLMResponseCache(max_entries=10, max_bytes=10_000, ttl_seconds=60)
+    cache.set("short", "v", "m", ttl_seconds=0.01)
+    cache.set("never_read", "v", "m", ttl_seconds=0.01)
+    cache.set("long", "v", "m")
+    time.sleep(0.02)
+
+    assert cache.get("short") is None
+    assert cache.sweep_expired() == 1
+    assert len(cache) == 1
+    assert cache.get("long") == "v"
+
+
+def test_hit_miss_counters():
+    """Test hit/miss accounting"""
+    cache = LLMResponseCache(max_entries=10, max_bytes=10_000, ttl_seconds=60)
+    cache.set("a", "1", "m")
+    cache.get("a")
+    cache.get("missing")
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_clients_share_process_wide_cache():
+    """Test that separately constructed clients share one cache"""
+    client1 = OllamaClient()
+    client2 = OllamaClient()
+    assert client1.cache is client2.cache is get_llm_response_cache()
+
+    key = client1._get_cache_key("shared prompt", "model")
+    client1._save_to_cache(key, "shared response", "model")
+    try:
+        assert client2._get_from_cache(key) == "shared response"
+    finally:
+        client1.cache.delete(key)
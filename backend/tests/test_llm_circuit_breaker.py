@@ -0,0 +1,112 @@
+"""
+Tests for Ollama server circuit breakers and retry policy
+"""
+import httpx
+import pytest
+from app.core.config import OllamaInstanceConfig
+from app.core.llm_circuit_breaker import (CircuitBreaker,
+                                          CircuitBreakerRegistry, CircuitOpen,
+                                          CircuitState, RetryPolicy)
+from app.core.ollama_client import OllamaClient, OllamaError, TaskType
+
+
+def test_circuit_opens_after_consecutive_failures():
+    """Test closed -> open transition and fail-fast while open"""
+    breaker = CircuitBreaker("http://cb:11434", failure_threshold=3, open_seconds=60)
+    breaker.record_failure("timeout")
+    breaker.record_failure("timeout")
+    breaker.record_success()  # Resets the streak
+    breaker.record_failure("timeout")
+    breaker.record_failure("timeout")
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.acquire() is False
+
+    breaker.record_failure("timeout")
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.is_open()
+    with pytest.raises(CircuitOpen):
+        breaker.acquire()
+
+
+def test_half_open_lets_one_probe_through():
+    """Test half-open probe: failure doubles the open time, success closes the circuit"""
+    breaker = CircuitBreaker("http://cb:11434", failure_threshold=1, open_seconds=10, max_open_seconds=15)
+    breaker.record_failure()
+    breaker.opened_at -= 10  # Open time elapsed
+
+    assert breaker.acquire() is True
+    assert breaker.state == CircuitState.HALF_OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.acquire()  # Only one probe at a time
+
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.open_seconds == 15  # Doubled, capped
+
+    breaker.opened_at -= 15
+    assert breaker.acquire() is True
+    breaker.release()  # Probe ended without an outcome
+    assert breaker.acquire() is True
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.open_seconds == 10
+
+
+def test_retry_backoff_and_budget():
+    """Test jittered exponential backoff bounds and the retry budget"""
+    policy = RetryPolicy(base_delay_seconds=1.0, max_delay_seconds=3.0, budget_ratio=0.5, initial_tokens=1.0)
+    for attempt, cap in ((0, 1.0), (1, 2.0), (5, 3.0)):
+        for _ in range(20):
+            assert 0 <= policy.backoff(attempt) <= cap
+
+    assert policy.try_acquire()
+    assert not policy.try_acquire()
+    policy.on_request()
+    policy.on_request()
+    assert policy.try_acquire()
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast_without_requests(monkeypatch):
+    """Test that the client stops calling a server once its circuit is open"""
+    breakers = CircuitBreakerRegistry(
+        failure_threshold=2,
+        open_seconds=60,
+        retry_policy=RetryPolicy(max_attempts=3, base_delay_seconds=0.0, initial_tokens=100.0),
+    )
+    monkeypatch.setattr("app.core.ollama_client.get_circuit_breakers", lambda: breakers)
+
+    calls = []
+
+    async def failing_post_chat(self, request_client, instance, payload, timeout):
+        calls.append(instance.url)
+        raise httpx.ConnectError("connection refused")
+
+    async def available(self, instance):
+        return True
+
+    monkeypatch.setattr(OllamaClient, "_post_chat", failing_post_chat)
+    monkeypatch.setattr(OllamaClient, "_is_available", available)
+
+    client = OllamaClient()
+    instance = OllamaInstanceConfig(url="http://cb-down:11434/v1", model="m")
+    kwargs = dict(
+        model_to_use="m",
+        task_type=TaskType.GENERAL_CHAT,
+        messages=[{"role": "user", "content": "hi"}],
+        options={},
+        cache_key="k",
+        use_cache=False,
+        stream=False,
+        prompt_length=2,
+    )
+
+    with pytest.raises(OllamaError):
+        await client._send_admitted(instance, **kwargs)
+    # The second failure opened the circuit, so the third attempt was not made
+    assert len(calls) == 2
+    assert breakers.get(instance.url).state == CircuitState.OPEN
+
+    with pytest.raises(OllamaError, match="Circuit open"):
+        await client._send_admitted(instance, **kwargs)
+    assert len(calls) == 2
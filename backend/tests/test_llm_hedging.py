@@ -0,0 +1,137 @@
+"""
+Tests for hedged LLM requests
+"""
+import asyncio
+
+import pytest
+from app.core.config import OllamaInstanceConfig
+from app.core.llm_hedging import HedgePolicy
+from app.core.ollama_client import OllamaClient, OllamaResponse, TaskType
+from app.core.ollama_server_state import OllamaServerStateRegistry
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Fresh server state registry, so test servers do not leak into other tests"""
+    registry = OllamaServerStateRegistry()
+    monkeypatch.setattr("app.core.ollama_client.get_server_state_registry", lambda: registry)
+    return registry
+
+
+def test_hedge_delay_from_percentile():
+    """Test percentile delay, minimum samples and minimum delay"""
+    policy = HedgePolicy(enabled=True, percentile=0.9, min_samples=10, min_delay_seconds=0.5)
+    for i in range(9):
+        policy.observe("planning", float(i + 1))
+    assert policy.hedge_delay("planning") is None  # Not enough samples
+
+    policy.observe("planning", 10.0)
+    assert policy.hedge_delay("planning") == 9.0
+    assert policy.hedge_delay("code_generation") is None
+
+    for _ in range(10):
+        policy.observe("fast", 0.01)
+    assert policy.hedge_delay("fast") == 0.5
+
+    policy.enabled = False
+    assert policy.hedge_delay("planning") is None
+
+
+def test_hedge_budget():
+    """Test that requests earn hedge tokens and hedges spend them"""
+    policy = HedgePolicy(enabled=True, budget_ratio=0.5, max_tokens=1.0)
+    assert policy.try_acquire()
+    assert not policy.try_acquire()
+
+    policy.on_request()
+    assert not policy.try_acquire()
+    policy.on_request()
+    assert policy.try_acquire()
+
+
+@pytest.mark.asyncio
+async def test_secondary_wins_and_primary_is_cancelled(monkeypatch, registry):
+    """Test that a hedged request returns the faster response and cancels the slower one"""
+    primary_url, secondary_url = "http://hedge-primary:11434", "http://hedge-secondary:11434"
+    for url in (primary_url, secondary_url):
+        registry.record_health(url, True)
+        registry.set_available_models(url, ["hedge-model"])
+
+    policy = HedgePolicy(enabled=True, budget_ratio=1.0)
+    monkeypatch.setattr("app.core.ollama_client.get_hedge_policy", lambda: policy)
+
+    primary_cancelled = asyncio.Event()
+
+    async def send(instance):
+        if instance.url.startswith(primary_url):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                primary_cancelled.set()
+                raise
+        return OllamaResponse(model="hedge-model", response=instance.url, done=True)
+
+    client = OllamaClient()
+    primary = OllamaInstanceConfig(url=f"{primary_url}/v1", model="hedge-model")
+    response = await client._send_hedged(send, primary, "hedge-model", delay=0.01)
+
+    assert response.response == f"{secondary_url}/v1"
+    await asyncio.wait_for(primary_cancelled.wait(), timeout=1)
+    assert policy.outcomes == {"fired": 1, "hedge_won": 1}
+
+
+@pytest.mark.asyncio
+async def test_no_hedge_without_secondary_or_budget(monkeypatch, registry):
+    """Test that the primary is awaited when hedging is not possible"""
+    policy = HedgePolicy(enabled=True, budget_ratio=0.0, max_tokens=0.0)
+    monkeypatch.setattr("app.core.ollama_client.get_hedge_policy", lambda: policy)
+
+    async def send(instance):
+        await asyncio.sleep(0.05)
+        return OllamaResponse(model="m", response=instance.url, done=True)
+
+    client = OllamaClient()
+    lonely = OllamaInstanceConfig(url="http://hedge-lonely:11434/v1", model="lonely-model")
+    response = await client._send_hedged(send, lonely, "lonely-model", delay=0.01)
+    assert response.response == lonely.url
+    assert policy.outcomes == {"no_secondary": 1}
+
+    registry.record_health("http://hedge-spare:11434", True)
+    registry.set_available_models("http://hedge-spare:11434", ["lonely-model"])
+    response = await client._send_hedged(send, lonely, "lonely-model", delay=0.01)
+    assert response.response == lonely.url
+    assert policy.outcomes == {"no_secondary": 1, "budget_exhausted": 1}
+
+
+@pytest.mark.asyncio
+async def test_pinned_requests_are_not_hedged(monkeypatch):
+    """Test that requests for an explicit or dynamic server are never hedged"""
+    policy = HedgePolicy(enabled=True, min_samples=1, min_delay_seconds=0.01)
+    policy.observe("general_chat", 0.01)
+    monkeypatch.setattr("app.core.ollama_client.get_hedge_policy", lambda: policy)
+
+    client = OllamaClient()
+    hedged = []
+
+    async def is_available(instance):
+        return True
+
+    async def send_admitted(instance, **kwargs):
+        return OllamaResponse(model="m", response=instance.url, done=True)
+
+    async def send_hedged(*args, **kwargs):
+        hedged.append(args)
+
+    monkeypatch.setattr(client, "_is_available", is_available)
+    monkeypatch.setattr(client, "_send_admitted", send_admitted)
+    monkeypatch.setattr(client, "_send_hedged", send_hedged)
+
+    instance = OllamaInstanceConfig(url="http://hedge-pinned:11434/v1", model="m")
+    for server_url, is_dynamic in ((instance.url, False), (None, True)):
+        response = await client._generate_uncached(
+            instance=instance, model_to_use="m", task_type=TaskType.GENERAL_CHAT, messages=[],
+            options={}, cache_key="", use_cache=False, stream=False, server_url=server_url,
+            is_dynamic_instance=is_dynamic, prompt_length=0,
+        )
+        assert response.response == instance.url
+    assert hedged == []
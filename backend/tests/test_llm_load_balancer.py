@@ -0,0 +1,66 @@
+"""
+Tests for latency-aware load balancing across Ollama servers
+"""
+from app.core.config import OllamaInstanceConfig
+from app.core.llm_load_balancer import (LLMLoadBalancer, get_load_balancer,
+                                        record_request_duration)
+from app.core.ollama_client import OllamaClient, TaskType
+from app.core.ollama_server_state import get_server_state_registry
+
+
+def test_ewma_latency_per_model_and_server():
+    """Test EWMA update and fallback from model to server to default latency"""
+    balancer = LLMLoadBalancer(alpha=0.5, default_latency_seconds=7.0)
+    balancer.observe("http://a:11434/v1", "m1", 2.0)
+    balancer.observe("http://a:11434", "m1", 4.0)
+
+    assert balancer.expected_latency("http://a:11434", "m1") == 3.0
+    assert balancer.expected_latency("http://a:11434", "other") == 3.0  # Server-level EWMA
+    assert balancer.expected_latency("http://b:11434", "m1") == 7.0
+
+
+def test_choose_prefers_faster_and_less_loaded_server():
+    """Test that the lower expected completion time wins"""
+    balancer = LLMLoadBalancer(alpha=1.0)
+    servers = ["http://fast:11434", "http://slow:11434"]
+    balancer.observe(servers[0], "m", 1.0)
+    balancer.observe(servers[1], "m", 3.0)
+    assert balancer.choose(servers, lambda s: s, "m") == "http://fast:11434"
+
+    # Three requests in flight on the fast server make it the worse choice (1 * 4 > 3 * 1)
+    with balancer.track(servers[0]), balancer.track(servers[0]), balancer.track(servers[0]):
+        assert balancer.in_flight(servers[0]) == 3
+        assert balancer.choose(servers, lambda s: s, "m") == "http://slow:11434"
+    assert balancer.in_flight(servers[0]) == 0
+
+
+def test_choose_skips_unhealthy_and_penalizes_cold_model():
+    """Test health filtering and the model-not-loaded penalty"""
+    balancer = LLMLoadBalancer(alpha=1.0, cold_start_penalty_seconds=100.0)
+    registry = get_server_state_registry()
+    warm, cold, down = "http://lb-warm:11434", "http://lb-cold:11434", "http://lb-down:11434"
+    for url, healthy, loaded in ((warm, True, {"m": {}}), (cold, True, {}), (down, False, {"m": {}})):
+        registry.record_health(url, healthy)
+        registry.get_state(url).loaded_models = loaded
+    balancer.observe(warm, "m", 5.0)
+    balancer.observe(cold, "m", 1.0)
+    balancer.observe(down, "m", 0.1)
+
+    for _ in range(10):
+        assert balancer.choose([warm, cold, down], lambda s: s, "m") == warm
+
+
+def test_client_balances_replicas_of_same_model():
+    """Test that OllamaClient spreads a task type across servers hosting its model"""
+    client = OllamaClient()
+    client._instances = [
+        OllamaInstanceConfig(url="http://replica-1:11434", model="shared", capabilities=["reasoning"]),
+        OllamaInstanceConfig(url="http://replica-2:11434", model="shared", capabilities=[]),
+        OllamaInstanceConfig(url="http://other:11434", model="different", capabilities=[]),
+    ]
+    record_request_duration("shared", "http://replica-1:11434", "reasoning", 30.0)
+    record_request_duration("shared", "http://replica-2:11434", "reasoning", 0.5)
+    try:
+        assert client.select_model_for_task(TaskType.REASONING).url == "http://replica-2:11434"
+    finally:
+        get_load_balancer()._latency.clear()
@@ -0,0 +1,118 @@
+"""
+Tests for persistent (database-backed) LLM response cache
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from app.core.llm_cache import LLMResponseCache
+from app.core.llm_persistent_cache import (PersistentLLMCache,
+                                           decode_payload, encode_payload)
+from app.core.ollama_client import OllamaClient, TaskType
+from app.models.llm_response_cache import LLMResponseCacheRecord
+
+
+@pytest.fixture
+def persistent_cache(tmp_path):
+    """Persistent cache backed by a temporary SQLite file"""
+    return PersistentLLMCache(
+        enabled=True,
+        database_url=f"sqlite:///{tmp_path / 'llm_cache.db'}",
+        ttl_seconds=3600,
+        max_bytes=1024 * 1024,
+        flush_interval_seconds=0.01,
+    )
+
+
+def test_payload_roundtrip():
+    """Test that payload compression is lossless"""
+    payload = encode_payload("ответ " * 100, "reasoning")
+    assert len(payload) < len(("ответ " * 100).encode("utf-8"))
+    assert decode_payload(payload) == {"response": "ответ " * 100, "reasoning": "reasoning"}
+
+
+def test_accepts_only_deterministic_requests(persistent_cache):
+    """Test that only temperature=0 requests are persisted by default"""
+    assert persistent_cache.accepts({"temperature": 0.0})
+    assert persistent_cache.accepts({"temperature": 0})
+    assert not persistent_cache.accepts({"temperature": 0.3})
+    assert not persistent_cache.accepts({})
+    persistent_cache.enabled = False
+    assert not persistent_cache.accepts({"temperature": 0.0})
+
+
+@pytest.mark.asyncio
+async def test_write_behind_and_read_through(persistent_cache, tmp_path):
+    """Test that queued responses are flushed and readable from another process"""
+    persistent_cache.put("key1", "model", "response", "thinking")
+    # Served from the pending buffer before the flush
+    assert (await persistent_cache.get("key1"))["response"] == "response"
+
+    assert await persistent_cache.flush() == 1
+
+    other = PersistentLLMCache(enabled=True, database_url=persistent_cache.database_url)
+    cached = await other.get("key1")
+    assert cached == {"response": "response", "reasoning": "thinking"}
+    assert await other.get("missing") is None
+    assert other.hits == 1
+    assert other.misses == 1
+
+    await other.close()
+    session = other._get_session()
+    try:
+        assert session.get(LLMResponseCacheRecord, "key1").hit_count == 1
+    finally:
+        session.close()
+
+
+@pytest.mark.asyncio
+async def test_cleanup_expired_and_over_budget(persistent_cache):
+    """Test that cleanup removes expired rows and least recently used rows over budget"""
+    for i in range(3):
+        persistent_cache.put(f"k{i}", "model", f"response {i}")
+    await persistent_cache.flush()
+
+    session = persistent_cache._get_session()
+    try:
+        now = datetime.now(timezone.utc)
+        session.get(LLMResponseCacheRecord, "k0").expires_at = now - timedelta(seconds=1)
+        session.get(LLMResponseCacheRecord, "k1").created_at = now - timedelta(hours=1)
+        session.commit()
+        size_k2 = session.get(LLMResponseCacheRecord, "k2").size_bytes
+    finally:
+        session.close()
+
+    persistent_cache.max_bytes = size_k2
+    assert persistent_cache.cleanup() == 2
+    assert await persistent_cache.get("k0") is None
+    assert await persistent_cache.get("k1") is None
+    assert (await persistent_cache.get("k2"))["response"] == "response 2"
+    await persistent_cache.close()
+
+
+@pytest.mark.asyncio
+async def test_client_reads_through_persistent_cache(persistent_cache):
+    """Test that a deterministic request is served from the persistent tier without an HTTP call"""
+    client = OllamaClient()
+    client.cache = LLMResponseCache(max_entries=10, max_bytes=100_000, ttl_seconds=60)
+    client.persistent_cache = persistent_cache
+
+    model = "test-model"
+    messages = client._build_messages("Analyze task", "system")
+    options = client._build_options(temperature=0.0)
+    key = client._get_request_cache_key(model, messages, options)
+    persistent_cache.put(key, model, "cached plan")
+    await persistent_cache.flush()
+
+    response = await client.generate(
+        prompt="Analyze task",
+        system_prompt="system",
+        task_type=TaskType.PLANNING,
+        model=model,
+        server_url="http://localhost:1",
+        temperature=0.0,
+    )
+    assert response.response == "cached plan"
+    assert response.done
+    # Promoted into the in-memory tier
+    assert client.cache.get(key) == "cached plan"
+    await persistent_cache.close()
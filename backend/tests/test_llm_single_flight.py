@@ -0,0 +1,134 @@
+"""
+Tests for single-flight coalescing of identical in-flight LLM requests
+"""
+import asyncio
+
+import pytest
+from app.core.llm_cache import LLMResponseCache
+from app.core.llm_single_flight import LLMSingleFlight
+from app.core.ollama_client import OllamaClient, OllamaResponse
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_share_one_request():
+    """Test that concurrent callers with the same key await the leader's result"""
+    flight = LLMSingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def request():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "result"
+
+    tasks = [asyncio.create_task(flight.run("key", request)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*tasks) == ["result"] * 5
+    assert calls == 1
+    assert flight.absorbed["generate"] == 4
+    assert flight.get_stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_leader_error_propagates_and_is_not_remembered():
+    """Test that followers receive the leader's error and the next call runs again"""
+    flight = LLMSingleFlight()
+    release = asyncio.Event()
+
+    async def failing():
+        await release.wait()
+        raise ValueError("boom")
+
+    tasks = [asyncio.create_task(flight.run("key", failing)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert all(isinstance(r, ValueError) for r in results)
+
+    async def succeeding():
+        return "ok"
+
+    assert await flight.run("key", succeeding) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_hands_over_to_follower():
+    """Test that a follower re-runs the request when the leader is cancelled"""
+    flight = LLMSingleFlight()
+    calls = 0
+
+    async def request():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await asyncio.sleep(10)
+        return "second"
+
+    leader = asyncio.create_task(flight.run("key", request))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.run("key", request))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == "second"
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_followers_replay_all_chunks():
+    """Test that a follower joining mid-stream receives every chunk"""
+    flight = LLMSingleFlight()
+    calls = 0
+    gate = asyncio.Event()
+
+    async def stream():
+        nonlocal calls
+        calls += 1
+        yield "a"
+        await gate.wait()
+        yield "b"
+        yield "c"
+
+    async def consume():
+        return [chunk async for chunk in flight.stream("key", stream)]
+
+    leader = asyncio.create_task(consume())
+    await asyncio.sleep(0.01)
+    follower = asyncio.create_task(consume())
+    await asyncio.sleep(0.01)
+    gate.set()
+
+    assert await leader == ["a", "b", "c"]
+    assert await follower == ["a", "b", "c"]
+    assert calls == 1
+    assert flight.absorbed["stream"] == 1
+
+
+@pytest.mark.asyncio
+async def test_client_coalesces_identical_generate_calls(monkeypatch):
+    """Test that OllamaClient.generate sends identical concurrent requests once"""
+    client = OllamaClient()
+    client.cache = LLMResponseCache(max_entries=10, max_bytes=100_000, ttl_seconds=60, enabled=False)
+    client.single_flight = LLMSingleFlight()
+    calls = 0
+
+    async def fake_generate_uncached(**kwargs):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return OllamaResponse(model=kwargs["model_to_use"], response="shared", done=True)
+
+    monkeypatch.setattr(client, "_generate_uncached", fake_generate_uncached)
+
+    responses = await asyncio.gather(*(
+        client.generate(prompt="same", model="m", server_url="http://localhost:1")
+        for _ in range(3)
+    ))
+
+    assert [r.response for r in responses] == ["shared"] * 3
+    assert len({id(r) for r in responses}) == 3  # Each caller gets its own copy
+    assert calls == 1
+    assert client.single_flight.absorbed["generate"] == 2
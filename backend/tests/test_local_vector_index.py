@@ -0,0 +1,72 @@
+"""
+Tests for in-process vector index
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.core.local_vector_index import (LocalVectorIndex,
+                                         LocalVectorIndexRegistry,
+                                         memory_namespace)
+
+
+def test_search_top_k_and_threshold():
+    """Test top-k by cosine similarity with threshold"""
+    index = LocalVectorIndex(2, capacity=1)
+    index.add("a", [1.0, 0.0])
+    index.add("b", [0.0, 2.0])
+    index.add("c", [1.0, 1.0])
+    index.add("zero", [0.0, 0.0])  # not indexed
+
+    assert len(index) == 3
+    results = index.search([2.0, 0.1], k=2)
+    assert [item_id for item_id, _ in results] == ["a", "c"]
+    assert results[0][1] == pytest.approx(0.9988, abs=1e-3)
+    assert [item_id for item_id, _ in index.search([1.0, 0.0], k=5, threshold=0.5)] == ["a", "c"]
+    assert index.search([1.0, 0.0, 0.0], k=1) == []
+
+
+def test_add_replace_and_remove():
+    """Test incremental updates keep ids and rows aligned"""
+    index = LocalVectorIndex(2)
+    index.add("a", [1.0, 0.0])
+    index.add("b", [0.0, 1.0])
+    index.add("c", [-1.0, 0.0])
+    index.add("a", [0.0, -1.0])  # replaced in place
+
+    assert index.remove("a")
+    assert not index.remove("a")
+    assert "a" not in index and len(index) == 2
+    assert index.search([-1.0, 0.0], k=1)[0][0] == "c"
+    assert index.search([0.0, 1.0], k=1)[0][0] == "b"
+
+
+def test_registry_namespaces_and_models():
+    """Test indexes are separated by namespace, model and dimension"""
+    registry = LocalVectorIndexRegistry()
+    namespace = memory_namespace("agent-1")
+    registry.add(namespace, "m", "a", [1.0, 0.0])
+    registry.add(namespace, "m", "b", [1.0, 0.0, 0.0])
+    registry.add(namespace, "other", "c", [1.0, 0.0])
+    registry.add(memory_namespace("agent-2"), "m", "d", [1.0, 0.0])
+
+    assert [item_id for item_id, _ in registry.search(namespace, "m", [1.0, 0.0], 10)] == ["a"]
+    registry.remove(namespace, ["a", "b", "c"])
+    assert registry.search(namespace, "m", [1.0, 0.0], 10) == []
+    assert registry.get_stats()["vectors"] == 1
+
+
+def test_snapshot_roundtrip(tmp_path):
+    """Test indexes survive a snapshot and restore"""
+    path = str(tmp_path / "index" / "vectors.npz")
+    registry = LocalVectorIndexRegistry(snapshot_path=path)
+    registry.add("plan_templates", "m", "a", [1.0, 0.0])
+    registry.add("plan_templates", "m", "b", [0.0, 1.0])
+    assert registry.save_snapshot()
+
+    restored = LocalVectorIndexRegistry(snapshot_path=path)
+    assert restored.load_snapshot()
+    assert restored.search("plan_templates", "m", [0.0, 1.0], 1)[0][0] == "b"
+    # Namespaces are still refreshed from the database after a restore
+    assert not restored.is_loaded("plan_templates")
+    assert not LocalVectorIndexRegistry().load_snapshot(str(tmp_path / "missing.npz"))
@@ -55,7 +55,8 @@ async def test_search_memories_vector_with_embeddings(memory_service, db):
         mock_embed.return_value = [0.1] * 1536
         
         # Mock database query result
-        with patch.object(db, 'execute') as mock_execute:
+        with patch.object(db, 'execute') as mock_execute, \
+                patch("app.services.memory_service.vector_search_available", return_value=True):
             # Mock empty result
             mock_result = Mock()
             mock_result.fetchall.return_value = []
@@ -64,10 +65,17 @@ async def test_search_memories_vector_with_embeddings(memory_service, db):
             results = await memory_service.search_memories_vector(
                 agent_id=agent_id,
                 query_text="test query",
-                similarity_threshold=0.7
+                similarity_threshold=0.7,
+                combine_with_text_search=False
             )
             
-            assert isinstance(results, list)
+            assert results == []
+            # One bound-parameter query: rows, similarity and threshold in SQL
+            assert mock_execute.call_count == 1
+            statement, params = mock_execute.call_args.args
+            compiled = str(statement.compile())
+            assert "<=>" in compiled and "similarity" in compiled
+            assert params == {"query_embedding": "[" + ",".join(["0.1"] * 1536) + "]"}
 
 
 @pytest.mark.asyncio
@@ -97,7 +105,8 @@ async def test_search_memories_vector_filters(memory_service):
     with patch.object(memory_service.embedding_service, 'generate_embedding', new_callable=AsyncMock) as mock_embed:
         mock_embed.return_value = [0.1] * 1536
         
-        with patch.object(memory_service.db, 'execute') as mock_execute:
+        with patch.object(memory_service.db, 'execute') as mock_execute, \
+                patch("app.services.memory_service.vector_search_available", return_value=True):
             mock_result = Mock()
             mock_result.fetchall.return_value = []
             mock_execute.return_value = mock_result
@@ -112,3 +121,34 @@ async def test_search_memories_vector_filters(memory_service):
             
             assert isinstance(results, list)
 
+
+
+@pytest.mark.asyncio
+async def test_search_memories_hybrid_one_statement(memory_service):
+    """Test that vector and full-text candidates are fused by rank in one statement"""
+    agent_id = uuid4()
+    
+    with patch.object(memory_service.embedding_service, 'generate_embedding', new_callable=AsyncMock) as mock_embed:
+        mock_embed.return_value = [0.1] * 768
+        
+        with patch.object(memory_service.db, 'execute') as mock_execute, \
+                patch("app.services.memory_service.vector_search_available", return_value=True), \
+                patch("app.services.memory_service.full_text_search_available", return_value=True):
+            mock_result = Mock()
+            mock_result.fetchall.return_value = []
+            mock_execute.return_value = mock_result
+            
+            results = await memory_service.search_memories_vector(
+                agent_id=agent_id,
+                query_text="ошибка подключения",
+                limit=5
+            )
+            
+            assert results == []
+            assert mock_execute.call_count == 1
+            statement, params = mock_execute.call_args.args
+            compiled = str(statement.compile())
+            assert "vector_hits" in compiled and "text_hits" in compiled
+            assert "FULL OUTER JOIN" in compiled
+            assert "search_vector @@" in compiled
+            assert params["query_text"] == "ошибка подключения"
@@ -1,6 +1,8 @@
 """
 Tests for Ollama client
 """
+import asyncio
+
 import pytest
 from app.core.ollama_client import OllamaClient, OllamaError, TaskType
 
@@ -42,3 +44,229 @@ async def test_health_check(ollama_client):
         # Should return True if instance is available
         assert isinstance(health, bool)
 
+
+
+@pytest.mark.asyncio
+async def test_transport_pool_reuses_client_per_server():
+    """Test that one pooled client is shared per server"""
+    from app.core.ollama_transport import OllamaTransportPool
+
+    pool = OllamaTransportPool()
+    client1 = pool.get_client("http://localhost:11434/v1")
+    client2 = pool.get_client("http://localhost:11434")
+    client3 = pool.get_client("http://localhost:11435")
+
+    assert client1 is client2
+    assert client1 is not client3
+    assert str(client1.base_url).rstrip("/") == "http://localhost:11434"
+
+    await pool.close()
+    assert client1.is_closed
+    # Closed client is rebuilt transparently
+    client4 = pool.get_client("http://localhost:11434")
+    assert client4 is not client1
+    assert not client4.is_closed
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_transport_pool_keeps_clients_per_event_loop(monkeypatch):
+    """Test that another loop gets its own client and clients of closed loops are released"""
+    import threading
+
+    from app.core import ollama_transport
+    from app.core.ollama_transport import OllamaTransportPool
+
+    pool = OllamaTransportPool()
+    main_client = pool.get_client("http://localhost:11434")
+
+    other_clients = []
+
+    async def use_pool():
+        other_clients.append(pool.get_client("http://localhost:11434"))
+        other_clients.append(pool.get_client("http://localhost:11434"))
+
+    thread = threading.Thread(target=lambda: asyncio.run(use_pool()))
+    thread.start()
+    thread.join()
+
+    assert other_clients[0] is other_clients[1]
+    assert other_clients[0] is not main_client
+    assert pool.get_client("http://localhost:11434") is main_client  # Not replaced
+    assert pool.get_stats()["servers"] == ["http://localhost:11434"]
+
+    released = []
+    monkeypatch.setattr(ollama_transport, "_close_sockets", released.append)
+    pool.get_client("http://localhost:11435")  # New client: releases clients of closed loops
+    assert released == [other_clients[0]]
+    assert pool.get_stats()["clients"] == 2
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_client_uses_shared_transport(ollama_client):
+    """Test that separate OllamaClient objects share transports"""
+    from app.core.ollama_transport import get_transport_pool
+
+    other = OllamaClient()
+    instance = ollama_client.instances[0]
+    assert await ollama_client._get_client(instance) is await other._get_client(instance)
+    assert await ollama_client._get_client(instance) is get_transport_pool().get_client(instance.url)
+
+    # Closing one client leaves the shared connections of the others open
+    shared = await other._get_client(instance)
+    await ollama_client.close()
+    assert not shared.is_closed
+    assert await other._get_client(instance) is shared
+
+
+@pytest.mark.asyncio
+async def test_server_state_registry_suspect_forces_probe():
+    """Test that cached server state is used until a request marks it suspect"""
+    from unittest.mock import AsyncMock
+
+    from app.core.ollama_server_state import OllamaServerStateRegistry
+
+    registry = OllamaServerStateRegistry()
+    registry.record_health("http://localhost:11434/v1", True)
+    assert registry.is_healthy("http://localhost:11434") is True
+
+    registry.refresh_server = AsyncMock()
+    assert await registry.ensure_healthy("http://localhost:11434") is True
+    registry.refresh_server.assert_not_called()
+
+    registry.mark_suspect("http://localhost:11434", "timeout")
+    assert registry.is_healthy("http://localhost:11434") is None
+    await registry.ensure_healthy("http://localhost:11434")
+    registry.refresh_server.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_server_state_registry_shares_inline_probe():
+    """Test that concurrent requests to an unknown server wait on one probe"""
+    import asyncio
+
+    from app.core.ollama_server_state import (OllamaServerStateRegistry,
+                                              ServerState)
+
+    registry = OllamaServerStateRegistry()
+    probes = []
+
+    async def refresh_server(server_url):
+        probes.append(server_url)
+        await asyncio.sleep(0.01)
+        registry.record_health(server_url, True)
+        return ServerState(url=server_url, healthy=True)
+
+    registry.refresh_server = refresh_server
+    results = await asyncio.gather(*(registry.ensure_healthy("http://probe-test:11434/v1") for _ in range(10)))
+    assert results == [True] * 10
+    assert probes == ["http://probe-test:11434"]
+    assert registry._probes == {}
+
+
+@pytest.mark.asyncio
+async def test_server_state_registry_discovers_database_servers_off_loop(monkeypatch):
+    """Test that database servers are loaded in a worker thread"""
+    import threading
+
+    from app.core.ollama_server_state import OllamaServerStateRegistry
+
+    main_thread = threading.get_ident()
+    threads = []
+
+    def load_database_servers():
+        threads.append(threading.get_ident())
+        return [("http://db-server:11434/v1", 3)]
+
+    registry = OllamaServerStateRegistry()
+    monkeypatch.setattr(registry, "_load_database_servers", load_database_servers)
+    await registry._discover_servers()
+
+    assert threads and threads[0] != main_thread
+    assert registry.get_state("http://db-server:11434").max_concurrent == 3
+
+
+def test_server_state_registry_model_index():
+    """Test model -> server lookup and its invalidation"""
+    from app.core.ollama_server_state import OllamaServerStateRegistry
+
+    registry = OllamaServerStateRegistry()
+    registry.set_available_models("http://a:11434/v1", ["nomic-embed-text:latest", "qwen3:8b"])
+    registry.set_available_models("http://b:11434", ["nomic-embed-text:latest"])
+
+    assert registry.servers_with_model("nomic-embed-text") == ["http://a:11434", "http://b:11434"]
+    assert registry.servers_with_model("qwen3:8b") == ["http://a:11434"]
+    assert registry.servers_with_model("missing") == []
+
+    registry.mark_suspect("http://a:11434", "timeout")
+    assert registry.servers_with_model("nomic-embed-text") == ["http://b:11434"]
+    registry.mark_success("http://a:11434")
+    registry.unregister_server("http://b:11434")
+    assert registry.servers_with_model("nomic-embed-text") == ["http://a:11434"]
+
+
+@pytest.mark.asyncio
+async def test_server_state_registry_refresh_reads_loaded_models():
+    """Test that refresh stores health and loaded models with VRAM residency"""
+    import httpx
+
+    from app.core.ollama_server_state import OllamaServerStateRegistry
+    from app.core.ollama_transport import get_transport_pool
+
+    def handler(request):
+        if request.url.path == "/api/tags":
+            return httpx.Response(200, json={"models": [{"name": "m1"}, {"name": "m2"}]})
+        return httpx.Response(200, json={"models": [{"name": "m1", "size": 10, "size_vram": 8}]})
+
+    url = "http://state-test:11434"
+    pool = get_transport_pool()
+    pool._clients[(url, asyncio.get_running_loop())] = httpx.AsyncClient(base_url=url, transport=httpx.MockTransport(handler))
+    try:
+        registry = OllamaServerStateRegistry()
+        state = await registry.refresh_server(url + "/v1")
+        assert state.healthy is True
+        assert state.available_models == ["m1", "m2"]
+        assert state.loaded_models["m1"]["size_vram"] == 8
+        assert registry.is_model_loaded(url, "m1") is True
+        assert registry.is_model_loaded(url, "m2") is False
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_chat_endpoint_is_memoized_per_server():
+    """Test that the working chat endpoint is probed once and then reused"""
+    import httpx
+
+    from app.core.ollama_server_state import get_server_state_registry
+    from app.core.ollama_transport import get_transport_pool
+
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        if request.url.path == "/api/generate":
+            return httpx.Response(200, json={"model": "m", "response": "hello", "done": True})
+        return httpx.Response(404, json={"error": "not found"})
+
+    url = "http://endpoint-test:11434"
+    pool = get_transport_pool()
+    client = OllamaClient()
+    instance = client._create_dynamic_instance(url, "m")
+    pool._clients[(url, asyncio.get_running_loop())] = httpx.AsyncClient(base_url=url, transport=httpx.MockTransport(handler))
+    payload = {"model": "m", "messages": [{"role": "user", "content": "hi"}], "stream": False, "options": {}}
+    try:
+        http_client = await client._get_client(instance)
+        response, endpoint = await client._post_chat(http_client, instance, payload, 5.0)
+        assert endpoint == "/api/generate"
+        assert client._extract_content(response.json()) == "hello"
+        assert calls == ["/api/chat", "/api/generate"]
+        assert get_server_state_registry().get_chat_endpoint(url) == "/api/generate"
+
+        calls.clear()
+        await client._post_chat(http_client, instance, payload, 5.0)
+        assert calls == ["/api/generate"]
+    finally:
+        get_server_state_registry().set_chat_endpoint(url, None)
+        await pool.close()
@@ -0,0 +1,69 @@
+"""
+Tests for partition maintenance of time-partitioned tables
+"""
+from datetime import datetime
+
+from app.services.partition_maintenance import (Partition,
+                                                expired_partitions,
+                                                missing_partition_ranges,
+                                                parse_partition, period_start)
+
+
+def test_parse_partition_bounds():
+    """Test range, MINVALUE and DEFAULT bounds are parsed to naive UTC"""
+    partition = parse_partition(
+        "request_logs_p20261012",
+        "FOR VALUES FROM ('2026-10-12 00:00:00+00') TO ('2026-10-19 03:00:00+03')",
+    )
+    assert partition.lower == datetime(2026, 10, 12)
+    assert partition.upper == datetime(2026, 10, 19)
+    assert not partition.is_default
+
+    legacy = parse_partition("request_logs_legacy", "FOR VALUES FROM (MINVALUE) TO ('2026-10-12 00:00:00')")
+    assert legacy.lower is None
+    assert legacy.upper == datetime(2026, 10, 12)
+
+    assert parse_partition("request_logs_default", "DEFAULT").is_default
+
+
+def test_period_start():
+    """Test periods start at midnight and on Monday for weeks"""
+    moment = datetime(2026, 10, 16, 13, 45)  # Friday
+    assert period_start(moment, "day") == datetime(2026, 10, 16)
+    assert period_start(moment, "week") == datetime(2026, 10, 12)
+
+
+def test_missing_partition_ranges_fills_up_to_premake():
+    """Test ranges continue from the newest partition, including gaps"""
+    partitions = [
+        Partition("execution_traces_legacy", None, datetime(2026, 9, 28)),
+        Partition("execution_traces_p20260928", datetime(2026, 9, 28), datetime(2026, 10, 5)),
+        Partition("execution_traces_default", None, None, is_default=True),
+    ]
+    ranges = missing_partition_ranges(partitions, datetime(2026, 10, 16, 12), "week", premake=2)
+    assert ranges[0] == (datetime(2026, 10, 5), datetime(2026, 10, 12))
+    assert ranges[-1] == (datetime(2026, 10, 26), datetime(2026, 11, 2))
+    assert len(ranges) == 4
+
+    # Nothing to do once covered
+    covered = partitions + [Partition("p", datetime(2026, 10, 5), datetime(2026, 11, 2))]
+    assert missing_partition_ranges(covered, datetime(2026, 10, 16, 12), "week", premake=2) == []
+
+
+def test_missing_partition_ranges_switch_to_daily():
+    """Test daily partitions continue after weekly ones"""
+    partitions = [Partition("workflow_events_p20261012", datetime(2026, 10, 12), datetime(2026, 10, 19))]
+    ranges = missing_partition_ranges(partitions, datetime(2026, 10, 18), "day", premake=1)
+    assert ranges == [(datetime(2026, 10, 19), datetime(2026, 10, 20))]
+
+
+def test_expired_partitions():
+    """Test only range partitions entirely before the cutoff expire"""
+    partitions = [
+        Partition("request_logs_legacy", None, datetime(2026, 9, 14)),
+        Partition("request_logs_p20260914", datetime(2026, 9, 14), datetime(2026, 9, 21)),
+        Partition("request_logs_p20260921", datetime(2026, 9, 21), datetime(2026, 9, 28)),
+        Partition("request_logs_default", None, None, is_default=True),
+    ]
+    expired = expired_partitions(partitions, datetime(2026, 9, 25))
+    assert [partition.name for partition in expired] == ["request_logs_legacy", "request_logs_p20260914"]
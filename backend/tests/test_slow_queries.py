@@ -0,0 +1,111 @@
+"""
+Tests for slow query recorder
+"""
+import uuid
+from unittest.mock import MagicMock, patch
+
+from app.core.slow_queries import (SlowQueryRecorder, _to_pyformat,
+                                   analyze_safe, explainable, normalize_sql,
+                                   parameter_shape)
+
+
+def test_normalize_sql():
+    """Test literals and placeholders are replaced and IN lists collapsed"""
+    statement = (
+        "SELECT t.id FROM tasks t\n  WHERE t.status = 'pending' AND t.priority > 5 "
+        "AND t.id IN (%(id_1_1)s, %(id_1_2)s, %(id_1_3)s) AND t.x = $1 LIMIT 10"
+    )
+    assert normalize_sql(statement) == (
+        "SELECT t.id FROM tasks t WHERE t.status = ? AND t.priority > ? AND t.id IN (?) AND t.x = ? LIMIT ?"
+    )
+    assert normalize_sql("SELECT 'it''s' FROM plans_v2") == "SELECT ? FROM plans_v2"
+
+
+def test_parameter_shape_and_explainable():
+    """Test only parameter names and types are kept; only reads are explained"""
+    assert parameter_shape({"id": uuid.uuid4(), "limit": 5}) == {"id": "UUID", "limit": "int"}
+    assert parameter_shape([{"a": 1}, {"a": 2}], executemany=True) == {"rows": 2, "row": {"a": "int"}}
+    assert explainable("  select * from tasks")
+    assert explainable("WITH x AS (SELECT 1) SELECT * FROM x")
+    assert not explainable("WITH d AS (DELETE FROM tasks RETURNING id) SELECT * FROM d")
+    assert not explainable("SELECT * FROM tasks FOR UPDATE")
+    assert not explainable("UPDATE tasks SET status = 'x'")
+    assert analyze_safe("SELECT * FROM tasks WHERE id = %(id)s")
+    assert not analyze_safe("SELECT nextval('tasks_id_seq')")
+    assert not analyze_safe("SELECT pg_advisory_lock(42), * FROM tasks")
+    assert not analyze_safe("SELECT set_config('app.user', 'x', false)")
+
+
+def test_asyncpg_statements_are_converted_for_psycopg2():
+    """Test $n placeholders become named pyformat parameters"""
+    value = uuid.uuid4()
+    statement, params = _to_pyformat("SELECT * FROM t WHERE a = $1 AND b LIKE '%x' AND c = $1 AND d = $2", (value, 3))
+    assert statement == "SELECT * FROM t WHERE a = %(p1)s AND b LIKE '%%x' AND c = %(p1)s AND d = %(p2)s"
+    assert params == {"p1": str(value), "p2": 3}
+
+
+def test_record_aggregates_and_reports_caller():
+    """Test slow executions are grouped by normalized SQL with caller and stats"""
+    recorder = SlowQueryRecorder(explain_sample_rate=0.0, max_statements=2)
+    recorder.record("SELECT * FROM tasks WHERE id = 1", None, 0.6, "select", "tasks")
+    recorder.record("SELECT * FROM tasks WHERE id = 2", None, 1.2, "select", "tasks")
+    recorder.record("SELECT * FROM plans", None, 0.7, "select", "plans")
+
+    top = recorder.get_statements()[0]
+    assert top["sql"] == "SELECT * FROM tasks WHERE id = ?"
+    assert top["count"] == 2
+    assert top["max_ms"] == 1200.0
+    assert top["avg_ms"] == 900.0
+    assert top["callers"] == {}  # test frames are not application code
+    assert recorder.get_recent(limit=1)[0]["sql"] == "SELECT * FROM plans"
+
+    recorder.record("SELECT * FROM agents", None, 0.7, "select", "agents")
+    assert len(recorder.get_statements()) == 2  # oldest evicted
+
+
+def test_caller_is_first_application_frame():
+    """Test the calling service is taken from the stack"""
+    recorder = SlowQueryRecorder(explain_sample_rate=0.0)
+    namespace = {"__name__": "app.services.fake_service", "recorder": recorder}
+    exec(
+        "def load_tasks():\n"
+        "    recorder.record('SELECT * FROM tasks', None, 0.6, 'select', 'tasks')\n",
+        namespace,
+    )
+    namespace["load_tasks"]()
+    assert list(recorder.get_statements()[0]["callers"]) == ["app.services.fake_service:load_tasks:2"]
+
+
+def test_sampled_explain_attaches_plan():
+    """Test EXPLAIN runs on a separate connection and is stored with the statement"""
+    recorder = SlowQueryRecorder(explain_sample_rate=1.0)
+    engine = MagicMock()
+    engine.dialect.name = "postgresql"
+    conn = engine.connect.return_value.__enter__.return_value
+    conn.exec_driver_sql.return_value.scalar.return_value = [{"Plan": {"Node Type": "Seq Scan"}}]
+
+    with patch.object(SlowQueryRecorder, "_submit_explain", lambda self, *args: self._explain(*args)):
+        recorder.record("SELECT * FROM tasks WHERE id = %(id)s", {"id": 1}, 0.8, "select", "tasks", explain_engine=engine)
+        recorder.record("SELECT * FROM tasks WHERE id = %(id)s", {"id": 2}, 0.8, "select", "tasks", explain_engine=engine)
+
+    assert str(conn.execute.call_args_list[0].args[0]) == "SET TRANSACTION READ ONLY"
+    sql, params = conn.exec_driver_sql.call_args[0]
+    assert sql == "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) SELECT * FROM tasks WHERE id = %(id)s"
+    assert params == {"id": 1}
+    assert conn.exec_driver_sql.call_count == 1  # once per statement per interval
+    stats = recorder.get_statements()[0]
+    assert stats["plan"][0]["Plan"]["Node Type"] == "Seq Scan"
+    assert stats["explain_error"] is None
+
+
+def test_side_effect_functions_are_explained_without_analyze():
+    """Test that statements calling side-effecting functions are planned but not executed"""
+    recorder = SlowQueryRecorder(explain_sample_rate=1.0)
+    engine = MagicMock()
+    engine.dialect.name = "postgresql"
+    conn = engine.connect.return_value.__enter__.return_value
+
+    with patch.object(SlowQueryRecorder, "_submit_explain", lambda self, *args: self._explain(*args)):
+        recorder.record("SELECT pg_advisory_lock(1)", None, 0.8, "select", None, explain_engine=engine)
+
+    assert conn.exec_driver_sql.call_args[0][0] == "EXPLAIN (FORMAT JSON) SELECT pg_advisory_lock(1)"
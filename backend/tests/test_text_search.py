@@ -0,0 +1,43 @@
+"""
+Tests for full-text search helpers
+"""
+from unittest.mock import MagicMock
+
+from app.core import text_search
+from app.core.text_search import (full_text_search_available,
+                                  reciprocal_rank_fusion, ts_match)
+from sqlalchemy.dialects import postgresql
+
+
+def test_reciprocal_rank_fusion():
+    """Test that items ranked by both lists come first"""
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "d", "a"]], k=60)
+    assert [item_id for item_id, _ in fused] == ["a", "c", "b", "d"]
+    assert fused[0][1] == 1 / 61 + 1 / 63
+    assert reciprocal_rank_fusion([["a", "b"], []], limit=1) == [("a", 1 / 61)]
+    assert reciprocal_rank_fusion([]) == []
+
+
+def test_ts_match_uses_every_configuration():
+    """Test the query is parsed in Russian and English and matched against the column"""
+    compiled = str(ts_match().compile(dialect=postgresql.dialect()))
+    assert compiled.startswith("agent_memories.search_vector @@ ")
+    assert "websearch_to_tsquery('russian'::regconfig, %(query_text)s)" in compiled
+    assert "websearch_to_tsquery('english'::regconfig, %(query_text)s)" in compiled
+
+
+def test_availability_is_probed_once(monkeypatch):
+    """Test the column probe is cached for PostgreSQL and skipped for other dialects"""
+    monkeypatch.setattr(text_search, "_available", {})
+    db = MagicMock()
+    db.get_bind.return_value.dialect.name = "postgresql"
+    db.execute.return_value.scalar.return_value = True
+
+    assert full_text_search_available(db)
+    assert full_text_search_available(db)
+    assert db.execute.call_count == 1
+
+    sqlite_db = MagicMock()
+    sqlite_db.get_bind.return_value.dialect.name = "sqlite"
+    assert not full_text_search_available(sqlite_db, "plan_templates")
+    assert sqlite_db.execute.call_count == 0
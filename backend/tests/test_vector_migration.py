@@ -42,18 +42,19 @@ def test_embedding_column_exists():
 
 @pytest.mark.skipif(os.environ.get("VECTOR_EXTENSION_AVAILABLE") != "1", reason="pgvector extension not available")
 def test_hnsw_index_exists():
-    """Test that HNSW index exists for vector search"""
+    """Test that a per-dimension partial HNSW index exists for vector search"""
     engine = get_engine()
     with engine.connect() as conn:
         result = conn.execute(text("""
             SELECT indexname, indexdef 
             FROM pg_indexes 
             WHERE tablename = 'agent_memories' 
-            AND indexname = 'idx_agent_memories_embedding_hnsw';
+            AND indexname LIKE 'idx_agent_memories_embedding_%_768_hnsw';
         """))
         row = result.fetchone()
         assert row is not None, "HNSW index should exist"
         assert 'hnsw' in row[1].lower(), "Index should use HNSW method"
+        assert 'embedding_dim = 768' in row[1], "Index should cover one dimension"
 
 
 def test_agent_memory_model_has_embedding():
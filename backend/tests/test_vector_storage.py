@@ -0,0 +1,143 @@
+"""
+Tests for pgvector column helpers
+"""
+from unittest.mock import MagicMock
+
+import pytest
+from app.core import vector_storage
+from app.core.config import get_settings
+from app.core.vector_storage import (apply_search_settings, create_index_sql,
+                                     distance_clause, distance_expression,
+                                     percentile, recall_at_k, save_embeddings,
+                                     vector_literal, vector_search_available)
+from sqlalchemy import column
+from sqlalchemy.dialects import postgresql
+
+
+def test_partial_index_matches_query_expression():
+    """Test that the search expression is the indexed expression of the same dimension"""
+    sql = create_index_sql("agent_memories", 768, vtype="halfvec")
+    assert "((embedding::halfvec(768)) halfvec_cosine_ops)" in sql
+    assert sql.endswith("WHERE embedding_dim = 768")
+    assert distance_expression(768, vtype="halfvec") == (
+        "(embedding::halfvec(768)) <=> CAST(:query_embedding AS halfvec(768))"
+    )
+    assert vector_literal([0.5, 1]) == "[0.5,1.0]"
+    with pytest.raises(ValueError):
+        create_index_sql("users; --", 768)
+
+    clause = distance_clause(column("embedding"), 768, vtype="halfvec")
+    compiled = clause.compile(dialect=postgresql.dialect())
+    assert str(compiled) == (
+        "CAST(embedding AS halfvec(768)) <=> CAST(%(query_embedding)s AS halfvec(768))"
+    )
+
+
+def test_capabilities_are_probed_once(monkeypatch):
+    """Test that the schema/extension probe runs once per table and process"""
+    monkeypatch.setattr(vector_storage, "_capabilities", {})
+    db = MagicMock()
+    db.get_bind.return_value.dialect.name = "postgresql"
+    db.execute.return_value.fetchone.return_value = ("vector", True)
+
+    assert vector_search_available(db, "agent_memories")
+    assert vector_search_available(db, "agent_memories")
+    assert db.execute.call_count == 1
+
+    db.execute.return_value.fetchone.return_value = ("_float8", True)
+    assert not vector_search_available(db, "plan_templates")
+    assert db.execute.call_count == 2
+
+    # Other dialects have no pgvector and are not probed
+    sqlite_db = MagicMock()
+    sqlite_db.get_bind.return_value.dialect.name = "sqlite"
+    assert not vector_search_available(sqlite_db, "plan_templates")
+    assert sqlite_db.execute.call_count == 0
+
+
+def test_save_embeddings_records_model_and_dimension(monkeypatch):
+    """Test one executemany per batch and one index check per new dimension"""
+    monkeypatch.setattr(vector_storage, "_ensured_indexes", set())
+    db = MagicMock()
+    db.execute.return_value.scalar.return_value = True  # Index exists
+
+    save_embeddings(db, "plan_templates", [("a", [1.0] * 3), ("b", [0.0, 1.0, 0.0])], "m")
+    save_embeddings(db, "plan_templates", [("c", [1.0] * 3)], "m")
+
+    assert db.execute.call_count == 3  # Catalog check, then two updates
+    assert "pg_class" in str(db.execute.call_args_list[0].args[0])
+    db.get_bind.return_value.connect.assert_not_called()
+    statement, params = db.execute.call_args_list[1].args
+    assert "embedding_model = :model, embedding_dim = :dim" in str(statement)
+    assert params[1] == {"id": "b", "embedding": "[0.0,1.0,0.0]", "model": "m", "dim": 3}
+
+
+def test_missing_index_is_built_concurrently_in_background(monkeypatch):
+    """Test that a missing index is built off the caller's thread with CONCURRENTLY and a lock timeout"""
+    monkeypatch.setattr(vector_storage, "_ensured_indexes", set())
+    submitted = []
+
+    class Executor:
+        def submit(self, fn, *args):
+            submitted.append((fn, args))
+
+    monkeypatch.setattr(vector_storage, "_index_executor", Executor())
+    db = MagicMock()
+    db.execute.return_value.scalar.return_value = False
+
+    vector_storage.ensure_vector_index(db, "agent_memories", 3)
+    vector_storage.ensure_vector_index(db, "agent_memories", 3)  # Already pending
+    assert len(submitted) == 1
+    db.get_bind.return_value.connect.assert_not_called()
+
+    fn, args = submitted[0]
+    fn(*args)
+    connection = db.get_bind.return_value.connect.return_value.execution_options.return_value.__enter__.return_value
+    statements = [str(call.args[0]) for call in connection.execute.call_args_list]
+    assert statements[0].startswith("SET lock_timeout")
+    assert statements[1].startswith("CREATE INDEX CONCURRENTLY IF NOT EXISTS")
+    assert statements[2] == "RESET lock_timeout"
+    assert len(vector_storage._ensured_indexes) == 1
+    assert not vector_storage._pending_indexes
+
+
+def test_index_methods_and_per_agent_indexes():
+    """Test IVFFlat and per-agent partial index definitions"""
+    agent_id = "5f0c3a52-8c7e-4f1e-9d43-1b2c3d4e5f60"
+    sql = create_index_sql("agent_memories", 1024, vtype="vector", method="ivfflat", agent_id=agent_id, concurrently=True)
+    assert sql.startswith("CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_agent_memories_embedding_vector_1024_ivfflat_agent_")
+    assert "USING ivfflat ((embedding::vector(1024)) vector_cosine_ops) WITH (lists = 100)" in sql
+    assert sql.endswith(f"WHERE embedding_dim = 1024 AND agent_id = '{agent_id}'")
+    with pytest.raises(ValueError):
+        create_index_sql("plan_templates", 768, agent_id=agent_id)
+    with pytest.raises(ValueError):
+        create_index_sql("agent_memories", 768, agent_id="1; DROP TABLE agents")
+
+
+def test_search_settings_in_one_round_trip(monkeypatch):
+    """Test that query-time parameters are set transaction-locally, and not at all by default"""
+    db = MagicMock()
+    apply_search_settings(db)
+    assert db.execute.call_count == 0
+
+    settings = get_settings().model_copy(update={"vector_hnsw_ef_search": 100, "vector_iterative_scan": "relaxed_order"})
+    monkeypatch.setattr(vector_storage, "get_settings", lambda: settings)
+    apply_search_settings(db, probes=5)
+    assert db.execute.call_count == 1
+    statement, params = db.execute.call_args.args
+    assert str(statement).count("set_config(") == 4
+    assert str(statement).count(", true)") == 4
+    assert dict(zip(list(params.values())[::2], list(params.values())[1::2])) == {
+        "hnsw.ef_search": "100",
+        "ivfflat.probes": "5",
+        "hnsw.iterative_scan": "relaxed_order",
+        "ivfflat.iterative_scan": "relaxed_order",
+    }
+
+
+def test_recall_and_percentiles():
+    """Test recall@k and latency percentile helpers of the recall check"""
+    assert recall_at_k([1, 2, 3, 4], [4, 3, 9, 8]) == 0.5
+    assert recall_at_k([], [1]) == 1.0
+    assert percentile([5.0, 1.0, 3.0, 2.0, 4.0], 0.5) == 3.0
+    assert percentile([5.0, 1.0, 3.0, 2.0, 4.0], 0.95) == 5.0